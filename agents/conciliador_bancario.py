@@ -1,5 +1,11 @@
 # agents/conciliador_bancario.py
-from typing import Dict, Any
+import warnings
+from typing import Dict, Any, Iterable, List, Mapping, Optional, Sequence, Union
+from models.conciliacao import ResultadoCompacto, StatusConciliacao
+from .matching import AutomatoParceiros, IndiceTrigramas, MemoriaConciliacoes
+from .matching.criterios import CRITERIOS_PADRAO, CriteriosConciliacao, InstantaneoCriterios, RegistroCriterios
+from .matching.selecao import ContadoresPoda, top_k_candidatos
+from .rastreamento import Rastreador, Rastreio, atributos_entrada
 from .workflow.graph import create_conciliacao_graph
 from .workflow.state import ConciliacaoState
 
@@ -12,22 +18,27 @@ class ConciliadorBancarioAgent:
     e realizar conciliações inteligentes com documentos fiscais.
     """
     
-    def __init__(self):
-        """Inicializa o agente com configurações padrão e workflow LangGraph."""
-        self.criterios_config = {
-            "tolerancia_valor_percentual": 0.05,  # 5%
-            "tolerancia_valor_absoluta": 50.00,   # R$ 50
-            "janela_data_dias": 7,
-            "score_minimo": 0.60,
-            "palavras_irrelevantes": {
-                "ted", "pix", "pgto", "boleto", "doc", "transferencia"
-            }
-        }
+    def __init__(self, registro: Optional[RegistroCriterios] = None):
+        """
+        Inicializa o agente com configurações padrão e workflow LangGraph.
+        
+        Args:
+            registro: Critérios por tenant/conta (recarregado a cada lote se o
+                arquivo mudar); sem registro, todas as transações usam
+                ``criterios_config``
+        """
+        self.criterios_config: CriteriosConciliacao = CRITERIOS_PADRAO
+        self.registro = registro
+        self.rastreador: Optional[Rastreador] = None
+        if registro is not None:
+            registro.definir_base(self.criterios_config)
         
         # Inicializar workflow LangGraph
         self.workflow = create_conciliacao_graph()
     
-    def conciliar(self, estado_global: Dict) -> Dict[str, Any]:
+    def conciliar(
+        self, estado_global: Dict, compacto: bool = False
+    ) -> Union[Dict[str, Any], ResultadoCompacto]:
         """
         Método principal de conciliação compatível com a interface original.
         
@@ -36,69 +47,252 @@ class ConciliadorBancarioAgent:
                 - transacao_bancaria: dados da transação
                 - classificacao_disponivel: classificação única (opcional)
                 - classificacoes_disponiveis: múltiplas classificações (opcional)
+            compacto: Se True, retorna um ResultadoCompacto com apenas os campos
+                essenciais, sem ecoar as entradas; observações sob demanda
+        
+        Returns:
+            Dict com resultado estruturado da conciliação, ou ResultadoCompacto
+        """
+        rastreio = self._iniciar_rastreio("conciliar", estado_global)
+        resultado = self._conciliar(estado_global, compacto, rastreio)
+        self._finalizar_rastreio(rastreio, resultado)
+        return resultado
+    
+    def _conciliar(
+        self, estado_global: Dict, compacto: bool, rastreio: Optional[Rastreio]
+    ) -> Union[Dict[str, Any], ResultadoCompacto]:
+        initial_state = self._criar_estado_inicial(estado_global, self._instantaneo_criterios(), rastreio)
+        
+        try:
+            # Executar o workflow LangGraph
+            final_state = self.workflow.invoke(initial_state)
+            self._aprender(final_state)
+            return self._montar_resultado(estado_global, final_state, compacto)
+            
+        except Exception as e:
+            return self.resultado_erro(estado_global, e, compacto)
+    
+    def conciliar_lote(
+        self, estados: List[Dict], compacto: bool = False
+    ) -> List[Union[Dict[str, Any], ResultadoCompacto]]:
+        """
+        Concilia várias transações em uma única execução do workflow.
+        
+        Reutiliza o grafo já compilado do agente e delega ao ``batch`` do
+        LangGraph, amortizando o custo fixo por chamada em cargas com rajadas.
+        Falhas em um item não afetam os demais.
+        
+        Args:
+            estados: Lista de dicionários no mesmo formato aceito por ``conciliar``
+            compacto: Se True, cada resultado é um ResultadoCompacto
         
         Returns:
-            Dict com resultado estruturado da conciliação
+            Lista de resultados na mesma ordem da entrada
         """
+        if not estados:
+            return []
         
-        # Converter entrada para o estado tipado do LangGraph
-        initial_state = ConciliacaoState(
+        # Um instantâneo por lote: recargas do registro valem a partir do próximo
+        instantaneo = self._instantaneo_criterios()
+        rastreios = [self._iniciar_rastreio("conciliar", estado, lote=True) for estado in estados]
+        estados_iniciais = [
+            self._criar_estado_inicial(estado, instantaneo, rastreio) for estado, rastreio in zip(estados, rastreios)
+        ]
+        finais = self.workflow.batch(estados_iniciais, return_exceptions=True)
+        
+        resultados = []
+        for estado_global, final_state, rastreio in zip(estados, finais, rastreios):
+            if isinstance(final_state, Exception):
+                resultados.append(self.resultado_erro(estado_global, final_state, compacto))
+            else:
+                self._aprender(final_state)
+                resultados.append(self._montar_resultado(estado_global, final_state, compacto))
+            self._finalizar_rastreio(rastreio, resultados[-1])
+        return resultados
+    
+    def conciliar_top_k(
+        self,
+        transacao: Dict[str, Any],
+        documentos: Sequence[Dict[str, Any]],
+        k: int = 5,
+        compacto: bool = False,
+        contadores: Optional[ContadoresPoda] = None
+    ) -> Dict[str, Any]:
+        """
+        Ranqueia os documentos candidatos e concilia contra o melhor.
+        
+        Os documentos são pontuados com o mesmo critério do workflow mantendo
+        apenas os k melhores em um heap limitado (memória O(k) por transação).
+        
+        Args:
+            transacao: Transação bancária
+            documentos: Pool de documentos candidatos (lista ou PoolDocumentos)
+            k: Quantidade de alternativas retornadas
+            compacto: Se True, o veredito é um ResultadoCompacto
+            contadores: Acumula os pares podados por limite superior (opcional)
+        
+        Returns:
+            Dict com ``resultado`` (veredito contra o melhor candidato) e
+            ``candidatos`` (top-k com scores_detalhados, margem e documento)
+        """
+        rastreio = self._iniciar_rastreio("conciliar_top_k", {"transacao_bancaria": transacao})
+        span = rastreio.abrir("top_k_candidatos", {"documentos": len(documentos), "k": k}) if rastreio else None
+        criterios = self._criterios({"transacao_bancaria": transacao}, self._instantaneo_criterios())
+        candidatos = top_k_candidatos(transacao, documentos, criterios, k, contadores=contadores)
+        for candidato in candidatos:
+            candidato["documento"] = documentos[candidato["indice"]]
+        if span is not None:
+            span.atributos["candidatos"] = len(candidatos)
+            rastreio.fechar(span)
+            rastreio.raiz.atributos["candidatos"] = len(candidatos)
+        
+        span = rastreio.abrir("conciliar") if rastreio else None
+        resultado = self._conciliar({
+            "transacao_bancaria": transacao,
+            "classificacao_disponivel": candidatos[0]["documento"] if candidatos else None
+        }, compacto, rastreio)
+        if span is not None:
+            rastreio.fechar(span)
+        self._finalizar_rastreio(rastreio, resultado)
+        return {"resultado": resultado, "candidatos": candidatos}
+    
+    def _instantaneo_criterios(self) -> Optional[InstantaneoCriterios]:
+        """Versão atual do registro, recarregando o arquivo se ele mudou."""
+        if self.registro is None:
+            return None
+        try:
+            self.registro.recarregar_se_alterado()
+        except (OSError, ValueError) as e:
+            warnings.warn(
+                f"Critérios não recarregados; mantida a versão {self.registro.versao}: {e}",
+                RuntimeWarning,
+                stacklevel=3
+            )
+        return self.registro.instantaneo()
+    
+    def _criterios(
+        self, estado_global: Dict, instantaneo: Optional[InstantaneoCriterios]
+    ) -> CriteriosConciliacao:
+        """Critérios da conta/tenant do estado (``tenant`` opcional na entrada)."""
+        if instantaneo is None:
+            return self.criterios_config
+        transacao = estado_global.get("transacao_bancaria") or {}
+        return instantaneo.obter(estado_global.get("tenant"), transacao.get("conta_bancaria"))
+    
+    def _iniciar_rastreio(self, nome: str, estado_global: Dict, lote: bool = False) -> Optional[Rastreio]:
+        if self.rastreador is None:
+            return None
+        rastreio = self.rastreador.iniciar(nome, atributos_entrada(estado_global))
+        if rastreio is not None:
+            rastreio.envelope = lote
+        return rastreio
+    
+    def _finalizar_rastreio(self, rastreio: Optional[Rastreio], resultado: Any) -> None:
+        if rastreio is not None:
+            self.rastreador.finalizar(rastreio, resultado)
+    
+    def _criar_estado_inicial(
+        self,
+        estado_global: Dict,
+        instantaneo: Optional[InstantaneoCriterios] = None,
+        rastreio: Optional[Rastreio] = None
+    ) -> ConciliacaoState:
+        """Converte a entrada para o estado tipado do LangGraph."""
+        return ConciliacaoState(
             transacao_bancaria=estado_global.get("transacao_bancaria", {}),
             classificacao_disponivel=estado_global.get("classificacao_disponivel"),
             classificacoes_disponiveis=estado_global.get("classificacoes_disponiveis", []),
             tipo_transacao=None,
             matching_info=None,
+            retencoes=None,
             validacao=None,
             processamento_especializado=None,
             resultado_final=None,
-            criterios_config=self.criterios_config
+            criterios_config=self._criterios(estado_global, instantaneo),
+            rastreio=rastreio
         )
+    
+    def _aprender(self, final_state: Dict) -> None:
+        """Grava na memória as conciliações automáticas (sem revisão manual) de um documento."""
+        memoria = CriteriosConciliacao.de(final_state.get("criterios_config")).extensoes.get("memoria_conciliacoes")
+        resultado = final_state.get("resultado_final")
+        if (memoria is None or resultado is None or not resultado.conciliado or resultado.needs_human_review
+                or not final_state.get("classificacao_disponivel")):
+            return
+        memoria.registrar(final_state["transacao_bancaria"], final_state["classificacao_disponivel"])
+    
+    def _montar_resultado(
+        self, estado_global: Dict, final_state: Dict, compacto: bool = False
+    ) -> Union[Dict[str, Any], ResultadoCompacto]:
+        """Extrai o resultado final do workflow no formato da interface original."""
+        resultado = final_state.get("resultado_final")
         
-        try:
-            # Executar o workflow LangGraph
-            final_state = self.workflow.invoke(initial_state)
-            
-            # Extrair resultado final
-            resultado = final_state.get("resultado_final")
-            
-            if not resultado:
-                # Fallback em caso de erro
-                resultado = {
-                    "conciliacao_ok": False,
-                    "conciliacao": {
-                        "conciliado": False,
-                        "score_confianca": 0.0,
-                        "status": "Erro_Processamento",
-                        "observacoes": ["Erro interno durante processamento"]
-                    },
-                    "confianca": 0.0,
-                    "needs_human_review": True,
-                    "rule_version": "v1.0"
-                }
-            
-            # Manter compatibilidade com a interface original
-            # Atualizar o estado global com o resultado
-            novo_estado = estado_global.copy()
-            novo_estado.update(resultado)
-            
-            return novo_estado
-            
-        except Exception as e:
-            # Tratamento de erro com fallback
-            return {
-                **estado_global,
+        if compacto:
+            if resultado is not None:
+                return resultado.compacto()
+            return ResultadoCompacto(
+                status=StatusConciliacao.ERRO_PROCESSAMENTO,
+                score_confianca=0.0,
+                conciliado=False,
+                needs_human_review=True
+            )
+        
+        if resultado is not None:
+            resultado = resultado.to_dict()
+        else:
+            # Fallback em caso de erro
+            resultado = {
                 "conciliacao_ok": False,
                 "conciliacao": {
                     "conciliado": False,
                     "score_confianca": 0.0,
                     "status": "Erro_Processamento",
-                    "observacoes": [f"Erro durante execução: {str(e)}"]
+                    "observacoes": ["Erro interno durante processamento"]
                 },
                 "confianca": 0.0,
                 "needs_human_review": True,
-                "rule_version": "v1.0",
-                "error": str(e)
+                "rule_version": "v1.0"
             }
+        
+        # Manter compatibilidade com a interface original
+        # Atualizar o estado global com o resultado
+        novo_estado = estado_global.copy()
+        novo_estado.update(resultado)
+        
+        return novo_estado
+    
+    def resultado_erro(
+        self, estado_global: Dict, e: Exception, compacto: bool = False
+    ) -> Union[Dict[str, Any], ResultadoCompacto]:
+        """
+        Resultado ``Erro_Processamento`` de um estado, no formato de ``conciliar``.
+        
+        Também usado por quem gera resultados para entradas que nem chegam ao
+        workflow (ex.: linhas NDJSON malformadas em ExecucaoComCheckpoint).
+        """
+        if compacto:
+            return ResultadoCompacto(
+                status=StatusConciliacao.ERRO_PROCESSAMENTO,
+                score_confianca=0.0,
+                conciliado=False,
+                needs_human_review=True,
+                contexto=(None, 0, 0, None, 0, str(e))
+            )
+        
+        return {
+            **estado_global,
+            "conciliacao_ok": False,
+            "conciliacao": {
+                "conciliado": False,
+                "score_confianca": 0.0,
+                "status": "Erro_Processamento",
+                "observacoes": [f"Erro durante execução: {str(e)}"]
+            },
+            "confianca": 0.0,
+            "needs_human_review": True,
+            "rule_version": "v1.0",
+            "error": str(e)
+        }
     
     def get_workflow_info(self) -> Dict[str, Any]:
         """
@@ -108,27 +302,106 @@ class ConciliadorBancarioAgent:
             "workflow_type": "LangGraph StateGraph",
             "nodes": [
                 "identificar_tipo",
+                "detectar_parceiro",
                 "calcular_matching", 
                 "validar_conciliacao",
                 "processar_especializado",
                 "gerar_resultado"
             ],
-            "criterios_config": self.criterios_config,
+            "criterios_config": dict(self.criterios_config),
+            "versao_registro": self.registro.versao if self.registro is not None else None,
             "version": "v1.0"
         }
     
+    def registrar_parceiros(self, nomes: Iterable[str]) -> IndiceTrigramas:
+        """
+        Indexa nomes de parceiros conhecidos para matching aproximado.
+        
+        A similaridade por trigramas passa a compor o score de descrição,
+        tolerando nomes abreviados ou truncados pelo banco.
+        
+        Args:
+            nomes: Valores de ``parceiro_nome`` conhecidos
+        
+        Returns:
+            O índice criado (também disponível em ``criterios_config``)
+        """
+        indice = IndiceTrigramas(nomes)
+        self.update_config({"indice_parceiros": indice})
+        return indice
+    
+    def registrar_cadastro_parceiros(self, cadastro: Mapping[str, Iterable[str]]) -> AutomatoParceiros:
+        """
+        Constrói o autômato de detecção de parceiros a partir do cadastro.
+        
+        As ocorrências de nomes/apelidos na descrição são encontradas em uma
+        única passada e o ``parceiro_id`` resolvido é anexado à transação
+        antes do matching.
+        
+        Args:
+            cadastro: Mapeamento parceiro_id → nomes e apelidos conhecidos
+        
+        Returns:
+            O autômato criado (também disponível em ``criterios_config``)
+        """
+        automato = AutomatoParceiros(cadastro)
+        self.update_config({"automato_parceiros": automato})
+        return automato
+    
+    def registrar_memoria(self, memoria: Optional[MemoriaConciliacoes] = None) -> MemoriaConciliacoes:
+        """
+        Ativa a memória de conciliações confirmadas (descrições recorrentes).
+        
+        Conciliações automáticas passam a ser lembradas por assinatura da
+        descrição; nas próximas ocorrências o parceiro é resolvido por busca
+        direta antes do score completo.
+        
+        Args:
+            memoria: Memória existente (ex.: carregada de arquivo); padrão: nova
+        
+        Returns:
+            A memória ativa (também disponível em ``criterios_config``)
+        """
+        memoria = memoria if memoria is not None else MemoriaConciliacoes()
+        self.update_config({"memoria_conciliacoes": memoria})
+        return memoria
+    
+    def registrar_rastreador(self, rastreador: Rastreador) -> Rastreador:
+        """
+        Ativa o rastreamento por transação (um span por chamada e por nó).
+        
+        Args:
+            rastreador: Rastreador com exportador e amostragem de cabeça/cauda
+        
+        Returns:
+            O rastreador ativo
+        """
+        self.rastreador = rastreador
+        return rastreador
+    
+    def confirmar_conciliacao(self, transacao: Dict[str, Any], classificacao: Dict[str, Any]) -> None:
+        """Registra na memória um par confirmado na revisão manual (sem memória ativa, não faz nada)."""
+        memoria = self.criterios_config.extensoes.get("memoria_conciliacoes")
+        if memoria is not None:
+            memoria.registrar(transacao, classificacao)
+    
     def update_config(self, new_config: Dict[str, Any]) -> None:
         """
         Atualiza configurações de critérios.
         
+        Os critérios são imutáveis: um novo objeto validado substitui o atual
+        (lotes em andamento seguem com o anterior) e, com registro, passa a
+        ser a base das sobrescritas por tenant/conta.
+        
         Args:
             new_config: Novas configurações para merge
-        """
-        self.criterios_config.update(new_config)
         
-        # Recriar workflow com nova configuração se necessário
-        # (Para versões futuras que dependam de config na inicialização)
-        pass
+        Raises:
+            ValueError: Se alguma tolerância for inválida
+        """
+        self.criterios_config = self.criterios_config.substituir(**new_config)
+        if self.registro is not None:
+            self.registro.definir_base(self.criterios_config)
 
 
 # Manter compatibilidade com imports antigos
@@ -0,0 +1,33 @@
+"""
+Armazenamento e carga de dados de conciliação em larga escala.
+"""
+
+from .deduplicacao import IndiceDuplicidade, normalizar_descricao
+from .exportacao import COLUNAS_PADRAO, SaidaCSV, SaidaParquet, SaidaResultados, SaidaXLSX, abrir_saida, exportar
+from .leitura import BlocoDocumentos, carregar_pool, ler_documentos, numeros_br
+from .pool_documentos import COLUNAS_TEXTO, EscritorPool, PoolDocumentos
+from .relatorio import RelatorioConciliacao
+from .validacao import CAMPOS_OBRIGATORIOS_TRANSACAO, estados_conciliacao, validar_lote
+
+__all__ = [
+    "BlocoDocumentos",
+    "CAMPOS_OBRIGATORIOS_TRANSACAO",
+    "COLUNAS_PADRAO",
+    "COLUNAS_TEXTO",
+    "EscritorPool",
+    "IndiceDuplicidade",
+    "PoolDocumentos",
+    "RelatorioConciliacao",
+    "SaidaCSV",
+    "SaidaParquet",
+    "SaidaResultados",
+    "SaidaXLSX",
+    "abrir_saida",
+    "carregar_pool",
+    "estados_conciliacao",
+    "exportar",
+    "ler_documentos",
+    "normalizar_descricao",
+    "numeros_br",
+    "validar_lote",
+]
@@ -0,0 +1,238 @@
+# agents/dados/deduplicacao.py
+"""
+Detecção de linhas de extrato duplicadas antes do workflow.
+
+Bancos reenviam períodos e os arquivos se sobrepõem; sem esta etapa a mesma
+linha seria conciliada duas vezes. Cada transação recebe uma impressão
+digital (data, valor em centavos, conta, descrição normalizada e sequência
+do banco quando existir) guardada em um índice SQLite persistente:
+
+- duplicata exata: a impressão já está no índice (busca pela chave primária)
+- suspeita: mesma conta e valor a até ``janela_dias`` dias de uma impressão
+  diferente (junção por faixa no índice conta/valor/data)
+
+Linhas idênticas dentro do mesmo arquivo (ex.: duas tarifas iguais no dia)
+são distinguidas pela ordem de ocorrência no arquivo, então o reenvio do
+arquivo é detectado sem descartar lançamentos legítimos repetidos.
+
+``classificar`` não grava nada; ``registrar`` grava as impressões aceitas.
+Registre só depois que os resultados estiverem persistidos, para que uma
+falha no meio do lote não faça linhas ainda não conciliadas parecerem
+duplicadas na reexecução (``filtrar`` faz as duas etapas de uma vez).
+"""
+import hashlib
+import re
+import sqlite3
+import unicodedata
+from datetime import date
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+_EPOCA_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def normalizar_descricao(descricao: str) -> str:
+    """Maiúsculas, sem acentos e só com letras/dígitos separados por um espaço."""
+    sem_acentos = unicodedata.normalize("NFKD", descricao or "").encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^A-Z0-9]+", " ", sem_acentos.upper()).split())
+
+
+def _dias(data_transacao: Any) -> Optional[int]:
+    try:
+        return date.fromisoformat(str(data_transacao)[:10]).toordinal() - _EPOCA_ORDINAL
+    except ValueError:
+        return None
+
+
+class IndiceDuplicidade:
+    """
+    Índice persistente de impressões digitais de transações.
+
+    Exemplo:
+        indice = IndiceDuplicidade("dados/duplicidade.sqlite")
+        triagem = indice.classificar(transacoes)
+        resultados = agente.conciliar_lote(
+            [{"transacao_bancaria": transacoes[i]} for i in triagem["novas"]]
+        )
+        ...  # persistir resultados
+        indice.registrar(triagem)
+    """
+
+    def __init__(
+        self,
+        caminho: str = ":memory:",
+        janela_dias: int = 1,
+        campo_sequencia: str = "sequencia_banco"
+    ):
+        """
+        Args:
+            caminho: Arquivo SQLite (":memory:" para um índice temporário)
+            janela_dias: Distância máxima em dias para marcar suspeita
+            campo_sequencia: Campo da transação com a sequência/NSU do banco
+        """
+        self.caminho = caminho
+        self.janela_dias = janela_dias
+        self.campo_sequencia = campo_sequencia
+        self._conexao = sqlite3.connect(caminho)
+        self._conexao.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS impressoes (
+                chave TEXT PRIMARY KEY,
+                conta TEXT NOT NULL,
+                valor_centavos INTEGER NOT NULL,
+                data_dias INTEGER,
+                origem TEXT
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS impressoes_conta_valor_data
+                ON impressoes (conta, valor_centavos, data_dias);
+        """)
+
+    def impressao(self, transacao: Mapping[str, Any], ocorrencia: int = 1) -> str:
+        """Impressão digital da transação (SHA-1 dos campos normalizados)."""
+        return hashlib.sha1(self._base(transacao, ocorrencia).encode("utf-8")).hexdigest()
+
+    def _base(self, transacao: Mapping[str, Any], ocorrencia: int) -> str:
+        sequencia = transacao.get(self.campo_sequencia)
+        return "|".join((
+            str(transacao.get("data_transacao", ""))[:10],
+            str(round(float(transacao.get("valor_transacao") or 0) * 100)),
+            str(transacao.get("conta_bancaria", "")),
+            normalizar_descricao(transacao.get("descricao_transacao", "")),
+            "" if sequencia is None else str(sequencia),
+            str(ocorrencia),
+        ))
+
+    def classificar(self, transacoes: Sequence[Mapping[str, Any]], origem: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Separa novas, duplicadas e suspeitas sem alterar o índice.
+
+        Args:
+            transacoes: Linhas de um arquivo de extrato, na ordem do arquivo
+            origem: Identificação do arquivo, guardada com as impressões
+
+        Returns:
+            Dicionário com:
+                novas: posições das transações a conciliar (inclui suspeitas)
+                duplicadas: posições cuja impressão já está registrada
+                suspeitas: posição → chave da impressão parecida (registrada ou
+                    anterior no mesmo lote)
+                chaves/atributos: impressão e (conta, centavos, dias) das novas,
+                    usados por ``registrar``
+        """
+        ocorrencias: Dict[str, int] = {}
+        bases: Dict[int, str] = {}
+        chaves: Dict[int, str] = {}
+        atributos: Dict[int, Tuple[str, int, Optional[int]]] = {}
+        for posicao, transacao in enumerate(transacoes):
+            base = bases[posicao] = self._base(transacao, 0)
+            ocorrencias[base] = ocorrencias.get(base, 0) + 1
+            chaves[posicao] = self.impressao(transacao, ocorrencias[base])
+            atributos[posicao] = (
+                str(transacao.get("conta_bancaria", "")),
+                round(float(transacao.get("valor_transacao") or 0) * 100),
+                _dias(transacao.get("data_transacao")),
+            )
+
+        existentes, parecidas = self._consultar(chaves, atributos)
+        novas: List[int] = []
+        duplicadas: List[int] = []
+        suspeitas: Dict[int, str] = {}
+        no_lote: Dict[Tuple[str, int], List[Tuple[Optional[int], str, str]]] = {}
+        for posicao, chave in chaves.items():
+            if posicao in existentes:
+                duplicadas.append(posicao)
+                continue
+            novas.append(posicao)
+            conta, valor_centavos, data_dias = atributos[posicao]
+            parecida = parecidas.get(posicao)
+            if parecida is None and data_dias is not None:
+                # Anteriores no mesmo lote; repetições idênticas já se
+                # distinguem pela ocorrência e não são suspeitas
+                parecida = next((
+                    anterior for dias, anterior, base in no_lote.get((conta, valor_centavos), ())
+                    if base != bases[posicao] and dias is not None and abs(dias - data_dias) <= self.janela_dias
+                ), None)
+            if parecida is not None:
+                suspeitas[posicao] = parecida
+            no_lote.setdefault((conta, valor_centavos), []).append((data_dias, chave, bases[posicao]))
+
+        return {
+            "novas": novas,
+            "duplicadas": duplicadas,
+            "suspeitas": suspeitas,
+            "chaves": {posicao: chaves[posicao] for posicao in novas},
+            "atributos": {posicao: atributos[posicao] for posicao in novas},
+            "origem": origem,
+        }
+
+    def registrar(self, triagem: Mapping[str, Any], posicoes: Optional[Iterable[int]] = None) -> int:
+        """
+        Grava as impressões das transações aceitas na triagem.
+
+        Args:
+            triagem: Retorno de ``classificar``
+            posicoes: Subconjunto a registrar (padrão: todas as novas)
+
+        Returns:
+            Quantidade de impressões gravadas
+        """
+        posicoes = triagem["novas"] if posicoes is None else list(posicoes)
+        linhas = [
+            (triagem["chaves"][posicao], *triagem["atributos"][posicao], triagem["origem"])
+            for posicao in posicoes
+        ]
+        with self._conexao:
+            self._conexao.executemany(
+                "INSERT OR IGNORE INTO impressoes (chave, conta, valor_centavos, data_dias, origem) "
+                "VALUES (?, ?, ?, ?, ?)",
+                linhas
+            )
+        return len(linhas)
+
+    def filtrar(self, transacoes: Sequence[Mapping[str, Any]], origem: Optional[str] = None) -> Dict[str, Any]:
+        """``classificar`` seguido de ``registrar`` (para quando não há etapa de persistência)."""
+        triagem = self.classificar(transacoes, origem)
+        self.registrar(triagem)
+        return triagem
+
+    def __len__(self) -> int:
+        return self._conexao.execute("SELECT COUNT(*) FROM impressoes").fetchone()[0]
+
+    def fechar(self) -> None:
+        self._conexao.close()
+
+    def _consultar(
+        self, chaves: Dict[int, str], atributos: Dict[int, Tuple[str, int, Optional[int]]]
+    ) -> Tuple[set, Dict[int, str]]:
+        """
+        Posições já registradas e posição → impressão parecida registrada.
+
+        O lote vai para uma tabela temporária e as duas buscas são junções
+        com o índice (chave primária e conta/valor/data), sem varrer o histórico.
+        """
+        with self._conexao:
+            self._conexao.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS lote ("
+                "posicao INTEGER PRIMARY KEY, chave TEXT, conta TEXT, valor_centavos INTEGER, data_dias INTEGER)"
+            )
+            self._conexao.execute("DELETE FROM lote")
+            self._conexao.executemany(
+                "INSERT INTO lote VALUES (?, ?, ?, ?, ?)",
+                ((posicao, chave, *atributos[posicao]) for posicao, chave in chaves.items())
+            )
+            existentes = {
+                linha[0] for linha in self._conexao.execute(
+                    "SELECT l.posicao FROM lote l JOIN impressoes i ON i.chave = l.chave"
+                )
+            }
+            parecidas = dict(self._conexao.execute(
+                "SELECT l.posicao, MIN(i.chave) FROM lote l JOIN impressoes i "
+                "ON i.conta = l.conta AND i.valor_centavos = l.valor_centavos "
+                "AND i.data_dias BETWEEN l.data_dias - ? AND l.data_dias + ? "
+                "WHERE i.chave <> l.chave GROUP BY l.posicao",
+                (self.janela_dias, self.janela_dias)
+            ))
+            self._conexao.execute("DELETE FROM lote")
+        return existentes, parecidas
+
+
+__all__ = ["IndiceDuplicidade", "normalizar_descricao"]
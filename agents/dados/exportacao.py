@@ -0,0 +1,350 @@
+# agents/dados/exportacao.py
+"""
+Exportação de resultados em streaming para planilhas (CSV, XLSX, Parquet).
+
+Cada resultado (dicionário completo, ``ResultadoConciliacao`` ou
+``ResultadoCompacto``) é achatado em uma linha com as colunas projetadas e
+acumulado em listas por coluna; a cada ``tamanho_bloco`` linhas o bloco é
+gravado e descartado. A memória fica limitada a um bloco, sem montar o
+DataFrame do lote inteiro.
+
+Colunas são nomes de ``CAMPOS_EXPORTACAO`` (ex.: ``"status"``,
+``"diferenca_valor"``) ou caminhos pontuados no dicionário do resultado
+(ex.: ``"conciliacao.calculo_retencoes.valor_liquido"``). Listas viram texto
+separado por "; ".
+
+XLSX requer ``openpyxl`` e Parquet requer ``pyarrow``; as dependências só são
+importadas ao abrir a saída correspondente.
+"""
+import abc
+import csv
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from models.conciliacao import ResultadoConciliacao
+
+# Coluna → (caminho no dicionário do resultado, tipo da coluna)
+CAMPOS_EXPORTACAO: Dict[str, Tuple[str, str]] = {
+    "data_transacao": ("transacao_bancaria.data_transacao", "texto"),
+    "valor_transacao": ("transacao_bancaria.valor_transacao", "numero"),
+    "descricao_transacao": ("transacao_bancaria.descricao_transacao", "texto"),
+    "conta_bancaria": ("transacao_bancaria.conta_bancaria", "texto"),
+    "status": ("conciliacao.status", "texto"),
+    "conciliado": ("conciliacao.conciliado", "booleano"),
+    "score_confianca": ("conciliacao.score_confianca", "numero"),
+    "tipo_conciliacao": ("conciliacao.tipo_conciliacao", "texto"),
+    "id_lancamento_contabil": ("conciliacao.id_lancamento_contabil", "texto"),
+    "documento_origem": ("conciliacao.documento_origem", "texto"),
+    "cfop_origem": ("conciliacao.cfop_origem", "texto"),
+    "criterio_principal": ("conciliacao.metadados_matching.criterio_principal", "texto"),
+    "diferenca_valor": ("conciliacao.metadados_matching.diferenca_valor", "numero"),
+    "diferenca_dias": ("conciliacao.metadados_matching.diferenca_dias", "numero"),
+    "total_retencoes": ("conciliacao.calculo_retencoes.total_retencoes", "numero"),
+    "divergencias": ("conciliacao.divergencias", "texto"),
+    "observacoes": ("conciliacao.observacoes", "texto"),
+    "needs_human_review": ("needs_human_review", "booleano"),
+    "motivo_nao_conciliacao": ("motivo_nao_conciliacao", "texto"),
+}
+
+COLUNAS_PADRAO: Tuple[str, ...] = (
+    "data_transacao",
+    "valor_transacao",
+    "descricao_transacao",
+    "conta_bancaria",
+    "status",
+    "conciliado",
+    "score_confianca",
+    "id_lancamento_contabil",
+    "documento_origem",
+    "diferenca_valor",
+    "diferenca_dias",
+    "total_retencoes",
+    "divergencias",
+    "needs_human_review",
+)
+
+# ResultadoCompacto não guarda a resposta aninhada: caminho → atributo
+_CAMPOS_COMPACTO = {
+    "conciliacao.status": "status",
+    "conciliacao.conciliado": "conciliado",
+    "conciliacao.score_confianca": "score_confianca",
+    "conciliacao.id_lancamento_contabil": "id_lancamento_contabil",
+    "conciliacao.documento_origem": "documento_origem",
+    "conciliacao.divergencias": "divergencias",
+    "conciliacao.observacoes": "observacoes",
+    "needs_human_review": "needs_human_review",
+}
+
+LIMITE_LINHAS_XLSX = 1_048_576
+
+# Colunas monetárias saem com casas fixas; demais números são arredondados
+_CASAS_MONETARIAS = {"valor_transacao": 2, "diferenca_valor": 2, "total_retencoes": 2}
+_CASAS_PADRAO = 4
+
+
+def _celula(valor: Any) -> Any:
+    """Converte listas, enums e dicionários em valores de planilha."""
+    if isinstance(valor, (list, tuple)):
+        return "; ".join(str(_celula(item)) for item in valor)
+    if isinstance(valor, dict):
+        # Divergência serializada: usa o tipo; demais dicionários viram texto
+        return valor.get("tipo", str(valor))
+    return getattr(valor, "value", valor)
+
+
+def _extrator(caminho: str) -> Callable[[Any], Any]:
+    chaves = caminho.split(".")
+    atributo = _CAMPOS_COMPACTO.get(caminho)
+
+    def extrair(resultado: Any) -> Any:
+        if not isinstance(resultado, dict):
+            return _celula(getattr(resultado, atributo)) if atributo else None
+        valor = resultado
+        for chave in chaves:
+            if not isinstance(valor, dict):
+                return None
+            valor = valor.get(chave)
+        return _celula(valor)
+
+    return extrair
+
+
+class SaidaResultados(abc.ABC):
+    """
+    Base das saídas em streaming: acumula blocos por coluna e grava por bloco.
+
+    Exemplo:
+        with SaidaCSV("resultados.csv", colunas=["status", "score_confianca"]) as saida:
+            for bloco in blocos:
+                saida.escrever(agente.conciliar_lote(bloco))
+    """
+
+    def __init__(self, caminho: str, colunas: Optional[Sequence[str]] = None, tamanho_bloco: int = 10000):
+        """
+        Args:
+            caminho: Arquivo de saída
+            colunas: Projeção (padrão: ``COLUNAS_PADRAO``)
+            tamanho_bloco: Linhas acumuladas antes de cada gravação
+        """
+        if tamanho_bloco < 1:
+            raise ValueError("tamanho_bloco deve ser positivo")
+        self.caminho = caminho
+        self.colunas = list(colunas or COLUNAS_PADRAO)
+        self.tamanho_bloco = tamanho_bloco
+        self.tipos = [CAMPOS_EXPORTACAO.get(coluna, (coluna, "texto"))[1] for coluna in self.colunas]
+        self._extratores = [_extrator(CAMPOS_EXPORTACAO.get(coluna, (coluna,))[0]) for coluna in self.colunas]
+        self._bloco: List[List[Any]] = [[] for _ in self.colunas]
+        self._pendentes = 0
+        self.linhas_escritas = 0
+        self.fechada = False
+
+    def escrever(self, resultados: Iterable[Any]) -> None:
+        """Acrescenta resultados; grava cada bloco completo."""
+        for resultado in resultados:
+            if resultado is None:
+                continue
+            if isinstance(resultado, ResultadoConciliacao):
+                resultado = resultado.to_dict()
+            for valores, extrair in zip(self._bloco, self._extratores):
+                valores.append(extrair(resultado))
+            self._pendentes += 1
+            if self._pendentes >= self.tamanho_bloco:
+                self._descarregar()
+
+    def fechar(self) -> None:
+        """Grava o bloco pendente e fecha o arquivo."""
+        if self.fechada:
+            return
+        self._descarregar()
+        self._finalizar()
+        self.fechada = True
+
+    def _descarregar(self) -> None:
+        if not self._pendentes:
+            return
+        self._gravar_bloco(self._bloco, self._pendentes)
+        self.linhas_escritas += self._pendentes
+        self._bloco = [[] for _ in self.colunas]
+        self._pendentes = 0
+
+    @abc.abstractmethod
+    def _gravar_bloco(self, colunas: List[List[Any]], linhas: int) -> None:
+        """Grava um bloco (listas por coluna, ``linhas`` valores cada)."""
+
+    def _finalizar(self) -> None:
+        pass
+
+    def __enter__(self) -> "SaidaResultados":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.fechar()
+
+
+class SaidaCSV(SaidaResultados):
+    """
+    CSV no padrão de planilhas brasileiras (``;`` e vírgula decimal, UTF-8 com
+    BOM para o Excel reconhecer acentos).
+    """
+
+    def __init__(
+        self,
+        caminho: str,
+        colunas: Optional[Sequence[str]] = None,
+        tamanho_bloco: int = 10000,
+        separador: str = ";",
+        decimal: str = ",",
+        encoding: str = "utf-8-sig"
+    ):
+        super().__init__(caminho, colunas, tamanho_bloco)
+        self.decimal = decimal
+        self._arquivo = open(caminho, "w", newline="", encoding=encoding)
+        self._escritor = csv.writer(self._arquivo, delimiter=separador)
+        self._escritor.writerow(self.colunas)
+
+    def _gravar_bloco(self, colunas: List[List[Any]], linhas: int) -> None:
+        for indice, (coluna, tipo) in enumerate(zip(self.colunas, self.tipos)):
+            if tipo == "numero":
+                colunas[indice] = [self._numero(valor, _CASAS_MONETARIAS.get(coluna)) for valor in colunas[indice]]
+        self._escritor.writerows(zip(*colunas))
+
+    def _numero(self, valor: Any, casas_fixas: Optional[int]) -> Any:
+        """Float com precisão fixa (sem ruído de representação) e o separador decimal da saída."""
+        if not isinstance(valor, float):
+            return valor
+        texto = f"{valor:.{casas_fixas}f}" if casas_fixas is not None else str(round(valor, _CASAS_PADRAO))
+        return texto.replace(".", self.decimal) if self.decimal != "." else texto
+
+    def _finalizar(self) -> None:
+        self._arquivo.close()
+
+
+class SaidaXLSX(SaidaResultados):
+    """
+    Planilha XLSX em modo ``write_only`` do openpyxl (linhas gravadas em
+    streaming). Acima do limite de linhas do Excel abre uma nova aba.
+    """
+
+    def __init__(
+        self,
+        caminho: str,
+        colunas: Optional[Sequence[str]] = None,
+        tamanho_bloco: int = 10000,
+        aba: str = "resultados"
+    ):
+        try:
+            from openpyxl import Workbook
+        except ImportError as e:
+            raise ImportError("SaidaXLSX requer openpyxl (pip install openpyxl)") from e
+        super().__init__(caminho, colunas, tamanho_bloco)
+        self.aba = aba
+        self._planilha = Workbook(write_only=True)
+        self._abas = 0
+        self._nova_aba()
+
+    def _nova_aba(self) -> None:
+        self._abas += 1
+        nome = self.aba if self._abas == 1 else f"{self.aba}_{self._abas}"
+        self._aba_atual = self._planilha.create_sheet(nome)
+        self._aba_atual.append(self.colunas)
+        self._linhas_aba = 1
+
+    def _gravar_bloco(self, colunas: List[List[Any]], linhas: int) -> None:
+        for linha in zip(*colunas):
+            if self._linhas_aba >= LIMITE_LINHAS_XLSX:
+                self._nova_aba()
+            self._aba_atual.append(linha)
+            self._linhas_aba += 1
+
+    def _finalizar(self) -> None:
+        self._planilha.save(self.caminho)
+
+
+class SaidaParquet(SaidaResultados):
+    """
+    Parquet via ``pyarrow.parquet.ParquetWriter``: cada bloco vira um row group
+    com esquema fixo derivado dos tipos das colunas.
+    """
+
+    def __init__(
+        self,
+        caminho: str,
+        colunas: Optional[Sequence[str]] = None,
+        tamanho_bloco: int = 10000,
+        compressao: str = "snappy"
+    ):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("SaidaParquet requer pyarrow (pip install pyarrow)") from e
+        super().__init__(caminho, colunas, tamanho_bloco)
+        self._pa = pa
+        tipos = {"texto": pa.string(), "numero": pa.float64(), "booleano": pa.bool_()}
+        self._esquema = pa.schema([(coluna, tipos[tipo]) for coluna, tipo in zip(self.colunas, self.tipos)])
+        self._escritor = pq.ParquetWriter(caminho, self._esquema, compression=compressao)
+
+    def _gravar_bloco(self, colunas: List[List[Any]], linhas: int) -> None:
+        arrays = []
+        for valores, tipo, campo in zip(colunas, self.tipos, self._esquema):
+            if tipo == "texto":
+                valores = [None if valor is None else str(valor) for valor in valores]
+            arrays.append(self._pa.array(valores, type=campo.type))
+        self._escritor.write_table(self._pa.Table.from_arrays(arrays, schema=self._esquema))
+
+    def _finalizar(self) -> None:
+        self._escritor.close()
+
+
+_SAIDAS = {"csv": SaidaCSV, "xlsx": SaidaXLSX, "parquet": SaidaParquet}
+
+
+def abrir_saida(
+    caminho: str,
+    formato: Optional[str] = None,
+    colunas: Optional[Sequence[str]] = None,
+    tamanho_bloco: int = 10000,
+    **opcoes: Any
+) -> SaidaResultados:
+    """
+    Abre a saída pelo formato informado ou pela extensão do arquivo.
+
+    Raises:
+        ValueError: Formato desconhecido
+        ImportError: Dependência opcional do formato ausente
+    """
+    formato = (formato or os.path.splitext(caminho)[1].lstrip(".")).lower()
+    if formato not in _SAIDAS:
+        raise ValueError(f"Formato de exportação desconhecido: {formato!r} (use csv, xlsx ou parquet)")
+    return _SAIDAS[formato](caminho, colunas, tamanho_bloco, **opcoes)
+
+
+def exportar(
+    resultados: Iterable[Any],
+    caminho: str,
+    formato: Optional[str] = None,
+    colunas: Optional[Sequence[str]] = None,
+    tamanho_bloco: int = 10000,
+    **opcoes: Any
+) -> int:
+    """
+    Consome um iterável de resultados (ex.: gerador sobre lotes) gravando em blocos.
+
+    Returns:
+        Quantidade de linhas gravadas
+    """
+    with abrir_saida(caminho, formato, colunas, tamanho_bloco, **opcoes) as saida:
+        saida.escrever(resultados)
+    return saida.linhas_escritas
+
+
+__all__ = [
+    "CAMPOS_EXPORTACAO",
+    "COLUNAS_PADRAO",
+    "SaidaCSV",
+    "SaidaParquet",
+    "SaidaResultados",
+    "SaidaXLSX",
+    "abrir_saida",
+    "exportar",
+]
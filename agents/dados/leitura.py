@@ -0,0 +1,262 @@
+# agents/dados/leitura.py
+"""
+Leitura colunar de documentos fiscais exportados pelo ERP (CSV/Parquet).
+
+Só as colunas usadas no matching são lidas (``valor_total``,
+``data_documento``, ``numero_documento``, ``parceiro_nome``, ``cfop``,
+``natureza_operacao`` e as retenções por imposto), em blocos de
+``tamanho_bloco`` linhas. Números no formato brasileiro ("1.234,56",
+"R$ 1.234,56", "(1.234,56)") e datas ISO ou dd/mm/aaaa são convertidos por
+coluna, e cada bloco já sai nas colunas do ``PoolDocumentos`` (centavos
+int64, dias int32, textos), sem montar um dicionário por documento.
+Documentos sem ``valor_total`` numérico são descartados (e informados), não
+gravados com valor zero.
+
+Uso:
+    pool = carregar_pool("nfs_abertas.csv", "dados/pool_nfs", renomear={"VALOR": "valor_total"})
+"""
+import json
+import os
+import warnings
+from typing import Any, Dict, Iterator, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..matching.retencoes import ALIQUOTAS_RETENCAO_PADRAO
+from .pool_documentos import COLUNAS_TEXTO, SEM_DATA, EscritorPool, PoolDocumentos
+
+COLUNAS_DOCUMENTO = ("valor_total", "data_documento") + COLUNAS_TEXTO
+IMPOSTOS_RETENCAO = tuple(ALIQUOTAS_RETENCAO_PADRAO)
+
+_PADRAO_MILHAR = r"-?\d{1,3}(?:\.\d{3})+"
+
+
+def numeros_br(serie: pd.Series) -> np.ndarray:
+    """
+    Converte uma coluna em float64 aceitando o formato brasileiro.
+
+    Com vírgula, "." é separador de milhar e "," decimal; sem vírgula, só
+    valores agrupados de três em três ("1.234", "1.234.567") são lidos como
+    milhar. Parênteses indicam negativo. Valores inválidos viram NaN.
+    """
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return serie.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    texto = serie.astype("string").str.strip().str.replace(r"^R\$\s*", "", regex=True)
+    negativo = (texto.str.startswith("(") & texto.str.endswith(")")).fillna(False).to_numpy(dtype=bool)
+    texto = texto.str.strip("()")
+    brasileiro = texto.str.contains(",", regex=False) | texto.str.fullmatch(_PADRAO_MILHAR)
+    texto = texto.where(
+        ~brasileiro.fillna(False),
+        texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    )
+    numeros = pd.to_numeric(texto, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    numeros[negativo] = -numeros[negativo]
+    return numeros
+
+
+def dias_data(serie: pd.Series) -> np.ndarray:
+    """Datas ISO (YYYY-MM-DD) ou dd/mm/aaaa em dias desde a época (int32; SEM_DATA se inválida)."""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        datas = pd.to_datetime(serie)
+    else:
+        texto = serie.astype("string").str.strip().str.slice(0, 10)
+        datas = pd.to_datetime(texto, format="%Y-%m-%d", errors="coerce").fillna(
+            pd.to_datetime(texto, format="%d/%m/%Y", errors="coerce")
+        )
+    valores = datas.to_numpy(dtype="datetime64[D]")
+    dias = np.full(len(valores), SEM_DATA, dtype=np.int32)
+    validas = ~np.isnat(valores)
+    dias[validas] = valores[validas].astype(np.int64)
+    return dias
+
+
+def _textos(serie: pd.Series) -> np.ndarray:
+    """Coluna de texto sem "nan" nem "5102.0" (inteiros lidos como float no Parquet)."""
+    if pd.api.types.is_float_dtype(serie) and np.all(np.isnan(serie) | (serie == np.round(serie))):
+        serie = serie.astype("Int64")
+    return serie.astype("string").fillna("").to_numpy(dtype=object)
+
+
+class BlocoDocumentos:
+    """
+    Bloco de documentos em colunas, no layout do ``PoolDocumentos``.
+
+    - valor_centavos: int64
+    - data_dias: int32 (SEM_DATA se ausente/inválida)
+    - textos: colunas de texto + "extras" (JSON com impostos_retidos)
+    - descartadas: posições, no quadro de origem, das linhas sem valor_total
+      numérico (não entram no bloco)
+    """
+
+    __slots__ = ("valor_centavos", "data_dias", "textos", "descartadas")
+
+    def __init__(
+        self,
+        valor_centavos: np.ndarray,
+        data_dias: np.ndarray,
+        textos: Dict[str, np.ndarray],
+        descartadas: Optional[np.ndarray] = None
+    ):
+        self.valor_centavos = valor_centavos
+        self.data_dias = data_dias
+        self.textos = textos
+        self.descartadas = np.zeros(0, dtype=np.int64) if descartadas is None else descartadas
+
+    def __len__(self) -> int:
+        return len(self.valor_centavos)
+
+    @classmethod
+    def de_quadro(cls, quadro: pd.DataFrame) -> "BlocoDocumentos":
+        """
+        Converte um DataFrame já com os nomes canônicos de coluna.
+
+        Linhas com ``valor_total`` ausente ou ilegível ficam fora do bloco
+        (posições em ``descartadas``).
+        """
+        valores = (
+            numeros_br(quadro["valor_total"]) if "valor_total" in quadro else np.full(len(quadro), np.nan)
+        )
+        validos = np.isfinite(valores)
+        descartadas = np.flatnonzero(~validos)
+        if len(descartadas):
+            quadro, valores = quadro.iloc[validos], valores[validos]
+        quantidade = len(quadro)
+        valor_centavos = np.rint(valores * 100).astype(np.int64)
+        data_dias = (
+            dias_data(quadro["data_documento"]) if "data_documento" in quadro
+            else np.full(quantidade, SEM_DATA, dtype=np.int32)
+        )
+        textos = {nome: _textos(quadro[nome]) for nome in COLUNAS_TEXTO if nome in quadro}
+
+        # Retenções: JSON apenas nas linhas com algum imposto informado
+        impostos = {nome: numeros_br(quadro[nome]) for nome in IMPOSTOS_RETENCAO if nome in quadro}
+        extras = np.full(quantidade, "", dtype=object)
+        if impostos:
+            matriz = np.nan_to_num(np.column_stack(list(impostos.values())))
+            nomes = list(impostos)
+            for linha in np.flatnonzero(matriz.any(axis=1)):
+                retidos = {nome: float(valor) for nome, valor in zip(nomes, matriz[linha]) if valor}
+                extras[linha] = json.dumps({"impostos_retidos": retidos})
+        textos["extras"] = extras
+        return cls(valor_centavos, data_dias, textos, descartadas)
+
+    @classmethod
+    def concatenar(cls, blocos: Sequence["BlocoDocumentos"]) -> "BlocoDocumentos":
+        if not blocos:
+            return cls(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32), {})
+        nomes = dict.fromkeys(nome for bloco in blocos for nome in bloco.textos)
+        textos = {
+            nome: np.concatenate([
+                bloco.textos.get(nome, np.full(len(bloco), "", dtype=object)) for bloco in blocos
+            ])
+            for nome in nomes
+        }
+        # Posições descartadas relativas ao primeiro bloco (cada bloco ocupava
+        # len(bloco) + len(descartadas) linhas na origem)
+        origem = np.cumsum([0] + [len(bloco) + len(bloco.descartadas) for bloco in blocos[:-1]])
+        return cls(
+            np.concatenate([bloco.valor_centavos for bloco in blocos]),
+            np.concatenate([bloco.data_dias for bloco in blocos]),
+            textos,
+            np.concatenate([inicio + bloco.descartadas for inicio, bloco in zip(origem, blocos)]).astype(np.int64)
+        )
+
+
+def _projecao(renomear: Optional[Mapping[str, str]]) -> Dict[str, str]:
+    """Nome na origem → nome canônico, para as colunas usadas no matching."""
+    canonicas = COLUNAS_DOCUMENTO + IMPOSTOS_RETENCAO
+    projecao = {nome: nome for nome in canonicas}
+    for origem, destino in (renomear or {}).items():
+        if destino in canonicas:
+            projecao.pop(destino, None)
+            projecao[origem] = destino
+    return projecao
+
+
+def ler_documentos(
+    caminho: str,
+    formato: Optional[str] = None,
+    tamanho_bloco: int = 100_000,
+    renomear: Optional[Mapping[str, str]] = None,
+    separador: str = ";",
+    encoding: str = "utf-8"
+) -> Iterator[BlocoDocumentos]:
+    """
+    Lê documentos em blocos colunares, carregando só as colunas do matching.
+
+    Args:
+        caminho: Arquivo CSV ou Parquet
+        formato: "csv" ou "parquet" (padrão: pela extensão)
+        tamanho_bloco: Linhas por bloco
+        renomear: Nome da coluna na origem → nome canônico (ex.: {"VL_TOTAL": "valor_total"})
+        separador: Separador do CSV
+        encoding: Codificação do CSV
+
+    Raises:
+        ValueError: Formato desconhecido
+        ImportError: Parquet sem pyarrow
+    """
+    formato = (formato or os.path.splitext(caminho)[1].lstrip(".")).lower()
+    projecao = _projecao(renomear)
+
+    if formato == "csv":
+        leitor = pd.read_csv(
+            caminho, sep=separador, encoding=encoding, dtype=str,
+            usecols=lambda coluna: coluna in projecao, chunksize=tamanho_bloco
+        )
+        for quadro in leitor:
+            yield BlocoDocumentos.de_quadro(quadro.rename(columns=projecao))
+    elif formato == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Leitura de Parquet requer pyarrow (pip install pyarrow)") from e
+        arquivo = pq.ParquetFile(caminho)
+        colunas = [coluna for coluna in arquivo.schema_arrow.names if coluna in projecao]
+        for lote in arquivo.iter_batches(batch_size=tamanho_bloco, columns=colunas):
+            yield BlocoDocumentos.de_quadro(lote.to_pandas().rename(columns=projecao))
+    else:
+        raise ValueError(f"Formato de leitura desconhecido: {formato!r} (use csv ou parquet)")
+
+
+def carregar_pool(caminho_entrada: str, caminho_pool: str, **opcoes: Any) -> PoolDocumentos:
+    """
+    Lê o arquivo do ERP em blocos e grava o ``PoolDocumentos`` direto das colunas.
+
+    Cada bloco é anexado ao pool assim que lido (``EscritorPool``): a memória
+    fica limitada a um bloco mais as colunas numéricas ordenadas. Linhas sem
+    ``valor_total`` numérico são descartadas com um RuntimeWarning; a
+    quantidade fica em ``pool.meta["descartados"]``.
+    """
+    descartados = 0
+    exemplos = []
+    linhas_lidas = 0
+    with EscritorPool(caminho_pool) as escritor:
+        for bloco in ler_documentos(caminho_entrada, **opcoes):
+            escritor.adicionar(bloco.valor_centavos, bloco.data_dias, bloco.textos)
+            descartados += len(bloco.descartadas)
+            exemplos.extend((linhas_lidas + bloco.descartadas[:10 - len(exemplos)]).tolist())
+            linhas_lidas += len(bloco) + len(bloco.descartadas)
+        pool = escritor.finalizar(descartados=descartados)
+
+    if descartados:
+        warnings.warn(
+            f"{descartados} documento(s) sem valor_total numérico descartados de {caminho_entrada} "
+            f"(linhas de dados, a partir de 0: {', '.join(map(str, exemplos))}{', ...' if descartados > 10 else ''})",
+            RuntimeWarning,
+            stacklevel=2
+        )
+    return pool
+
+
+__all__ = [
+    "BlocoDocumentos",
+    "COLUNAS_DOCUMENTO",
+    "IMPOSTOS_RETENCAO",
+    "carregar_pool",
+    "dias_data",
+    "ler_documentos",
+    "numeros_br",
+]
@@ -0,0 +1,488 @@
+# agents/dados/pool_documentos.py
+"""
+Pool de documentos fiscais em formato colunar mapeado em memória.
+
+O pool é um diretório com um arquivo ``.npy`` por coluna, ordenado por valor
+em centavos, mais um índice secundário por data. Os arquivos são abertos com
+``np.load(mmap_mode="r")``: nada é desserializado na abertura, as páginas são
+compartilhadas entre processos pelo cache do sistema operacional e as buscas
+por faixa de valor/data são ``searchsorted`` sobre as colunas ordenadas.
+
+Layout:
+    meta.json                    formato, quantidade e colunas de texto
+    valor_centavos.npy           int64, ordenado (chave primária)
+    data_dias.npy                int32, dias desde 1970-01-01 (SEM_DATA se ausente)
+    posicao_original.npy         int64, posição do documento na entrada
+    indice_data.npy              int64, linhas ordenadas por data
+    datas_ordenadas.npy          int32, data_dias[indice_data]
+    <coluna>.offsets.npy         int64, n + 1 offsets no blob UTF-8
+    <coluna>.dados.npy           uint8, blob UTF-8 concatenado
+"""
+import json
+import os
+import shutil
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+FORMATO_POOL = 1
+
+# Colunas de texto armazenadas separadamente; demais campos vão para "extras" (JSON)
+COLUNAS_TEXTO: Tuple[str, ...] = ("cfop", "numero_documento", "parceiro_nome", "natureza_operacao")
+_COLUNA_EXTRAS = "extras"
+_CAMPOS_NUMERICOS = ("valor_total", "data_documento")
+
+SEM_DATA = np.iinfo(np.int32).min
+_EPOCA = date(1970, 1, 1)
+
+
+def _data_para_dias(valor: Any) -> int:
+    """Converte "YYYY-MM-DD" (ou date/datetime) em dias desde a época."""
+    if not valor:
+        return SEM_DATA
+    if isinstance(valor, datetime):
+        valor = valor.date()
+    if not isinstance(valor, date):
+        try:
+            valor = datetime.strptime(str(valor)[:10], "%Y-%m-%d").date()
+        except ValueError:
+            return SEM_DATA
+    return (valor - _EPOCA).days
+
+
+def _dias_para_data(dias: int) -> Optional[str]:
+    if dias == SEM_DATA:
+        return None
+    return date.fromordinal(_EPOCA.toordinal() + int(dias)).isoformat()
+
+
+def _buscar(coluna: np.ndarray, chave: int, lado: str) -> int:
+    """``searchsorted`` com a chave no dtype da coluna (evita conversão da coluna inteira)."""
+    info = np.iinfo(coluna.dtype)
+    chave = min(max(chave, info.min), info.max)
+    return int(coluna.searchsorted(coluna.dtype.type(chave), side=lado))
+
+
+def _gravar_meta(caminho: str, quantidade: int, **informacoes: Any) -> None:
+    with open(os.path.join(caminho, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "formato": FORMATO_POOL,
+            "quantidade": quantidade,
+            "colunas_texto": list(COLUNAS_TEXTO),
+            **informacoes,
+        }, f)
+
+
+def codificar_texto(valores: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Codifica uma coluna de texto como (offsets int64, blob UTF-8 uint8).
+
+    A coluna é unida com separador NUL e codificada de uma vez; os offsets
+    saem das posições dos separadores, sem codificar valor a valor.
+    """
+    valores = list(valores)
+    texto = "\x00".join(valores)
+    if valores and texto.count("\x00") == len(valores) - 1:
+        bruto = np.frombuffer(texto.encode("utf-8"), dtype=np.uint8)
+        separadores = np.flatnonzero(bruto == 0)
+        offsets = np.empty(len(valores) + 1, dtype=np.int64)
+        offsets[0] = 0
+        offsets[1:-1] = separadores - np.arange(len(separadores))
+        offsets[-1] = len(bruto) - len(separadores)
+        dados = bruto[bruto != 0] if len(separadores) else bruto
+    else:
+        # Vazia ou com NUL dentro dos valores
+        codificados = [valor.encode("utf-8") for valor in valores]
+        offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(valor) for valor in codificados], dtype=np.int64)
+        dados = np.frombuffer(b"".join(codificados), dtype=np.uint8)
+    return offsets, dados
+
+
+class ColunaTexto:
+    """Coluna de texto mapeada em memória; decodifica apenas as linhas acessadas."""
+
+    def __init__(self, offsets: np.ndarray, dados: np.ndarray):
+        self._offsets = offsets
+        self._dados = dados
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, linha: int) -> str:
+        inicio, fim = self._offsets[linha], self._offsets[linha + 1]
+        return self._dados[inicio:fim].tobytes().decode("utf-8")
+
+
+class PoolDocumentos:
+    """
+    Pool de documentos aberto em modo somente leitura (zero-copy).
+
+    Exemplo:
+        PoolDocumentos.escrever("pool_nfs", documentos)
+        pool = PoolDocumentos.abrir("pool_nfs")
+        for linha in pool.candidatos(1500.00, data="2025-01-15"):
+            documento = pool[linha]
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        with open(os.path.join(caminho, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        if self.meta.get("formato") != FORMATO_POOL:
+            raise ValueError(f"Formato de pool não suportado: {self.meta.get('formato')}")
+        self._atribuir(lambda nome: np.load(os.path.join(caminho, f"{nome}.npy"), mmap_mode="r"))
+
+    def _atribuir(self, carregar: Callable[[str], np.ndarray]) -> None:
+        self.valor_centavos = carregar("valor_centavos")
+        self.data_dias = carregar("data_dias")
+        self.posicao_original = carregar("posicao_original")
+        self.indice_data = carregar("indice_data")
+        self.datas_ordenadas = carregar("datas_ordenadas")
+        self._texto: Dict[str, ColunaTexto] = {
+            nome: ColunaTexto(carregar(f"{nome}.offsets"), carregar(f"{nome}.dados"))
+            for nome in self.meta["colunas_texto"] + [_COLUNA_EXTRAS]
+        }
+
+    @classmethod
+    def de_colunas(cls, colunas: Mapping[str, np.ndarray]) -> "PoolDocumentos":
+        """
+        Pool sobre arrays já em memória no layout de ``montar_colunas``
+        (ex.: blocos de memória compartilhada), sem arquivos.
+        """
+        pool = cls.__new__(cls)
+        pool.caminho = None
+        pool.meta = {
+            "formato": FORMATO_POOL,
+            "quantidade": len(colunas["valor_centavos"]),
+            "colunas_texto": list(COLUNAS_TEXTO),
+        }
+        pool._atribuir(colunas.__getitem__)
+        return pool
+
+    @classmethod
+    def abrir(cls, caminho: str) -> "PoolDocumentos":
+        return cls(caminho)
+
+    @classmethod
+    def escrever(cls, caminho: str, documentos: Iterable[Mapping[str, Any]]) -> "PoolDocumentos":
+        """
+        Grava o pool (ordenado por valor) e o abre.
+
+        ``meta.json`` é gravado por último: um diretório sem ele é uma
+        gravação incompleta e não é aberto.
+        """
+        valores: List[int] = []
+        datas: List[int] = []
+        textos: Dict[str, List[str]] = {nome: [] for nome in COLUNAS_TEXTO}
+        extras: List[str] = []
+        for documento in documentos:
+            valores.append(round(float(documento.get("valor_total") or 0) * 100))
+            datas.append(_data_para_dias(documento.get("data_documento")))
+            for nome in COLUNAS_TEXTO:
+                valor = documento.get(nome)
+                textos[nome].append("" if valor is None else str(valor))
+            restantes = {
+                chave: valor for chave, valor in documento.items()
+                if chave not in COLUNAS_TEXTO and chave not in _CAMPOS_NUMERICOS
+            }
+            extras.append(json.dumps(restantes, ensure_ascii=False, default=str) if restantes else "")
+
+        textos[_COLUNA_EXTRAS] = extras
+        return cls._gravar(caminho, np.array(valores, dtype=np.int64), np.array(datas, dtype=np.int32), textos)
+
+    @classmethod
+    def escrever_colunas(
+        cls,
+        caminho: str,
+        valor_centavos: np.ndarray,
+        data_dias: np.ndarray,
+        textos: Mapping[str, Sequence[str]]
+    ) -> "PoolDocumentos":
+        """
+        Grava o pool a partir de colunas já vetorizadas (sem dicionários por linha).
+
+        Args:
+            valor_centavos: int64 por documento
+            data_dias: int32, dias desde a época (``SEM_DATA`` se ausente)
+            textos: Colunas de ``COLUNAS_TEXTO`` e, opcionalmente, "extras"
+                (JSON por linha com os demais campos); ausentes ficam vazias
+        """
+        return cls._gravar(caminho, valor_centavos, data_dias, textos)
+
+    @staticmethod
+    def montar_colunas(
+        valor_centavos: np.ndarray,
+        data_dias: np.ndarray,
+        textos: Mapping[str, Sequence[str]]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Arrays do pool (ordenados por valor, índice por data, textos como
+        offsets + blob UTF-8), com os nomes dos arquivos ``.npy`` do layout.
+
+        Colunas de ``COLUNAS_TEXTO`` e "extras" ausentes em ``textos`` ficam vazias.
+        """
+        valor_centavos = np.asarray(valor_centavos, dtype=np.int64)
+        ordem = np.argsort(valor_centavos, kind="stable")
+        data_dias = np.asarray(data_dias, dtype=np.int32)[ordem]
+        indice_data = np.argsort(data_dias, kind="stable").astype(np.int64)
+        colunas = {
+            "valor_centavos": valor_centavos[ordem],
+            "data_dias": data_dias,
+            "posicao_original": ordem.astype(np.int64),
+            "indice_data": indice_data,
+            "datas_ordenadas": data_dias[indice_data],
+        }
+        vazia = np.full(len(valor_centavos), "", dtype=object)
+        for nome in COLUNAS_TEXTO + (_COLUNA_EXTRAS,):
+            colunas[f"{nome}.offsets"], colunas[f"{nome}.dados"] = codificar_texto(
+                np.asarray(textos.get(nome, vazia), dtype=object)[ordem]
+            )
+        return colunas
+
+    @classmethod
+    def _gravar(
+        cls,
+        caminho: str,
+        valor_centavos: np.ndarray,
+        data_dias: np.ndarray,
+        textos: Mapping[str, Sequence[str]]
+    ) -> "PoolDocumentos":
+        os.makedirs(caminho, exist_ok=True)
+        meta_caminho = os.path.join(caminho, "meta.json")
+        if os.path.exists(meta_caminho):
+            os.remove(meta_caminho)
+
+        for nome, coluna in cls.montar_colunas(valor_centavos, data_dias, textos).items():
+            np.save(os.path.join(caminho, f"{nome}.npy"), coluna)
+
+        _gravar_meta(caminho, len(valor_centavos))
+        return cls(caminho)
+
+    def colunas(self) -> Dict[str, np.ndarray]:
+        """Arrays do pool pelos nomes do layout (inverso de ``de_colunas``)."""
+        colunas = {
+            "valor_centavos": self.valor_centavos,
+            "data_dias": self.data_dias,
+            "posicao_original": self.posicao_original,
+            "indice_data": self.indice_data,
+            "datas_ordenadas": self.datas_ordenadas,
+        }
+        for nome, coluna in self._texto.items():
+            colunas[f"{nome}.offsets"], colunas[f"{nome}.dados"] = coluna._offsets, coluna._dados
+        return colunas
+
+    def __len__(self) -> int:
+        return len(self.valor_centavos)
+
+    def __reduce__(self) -> Tuple[Any, Tuple[str]]:
+        # Em outro processo o pool é reaberto do disco (mmap), sem copiar arrays
+        if self.caminho is None:
+            raise TypeError("Pool sem arquivo não é serializável; envie o descritor da memória compartilhada")
+        return (PoolDocumentos, (self.caminho,))
+
+    def __getitem__(self, linha: int) -> Dict[str, Any]:
+        return self.documento(linha)
+
+    def documento(self, linha: int) -> Dict[str, Any]:
+        """Materializa uma linha como dicionário no formato de classificação."""
+        linha = int(linha)
+        extras = self._texto[_COLUNA_EXTRAS][linha]
+        documento: Dict[str, Any] = json.loads(extras) if extras else {}
+        documento["valor_total"] = int(self.valor_centavos[linha]) / 100
+        data_documento = _dias_para_data(self.data_dias[linha])
+        if data_documento is not None:
+            documento["data_documento"] = data_documento
+        for nome in self.meta["colunas_texto"]:
+            valor = self._texto[nome][linha]
+            if valor:
+                documento[nome] = valor
+        return documento
+
+    def documentos(self, linhas: Iterable[int]) -> Iterator[Dict[str, Any]]:
+        for linha in linhas:
+            yield self.documento(linha)
+
+    def texto(self, coluna: str, linha: int) -> str:
+        """Valor de uma coluna de texto sem materializar a linha inteira."""
+        return self._texto[coluna][int(linha)]
+
+    def faixa_valor(self, minimo: float, maximo: float) -> Tuple[int, int]:
+        """Intervalo [inicio, fim) de linhas com valor_total em [minimo, maximo]."""
+        inicio = _buscar(self.valor_centavos, round(minimo * 100), "left")
+        fim = _buscar(self.valor_centavos, round(maximo * 100), "right")
+        return inicio, max(inicio, fim)
+
+    def faixa_data(self, inicio: Union[str, date], fim: Union[str, date]) -> np.ndarray:
+        """Linhas (visão sobre o índice secundário) com data_documento em [inicio, fim]."""
+        a = _buscar(self.datas_ordenadas, _data_para_dias(inicio), "left")
+        b = _buscar(self.datas_ordenadas, _data_para_dias(fim), "right")
+        return self.indice_data[a:max(a, b)]
+
+    def candidatos(
+        self,
+        valor: float,
+        data: Optional[Union[str, date]] = None,
+        tolerancia_percentual: float = 0.05,
+        tolerancia_absoluta: float = 50.0,
+        janela_dias: Optional[int] = 7
+    ) -> np.ndarray:
+        """
+        Linhas dentro da banda de tolerância de valor (e da janela de datas).
+
+        A banda é um superconjunto dos documentos que recebem score de valor
+        "dentro da tolerância" em ``calcular_matching_node`` (diferença até
+        ``tolerancia_absoluta`` e até ``tolerancia_percentual`` do maior valor).
+        O matching compara valores absolutos e ``valor_centavos`` guarda o
+        sinal (estornos, devoluções), então a banda é buscada em torno de
+        ``+|valor|`` e de ``-|valor|``; as linhas saem em ordem crescente.
+        O lado mais seletivo (valor ou data) é percorrido e o outro filtrado.
+        """
+        valor = abs(valor)
+        largura = min(tolerancia_absoluta, valor * tolerancia_percentual / (1 - tolerancia_percentual))
+        # largura < valor: as bandas dos dois sinais só coincidem em valor == 0
+        sinais = (-1, 1) if valor > 0 else (1,)
+        faixas = [self.faixa_valor(sinal * valor - largura, sinal * valor + largura) for sinal in sinais]
+
+        dias = _data_para_dias(data) if data is not None and janela_dias is not None else SEM_DATA
+        if dias == SEM_DATA:
+            return np.concatenate([np.arange(inicio, fim, dtype=np.int64) for inicio, fim in faixas])
+
+        a = _buscar(self.datas_ordenadas, dias - janela_dias, "left")
+        b = _buscar(self.datas_ordenadas, dias + janela_dias, "right")
+        if sum(fim - inicio for inicio, fim in faixas) <= b - a:
+            linhas_faixas = []
+            for inicio, fim in faixas:
+                datas = self.data_dias[inicio:fim]
+                selecionadas = (datas >= dias - janela_dias) & (datas <= dias + janela_dias)
+                linhas_faixas.append(inicio + np.flatnonzero(selecionadas))
+            return np.concatenate(linhas_faixas).astype(np.int64, copy=False)
+
+        linhas = self.indice_data[a:b]
+        dentro = np.zeros(len(linhas), dtype=bool)
+        for inicio, fim in faixas:
+            dentro |= (linhas >= inicio) & (linhas < fim)
+        return np.sort(linhas[dentro])
+
+class EscritorPool:
+    """
+    Grava um pool bloco a bloco, sem reunir os blocos em memória.
+
+    Cada bloco é anexado a arquivos temporários (valores, datas e, por coluna
+    de texto, comprimentos + bytes UTF-8). ``finalizar`` ordena só as colunas
+    numéricas e copia os textos para a ordem do pool em faixas de
+    ``linhas_por_copia`` linhas, lendo os bytes temporários por mmap. O
+    resultado é idêntico ao de ``PoolDocumentos.escrever_colunas`` com os
+    blocos concatenados.
+
+    Exemplo:
+        with EscritorPool("dados/pool_nfs") as escritor:
+            for bloco in blocos:
+                escritor.adicionar(bloco.valor_centavos, bloco.data_dias, bloco.textos)
+        pool = escritor.pool
+    """
+
+    _NOMES = COLUNAS_TEXTO + (_COLUNA_EXTRAS,)
+
+    def __init__(self, caminho: str, linhas_por_copia: int = 65_536):
+        self.caminho = caminho
+        self.linhas_por_copia = linhas_por_copia
+        self.quantidade = 0
+        self.pool: Optional[PoolDocumentos] = None
+        os.makedirs(caminho, exist_ok=True)
+        meta_caminho = os.path.join(caminho, "meta.json")
+        if os.path.exists(meta_caminho):
+            os.remove(meta_caminho)
+        self._temporario = os.path.join(caminho, ".parcial")
+        shutil.rmtree(self._temporario, ignore_errors=True)
+        os.makedirs(self._temporario)
+        self._arquivos = {
+            nome: open(os.path.join(self._temporario, nome), "wb")
+            for nome in ["valor_centavos", "data_dias"]
+            + [f"{coluna}.{parte}" for coluna in self._NOMES for parte in ("comprimentos", "dados")]
+        }
+
+    def adicionar(
+        self, valor_centavos: np.ndarray, data_dias: np.ndarray, textos: Mapping[str, Sequence[str]]
+    ) -> None:
+        """Anexa um bloco (mesmo formato de ``escrever_colunas``)."""
+        quantidade = len(valor_centavos)
+        np.asarray(valor_centavos, dtype=np.int64).tofile(self._arquivos["valor_centavos"])
+        np.asarray(data_dias, dtype=np.int32).tofile(self._arquivos["data_dias"])
+        vazia = np.full(quantidade, "", dtype=object)
+        for nome in self._NOMES:
+            offsets, dados = codificar_texto(textos.get(nome, vazia))
+            np.diff(offsets).tofile(self._arquivos[f"{nome}.comprimentos"])
+            dados.tofile(self._arquivos[f"{nome}.dados"])
+        self.quantidade += quantidade
+
+    def finalizar(self, **informacoes: Any) -> PoolDocumentos:
+        """Ordena, grava as colunas e ``meta.json`` (com ``informacoes`` extras) e abre o pool."""
+        for arquivo in self._arquivos.values():
+            arquivo.close()
+        ler = lambda nome, tipo: np.fromfile(os.path.join(self._temporario, nome), dtype=tipo)  # noqa: E731
+
+        valor_centavos = ler("valor_centavos", np.int64)
+        ordem = np.argsort(valor_centavos, kind="stable")
+        data_dias = ler("data_dias", np.int32)[ordem]
+        indice_data = np.argsort(data_dias, kind="stable").astype(np.int64)
+        numericas = {
+            "valor_centavos": valor_centavos[ordem],
+            "data_dias": data_dias,
+            "posicao_original": ordem.astype(np.int64),
+            "indice_data": indice_data,
+            "datas_ordenadas": data_dias[indice_data],
+        }
+        for nome, coluna in numericas.items():
+            np.save(os.path.join(self.caminho, f"{nome}.npy"), coluna)
+        del valor_centavos, data_dias, indice_data, numericas
+
+        for nome in self._NOMES:
+            self._copiar_texto(nome, ordem, ler(f"{nome}.comprimentos", np.int64))
+
+        shutil.rmtree(self._temporario, ignore_errors=True)
+        _gravar_meta(self.caminho, self.quantidade, **informacoes)
+        self.pool = PoolDocumentos(self.caminho)
+        return self.pool
+
+    def _copiar_texto(self, nome: str, ordem: np.ndarray, comprimentos: np.ndarray) -> None:
+        """Grava ``<nome>.offsets``/``<nome>.dados`` na ordem do pool, faixa a faixa."""
+        inicios = np.zeros(len(comprimentos) + 1, dtype=np.int64)
+        np.cumsum(comprimentos, out=inicios[1:])
+        ordenados = comprimentos[ordem]
+        offsets = np.zeros(len(ordenados) + 1, dtype=np.int64)
+        np.cumsum(ordenados, out=offsets[1:])
+        np.save(os.path.join(self.caminho, f"{nome}.offsets.npy"), offsets)
+
+        destino = os.path.join(self.caminho, f"{nome}.dados.npy")
+        total = int(offsets[-1])
+        if total == 0:
+            np.save(destino, np.zeros(0, dtype=np.uint8))
+            return
+        origem = np.memmap(os.path.join(self._temporario, f"{nome}.dados"), dtype=np.uint8, mode="r")
+        saida = np.lib.format.open_memmap(destino, mode="w+", dtype=np.uint8, shape=(total,))
+        for inicio in range(0, len(ordem), self.linhas_por_copia):
+            linhas = ordem[inicio:inicio + self.linhas_por_copia]
+            tamanhos = comprimentos[linhas]
+            a, b = offsets[inicio], offsets[inicio + len(linhas)]
+            # Posição de cada byte da faixa no arquivo temporário
+            deslocamento = np.repeat(inicios[linhas] - (offsets[inicio:inicio + len(linhas)] - a), tamanhos)
+            saida[a:b] = origem[deslocamento + np.arange(b - a)]
+        saida.flush()
+        del saida, origem
+
+    def __enter__(self) -> "EscritorPool":
+        return self
+
+    def __exit__(self, tipo, valor, rastro) -> None:
+        if tipo is None:
+            if self.pool is None:
+                self.finalizar()
+            return
+        for arquivo in self._arquivos.values():
+            arquivo.close()
+        shutil.rmtree(self._temporario, ignore_errors=True)
+
+
+__all__ = ["COLUNAS_TEXTO", "ColunaTexto", "EscritorPool", "PoolDocumentos", "SEM_DATA", "codificar_texto"]
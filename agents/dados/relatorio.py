@@ -0,0 +1,188 @@
+# agents/dados/relatorio.py
+"""
+Relatório agregado de conciliação em uma única passada.
+
+``RelatorioConciliacao`` acumula os resultados à medida que saem dos lotes
+(ou do modo contínuo), sem guardar os resultados: cada grupo (status,
+parceiro, CFOP, tipo de divergência) mantém só contadores e somas, então a
+memória é constante por grupo e não cresce com o volume.
+
+Valores são somados em módulo (débitos e créditos não se anulam) a partir de
+``valor_transacao``. Resultados compactos não trazem a transação nem o
+documento: informe-os em ``adicionar`` para agrupar por parceiro/CFOP e somar
+valores.
+
+Uso:
+    relatorio = RelatorioConciliacao()
+    for bloco in blocos:
+        relatorio.acumular(agente.conciliar_lote(bloco))
+    relatorio.resumo()["valor_conciliado"]
+    relatorio.quadro("parceiro")            # DataFrame por parceiro
+"""
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import pandas as pd
+
+DIMENSOES = ("status", "parceiro", "cfop", "divergencia")
+
+SEM_PARCEIRO = "(sem parceiro)"
+SEM_CFOP = "(sem CFOP)"
+
+
+class _Grupo:
+    """Contadores de um grupo do relatório."""
+
+    __slots__ = ("quantidade", "conciliados", "revisao", "valor_conciliado", "valor_nao_conciliado", "soma_score")
+
+    def __init__(self) -> None:
+        self.quantidade = 0
+        self.conciliados = 0
+        self.revisao = 0
+        self.valor_conciliado = 0.0
+        self.valor_nao_conciliado = 0.0
+        self.soma_score = 0.0
+
+    def somar(self, conciliado: bool, revisao: bool, valor: float, score: float) -> None:
+        self.quantidade += 1
+        self.soma_score += score
+        if revisao:
+            self.revisao += 1
+        if conciliado:
+            self.conciliados += 1
+            self.valor_conciliado += valor
+        else:
+            self.valor_nao_conciliado += valor
+
+    def mesclar(self, outro: "_Grupo") -> None:
+        for campo in self.__slots__:
+            setattr(self, campo, getattr(self, campo) + getattr(outro, campo))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "quantidade": self.quantidade,
+            "conciliados": self.conciliados,
+            "nao_conciliados": self.quantidade - self.conciliados,
+            "revisao": self.revisao,
+            "valor_conciliado": round(self.valor_conciliado, 2),
+            "valor_nao_conciliado": round(self.valor_nao_conciliado, 2),
+            "score_medio": self.soma_score / self.quantidade if self.quantidade else 0.0,
+        }
+
+
+def _valor(enum_ou_texto: Any) -> Any:
+    return getattr(enum_ou_texto, "value", enum_ou_texto)
+
+
+class RelatorioConciliacao:
+    """
+    Agregador incremental de resultados de conciliação.
+
+    Exemplo:
+        relatorio = RelatorioConciliacao()
+        for transacao, resultado in continuo.processar(eventos):
+            relatorio.adicionar(resultado, transacao=transacao)
+    """
+
+    def __init__(self) -> None:
+        self.total = _Grupo()
+        self.grupos: Dict[str, Dict[str, _Grupo]] = {dimensao: {} for dimensao in DIMENSOES}
+
+    def adicionar(
+        self,
+        resultado: Any,
+        transacao: Optional[Mapping[str, Any]] = None,
+        documento: Optional[Mapping[str, Any]] = None
+    ) -> None:
+        """
+        Acumula um resultado (dicionário completo, ``ResultadoConciliacao`` ou ``ResultadoCompacto``).
+
+        Args:
+            transacao: Transação do resultado, se ele não a ecoa (compacto)
+            documento: Documento conciliado, se o resultado não o ecoa
+        """
+        if isinstance(resultado, dict):
+            conciliacao = resultado.get("conciliacao") or {}
+            status = conciliacao.get("status")
+            conciliado = bool(conciliacao.get("conciliado"))
+            revisao = bool(resultado.get("needs_human_review"))
+            score = conciliacao.get("score_confianca") or 0.0
+            divergencias = [divergencia.get("tipo") for divergencia in conciliacao.get("divergencias") or ()]
+            cfop = conciliacao.get("cfop_origem")
+            transacao = transacao or resultado.get("transacao_bancaria")
+            documento = documento or resultado.get("classificacao_disponivel")
+        else:
+            status = _valor(resultado.status)
+            conciliado = resultado.conciliado
+            revisao = resultado.needs_human_review
+            score = resultado.score_confianca
+            # ResultadoCompacto guarda o tipo; ResultadoConciliacao, a Divergencia
+            divergencias = [_valor(getattr(divergencia, "tipo", divergencia)) for divergencia in resultado.divergencias]
+            cfop = getattr(resultado, "cfop_origem", None)
+
+        documento = documento or {}
+        valor = abs(float((transacao or {}).get("valor_transacao") or 0))
+        chaves = {
+            "status": status or "(sem status)",
+            "parceiro": documento.get("parceiro_nome") or SEM_PARCEIRO,
+            "cfop": str(cfop or documento.get("cfop") or SEM_CFOP),
+        }
+
+        self.total.somar(conciliado, revisao, valor, score)
+        for dimensao, chave in chaves.items():
+            self._grupo(dimensao, chave).somar(conciliado, revisao, valor, score)
+        for tipo in dict.fromkeys(divergencias):
+            self._grupo("divergencia", tipo).somar(conciliado, revisao, valor, score)
+
+    def acumular(self, resultados: Iterable[Any]) -> "RelatorioConciliacao":
+        """Acumula um lote de resultados (que ecoam a transação)."""
+        for resultado in resultados:
+            if resultado is not None:
+                self.adicionar(resultado)
+        return self
+
+    def mesclar(self, outro: "RelatorioConciliacao") -> "RelatorioConciliacao":
+        """Soma outro relatório a este (ex.: relatórios de partições)."""
+        self.total.mesclar(outro.total)
+        for dimensao, grupos in outro.grupos.items():
+            for chave, grupo in grupos.items():
+                self._grupo(dimensao, chave).mesclar(grupo)
+        return self
+
+    def _grupo(self, dimensao: str, chave: str) -> _Grupo:
+        grupos = self.grupos[dimensao]
+        grupo = grupos.get(chave)
+        if grupo is None:
+            grupo = grupos[chave] = _Grupo()
+        return grupo
+
+    def resumo(self) -> Dict[str, Any]:
+        """Totais do lote: quantidades, valores conciliado/não conciliado e fila de revisão."""
+        return {
+            **self.total.to_dict(),
+            "fila_revisao": self.total.revisao,
+            "por_status": {chave: grupo.quantidade for chave, grupo in self.grupos["status"].items()},
+        }
+
+    def quadro(self, dimensao: str) -> pd.DataFrame:
+        """Uma linha por grupo da dimensão, ordenada por quantidade."""
+        if dimensao not in self.grupos:
+            raise ValueError(f"Dimensão desconhecida: {dimensao!r} (use {', '.join(DIMENSOES)})")
+        linhas: List[Dict[str, Any]] = [
+            {dimensao: chave, **grupo.to_dict()} for chave, grupo in self.grupos[dimensao].items()
+        ]
+        colunas = [dimensao] + list(_Grupo().to_dict())
+        return pd.DataFrame(linhas, columns=colunas).sort_values(
+            ["quantidade", dimensao], ascending=[False, True], ignore_index=True
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "resumo": self.resumo(),
+            **{
+                dimensao: {chave: grupo.to_dict() for chave, grupo in grupos.items()}
+                for dimensao, grupos in self.grupos.items()
+            },
+        }
+
+
+__all__ = ["DIMENSOES", "RelatorioConciliacao"]
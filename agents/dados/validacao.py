@@ -0,0 +1,159 @@
+# agents/dados/validacao.py
+"""
+Validação vetorizada de lotes de entrada.
+
+Aplica as mesmas regras de ``validar_json_transacao`` (campos obrigatórios,
+valor numérico, data ISO ``YYYY-MM-DD``) coluna a coluna com pandas
+(``to_numeric``/``to_datetime`` com ``errors="coerce"``), em vez de um
+``float()``/``strptime`` por registro. O resultado separa o subconjunto limpo,
+já normalizado e no formato aceito por ``conciliar_lote``, de um relatório
+compacto com uma linha por registro rejeitado.
+"""
+from typing import Any, Dict, List, Mapping, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+CAMPOS_OBRIGATORIOS_TRANSACAO = ("data_transacao", "valor_transacao", "descricao_transacao", "tipo_transacao")
+CAMPOS_NUMERICOS_TRANSACAO = ("valor_transacao",)
+CAMPOS_DATA_TRANSACAO = ("data_transacao",)
+
+FORMATO_DATA = "%Y-%m-%d"
+
+
+def _transacoes(registros: Sequence[Any]) -> List[Mapping[str, Any]]:
+    """Extrai a transação de cada registro (estado completo ou transação pura)."""
+    transacoes = []
+    for registro in registros:
+        if not isinstance(registro, Mapping):
+            transacoes.append({})
+        elif isinstance(registro.get("transacao_bancaria"), Mapping):
+            transacoes.append(registro["transacao_bancaria"])
+        else:
+            transacoes.append(registro)
+    return transacoes
+
+
+def validar_lote(
+    registros: Union[pd.DataFrame, Sequence[Any]],
+    campos_obrigatorios: Sequence[str] = CAMPOS_OBRIGATORIOS_TRANSACAO,
+    campos_numericos: Sequence[str] = CAMPOS_NUMERICOS_TRANSACAO,
+    campos_data: Sequence[str] = CAMPOS_DATA_TRANSACAO,
+) -> Dict[str, Any]:
+    """
+    Valida um lote de transações de uma só vez.
+
+    Args:
+        registros: DataFrame de transações ou lista de dicionários, cada um
+            uma transação pura ou um estado com ``transacao_bancaria``
+        campos_obrigatorios: Campos que não podem estar ausentes/nulos
+        campos_numericos: Campos que devem ser números finitos
+        campos_data: Campos que devem ser datas no formato YYYY-MM-DD
+
+    Returns:
+        Dicionário com:
+            validos: registros aceitos com valores como float e datas
+                normalizadas; para lista, estados prontos para ``conciliar_lote``
+                (demais campos preservados); para DataFrame, o DataFrame filtrado
+                (ver ``estados_conciliacao``)
+            linhas_validas: posições dos registros aceitos na entrada
+            erros: DataFrame ``linha``/``erros`` com um registro rejeitado por
+                linha e os motivos separados por "; "
+            resumo: total, validos, rejeitados e contagem de erros por campo
+    """
+    if isinstance(registros, pd.DataFrame):
+        quadro = registros.reset_index(drop=True)
+        estados = originais = None
+    else:
+        estados = list(registros)
+        originais = _transacoes(estados)
+        quadro = pd.DataFrame.from_records(originais)
+    total = len(quadro) if estados is None else len(estados)
+    if len(quadro) != total:  # lista só com registros vazios
+        quadro = quadro.reindex(range(total))
+
+    motivos = []
+    numericos: Dict[str, pd.Series] = {}
+    datas: Dict[str, pd.Series] = {}
+    for campo in dict.fromkeys([*campos_obrigatorios, *campos_numericos, *campos_data]):
+        coluna = quadro[campo] if campo in quadro.columns else pd.Series(np.nan, index=quadro.index, dtype=object)
+        ausente = coluna.isna().to_numpy()
+        if campo in campos_obrigatorios:
+            motivos.append((campo, ausente, "ausente"))
+        if campo in campos_numericos:
+            convertido = pd.to_numeric(coluna, errors="coerce")
+            numericos[campo] = convertido
+            invalido = ~np.isfinite(convertido.to_numpy(dtype=float, na_value=np.nan)) & ~ausente
+            motivos.append((campo, invalido, "não numérico"))
+        if campo in campos_data:
+            convertido = pd.to_datetime(coluna, format=FORMATO_DATA, errors="coerce")
+            datas[campo] = convertido
+            motivos.append((campo, convertido.isna().to_numpy() & ~ausente, "data inválida (YYYY-MM-DD)"))
+
+    rejeitado = np.zeros(total, dtype=bool)
+    for _, mascara, _ in motivos:
+        rejeitado |= mascara
+    linhas_rejeitadas = np.flatnonzero(rejeitado)
+    linhas_validas = np.flatnonzero(~rejeitado)
+
+    # Mensagens só para as linhas rejeitadas
+    mensagens = np.full(len(linhas_rejeitadas), "", dtype=object)
+    erros_por_campo: Dict[str, int] = {}
+    for campo, mascara, motivo in motivos:
+        selecionadas = mascara[linhas_rejeitadas]
+        quantidade = int(selecionadas.sum())
+        if not quantidade:
+            continue
+        erros_por_campo[campo] = erros_por_campo.get(campo, 0) + quantidade
+        anteriores = mensagens[selecionadas]
+        separador = np.where(anteriores == "", "", "; ").astype(object)
+        mensagens[selecionadas] = anteriores + separador + f"{campo}: {motivo}"
+    erros = pd.DataFrame({"linha": linhas_rejeitadas, "erros": mensagens})
+
+    # Subconjunto limpo com tipos normalizados
+    normalizados = {
+        **{campo: convertido.iloc[linhas_validas].astype(float) for campo, convertido in numericos.items()},
+        **{campo: convertido.iloc[linhas_validas].dt.strftime(FORMATO_DATA) for campo, convertido in datas.items()},
+    }
+    if estados is None:
+        validos = quadro.iloc[linhas_validas].assign(**normalizados)
+    else:
+        # Só os campos normalizados são substituídos; o resto do registro é preservado
+        colunas = {campo: serie.tolist() for campo, serie in normalizados.items()}
+        validos = []
+        for posicao, linha in enumerate(linhas_validas.tolist()):
+            transacao = {**originais[linha], **{campo: valores[posicao] for campo, valores in colunas.items()}}
+            registro = estados[linha]
+            if registro is originais[linha]:
+                validos.append({"transacao_bancaria": transacao})
+            else:
+                validos.append({**registro, "transacao_bancaria": transacao})
+
+    return {
+        "validos": validos,
+        "linhas_validas": linhas_validas,
+        "erros": erros,
+        "resumo": {
+            "total": total,
+            "validos": int(len(linhas_validas)),
+            "rejeitados": int(len(linhas_rejeitadas)),
+            "erros_por_campo": erros_por_campo,
+        },
+    }
+
+
+def estados_conciliacao(transacoes: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Converte um DataFrame de transações em estados para ``conciliar_lote``."""
+    campos = list(transacoes.columns)
+    # Equivale a ``to_dict("records")``, sem o custo de conversão por célula
+    linhas = zip(*(transacoes[campo].tolist() for campo in campos))
+    return [{"transacao_bancaria": dict(zip(campos, valores))} for valores in linhas]
+
+
+__all__ = [
+    "CAMPOS_DATA_TRANSACAO",
+    "CAMPOS_NUMERICOS_TRANSACAO",
+    "CAMPOS_OBRIGATORIOS_TRANSACAO",
+    "estados_conciliacao",
+    "validar_lote",
+]
@@ -0,0 +1,19 @@
+"""
+Modos de execução em larga escala (partições, processos, diretório compartilhado,
+memória compartilhada, streaming).
+"""
+
+from .checkpoint import ExecucaoComCheckpoint
+from .continuo import ConciliadorContinuo
+from .memoria_compartilhada import ConciliadorMemoriaCompartilhada, TabelaCompartilhada
+from .particionamento import ConciliadorParticionado, conciliar_particao, particionar
+
+__all__ = [
+    "ConciliadorContinuo",
+    "ConciliadorMemoriaCompartilhada",
+    "ConciliadorParticionado",
+    "ExecucaoComCheckpoint",
+    "TabelaCompartilhada",
+    "conciliar_particao",
+    "particionar",
+]
@@ -0,0 +1,232 @@
+# agents/execucao/checkpoint.py
+"""
+Execução em lote retomável com checkpoints.
+
+A entrada é um arquivo NDJSON (um estado de conciliação por linha). O job
+processa blocos de ``intervalo`` linhas, anexa os resultados a
+``resultados.ndjson`` e só então grava ``checkpoint.json`` de forma atômica
+com o offset em bytes da entrada, o tamanho confirmado do arquivo de
+resultados e, opcionalmente, um snapshot de estado pendente.
+
+Ao retomar, o arquivo de resultados é truncado no tamanho confirmado (o que
+foi escrito depois do último checkpoint é descartado e reprocessado) e a
+leitura continua do offset salvo; um arquivo de resultados ausente ou menor
+que o confirmado interrompe a retomada (resultados perdidos): cada linha de entrada gera exatamente uma
+linha de resultado. Linhas que não são um objeto JSON (ex.: truncadas) geram
+um resultado ``Erro_Processamento`` e não interrompem o job.
+
+Uso:
+    python -m agents.execucao.checkpoint entrada.ndjson --diretorio job_01 --intervalo 5000
+"""
+import argparse
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from ..conciliador_bancario import ConciliadorBancarioAgent
+
+ARQUIVO_CHECKPOINT = "checkpoint.json"
+ARQUIVO_RESULTADOS = "resultados.ndjson"
+
+
+def _gravar_atomico(caminho: str, conteudo: Dict[str, Any]) -> None:
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(conteudo, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+def _estado_linha(linha: bytes) -> Union[Dict[str, Any], ValueError, None]:
+    """Estado de uma linha NDJSON; None se vazia, ValueError se não for um objeto JSON."""
+    if not linha.strip():
+        return None
+    try:
+        registro = json.loads(linha)
+    except ValueError as e:  # inclui JSONDecodeError e UTF-8 inválido
+        return ValueError(f"Linha NDJSON inválida: {e}")
+    if not isinstance(registro, dict):
+        return ValueError(f"Linha NDJSON não é um objeto: {type(registro).__name__}")
+    return registro if "transacao_bancaria" in registro else {"transacao_bancaria": registro}
+
+
+class ExecucaoComCheckpoint:
+    """
+    Job de conciliação em lote com retomada a partir do último checkpoint.
+
+    Exemplo:
+        job = ExecucaoComCheckpoint("jobs/extrato_2025_01", intervalo=5000)
+        resumo = job.executar("extrato_2025_01.ndjson")  # retoma se já iniciado
+    """
+
+    def __init__(
+        self,
+        diretorio: str,
+        agente: Optional[ConciliadorBancarioAgent] = None,
+        intervalo: int = 1000,
+        compacto: bool = False,
+        processar_bloco: Optional[Callable[[List[Dict[str, Any]]], List[Any]]] = None,
+        snapshot_pendente: Optional[Callable[[], Any]] = None,
+        restaurar_pendente: Optional[Callable[[Any], None]] = None
+    ):
+        """
+        Args:
+            diretorio: Local dos arquivos de checkpoint e resultados
+            agente: Agente usado no processamento (padrão: novo agente)
+            intervalo: Linhas de entrada por checkpoint
+            compacto: Se True, grava resultados no formato compacto
+            processar_bloco: Substitui ``agente.conciliar_lote`` (um resultado por estado)
+            snapshot_pendente: Retorna estado pendente serializável em JSON (ex.: buffers)
+            restaurar_pendente: Recebe o snapshot salvo ao retomar
+        """
+        if intervalo < 1:
+            raise ValueError("intervalo deve ser positivo")
+        self.diretorio = diretorio
+        self.agente = agente or ConciliadorBancarioAgent()
+        self.intervalo = intervalo
+        self.compacto = compacto
+        self.processar_bloco = processar_bloco or (
+            lambda estados: self.agente.conciliar_lote(estados, compacto=self.compacto)
+        )
+        self.snapshot_pendente = snapshot_pendente
+        self.restaurar_pendente = restaurar_pendente
+        os.makedirs(diretorio, exist_ok=True)
+
+    @property
+    def caminho_resultados(self) -> str:
+        return os.path.join(self.diretorio, ARQUIVO_RESULTADOS)
+
+    @property
+    def caminho_checkpoint(self) -> str:
+        return os.path.join(self.diretorio, ARQUIVO_CHECKPOINT)
+
+    def checkpoint(self) -> Optional[Dict[str, Any]]:
+        """Último checkpoint gravado, se houver."""
+        if not os.path.exists(self.caminho_checkpoint):
+            return None
+        with open(self.caminho_checkpoint, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def executar(self, caminho_entrada: str, max_linhas: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Processa (ou retoma) o arquivo de entrada até o fim.
+
+        Args:
+            caminho_entrada: Arquivo NDJSON de estados (ou transações puras)
+            max_linhas: Para após processar esta quantidade de linhas nesta chamada
+
+        Returns:
+            Resumo com linhas processadas, ponto de retomada e checkpoints gravados
+
+        Raises:
+            ValueError: Se o checkpoint é de outra entrada ou se o arquivo de
+                resultados está ausente ou menor que o tamanho confirmado
+        """
+        checkpoint = self.checkpoint() or {
+            "entrada": os.path.abspath(caminho_entrada),
+            "offset_entrada": 0,
+            "linhas": 0,
+            "bytes_resultados": 0,
+            "pendente": None,
+            "concluido": False
+        }
+        if checkpoint["entrada"] != os.path.abspath(caminho_entrada):
+            raise ValueError(
+                f"Checkpoint de {self.diretorio} pertence a outra entrada: {checkpoint['entrada']}"
+            )
+
+        retomado_de = checkpoint["linhas"]
+        if checkpoint["pendente"] is not None and self.restaurar_pendente is not None:
+            self.restaurar_pendente(checkpoint["pendente"])
+
+        gravados = os.path.getsize(self.caminho_resultados) if os.path.exists(self.caminho_resultados) else 0
+        if gravados < checkpoint["bytes_resultados"]:
+            raise ValueError(
+                f"{self.caminho_resultados} tem {gravados} bytes, menos que os {checkpoint['bytes_resultados']} "
+                "confirmados no checkpoint: resultados perdidos, o job não pode ser retomado"
+            )
+
+        # Descarta resultados gravados após o último checkpoint
+        with open(self.caminho_resultados, "ab") as saida:
+            saida.truncate(checkpoint["bytes_resultados"])
+
+        checkpoints = 0
+        processadas = 0
+        with open(caminho_entrada, "rb") as entrada, open(self.caminho_resultados, "ab") as saida:
+            entrada.seek(checkpoint["offset_entrada"])
+            while not checkpoint["concluido"]:
+                limite = self.intervalo if max_linhas is None else min(self.intervalo, max_linhas - processadas)
+                if limite <= 0:
+                    break
+
+                estados = []
+                for _ in range(limite):
+                    linha = entrada.readline()
+                    if not linha:
+                        break
+                    estados.append(_estado_linha(linha))
+                if not estados:
+                    checkpoint["concluido"] = True
+                else:
+                    self._gravar_bloco(saida, checkpoint["linhas"], estados)
+                    checkpoint["linhas"] += len(estados)
+                    processadas += len(estados)
+
+                checkpoint["offset_entrada"] = entrada.tell()
+                checkpoint["bytes_resultados"] = saida.tell()
+                if self.snapshot_pendente is not None:
+                    checkpoint["pendente"] = self.snapshot_pendente()
+                _gravar_atomico(self.caminho_checkpoint, checkpoint)
+                checkpoints += 1
+
+        return {
+            "linhas_processadas": processadas,
+            "linhas_totais": checkpoint["linhas"],
+            "retomado_de": retomado_de,
+            "checkpoints": checkpoints,
+            "concluido": checkpoint["concluido"]
+        }
+
+    def _gravar_bloco(
+        self, saida: Any, primeira_linha: int, estados: List[Union[Dict[str, Any], ValueError, None]]
+    ) -> None:
+        """Processa um bloco e grava uma linha de resultado por linha de entrada."""
+        validos = [estado for estado in estados if isinstance(estado, dict)]
+        resultados = iter(self.processar_bloco(validos) if validos else [])
+
+        linhas = []
+        for deslocamento, estado in enumerate(estados):
+            if isinstance(estado, ValueError):
+                # Linha malformada: resultado de erro, para o offset avançar além dela
+                resultado = self.agente.resultado_erro({}, estado, self.compacto)
+            else:
+                resultado = next(resultados) if estado is not None else None
+            if self.compacto and resultado is not None and hasattr(resultado, "to_dict"):
+                resultado = resultado.to_dict()
+            linhas.append(json.dumps(
+                {"linha": primeira_linha + deslocamento, "resultado": resultado},
+                ensure_ascii=False, default=str
+            ))
+        saida.write(("\n".join(linhas) + "\n").encode("utf-8"))
+        saida.flush()
+        os.fsync(saida.fileno())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Conciliação em lote retomável")
+    parser.add_argument("entrada", help="Arquivo NDJSON de estados de conciliação")
+    parser.add_argument("--diretorio", required=True, help="Diretório de checkpoint e resultados")
+    parser.add_argument("--intervalo", type=int, default=1000, help="Linhas por checkpoint")
+    parser.add_argument("--compacto", action="store_true", help="Grava resultados no formato compacto")
+    args = parser.parse_args()
+
+    job = ExecucaoComCheckpoint(args.diretorio, intervalo=args.intervalo, compacto=args.compacto)
+    print(json.dumps(job.executar(args.entrada), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
+
+
+__all__ = ["ExecucaoComCheckpoint"]
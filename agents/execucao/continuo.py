@@ -0,0 +1,305 @@
+# agents/execucao/continuo.py
+"""
+Conciliação contínua (streaming) de transações e documentos intradiários.
+
+Créditos PIX podem chegar antes da emissão da NF-e e vice-versa. Cada evento
+(transação ou documento) é comparado com os pendentes do lado oposto; sem
+par, fica pendente até surgir a contrapartida ou sair da janela.
+
+Pendentes ficam em um buffer por lado, indexado por:
+
+- valor: lista ordenada de centavos; só a faixa de valores que ainda pode
+  alcançar ``score_minimo`` (limite superior de ``pontuar``) é avaliada
+- data: heap pela data do item, para expirar em ordem
+
+A marca d'água é a maior data de evento vista. Itens com data anterior a
+``marca - janela_data_dias`` expiram: transações saem como
+``Nao_Conciliado`` e documentos vão para ``ao_expirar_documento``. A memória
+é limitada pelo volume de eventos dentro da janela, não pelo histórico.
+
+No modo contínuo a janela é um limite rígido: um par só é considerado se as
+datas distam no máximo ``janela_data_dias`` (ou se alguma delas falta).
+
+Uso:
+    continuo = ConciliadorContinuo(agente, compacto=True)
+    for transacao, resultado in continuo.processar(eventos):  # ("transacao" | "documento", dict)
+        ...
+    for transacao, resultado in continuo.encerrar():
+        ...
+"""
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from math import ceil, floor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from models.conciliacao import ResultadoConciliacao, StatusConciliacao
+
+from ..conciliador_bancario import ConciliadorBancarioAgent
+from ..matching.classificador_tipo import CLASSIFICADOR_PADRAO
+from ..matching.selecao import PESOS, melhor_candidato, pontuar
+
+Emissao = Tuple[Mapping[str, Any], Any]
+
+_EPOCA_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _dias(valor: Any) -> Optional[int]:
+    try:
+        return date.fromisoformat(str(valor)[:10]).toordinal() - _EPOCA_ORDINAL
+    except ValueError:
+        return None
+
+
+def _centavos(valor: Any) -> int:
+    return abs(round(float(valor or 0) * 100))
+
+
+class _Pendentes:
+    """Itens pendentes de um lado, indexados por valor e por data."""
+
+    __slots__ = ("itens", "valores", "expiracao")
+
+    def __init__(self) -> None:
+        self.itens: Dict[int, Tuple[Mapping[str, Any], int, Optional[int]]] = {}
+        self.valores: List[Tuple[int, int]] = []
+        # (data de referência, sequência); entradas já conciliadas são
+        # descartadas ao chegar a vez delas (remoção preguiçosa)
+        self.expiracao: List[Tuple[int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.itens)
+
+    def adicionar(
+        self, sequencia: int, item: Mapping[str, Any], centavos: int, dias: Optional[int], referencia: Optional[int]
+    ) -> None:
+        self.itens[sequencia] = (item, centavos, dias)
+        insort(self.valores, (centavos, sequencia))
+        if referencia is not None:
+            heapq.heappush(self.expiracao, (referencia, sequencia))
+
+    def remover(self, sequencia: int) -> Mapping[str, Any]:
+        item, centavos, _ = self.itens.pop(sequencia)
+        del self.valores[bisect_left(self.valores, (centavos, sequencia))]
+        return item
+
+    def candidatos(
+        self, centavos: int, dias: Optional[int], margem: Optional[float], janela: int
+    ) -> List[Tuple[int, Mapping[str, Any]]]:
+        """Pendentes na faixa de valor e na janela de datas, em ordem de chegada."""
+        if margem is None:
+            faixa = self.valores
+        else:
+            minimo = floor(centavos * (1 - margem)) - 1
+            maximo = ceil(centavos / (1 - margem)) + 1 if margem < 1 else float("inf")
+            faixa = self.valores[
+                bisect_left(self.valores, (minimo, -1)):bisect_right(self.valores, (maximo, float("inf")))
+            ]
+        selecionados = []
+        for _, sequencia in faixa:
+            item, _, dias_item = self.itens[sequencia]
+            if dias is None or dias_item is None or abs(dias - dias_item) <= janela:
+                selecionados.append((sequencia, item))
+        selecionados.sort(key=lambda par: par[0])
+        return selecionados
+
+    def expirar(self, limite: float) -> List[Mapping[str, Any]]:
+        """Remove e devolve os itens com data de referência anterior a ``limite``."""
+        expirados = []
+        while self.expiracao and self.expiracao[0][0] < limite:
+            _, sequencia = heapq.heappop(self.expiracao)
+            if sequencia in self.itens:
+                expirados.append(self.remover(sequencia))
+        return expirados
+
+    def esvaziar(self) -> List[Mapping[str, Any]]:
+        itens = [item for _, (item, _, _) in sorted(self.itens.items())]
+        self.itens.clear()
+        self.valores.clear()
+        self.expiracao.clear()
+        return itens
+
+
+class ConciliadorContinuo:
+    """
+    Concilia eventos de transações e documentos à medida que chegam.
+
+    Exemplo:
+        continuo = ConciliadorContinuo(ao_expirar_documento=fila_revisao.append)
+        emitidos = continuo.receber_documento(nfe)       # [] (fica pendente)
+        emitidos = continuo.receber_transacao(pix)       # [(pix, resultado)]
+    """
+
+    def __init__(
+        self,
+        agente: Optional[ConciliadorBancarioAgent] = None,
+        compacto: bool = False,
+        ao_expirar_documento: Optional[Callable[[Mapping[str, Any]], None]] = None
+    ):
+        """
+        Args:
+            agente: Agente usado no veredito e cujos critérios definem score
+                mínimo e janela (padrão: novo agente)
+            compacto: Se True, resultados são ResultadoCompacto
+            ao_expirar_documento: Chamado com cada documento que sai da janela sem par
+        """
+        self.agente = agente or ConciliadorBancarioAgent()
+        self.compacto = compacto
+        self.ao_expirar_documento = ao_expirar_documento
+        self.transacoes = _Pendentes()
+        self.documentos = _Pendentes()
+        self.marca_dagua: Optional[int] = None
+        self._sequencia = 0
+        self._prontos: List[Dict[str, Any]] = []
+        self._expiradas: List[Mapping[str, Any]] = []
+        self._contagens = {"pareadas": 0, "expiradas": 0, "documentos_expirados": 0, "taxas": 0}
+
+    # === ENTRADA DE EVENTOS ===
+
+    def receber_transacao(self, transacao: Mapping[str, Any]) -> List[Emissao]:
+        """Registra uma transação; devolve as transações finalizadas por este evento."""
+        self._adicionar_transacao(transacao)
+        return self._emitir()
+
+    def receber_documento(self, documento: Mapping[str, Any]) -> List[Emissao]:
+        """Registra um documento; devolve as transações finalizadas por este evento."""
+        self._adicionar_documento(documento)
+        return self._emitir()
+
+    def processar(self, eventos: Iterable[Tuple[str, Mapping[str, Any]]], tamanho_lote: int = 500) -> Iterator[Emissao]:
+        """
+        Consome eventos ("transacao" ou "documento", registro) e emite resultados.
+
+        Os pares encontrados são acumulados e passam pelo workflow em lotes de
+        até ``tamanho_lote`` (``conciliar_lote``), amortizando o custo por chamada.
+        """
+        adicionar = {"transacao": self._adicionar_transacao, "documento": self._adicionar_documento}
+        for tipo, registro in eventos:
+            if tipo not in adicionar:
+                raise ValueError(f"Tipo de evento desconhecido: {tipo!r} (use transacao ou documento)")
+            adicionar[tipo](registro)
+            if len(self._prontos) + len(self._expiradas) >= tamanho_lote:
+                yield from self._emitir()
+        yield from self._emitir()
+
+    def encerrar(self) -> List[Emissao]:
+        """Fim do fluxo: todas as transações pendentes saem como não conciliadas."""
+        self._expiradas.extend(self.transacoes.esvaziar())
+        for documento in self.documentos.esvaziar():
+            self._documento_expirado(documento)
+        return self._emitir()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {
+            "pendentes_transacoes": len(self.transacoes),
+            "pendentes_documentos": len(self.documentos),
+            "marca_dagua": self.marca_dagua,
+            **self._contagens
+        }
+
+    # === MATCHING ===
+
+    def _margem_valor(self) -> Optional[float]:
+        """
+        Maior diferença relativa de valor que ainda pode alcançar ``score_minimo``.
+
+        Data e descrição valem no máximo 1; o score de valor nunca passa de
+        ``1 - diferença relativa``. None quando o valor sozinho não poda.
+        """
+        criterios = self.agente.criterios_config
+        score_valor_minimo = (criterios.score_minimo - PESOS["data"] - PESOS["descricao"]) / PESOS["valor"]
+        return 1 - score_valor_minimo if score_valor_minimo > 0 else None
+
+    def _adicionar_transacao(self, transacao: Mapping[str, Any]) -> None:
+        criterios = self.agente.criterios_config
+        classificador = criterios.get("classificador_tipo") or CLASSIFICADOR_PADRAO
+        if classificador.classificar(transacao.get("descricao_transacao", "")) == "taxa_bancaria":
+            self._contagens["taxas"] += 1
+            self._prontos.append({"transacao_bancaria": transacao, "classificacao_disponivel": None})
+            return
+
+        centavos, dias = _centavos(transacao.get("valor_transacao")), _dias(transacao.get("data_transacao"))
+        candidatos = self.documentos.candidatos(centavos, dias, self._margem_valor(), criterios.janela_data_dias)
+        escolhido = melhor_candidato(
+            transacao, [documento for _, documento in candidatos], criterios, limiar=criterios.score_minimo
+        )
+        if escolhido is not None:
+            documento = self.documentos.remover(candidatos[escolhido[0]][0])
+            self._prontos.append({"transacao_bancaria": transacao, "classificacao_disponivel": documento})
+        else:
+            self._sequencia += 1
+            self.transacoes.adicionar(self._sequencia, transacao, centavos, dias, self._referencia(dias))
+        self._avancar(dias)
+
+    def _adicionar_documento(self, documento: Mapping[str, Any]) -> None:
+        criterios = self.agente.criterios_config
+        centavos, dias = _centavos(documento.get("valor_total")), _dias(documento.get("data_documento"))
+        candidatos = self.transacoes.candidatos(centavos, dias, self._margem_valor(), criterios.janela_data_dias)
+
+        # Transação de maior score; em empate, a que chegou primeiro
+        melhor: Optional[Tuple[float, int]] = None
+        for sequencia, transacao in candidatos:
+            score = pontuar(transacao, documento, criterios)["score_total"]
+            if score >= criterios.score_minimo and (melhor is None or score > melhor[0]):
+                melhor = (score, sequencia)
+        if melhor is not None:
+            transacao = self.transacoes.remover(melhor[1])
+            self._prontos.append({"transacao_bancaria": transacao, "classificacao_disponivel": documento})
+        else:
+            self._sequencia += 1
+            self.documentos.adicionar(self._sequencia, documento, centavos, dias, self._referencia(dias))
+        self._avancar(dias)
+
+    def _referencia(self, dias: Optional[int]) -> Optional[int]:
+        # Sem data, o item expira pela marca d'água de chegada (ou só no encerramento)
+        return dias if dias is not None else self.marca_dagua
+
+    def _avancar(self, dias: Optional[int]) -> None:
+        """Avança a marca d'água e expira o que ficou fora da janela."""
+        if dias is None or (self.marca_dagua is not None and dias <= self.marca_dagua):
+            return
+        self.marca_dagua = dias
+        limite = dias - self.agente.criterios_config.janela_data_dias
+        self._expiradas.extend(self.transacoes.expirar(limite))
+        for documento in self.documentos.expirar(limite):
+            self._documento_expirado(documento)
+
+    def _documento_expirado(self, documento: Mapping[str, Any]) -> None:
+        self._contagens["documentos_expirados"] += 1
+        if self.ao_expirar_documento is not None:
+            self.ao_expirar_documento(documento)
+
+    # === SAÍDA ===
+
+    def _emitir(self) -> List[Emissao]:
+        """Veredito dos pares prontos (workflow em lote) e das transações expiradas."""
+        prontos, self._prontos = self._prontos, []
+        expiradas, self._expiradas = self._expiradas, []
+        emitidos: List[Emissao] = []
+        if prontos:
+            resultados = self.agente.conciliar_lote(prontos, compacto=self.compacto)
+            emitidos.extend((estado["transacao_bancaria"], resultado) for estado, resultado in zip(prontos, resultados))
+            self._contagens["pareadas"] += sum(1 for estado in prontos if estado["classificacao_disponivel"])
+        for transacao in expiradas:
+            emitidos.append((transacao, self._nao_conciliado(transacao)))
+        self._contagens["expiradas"] += len(expiradas)
+        return emitidos
+
+    def _nao_conciliado(self, transacao: Mapping[str, Any]) -> Any:
+        janela = self.agente.criterios_config.janela_data_dias
+        resultado = ResultadoConciliacao(
+            conciliado=False,
+            id_lancamento_contabil=None,
+            documento_origem=None,
+            score_confianca=0.0,
+            status=StatusConciliacao.NAO_CONCILIADO,
+            needs_human_review=True,
+            criterio_principal="expiracao_janela",
+            motivo_nao_conciliacao=f"Sem documento correspondente na janela de {janela} dias"
+        )
+        if self.compacto:
+            return resultado.compacto()
+        return {"transacao_bancaria": transacao, **resultado.to_dict()}
+
+
+__all__ = ["ConciliadorContinuo", "Emissao"]
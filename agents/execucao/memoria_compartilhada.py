@@ -0,0 +1,412 @@
+# agents/execucao/memoria_compartilhada.py
+"""
+Transporte sem cópia para processos workers via ``multiprocessing.shared_memory``.
+
+No modo particionado cada tarefa leva as transações e os documentos da sua
+partição como dicionários serializados com pickle, e cada resultado volta
+pelo mesmo caminho. Aqui transações e documentos são gravados uma única vez,
+pelo processo principal, em blocos de memória compartilhada:
+
+- entradas: um registro JSON por linha (offsets + blob UTF-8), agrupados por
+  partição (mesma chave e mesma ordem de ``ConciliadorParticionado``), mais a
+  posição original de cada linha
+- saída: arrays compactos (código de status, score, conciliado, revisão,
+  posição do documento escolhido), preenchidos nas posições originais
+
+Cada tarefa enviada ao worker é só (descritores, faixas de partições): o
+worker anexa os blocos uma vez por processo, em modo somente leitura para as
+entradas, decodifica apenas as linhas das suas partições e escreve o
+resultado direto na saída. A escolha de documentos é a de
+``conciliar_particao`` (``escolher_documentos``: documentos da mesma
+partição, melhor candidato ou atribuição 1:1 com ``atribuicao_otima``), então
+os resultados são os mesmos do modo particionado.
+
+Valores que não são tipos JSON (datas, numpy) passam pelo JSON como número
+(numpy) ou texto.
+
+Uso:
+    conciliador = ConciliadorMemoriaCompartilhada(max_processos=8, atribuicao_otima=True)
+    quadro = conciliador.conciliar(transacoes, documentos)
+    quadro["status"].value_counts()
+"""
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from models.conciliacao import StatusConciliacao
+
+from ..conciliador_bancario import ConciliadorBancarioAgent
+from ..dados.pool_documentos import ColunaTexto, codificar_texto
+from .particionamento import ChaveParticao, escolher_documentos, indices_particoes
+
+# Código de status na saída = posição nesta tupla
+STATUS_CODIGOS: Tuple[StatusConciliacao, ...] = tuple(StatusConciliacao)
+_CODIGO_STATUS = {status: codigo for codigo, status in enumerate(STATUS_CODIGOS)}
+
+_ALINHAMENTO = 64
+
+# (início, fim) das transações e (início, fim) dos documentos de uma partição
+FaixaParticao = Tuple[int, int, int, int]
+
+
+def _anexar_memoria(nome: str) -> shared_memory.SharedMemory:
+    # A partir do 3.13 o anexo não é registrado no resource_tracker (só quem cria remove)
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=nome, track=False)
+    return shared_memory.SharedMemory(name=nome)
+
+
+class TabelaCompartilhada:
+    """
+    Arrays numpy nomeados em um único bloco de memória compartilhada.
+
+    Quem cria é dono do bloco e o remove em ``liberar`` (ou ao sair do
+    ``with``); os workers anexam pelo ``descritor``, um dicionário pequeno
+    e serializável com o nome do bloco e dtype/forma/deslocamento de cada array.
+
+    Exemplo:
+        with TabelaCompartilhada.criar({"valor": valores}) as tabela:
+            executor.submit(funcao, tabela.descritor)
+        # no worker:
+        tabela = TabelaCompartilhada.anexar(descritor)
+        tabela["valor"]                    # visão somente leitura, sem cópia
+    """
+
+    def __init__(self, memoria: shared_memory.SharedMemory, layout: Dict[str, Any], dono: bool, somente_leitura: bool):
+        self._memoria = memoria
+        self.layout = layout
+        self.dono = dono
+        self._arrays: Dict[str, np.ndarray] = {}
+        for nome, (dtype, forma, deslocamento) in layout.items():
+            array = np.ndarray(tuple(forma), dtype=np.dtype(dtype), buffer=memoria.buf, offset=deslocamento)
+            if somente_leitura:
+                array.flags.writeable = False
+            self._arrays[nome] = array
+
+    @classmethod
+    def criar(cls, arrays: Mapping[str, np.ndarray]) -> "TabelaCompartilhada":
+        """Copia ``arrays`` para um bloco novo (a única cópia do transporte)."""
+        layout: Dict[str, Any] = {}
+        tamanho = 0
+        for nome, array in arrays.items():
+            array = np.asarray(array)
+            layout[nome] = (array.dtype.str, array.shape, tamanho)
+            tamanho += -(-array.nbytes // _ALINHAMENTO) * _ALINHAMENTO
+        memoria = shared_memory.SharedMemory(create=True, size=max(tamanho, 1))
+        tabela = cls(memoria, layout, dono=True, somente_leitura=False)
+        for nome, array in arrays.items():
+            tabela._arrays[nome][...] = array
+        return tabela
+
+    @classmethod
+    def vazia(cls, colunas: Mapping[str, Tuple[Any, int]]) -> "TabelaCompartilhada":
+        """Bloco novo com arrays zerados de (dtype, quantidade)."""
+        return cls.criar({nome: np.zeros(quantidade, dtype=dtype) for nome, (dtype, quantidade) in colunas.items()})
+
+    @classmethod
+    def anexar(cls, descritor: Mapping[str, Any], somente_leitura: bool = True) -> "TabelaCompartilhada":
+        """Anexa um bloco criado em outro processo, sem copiar os dados."""
+        return cls(_anexar_memoria(descritor["nome"]), descritor["layout"], dono=False, somente_leitura=somente_leitura)
+
+    @property
+    def descritor(self) -> Dict[str, Any]:
+        return {"nome": self._memoria.name, "layout": self.layout}
+
+    @property
+    def tamanho_bytes(self) -> int:
+        return self._memoria.size
+
+    def __getitem__(self, nome: str) -> np.ndarray:
+        return self._arrays[nome]
+
+    def __contains__(self, nome: str) -> bool:
+        return nome in self._arrays
+
+    def texto(self, nome: str) -> ColunaTexto:
+        """Coluna de texto gravada como ``<nome>.offsets`` + ``<nome>.dados``."""
+        return ColunaTexto(self._arrays[f"{nome}.offsets"], self._arrays[f"{nome}.dados"])
+
+    def fechar(self) -> None:
+        """
+        Solta as visões e o mapeamento deste processo (o bloco continua existindo).
+
+        Arrays obtidos da tabela fora dela (ex.: um ``PoolDocumentos.de_colunas``)
+        precisam ter sido descartados antes; senão ``BufferError``.
+        """
+        self._arrays.clear()
+        self._memoria.close()
+
+    def liberar(self) -> None:
+        """Fecha e, se este processo é o dono, remove o bloco do sistema."""
+        self.fechar()
+        if self.dono:
+            self._memoria.unlink()
+
+    def __enter__(self) -> "TabelaCompartilhada":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.liberar()
+
+    def __reduce__(self) -> Any:
+        raise TypeError("Envie tabela.descritor aos workers, não a tabela")
+
+
+def _valor_json(valor: Any) -> Any:
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return str(valor)
+
+
+def registros(dados: Union[pd.DataFrame, Sequence[Mapping[str, Any]]]) -> List[Dict[str, Any]]:
+    """Linhas como dicionários; de um DataFrame, sem os campos ausentes (NaN/None)."""
+    if isinstance(dados, pd.DataFrame):
+        return [
+            {campo: valor for campo, valor in linha.items() if not (valor is None or valor != valor)}
+            for linha in dados.to_dict("records")
+        ]
+    return [dict(registro) for registro in dados]
+
+
+def compartilhar_registros(linhas: Sequence[Mapping[str, Any]], posicoes: Sequence[int]) -> TabelaCompartilhada:
+    """
+    Registros ``linhas[posicao]`` na ordem de ``posicoes``: JSON por linha
+    (``registros``) e a posição de cada um na entrada (``posicao_original``).
+    """
+    arrays: Dict[str, np.ndarray] = {"posicao_original": np.asarray(posicoes, dtype=np.int64)}
+    arrays["registros.offsets"], arrays["registros.dados"] = codificar_texto([
+        json.dumps(linhas[posicao], ensure_ascii=False, default=_valor_json) for posicao in posicoes
+    ])
+    return TabelaCompartilhada.criar(arrays)
+
+
+def ler_registros(tabela: TabelaCompartilhada, inicio: int, fim: int) -> List[Dict[str, Any]]:
+    """Decodifica as linhas [inicio, fim) de uma tabela de ``compartilhar_registros``."""
+    coluna = tabela.texto("registros")
+    return [json.loads(coluna[linha]) for linha in range(inicio, fim)]
+
+
+def saida_compartilhada(quantidade: int) -> TabelaCompartilhada:
+    """Arrays de resultado: código de status, score, conciliado, revisão e documento escolhido."""
+    saida = TabelaCompartilhada.vazia({
+        "status": (np.int8, quantidade),
+        "score_confianca": (np.float32, quantidade),
+        "conciliado": (np.bool_, quantidade),
+        "needs_human_review": (np.bool_, quantidade),
+        "documento": (np.int64, quantidade),
+    })
+    saida["documento"][:] = -1
+    return saida
+
+
+# === WORKER ===
+
+# Anexos e agente reaproveitados entre tarefas do mesmo processo
+_ANEXOS: Dict[Tuple[str, bool], TabelaCompartilhada] = {}
+_AGENTES: Dict[str, ConciliadorBancarioAgent] = {}
+
+
+def _anexo(descritor: Mapping[str, Any], somente_leitura: bool = True) -> TabelaCompartilhada:
+    chave = (descritor["nome"], somente_leitura)
+    tabela = _ANEXOS.get(chave)
+    if tabela is None:
+        tabela = _ANEXOS[chave] = TabelaCompartilhada.anexar(descritor, somente_leitura)
+    return tabela
+
+
+def _agente(config: Optional[Dict[str, Any]]) -> ConciliadorBancarioAgent:
+    chave = json.dumps(config or {}, sort_keys=True, default=str)
+    agente = _AGENTES.get(chave)
+    if agente is None:
+        agente = _AGENTES[chave] = ConciliadorBancarioAgent()
+        if config:
+            agente.update_config(config)
+    return agente
+
+
+def conciliar_faixa(
+    transacoes: TabelaCompartilhada,
+    documentos: TabelaCompartilhada,
+    saida: TabelaCompartilhada,
+    particoes: Sequence[FaixaParticao],
+    agente: ConciliadorBancarioAgent,
+    atribuicao_otima: bool = False,
+    candidatos_por_transacao: int = 10
+) -> int:
+    """
+    Concilia as partições informadas e grava os resultados nas posições originais.
+
+    Cada partição é conciliada como em ``conciliar_particao``: só contra os
+    documentos da própria partição, com ``escolher_documentos``.
+
+    Returns:
+        Quantidade de transações processadas
+    """
+    processadas = 0
+    for inicio, fim, inicio_documentos, fim_documentos in particoes:
+        itens = ler_registros(transacoes, inicio, fim)
+        candidatos = ler_registros(documentos, inicio_documentos, fim_documentos)
+        escolhas = escolher_documentos(
+            itens, candidatos, agente.criterios_config, atribuicao_otima, candidatos_por_transacao
+        )
+        estados = [
+            {
+                "transacao_bancaria": item,
+                "classificacao_disponivel": candidatos[escolhas[posicao]] if posicao in escolhas else None
+            }
+            for posicao, item in enumerate(itens)
+        ]
+        resultados = agente.conciliar_lote(estados, compacto=True)
+
+        posicoes = transacoes["posicao_original"][inicio:fim]
+        saida["status"][posicoes] = [_CODIGO_STATUS[StatusConciliacao(resultado.status)] for resultado in resultados]
+        saida["score_confianca"][posicoes] = [resultado.score_confianca for resultado in resultados]
+        saida["conciliado"][posicoes] = [resultado.conciliado for resultado in resultados]
+        saida["needs_human_review"][posicoes] = [resultado.needs_human_review for resultado in resultados]
+        posicoes_documentos = documentos["posicao_original"]
+        saida["documento"][posicoes] = [
+            posicoes_documentos[inicio_documentos + escolhas[posicao]] if posicao in escolhas else -1
+            for posicao in range(len(itens))
+        ]
+        processadas += fim - inicio
+    return processadas
+
+
+def _executar_faixa(argumentos: Tuple[Any, ...]) -> int:
+    # Ponto de entrada dos processos do pool: só descritores e índices atravessam o pickle
+    descritor_transacoes, descritor_documentos, descritor_saida, particoes, config, atribuicao_otima = argumentos
+    return conciliar_faixa(
+        _anexo(descritor_transacoes), _anexo(descritor_documentos), _anexo(descritor_saida, somente_leitura=False),
+        particoes, _agente(config), atribuicao_otima
+    )
+
+
+def _agrupar_faixas(particoes: Sequence[FaixaParticao], tamanho: int) -> List[List[FaixaParticao]]:
+    """Partições consecutivas em tarefas de pelo menos ``tamanho`` transações (partição nunca é dividida)."""
+    tarefas: List[List[FaixaParticao]] = []
+    atual: List[FaixaParticao] = []
+    quantidade = 0
+    for particao in particoes:
+        atual.append(particao)
+        quantidade += particao[1] - particao[0]
+        if quantidade >= tamanho:
+            tarefas.append(atual)
+            atual, quantidade = [], 0
+    if atual:
+        tarefas.append(atual)
+    return tarefas
+
+
+class ConciliadorMemoriaCompartilhada:
+    """
+    Conciliação particionada em processos com entradas e saída em memória compartilhada.
+
+    Exemplo:
+        conciliador = ConciliadorMemoriaCompartilhada(max_processos=4, tamanho_faixa=2000)
+        quadro = conciliador.conciliar(transacoes, documentos)
+    """
+
+    def __init__(
+        self,
+        chave: ChaveParticao = "conta_bancaria",
+        max_processos: Optional[int] = None,
+        config: Optional[Dict[str, Any]] = None,
+        tamanho_faixa: int = 1000,
+        atribuicao_otima: bool = False,
+        chave_documentos: Optional[ChaveParticao] = None
+    ):
+        """
+        Args:
+            chave: Campo, tupla de campos ou função de partição (como em
+                ``ConciliadorParticionado``; aplicada só no processo principal)
+            max_processos: Processos paralelos (None = número de CPUs; 1 = no processo atual)
+            config: Sobrescritas de ``criterios_config`` aplicadas em cada worker
+            tamanho_faixa: Transações por tarefa (partições inteiras são agrupadas até esse total)
+            atribuicao_otima: Se True, atribuição 1:1 globalmente ótima dentro de cada partição
+            chave_documentos: Chave própria dos documentos (None = ``chave``)
+        """
+        if tamanho_faixa < 1:
+            raise ValueError("tamanho_faixa deve ser positivo")
+        self.chave = chave if isinstance(chave, str) or callable(chave) else tuple(chave)
+        self.chave_documentos = chave_documentos
+        self.max_processos = max_processos
+        self.config = dict(config or {})
+        self.tamanho_faixa = tamanho_faixa
+        self.atribuicao_otima = atribuicao_otima
+
+    def conciliar(
+        self,
+        transacoes: Union[pd.DataFrame, Sequence[Mapping[str, Any]]],
+        documentos: Union[pd.DataFrame, Sequence[Mapping[str, Any]]]
+    ) -> pd.DataFrame:
+        """
+        Concilia cada partição contra os documentos da mesma partição.
+
+        Returns:
+            DataFrame na ordem das transações com status, score_confianca,
+            conciliado, needs_human_review e documento (posição do documento
+            escolhido na entrada; -1 se nenhum)
+        """
+        transacoes, documentos = registros(transacoes), registros(documentos)
+        posicoes: List[int] = []
+        indices: List[int] = []
+        particoes: List[FaixaParticao] = []
+        for posicoes_particao, indices_particao in indices_particoes(
+            transacoes, documentos, self.chave, self.chave_documentos
+        ).values():
+            particoes.append((
+                len(posicoes), len(posicoes) + len(posicoes_particao),
+                len(indices), len(indices) + len(indices_particao)
+            ))
+            posicoes.extend(posicoes_particao)
+            indices.extend(indices_particao)
+
+        with compartilhar_registros(transacoes, posicoes) as tabela_transacoes, \
+                compartilhar_registros(documentos, indices) as tabela_documentos, \
+                saida_compartilhada(len(transacoes)) as saida:
+            tarefas = _agrupar_faixas(particoes, self.tamanho_faixa)
+            if self.max_processos == 1 or len(tarefas) <= 1:
+                agente = _agente(self.config)
+                for tarefa in tarefas:
+                    conciliar_faixa(
+                        tabela_transacoes, tabela_documentos, saida, tarefa, agente, self.atribuicao_otima
+                    )
+            else:
+                with ProcessPoolExecutor(max_workers=self.max_processos) as executor:
+                    list(executor.map(_executar_faixa, [
+                        (tabela_transacoes.descritor, tabela_documentos.descritor, saida.descritor,
+                         tarefa, self.config, self.atribuicao_otima)
+                        for tarefa in tarefas
+                    ]))
+            return quadro_resultados(saida)
+
+
+def quadro_resultados(saida: TabelaCompartilhada) -> pd.DataFrame:
+    """Copia os arrays de saída para um DataFrame (status decodificado)."""
+    status = np.array([status.value for status in STATUS_CODIGOS], dtype=object)
+    return pd.DataFrame({
+        "status": status[saida["status"]],
+        "score_confianca": saida["score_confianca"].astype(np.float64),
+        "conciliado": saida["conciliado"].copy(),
+        "needs_human_review": saida["needs_human_review"].copy(),
+        "documento": saida["documento"].copy(),
+    })
+
+
+__all__ = [
+    "ConciliadorMemoriaCompartilhada",
+    "FaixaParticao",
+    "STATUS_CODIGOS",
+    "TabelaCompartilhada",
+    "compartilhar_registros",
+    "conciliar_faixa",
+    "ler_registros",
+    "quadro_resultados",
+    "registros",
+    "saida_compartilhada",
+]
@@ -0,0 +1,469 @@
+# agents/execucao/particionamento.py
+"""
+Conciliação particionada por conta bancária (ou outra chave).
+
+Transações e documentos são agrupados pela chave de partição (os documentos
+podem usar uma chave própria, ``chave_documentos``, quando não trazem o campo
+das transações); cada partição é conciliada de forma independente (o melhor documento da própria partição é
+escolhido para cada transação e a transação passa pelo workflow) e os
+resultados voltam na ordem da entrada.
+
+Execução local: partições em paralelo com ``ProcessPoolExecutor``.
+Execução distribuída: ``preparar_diretorio`` grava as partições em um
+diretório compartilhado; processos em qualquer host executam
+``processar_diretorio`` (cada partição é reivindicada por um arquivo de
+trava criado atomicamente, com host, PID e horário do dono) e
+``mesclar_diretorio`` reúne os resultados. Travas mais antigas que
+``validade_trava`` ou cujo processo (no mesmo host) não existe mais são
+assumidas por outro worker, de modo que um worker morto não bloqueia a
+partição para sempre.
+
+Uso (worker em outro host):
+    python -m agents.execucao.particionamento /mnt/compartilhado/job_01
+"""
+import argparse
+import hashlib
+import json
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..conciliador_bancario import ConciliadorBancarioAgent
+from ..dados.pool_documentos import PoolDocumentos
+from ..matching.classificador_tipo import CLASSIFICADOR_PADRAO
+from ..matching.atribuicao import atribuir
+from ..matching.selecao import ContadoresPoda, melhor_candidato, palavras_documento, top_k_candidatos
+
+ChaveParticao = Union[str, Sequence[str], Callable[[Mapping[str, Any]], Hashable]]
+
+_ARQUIVO_TRANSACOES = "transacoes.ndjson"
+_ARQUIVO_RESULTADOS = "resultados.ndjson"
+_ARQUIVO_TRAVA = ".trava"
+_POOL = "documentos"
+VALIDADE_TRAVA_PADRAO = 3600.0
+
+
+def valor_chave(registro: Mapping[str, Any], chave: ChaveParticao) -> Hashable:
+    """Valor da chave de partição de uma transação ou documento."""
+    if callable(chave):
+        return chave(registro)
+    if isinstance(chave, str):
+        return registro.get(chave)
+    return tuple(registro.get(campo) for campo in chave)
+
+
+def _chave_ausente(valor: Hashable) -> bool:
+    if isinstance(valor, tuple):
+        return all(parte is None for parte in valor)
+    return valor is None
+
+
+def indices_particoes(
+    transacoes: Sequence[Mapping[str, Any]],
+    documentos: Sequence[Mapping[str, Any]],
+    chave: ChaveParticao = "conta_bancaria",
+    chave_documentos: Optional[ChaveParticao] = None
+) -> Dict[Hashable, Tuple[List[int], List[int]]]:
+    """
+    Posições das transações e dos documentos de cada partição, na ordem da entrada.
+
+    As partições seguem a ordem da primeira transação de cada chave; partições
+    só com documentos são descartadas.
+
+    Args:
+        chave: Chave de partição das transações
+        chave_documentos: Chave dos documentos (None = ``chave``); deve produzir
+            os mesmos valores que ``chave`` produz nas transações
+
+    Raises:
+        ValueError: Se algum documento não tem a chave (ele nunca seria conciliado)
+    """
+    chave_documentos = chave if chave_documentos is None else chave_documentos
+    particoes: Dict[Hashable, Tuple[List[int], List[int]]] = {}
+    for posicao, transacao in enumerate(transacoes):
+        particoes.setdefault(valor_chave(transacao, chave), ([], []))[0].append(posicao)
+
+    sem_chave = []
+    for posicao, documento in enumerate(documentos):
+        valor = valor_chave(documento, chave_documentos)
+        if _chave_ausente(valor):
+            sem_chave.append(posicao)
+            continue
+        particao = particoes.get(valor)
+        if particao is not None:
+            particao[1].append(posicao)
+    if sem_chave:
+        raise ValueError(
+            f"{len(sem_chave)} documento(s) sem a chave de partição (primeiro na posição {sem_chave[0]}); "
+            "informe chave_documentos para os documentos"
+        )
+    return particoes
+
+
+def particionar(
+    transacoes: Iterable[Mapping[str, Any]],
+    documentos: Iterable[Mapping[str, Any]],
+    chave: ChaveParticao = "conta_bancaria",
+    chave_documentos: Optional[ChaveParticao] = None
+) -> Dict[Hashable, Tuple[List[Tuple[int, Mapping[str, Any]]], List[Mapping[str, Any]]]]:
+    """
+    Agrupa transações (com sua posição na entrada) e documentos pela chave.
+
+    Partições só com documentos são descartadas: não há o que conciliar nelas.
+    Documentos sem a chave levantam ValueError (ver ``indices_particoes``).
+    """
+    transacoes, documentos = list(transacoes), list(documentos)
+    return {
+        valor: ([(posicao, transacoes[posicao]) for posicao in posicoes], [documentos[indice] for indice in indices])
+        for valor, (posicoes, indices) in indices_particoes(transacoes, documentos, chave, chave_documentos).items()
+    }
+
+
+def escolher_documentos(
+    transacoes: Sequence[Mapping[str, Any]],
+    documentos: Sequence[Mapping[str, Any]],
+    criterios_config: Mapping[str, Any],
+    atribuicao_otima: bool = False,
+    candidatos_por_transacao: int = 10,
+    contadores: Optional[ContadoresPoda] = None
+) -> Dict[int, int]:
+    """
+    Documento escolhido para cada transação de uma partição.
+
+    Por padrão cada transação recebe o documento de maior score (ou nenhum,
+    se a partição não tem documentos). Com ``atribuicao_otima`` os
+    ``candidatos_por_transacao`` melhores documentos de cada transação formam
+    um grafo resolvido globalmente (um documento por pagamento, score total
+    máximo, arestas abaixo de ``score_minimo`` descartadas). Tarifas
+    bancárias não recebem documento.
+
+    Returns:
+        Posição da transação → posição do documento em ``documentos``
+    """
+    classificador = criterios_config.get("classificador_tipo") or CLASSIFICADOR_PADRAO
+    palavras_documentos = [palavras_documento(documento, criterios_config) for documento in documentos]
+
+    elegiveis = [
+        posicao for posicao, transacao in enumerate(transacoes)
+        if classificador.classificar(transacao.get("descricao_transacao", "")) != "taxa_bancaria"
+    ]
+    escolhas: Dict[int, int] = {}
+    if atribuicao_otima:
+        arestas = [
+            (posicao, candidato["indice"], candidato["score_total"])
+            for posicao in elegiveis
+            for candidato in top_k_candidatos(
+                transacoes[posicao], documentos, criterios_config, candidatos_por_transacao, palavras_documentos,
+                limiar=criterios_config["score_minimo"], contadores=contadores
+            )
+        ]
+        for posicao, (indice, _) in atribuir(arestas, criterios_config["score_minimo"]).items():
+            escolhas[posicao] = indice
+    else:
+        for posicao in elegiveis:
+            escolhido = melhor_candidato(
+                transacoes[posicao], documentos, criterios_config, palavras_documentos, contadores=contadores
+            )
+            if escolhido:
+                escolhas[posicao] = escolhido[0]
+    return escolhas
+
+
+def conciliar_particao(
+    transacoes: Sequence[Mapping[str, Any]],
+    documentos: Sequence[Mapping[str, Any]],
+    config: Optional[Dict[str, Any]] = None,
+    compacto: bool = False,
+    agente: Optional[ConciliadorBancarioAgent] = None,
+    atribuicao_otima: bool = False,
+    candidatos_por_transacao: int = 10,
+    contadores: Optional[ContadoresPoda] = None
+) -> List[Any]:
+    """
+    Concilia as transações de uma partição contra os documentos da mesma partição.
+
+    Os documentos são escolhidos por ``escolher_documentos``; transações sem
+    documento seguem sem classificação. O lote passa pelo workflow de uma
+    vez. ``contadores`` acumula os pares podados por limite superior.
+    """
+    if agente is None:
+        agente = ConciliadorBancarioAgent()
+        if config:
+            agente.update_config(config)
+    escolhas = escolher_documentos(
+        transacoes, documentos, agente.criterios_config, atribuicao_otima, candidatos_por_transacao, contadores
+    )
+    estados = [
+        {
+            "transacao_bancaria": transacao,
+            "classificacao_disponivel": documentos[escolhas[posicao]] if posicao in escolhas else None
+        }
+        for posicao, transacao in enumerate(transacoes)
+    ]
+    return agente.conciliar_lote(estados, compacto=compacto)
+
+
+def _normalizar_chave(chave: ChaveParticao) -> ChaveParticao:
+    return chave if isinstance(chave, str) or callable(chave) else tuple(chave)
+
+
+def _executar_particao(argumentos: Tuple[Any, ...]) -> List[Any]:
+    # Ponto de entrada dos processos do pool (precisa ser função de módulo)
+    transacoes, documentos, config, compacto, atribuicao_otima = argumentos
+    return conciliar_particao(transacoes, documentos, config, compacto, atribuicao_otima=atribuicao_otima)
+
+
+def _nome_particao(valor: Hashable) -> str:
+    return hashlib.sha1(repr(valor).encode("utf-8")).hexdigest()[:16]
+
+
+def _processo_vivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _trava_abandonada(caminho: str, conteudo: str, validade: float) -> bool:
+    """Trava mais antiga que ``validade`` segundos ou de processo morto neste host."""
+    try:
+        dono = json.loads(conteudo)
+        criada_em = float(dono["criada_em"])
+    except (ValueError, KeyError, TypeError):
+        # Conteúdo ainda não gravado (ou corrompido): vale a idade do arquivo
+        dono, criada_em = {}, os.path.getmtime(caminho)
+    if time.time() - criada_em > validade:
+        return True
+    pid = dono.get("pid")
+    return dono.get("host") == socket.gethostname() and isinstance(pid, int) and not _processo_vivo(pid)
+
+
+def _reivindicar(caminho: str, validade: float) -> bool:
+    """
+    Cria a trava de ``caminho`` para este processo.
+
+    Uma trava abandonada é renomeada para um nome exclusivo (só um worker
+    consegue) e descartada antes de nova tentativa de criação.
+
+    Returns:
+        True se a trava passou a ser deste processo
+    """
+    dono = json.dumps({"host": socket.gethostname(), "pid": os.getpid(), "criada_em": time.time()})
+    for _ in range(2):
+        try:
+            descritor = os.open(caminho, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                with open(caminho, "r", encoding="utf-8") as f:
+                    conteudo = f.read()
+                if not _trava_abandonada(caminho, conteudo, validade):
+                    return False
+                abandonada = f"{caminho}.{socket.gethostname()}.{os.getpid()}"
+                os.rename(caminho, abandonada)
+            except FileNotFoundError:
+                continue  # outro worker removeu/assumiu a trava nesse meio-tempo
+            with open(abandonada, "r", encoding="utf-8") as f:
+                renomeada = f.read()
+            if renomeada != conteudo:
+                # Outro worker já tinha assumido a trava: devolve a dele
+                try:
+                    os.link(abandonada, caminho)
+                except FileExistsError:
+                    pass
+                os.remove(abandonada)
+                return False
+            os.remove(abandonada)
+            continue
+        with os.fdopen(descritor, "w", encoding="utf-8") as f:
+            f.write(dono)
+        return True
+    return False
+
+
+class ConciliadorParticionado:
+    """
+    Executa a conciliação por partições independentes.
+
+    Exemplo:
+        particionado = ConciliadorParticionado(chave=("codigo_banco", "conta_bancaria"))
+        resultados = particionado.conciliar(transacoes, documentos)
+    """
+
+    def __init__(
+        self,
+        chave: ChaveParticao = "conta_bancaria",
+        max_processos: Optional[int] = None,
+        config: Optional[Dict[str, Any]] = None,
+        compacto: bool = False,
+        atribuicao_otima: bool = False,
+        chave_documentos: Optional[ChaveParticao] = None
+    ):
+        """
+        Args:
+            chave: Campo, tupla de campos ou função aplicada a transações e documentos
+            max_processos: Processos paralelos (None = número de CPUs; 1 = no processo atual)
+            config: Sobrescritas de ``criterios_config`` aplicadas em cada worker
+            compacto: Se True, resultados são ResultadoCompacto
+            atribuicao_otima: Se True, resolve conflitos (um documento disputado por
+                vários pagamentos) com atribuição 1:1 globalmente ótima
+            chave_documentos: Chave própria dos documentos (None = ``chave``), para
+                documentos sem o campo das transações (ex.: função parceiro → conta)
+        """
+        self.chave = _normalizar_chave(chave)
+        self.chave_documentos = None if chave_documentos is None else _normalizar_chave(chave_documentos)
+        self.max_processos = max_processos
+        self.config = dict(config or {})
+        self.compacto = compacto
+        self.atribuicao_otima = atribuicao_otima
+
+    def conciliar(
+        self, transacoes: Sequence[Mapping[str, Any]], documentos: Iterable[Mapping[str, Any]]
+    ) -> List[Any]:
+        """Concilia todas as partições e devolve os resultados na ordem das transações."""
+        transacoes = list(transacoes)
+        particoes = list(particionar(transacoes, documentos, self.chave, self.chave_documentos).values())
+        resultados: List[Any] = [None] * len(transacoes)
+        tarefas = [
+            ([transacao for _, transacao in itens], docs, self.config, self.compacto, self.atribuicao_otima)
+            for itens, docs in particoes
+        ]
+
+        if self.max_processos == 1 or len(tarefas) <= 1:
+            saidas = [_executar_particao(tarefa) for tarefa in tarefas]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_processos) as executor:
+                saidas = list(executor.map(_executar_particao, tarefas))
+
+        for (itens, _), resultados_particao in zip(particoes, saidas):
+            for (posicao, _), resultado in zip(itens, resultados_particao):
+                resultados[posicao] = resultado
+        return resultados
+
+    # === EXECUÇÃO VIA DIRETÓRIO COMPARTILHADO ===
+
+    def preparar_diretorio(
+        self, diretorio: str, transacoes: Iterable[Mapping[str, Any]], documentos: Iterable[Mapping[str, Any]]
+    ) -> List[str]:
+        """
+        Grava uma subpasta por partição (transações em NDJSON + pool de documentos).
+
+        Returns:
+            Nomes das partições gravadas
+        """
+        nomes = []
+        for valor, (itens, docs) in particionar(transacoes, documentos, self.chave, self.chave_documentos).items():
+            nome = _nome_particao(valor)
+            caminho = os.path.join(diretorio, nome)
+            os.makedirs(caminho, exist_ok=True)
+            PoolDocumentos.escrever(os.path.join(caminho, _POOL), docs)
+            with open(os.path.join(caminho, _ARQUIVO_TRANSACOES), "w", encoding="utf-8") as f:
+                for posicao, transacao in itens:
+                    f.write(json.dumps({"posicao": posicao, "transacao": transacao}, ensure_ascii=False) + "\n")
+            nomes.append(nome)
+
+        with open(os.path.join(diretorio, "job.json"), "w", encoding="utf-8") as f:
+            json.dump({"particoes": nomes}, f)
+        return nomes
+
+    def processar_diretorio(self, diretorio: str, validade_trava: float = VALIDADE_TRAVA_PADRAO) -> int:
+        """
+        Processa as partições ainda não reivindicadas do diretório.
+
+        Pode ser executado por vários processos/hosts ao mesmo tempo.
+
+        Args:
+            diretorio: Diretório preparado com ``preparar_diretorio``
+            validade_trava: Segundos após os quais a trava de outro worker é
+                considerada abandonada (deve exceder o tempo de uma partição)
+
+        Returns:
+            Quantidade de partições processadas por esta chamada
+        """
+        with open(os.path.join(diretorio, "job.json"), "r", encoding="utf-8") as f:
+            job = json.load(f)
+
+        agente = ConciliadorBancarioAgent()
+        if self.config:
+            agente.update_config(self.config)
+
+        processadas = 0
+        for nome in job["particoes"]:
+            caminho = os.path.join(diretorio, nome)
+            if os.path.exists(os.path.join(caminho, _ARQUIVO_RESULTADOS)):
+                continue
+            if not _reivindicar(os.path.join(caminho, _ARQUIVO_TRAVA), validade_trava):
+                continue
+
+            with open(os.path.join(caminho, _ARQUIVO_TRANSACOES), "r", encoding="utf-8") as f:
+                itens = [json.loads(linha) for linha in f if linha.strip()]
+            pool = PoolDocumentos.abrir(os.path.join(caminho, _POOL))
+            # Ordem original dos documentos (o pool é ordenado por valor)
+            documentos = list(pool.documentos(np.argsort(pool.posicao_original)))
+            resultados = conciliar_particao(
+                [item["transacao"] for item in itens], documentos, agente=agente, compacto=self.compacto,
+                atribuicao_otima=self.atribuicao_otima
+            )
+
+            # Gravação atômica: o arquivo de resultados só existe completo
+            temporario = os.path.join(caminho, _ARQUIVO_RESULTADOS + ".tmp")
+            with open(temporario, "w", encoding="utf-8") as f:
+                for item, resultado in zip(itens, resultados):
+                    saida = resultado.to_dict() if self.compacto else resultado
+                    f.write(json.dumps({"posicao": item["posicao"], "resultado": saida}, ensure_ascii=False, default=str) + "\n")
+            os.replace(temporario, os.path.join(caminho, _ARQUIVO_RESULTADOS))
+            processadas += 1
+        return processadas
+
+    def mesclar_diretorio(self, diretorio: str) -> List[Dict[str, Any]]:
+        """Reúne os resultados de todas as partições na ordem original das transações."""
+        with open(os.path.join(diretorio, "job.json"), "r", encoding="utf-8") as f:
+            job = json.load(f)
+
+        posicionados = []
+        for nome in job["particoes"]:
+            caminho = os.path.join(diretorio, nome, _ARQUIVO_RESULTADOS)
+            if not os.path.exists(caminho):
+                raise RuntimeError(f"Partição {nome} ainda não foi processada")
+            with open(caminho, "r", encoding="utf-8") as f:
+                posicionados.extend(json.loads(linha) for linha in f if linha.strip())
+        posicionados.sort(key=lambda item: item["posicao"])
+        return [item["resultado"] for item in posicionados]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Worker de conciliação particionada (diretório compartilhado)")
+    parser.add_argument("diretorio", help="Diretório preparado com ConciliadorParticionado.preparar_diretorio")
+    parser.add_argument("--compacto", action="store_true", help="Grava resultados no formato compacto")
+    parser.add_argument(
+        "--validade-trava", type=float, default=VALIDADE_TRAVA_PADRAO,
+        help="Segundos até a trava de outro worker ser considerada abandonada"
+    )
+    args = parser.parse_args()
+
+    processadas = ConciliadorParticionado(compacto=args.compacto).processar_diretorio(
+        args.diretorio, validade_trava=args.validade_trava
+    )
+    print(f"Partições processadas: {processadas}")
+
+
+if __name__ == "__main__":
+    main()
+
+
+__all__ = [
+    "ChaveParticao",
+    "ConciliadorParticionado",
+    "VALIDADE_TRAVA_PADRAO",
+    "conciliar_particao",
+    "escolher_documentos",
+    "indices_particoes",
+    "particionar",
+    "valor_chave",
+]
@@ -0,0 +1,30 @@
+"""
+Estruturas auxiliares de matching (índices e classificadores) usadas pelo workflow.
+"""
+
+from .aho_corasick import AutomatoAhoCorasick, AutomatoParceiros, OcorrenciaParceiro
+from .atribuicao import atribuir
+from .classificador_tipo import CLASSIFICADOR_PADRAO, REGRAS_TIPO_PADRAO, ClassificadorTipo
+from .criterios import CRITERIOS_PADRAO, CriteriosConciliacao, RegistroCriterios
+from .memoria import EntradaMemoria, MemoriaConciliacoes
+from .retencoes import ALIQUOTAS_RETENCAO_PADRAO, MOTOR_RETENCOES_PADRAO, MotorRetencoes
+from .trigramas import IndiceTrigramas
+
+__all__ = [
+    "ALIQUOTAS_RETENCAO_PADRAO",
+    "AutomatoAhoCorasick",
+    "AutomatoParceiros",
+    "CLASSIFICADOR_PADRAO",
+    "CRITERIOS_PADRAO",
+    "ClassificadorTipo",
+    "CriteriosConciliacao",
+    "EntradaMemoria",
+    "IndiceTrigramas",
+    "MOTOR_RETENCOES_PADRAO",
+    "MemoriaConciliacoes",
+    "MotorRetencoes",
+    "OcorrenciaParceiro",
+    "REGRAS_TIPO_PADRAO",
+    "RegistroCriterios",
+    "atribuir",
+]
@@ -0,0 +1,139 @@
+# agents/matching/aho_corasick.py
+"""
+Detecção de múltiplos padrões em uma única passada (Aho-Corasick).
+
+``AutomatoAhoCorasick`` é genérico (padrão → valor) e reporta inclusive
+ocorrências sobrepostas. ``AutomatoParceiros`` o especializa para localizar
+nomes e apelidos de parceiros em descrições bancárias respeitando limites de
+palavra.
+"""
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+
+from .trigramas import normalizar_texto
+
+
+class AutomatoAhoCorasick:
+    """
+    Autômato de Aho-Corasick sobre caracteres.
+
+    Construído uma vez; cada busca é linear no tamanho do texto mais o
+    número de ocorrências.
+    """
+
+    def __init__(self) -> None:
+        self._transicoes: List[Dict[str, int]] = [{}]
+        self._falhas: List[int] = [0]
+        self._saidas: List[List[Tuple[int, Any]]] = [[]]
+        self._construido = False
+
+    def adicionar(self, padrao: str, valor: Any) -> None:
+        """Adiciona um padrão; deve ser chamado antes de ``construir``."""
+        if not padrao:
+            raise ValueError("Padrão vazio não é permitido")
+        if self._construido:
+            raise RuntimeError("Autômato já construído; crie um novo para adicionar padrões")
+
+        estado = 0
+        for caractere in padrao:
+            proximo = self._transicoes[estado].get(caractere)
+            if proximo is None:
+                proximo = len(self._transicoes)
+                self._transicoes[estado][caractere] = proximo
+                self._transicoes.append({})
+                self._falhas.append(0)
+                self._saidas.append([])
+            estado = proximo
+        self._saidas[estado].append((len(padrao), valor))
+
+    def construir(self) -> "AutomatoAhoCorasick":
+        """Calcula os links de falha (BFS) e propaga as saídas."""
+        fila = deque(self._transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            for caractere, proximo in self._transicoes[estado].items():
+                fila.append(proximo)
+                falha = self._falhas[estado]
+                while falha and caractere not in self._transicoes[falha]:
+                    falha = self._falhas[falha]
+                destino = self._transicoes[falha].get(caractere, 0)
+                self._falhas[proximo] = destino if destino != proximo else 0
+                self._saidas[proximo] = self._saidas[proximo] + self._saidas[self._falhas[proximo]]
+        self._construido = True
+        return self
+
+    def buscar(self, texto: str) -> Iterator[Tuple[int, int, Any]]:
+        """Gera (início, fim, valor) para cada ocorrência, sobrepostas inclusive."""
+        if not self._construido:
+            self.construir()
+
+        transicoes = self._transicoes
+        falhas = self._falhas
+        saidas = self._saidas
+        estado = 0
+        for posicao, caractere in enumerate(texto):
+            while estado and caractere not in transicoes[estado]:
+                estado = falhas[estado]
+            estado = transicoes[estado].get(caractere, 0)
+            for tamanho, valor in saidas[estado]:
+                yield posicao - tamanho + 1, posicao + 1, valor
+
+
+class OcorrenciaParceiro(NamedTuple):
+    """Ocorrência de um parceiro (nome ou apelido) em uma descrição normalizada."""
+    parceiro_id: str
+    alias: str
+    inicio: int
+    fim: int
+
+
+class AutomatoParceiros:
+    """
+    Localiza parceiros cadastrados em descrições bancárias.
+
+    Exemplo:
+        automato = AutomatoParceiros({"F001": ["XYZ INDUSTRIA SA", "XYZ IND"]})
+        automato.resolver("PGTO NF 1234 XYZ INDUSTRIA SA")  # "F001"
+    """
+
+    def __init__(self, cadastro: Mapping[str, Iterable[str]]):
+        """
+        Args:
+            cadastro: Mapeamento parceiro_id → nomes e apelidos conhecidos
+        """
+        self._automato = AutomatoAhoCorasick()
+        self._ids_por_alias: Dict[str, str] = {}
+        for parceiro_id, aliases in cadastro.items():
+            for alias in aliases:
+                normalizado = normalizar_texto(alias)
+                if not normalizado or normalizado in self._ids_por_alias:
+                    continue
+                self._ids_por_alias[normalizado] = parceiro_id
+                # Espaços nas bordas garantem casamento de palavras inteiras
+                self._automato.adicionar(f" {normalizado} ", (parceiro_id, normalizado))
+        self._automato.construir()
+
+    def __len__(self) -> int:
+        return len(self._ids_por_alias)
+
+    def detectar(self, descricao: str) -> List[OcorrenciaParceiro]:
+        """Todas as ocorrências de parceiros na descrição, em ordem de posição."""
+        texto = f" {normalizar_texto(descricao)} "
+        return [
+            OcorrenciaParceiro(parceiro_id, alias, inicio, fim - 2)
+            for inicio, fim, (parceiro_id, alias) in self._automato.buscar(texto)
+        ]
+
+    def resolver(self, descricao: str) -> Optional[str]:
+        """Parceiro da ocorrência mais longa (mais específica), se houver."""
+        ocorrencias = self.detectar(descricao)
+        if not ocorrencias:
+            return None
+        return max(ocorrencias, key=lambda ocorrencia: len(ocorrencia.alias)).parceiro_id
+
+    def id_por_nome(self, nome: str) -> Optional[str]:
+        """Resolve um nome/apelido exato (após normalização) para o parceiro_id."""
+        return self._ids_por_alias.get(normalizar_texto(nome))
+
+
+__all__ = ["AutomatoAhoCorasick", "AutomatoParceiros", "OcorrenciaParceiro"]
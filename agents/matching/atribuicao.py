@@ -0,0 +1,155 @@
+# agents/matching/atribuicao.py
+"""
+Atribuição 1:1 globalmente ótima entre transações e documentos.
+
+Dado o grafo de candidatos (arestas transação–documento com ``score_total``),
+escolhe no máximo um documento por transação e uma transação por documento
+maximizando a soma dos scores. Arestas abaixo de ``score_minimo`` são
+descartadas antes.
+
+O grafo é separado em componentes conexos (union-find) e cada componente é
+resolvido como problema de atribuição esparso (custo = -score) pelo método
+húngaro com caminhos aumentantes mínimos, o que dá o emparelhamento de peso
+máximo (não necessariamente perfeito).
+"""
+import heapq
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+Aresta = Tuple[Hashable, Hashable, float]
+
+
+def componentes_conexos(arestas: Iterable[Aresta]) -> List[List[Aresta]]:
+    """Agrupa as arestas por componente conexo do grafo bipartido."""
+    pais: Dict[Tuple[int, Hashable], Tuple[int, Hashable]] = {}
+
+    def raiz(no: Tuple[int, Hashable]) -> Tuple[int, Hashable]:
+        pais.setdefault(no, no)
+        while pais[no] != no:
+            pais[no] = pais[pais[no]]
+            no = pais[no]
+        return no
+
+    lista = list(arestas)
+    for transacao, documento, _ in lista:
+        a, b = raiz((0, transacao)), raiz((1, documento))
+        if a != b:
+            pais[a] = b
+
+    grupos: Dict[Tuple[int, Hashable], List[Aresta]] = {}
+    for aresta in lista:
+        grupos.setdefault(raiz((0, aresta[0])), []).append(aresta)
+    return list(grupos.values())
+
+
+def _resolver_componente(arestas: List[Aresta]) -> List[Aresta]:
+    """
+    Emparelhamento de peso máximo de um componente.
+
+    Húngaro esparso por caminho aumentante mínimo (uma augmentação por
+    transação, Dijkstra sobre custos reduzidos com potenciais duais ``u``/``v``
+    e parada antecipada na primeira coluna livre). Cada transação tem uma
+    coluna fictícia própria de custo 0 ("não atribuída"), de modo que deixar
+    uma transação sem documento é sempre possível e só ocorre quando é ótimo.
+    """
+    if len(arestas) == 1:
+        return arestas
+
+    linhas = {t: i for i, t in enumerate(dict.fromkeys(t for t, _, _ in arestas))}
+    colunas = {d: j for j, d in enumerate(dict.fromkeys(d for _, d, _ in arestas))}
+    n_linhas, n_colunas = len(linhas), len(colunas)
+
+    # Custo = -score; coluna fictícia da linha i é n_colunas + i
+    # Potenciais iniciais: mínimo de cada linha (toda linha é atribuída a uma
+    # coluna, real ou fictícia) e zero nas colunas, que podem ficar livres
+    adjacencia: List[List[Tuple[int, float]]] = [[] for _ in range(n_linhas)]
+    potencial_linha = [0.0] * n_linhas
+    for transacao, documento, score in arestas:
+        i = linhas[transacao]
+        adjacencia[i].append((colunas[documento], -score))
+        potencial_linha[i] = min(potencial_linha[i], -score)
+    for i in range(n_linhas):
+        adjacencia[i].append((n_colunas + i, 0.0))
+    potencial_coluna = [0.0] * (n_colunas + n_linhas)
+
+    linha_da_coluna = [-1] * (n_colunas + n_linhas)
+    coluna_da_linha = [-1] * n_linhas
+    infinito = float("inf")
+
+    for origem in range(n_linhas):
+        distancia: Dict[int, float] = {}
+        predecessor: Dict[int, int] = {}
+        finalizadas: Dict[int, float] = {}
+        visitadas = [origem]
+        fila: List[Tuple[float, int]] = []
+        i, minimo = origem, 0.0
+
+        while True:
+            for j, custo in adjacencia[i]:
+                if j in finalizadas:
+                    continue
+                reduzido = minimo + custo - potencial_linha[i] - potencial_coluna[j]
+                if reduzido < distancia.get(j, infinito):
+                    distancia[j] = reduzido
+                    predecessor[j] = i
+                    heapq.heappush(fila, (reduzido, j))
+            # A coluna fictícia da origem garante que a fila nunca esvazia
+            while True:
+                minimo, j = heapq.heappop(fila)
+                if j not in finalizadas and minimo == distancia[j]:
+                    break
+            finalizadas[j] = minimo
+            if linha_da_coluna[j] == -1:
+                livre = j
+                break
+            i = linha_da_coluna[j]
+            visitadas.append(i)
+
+        # Atualização dos potenciais (mantém custos reduzidos não negativos)
+        potencial_linha[origem] += minimo
+        for i in visitadas[1:]:
+            potencial_linha[i] += minimo - finalizadas[coluna_da_linha[i]]
+        for j, distancia_j in finalizadas.items():
+            potencial_coluna[j] -= minimo - distancia_j
+
+        # Inverte o caminho aumentante
+        j = livre
+        while True:
+            i = predecessor[j]
+            linha_da_coluna[j] = i
+            j, coluna_da_linha[i] = coluna_da_linha[i], j
+            if i == origem:
+                break
+
+    return [
+        aresta for aresta in arestas
+        if coluna_da_linha[linhas[aresta[0]]] == colunas[aresta[1]]
+    ]
+
+
+def atribuir(arestas: Iterable[Aresta], score_minimo: float = 0.0) -> Dict[Hashable, Tuple[Hashable, float]]:
+    """
+    Atribuição de score total máximo, com no máximo um documento por transação.
+
+    Args:
+        arestas: (transação, documento, score_total) do grafo de candidatos;
+            transações e documentos podem ser quaisquer identificadores hasheáveis
+        score_minimo: Arestas com score abaixo deste limite são ignoradas
+
+    Returns:
+        transação → (documento, score) para as transações atribuídas
+    """
+    # Mantém a melhor aresta por par (transação, documento)
+    melhores: Dict[Tuple[Hashable, Hashable], float] = {}
+    for transacao, documento, score in arestas:
+        if score >= score_minimo and score > melhores.get((transacao, documento), float("-inf")):
+            melhores[(transacao, documento)] = score
+
+    atribuicao: Dict[Hashable, Tuple[Hashable, float]] = {}
+    candidatas = [(t, d, s) for (t, d), s in melhores.items()]
+    for componente in componentes_conexos(candidatas):
+        for transacao, documento, score in _resolver_componente(componente):
+            atribuicao[transacao] = (documento, score)
+    return atribuicao
+
+
+__all__ = ["Aresta", "atribuir", "componentes_conexos"]
@@ -0,0 +1,251 @@
+# agents/matching/classificador_tipo.py
+"""
+Classificador de tipo de transação orientado por tabela de regras.
+
+Cada regra é uma conjunção de grupos de termos (basta um termo de cada grupo
+aparecer na descrição) e as regras são avaliadas na ordem da tabela, como na
+cadeia de ``if/elif`` original.
+
+Modo escalar: todos os termos são compilados em uma única expressão regular
+(alternância); a combinação de termos encontrados é resolvida para o tipo via
+cache. Se a tabela tiver termos que se sobrepõem entre grupos (o que faria a
+alternância perder ocorrências), usa-se uma regex de lookaheads nomeados.
+
+Modo vetorizado: ``classificar_lote`` localiza cada termo na coluna inteira
+concatenada (busca em C, sem laço por linha) e aplica a precedência com
+``np.select``.
+"""
+import json
+import re
+from bisect import bisect_right
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Separador de linhas no modo vetorizado (não pode ocorrer em nenhum termo)
+_SEPARADOR = "\x00"
+
+
+# Tabela padrão: reproduz a precedência de identificar_tipo_node
+REGRAS_TIPO_PADRAO: List[Dict[str, Any]] = [
+    {"tipo": "taxa_bancaria", "termos": [["TARIFA", "TAXA", "MANUTENCAO", "ANUIDADE"]]},
+    {"tipo": "parcela", "termos": [["PARC"], ["/"]]},
+    {"tipo": "com_retencoes", "termos": [["LIQ", "LIQUIDO"]]},
+    {"tipo": "multiplos_documentos", "termos": [["LOTE"], ["NFS", "NOTAS"]]},
+]
+
+
+class ClassificadorTipo:
+    """
+    Regras de tipo compiladas uma única vez.
+
+    Exemplo:
+        classificador = ClassificadorTipo(REGRAS_TIPO_PADRAO + [
+            {"tipo": "folha", "termos": [["FOLHA", "SALARIO"]]}
+        ])
+        classificador.classificar("TARIFA PACOTE SERVICOS")  # "taxa_bancaria"
+    """
+
+    def __init__(self, regras: Sequence[Mapping[str, Any]], tipo_padrao: str = "normal"):
+        """
+        Args:
+            regras: Lista ordenada de {"tipo": str, "termos": [[termo, ...], ...]}
+            tipo_padrao: Tipo retornado quando nenhuma regra é satisfeita
+        """
+        if not regras:
+            raise ValueError("A tabela de regras não pode ser vazia")
+
+        self.tipo_padrao = tipo_padrao
+        self.regras: Tuple[Tuple[str, Tuple[Tuple[str, ...], ...]], ...] = tuple(
+            (regra["tipo"], tuple(tuple(termo.upper() for termo in grupo) for grupo in regra["termos"]))
+            for regra in regras
+        )
+
+        # Máscara de grupos por regra e por termo (um bit por conjunto de termos distinto)
+        grupos: Dict[Tuple[str, ...], int] = {}
+        self._mascaras_regras: List[Tuple[str, int]] = []
+        for tipo, conjuntos in self.regras:
+            if not conjuntos or any(not grupo for grupo in conjuntos):
+                raise ValueError(f"Regra '{tipo}' possui grupo de termos vazio")
+            mascara = 0
+            for grupo in conjuntos:
+                mascara |= 1 << grupos.setdefault(grupo, len(grupos))
+            self._mascaras_regras.append((tipo, mascara))
+
+        self._numero_grupos = len(grupos)
+        self._mascaras_termos: Dict[str, int] = {}
+        for grupo, indice in grupos.items():
+            for termo in grupo:
+                self._mascaras_termos[termo] = self._mascaras_termos.get(termo, 0) | (1 << indice)
+        if any(_SEPARADOR in termo for termo in self._mascaras_termos):
+            raise ValueError("Termos não podem conter o caractere nulo")
+
+        # Modo vetorizado: termos que contêm outro termo de grupos equivalentes
+        # não acrescentam informação (ex.: LIQUIDO já implica LIQ)
+        self._termos_lote = [
+            (termo, mascara) for termo, mascara in self._mascaras_termos.items()
+            if not any(
+                outro != termo and outro in termo and mascara & ~self._mascaras_termos[outro] == 0
+                for outro in self._mascaras_termos
+            )
+        ]
+
+        # Termos mais longos primeiro: na mesma posição vence o mais específico
+        termos = sorted(self._mascaras_termos, key=len, reverse=True)
+        self._regex_termos = re.compile("|".join(re.escape(termo) for termo in termos))
+        self._regex_lookahead: Optional["re.Pattern[str]"] = None
+        if not self._alternancia_segura(termos):
+            # (?:(?=.*?(?P<gN>A|B)))? em sequência: um único match avalia todos os grupos
+            self._regex_lookahead = re.compile("".join(
+                f"(?:(?=.*?(?P<g{indice}>{'|'.join(re.escape(termo) for termo in grupo)})))?"
+                for grupo, indice in grupos.items()
+            ), re.DOTALL)
+        self._cache: Dict[FrozenSet[str], str] = {}
+
+    def _alternancia_segura(self, termos: Sequence[str]) -> bool:
+        """
+        Verifica se a busca não sobreposta por alternância encontra todos os grupos.
+
+        Uma ocorrência só pode ser perdida quando um termo contém outro, ou o
+        sufixo de um é prefixo de outro, e o termo perdido acrescenta grupos.
+        """
+        for a in termos:
+            for b in termos:
+                if a == b or self._mascaras_termos[b] & ~self._mascaras_termos[a] == 0:
+                    continue
+                if b in a or any(a.endswith(b[:k]) for k in range(1, min(len(a), len(b)))):
+                    return False
+        return True
+
+    @classmethod
+    def de_regras(cls, especificacao: Any) -> "ClassificadorTipo":
+        """
+        Classificador a partir de dados JSON: lista de regras (formato de
+        ``REGRAS_TIPO_PADRAO``) ou {"regras": [...], "tipo_padrao": "..."}.
+        Um ``ClassificadorTipo`` é devolvido como está.
+
+        Raises:
+            ValueError: Se a especificação não tiver o formato esperado
+        """
+        if isinstance(especificacao, cls):
+            return especificacao
+        tipo_padrao: Any = "normal"
+        regras = especificacao
+        if isinstance(especificacao, Mapping):
+            if set(especificacao) - {"regras", "tipo_padrao"}:
+                raise ValueError('Classificador deve ter apenas "regras" e "tipo_padrao"')
+            regras = especificacao.get("regras")
+            tipo_padrao = especificacao.get("tipo_padrao", tipo_padrao)
+        if not isinstance(tipo_padrao, str):
+            raise ValueError("tipo_padrao deve ser um texto")
+        if isinstance(regras, (str, Mapping)) or not isinstance(regras, Sequence):
+            raise ValueError("As regras de tipo devem ser uma lista")
+        for regra in regras:
+            if (
+                not isinstance(regra, Mapping) or not isinstance(regra.get("tipo"), str)
+                or not isinstance(regra.get("termos"), list)
+                or not all(
+                    isinstance(grupo, list) and all(isinstance(termo, str) for termo in grupo)
+                    for grupo in regra["termos"]
+                )
+            ):
+                raise ValueError(f'Regra inválida (esperado {{"tipo": str, "termos": [[str, ...], ...]}}): {regra!r}')
+        return cls(regras, tipo_padrao=tipo_padrao)
+
+    @classmethod
+    def de_arquivo(cls, caminho: str, tipo_padrao: str = "normal") -> "ClassificadorTipo":
+        """Carrega a tabela de regras de um arquivo JSON (lista de regras)."""
+        with open(caminho, "r", encoding="utf-8") as f:
+            return cls(json.load(f), tipo_padrao=tipo_padrao)
+
+    def classificar(self, descricao: str) -> str:
+        """Tipo da transação para uma descrição."""
+        descricao = descricao.upper()
+        if self._regex_lookahead is not None:
+            grupos = self._regex_lookahead.match(descricao).groups()
+            mascara = sum(1 << indice for indice, valor in enumerate(grupos) if valor is not None)
+            return self._resolver(mascara)
+
+        encontrados = frozenset(self._regex_termos.findall(descricao))
+        tipo = self._cache.get(encontrados)
+        if tipo is None:
+            mascara = 0
+            for termo in encontrados:
+                mascara |= self._mascaras_termos[termo]
+            tipo = self._cache[encontrados] = self._resolver(mascara)
+        return tipo
+
+    def _resolver(self, mascara: int) -> str:
+        """Primeira regra (ordem da tabela) cujos grupos estão todos presentes."""
+        for tipo, mascara_regra in self._mascaras_regras:
+            if mascara & mascara_regra == mascara_regra:
+                return tipo
+        return self.tipo_padrao
+
+    def classificar_lote(self, descricoes: Union[Iterable[str], Any]) -> Any:
+        """
+        Classifica uma coluna inteira de descrições sem laço Python por linha.
+
+        As descrições são concatenadas com um separador e cada termo da
+        tabela é localizado no texto inteiro por busca em C; o laço Python
+        ocorre apenas por linha que contém o termo (após o primeiro achado,
+        a busca salta para a linha seguinte). A precedência entre regras é
+        aplicada com ``np.select``.
+
+        Args:
+            descricoes: ``pandas.Series`` ou iterável de strings
+
+        Returns:
+            ``pandas.Series`` com o mesmo índice se a entrada for Series;
+            caso contrário, array numpy de tipos
+        """
+        e_serie = hasattr(descricoes, "index") and hasattr(descricoes, "fillna")
+        valores = descricoes.fillna("").to_numpy(dtype=object) if e_serie else descricoes
+        linhas = [
+            valor.replace(_SEPARADOR, " ") if _SEPARADOR in valor else valor
+            for valor in map(str.upper, map(_texto, valores))
+        ]
+        tamanhos = np.fromiter(map(len, linhas), dtype=np.int64, count=len(linhas))
+        inicios = np.zeros(len(linhas) + 1, dtype=np.int64)
+        inicios[1:] = np.cumsum(tamanhos + 1)
+        inicios_lista = inicios.tolist()
+        texto = _SEPARADOR.join(linhas)
+
+        presentes = np.zeros((self._numero_grupos, len(linhas)), dtype=bool)
+        for termo, mascara in self._termos_lote:
+            encontradas = []
+            posicao = texto.find(termo)
+            while posicao != -1:
+                linha = bisect_right(inicios_lista, posicao) - 1
+                encontradas.append(linha)
+                posicao = texto.find(termo, inicios_lista[linha + 1])
+            if encontradas:
+                for bit in range(self._numero_grupos):
+                    if mascara >> bit & 1:
+                        presentes[bit, encontradas] = True
+
+        condicoes = [
+            np.logical_and.reduce([presentes[bit] for bit in range(self._numero_grupos) if mascara >> bit & 1])
+            for _, mascara in self._mascaras_regras
+        ]
+        tipos = np.select(
+            condicoes, [tipo for tipo, _ in self._mascaras_regras], default=self.tipo_padrao
+        ).astype(object)
+
+        if e_serie:
+            import pandas as pd
+            return pd.Series(tipos, index=descricoes.index, dtype=object)
+        return tipos
+
+
+def _texto(valor: Any) -> str:
+    """Converte valores ausentes (None/NaN) em string vazia."""
+    if valor is None or valor != valor:
+        return ""
+    return str(valor)
+
+
+CLASSIFICADOR_PADRAO = ClassificadorTipo(REGRAS_TIPO_PADRAO)
+
+
+__all__ = ["ClassificadorTipo", "CLASSIFICADOR_PADRAO", "REGRAS_TIPO_PADRAO"]
@@ -0,0 +1,371 @@
+# agents/matching/criterios.py
+"""
+Critérios de conciliação imutáveis e pré-compilados, por tenant/conta.
+
+``CriteriosConciliacao`` substitui o dicionário mutável ``criterios_config``:
+as tolerâncias são validadas uma vez na construção, as palavras irrelevantes
+viram ``frozenset`` e constantes derivadas (ex.: ``inverso_janela``) ficam
+prontas para o laço de pontuação, que lê atributos em vez de chaves. O
+objeto continua sendo um ``Mapping`` (``criterios["score_minimo"]``,
+``criterios.get("indice_parceiros")``) para o código que recebe dicionários.
+
+``RegistroCriterios`` guarda critérios por conta bancária e por tenant sobre
+uma base comum e pode ser recarregado de um arquivo JSON. Cada recarga
+publica um novo ``InstantaneoCriterios`` (troca de uma referência): lotes em
+andamento continuam com o instantâneo que obtiveram no início.
+
+Formato do arquivo::
+
+    {
+        "padrao": {"score_minimo": 0.6},
+        "tenants": {"empresa_a": {"janela_data_dias": 10}},
+        "contas": {"341-12345-6": {"tolerancia_valor_absoluta": 5.0}}
+    }
+
+Os valores de conta se sobrepõem aos do tenant da conta, se informado em
+``"tenant"``, e estes aos de ``padrao``. Cada seção aceita apenas os campos
+validados e ``"classificador_tipo"`` (lista de regras no formato de
+``REGRAS_TIPO_PADRAO``, compilada em ``ClassificadorTipo``); qualquer outra
+chave (ex.: um nome digitado errado) invalida o arquivo.
+"""
+import json
+import math
+import numbers
+import os
+import threading
+from collections.abc import Iterable, Mapping
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Optional
+
+from .classificador_tipo import ClassificadorTipo
+
+PALAVRAS_IRRELEVANTES_PADRAO = frozenset({"ted", "pix", "pgto", "boleto", "doc", "transferencia"})
+
+# Campos validados; demais chaves (índices, autômatos, classificador, motor
+# de retenções...) são extensões guardadas como estão
+_CAMPOS = (
+    "tolerancia_valor_percentual",
+    "tolerancia_valor_absoluta",
+    "janela_data_dias",
+    "score_minimo",
+    "palavras_irrelevantes",
+)
+
+# Chaves aceitas no arquivo do registro (extensões de objetos, como índices,
+# não vêm de JSON) e seções da raiz
+_CAMPOS_ARQUIVO = _CAMPOS + ("classificador_tipo",)
+_SECOES_ARQUIVO = ("padrao", "tenants", "contas")
+
+
+def _numero(nome: str, valor: Any) -> float:
+    """Valor numérico finito de um campo; tipos inválidos (None, texto, bool) viram ValueError."""
+    if isinstance(valor, bool) or not isinstance(valor, numbers.Real) or not math.isfinite(valor):
+        raise ValueError(f"{nome} deve ser um número finito: {valor!r}")
+    return float(valor)
+
+
+def _secao(dados: Mapping[str, Any], nome: str) -> Mapping[str, Any]:
+    secao = dados.get(nome, {})
+    if not isinstance(secao, Mapping):
+        raise ValueError(f'"{nome}" deve ser um objeto JSON')
+    return secao
+
+
+def _sobrescritas(nome: str, valores: Any, permitidos: tuple = _CAMPOS_ARQUIVO) -> Dict[str, Any]:
+    """Sobrescritas de uma seção do arquivo, só com chaves conhecidas e extensões compiladas."""
+    if not isinstance(valores, Mapping):
+        raise ValueError(f"{nome} deve ser um objeto JSON")
+    desconhecidas = sorted(str(chave) for chave in valores if chave not in permitidos)
+    if desconhecidas:
+        raise ValueError(f"{nome}: chaves desconhecidas {desconhecidas} (aceitas: {', '.join(permitidos)})")
+    sobrescritas = dict(valores)
+    if "classificador_tipo" in sobrescritas:
+        try:
+            sobrescritas["classificador_tipo"] = ClassificadorTipo.de_regras(sobrescritas["classificador_tipo"])
+        except ValueError as e:
+            raise ValueError(f"{nome}: classificador_tipo inválido: {e}") from e
+    return sobrescritas
+
+
+class CriteriosConciliacao(Mapping):
+    """
+    Critérios de matching validados e imutáveis.
+
+    Exemplo:
+        criterios = CriteriosConciliacao(janela_data_dias=10, score_minimo=0.7)
+        criterios.inverso_janela                    # 0.1
+        mais_rigido = criterios.substituir(tolerancia_valor_absoluta=5.0)
+    """
+
+    __slots__ = (
+        "tolerancia_valor_percentual",
+        "tolerancia_valor_absoluta",
+        "janela_data_dias",
+        "score_minimo",
+        "palavras_irrelevantes",
+        "inverso_janela",
+        "extensoes",
+    )
+
+    def __init__(
+        self,
+        tolerancia_valor_percentual: float = 0.05,
+        tolerancia_valor_absoluta: float = 50.00,
+        janela_data_dias: int = 7,
+        score_minimo: float = 0.60,
+        palavras_irrelevantes: Iterable[str] = PALAVRAS_IRRELEVANTES_PADRAO,
+        **extensoes: Any
+    ):
+        """
+        Args:
+            tolerancia_valor_percentual: Diferença relativa aceita, em [0, 1)
+            tolerancia_valor_absoluta: Diferença em reais aceita (>= 0)
+            janela_data_dias: Dias de distância com score de data positivo (> 0)
+            score_minimo: Score total para conciliar, em [0, 1]
+            palavras_irrelevantes: Termos ignorados nas descrições
+            **extensoes: Objetos opcionais lidos pelos nós (indice_parceiros,
+                automato_parceiros, classificador_tipo, motor_retencoes);
+                ``classificador_tipo`` aceita também a lista de regras
+
+        Raises:
+            ValueError: Se algum campo tiver tipo inválido ou estiver fora da faixa válida
+        """
+        tolerancia_valor_percentual = _numero("tolerancia_valor_percentual", tolerancia_valor_percentual)
+        tolerancia_valor_absoluta = _numero("tolerancia_valor_absoluta", tolerancia_valor_absoluta)
+        janela_data_dias = _numero("janela_data_dias", janela_data_dias)
+        score_minimo = _numero("score_minimo", score_minimo)
+        if not 0 <= tolerancia_valor_percentual < 1:
+            raise ValueError(f"tolerancia_valor_percentual fora de [0, 1): {tolerancia_valor_percentual}")
+        if tolerancia_valor_absoluta < 0:
+            raise ValueError(f"tolerancia_valor_absoluta negativa: {tolerancia_valor_absoluta}")
+        if janela_data_dias != int(janela_data_dias) or janela_data_dias <= 0:
+            raise ValueError(f"janela_data_dias deve ser um inteiro positivo: {janela_data_dias}")
+        if not 0 <= score_minimo <= 1:
+            raise ValueError(f"score_minimo fora de [0, 1]: {score_minimo}")
+        if isinstance(palavras_irrelevantes, str) or not isinstance(palavras_irrelevantes, Iterable):
+            raise ValueError("palavras_irrelevantes deve ser uma coleção de palavras")
+        palavras_irrelevantes = list(palavras_irrelevantes)
+        if not all(isinstance(palavra, str) for palavra in palavras_irrelevantes):
+            raise ValueError("palavras_irrelevantes deve conter apenas textos")
+
+        atribuir = object.__setattr__
+        atribuir(self, "tolerancia_valor_percentual", tolerancia_valor_percentual)
+        atribuir(self, "tolerancia_valor_absoluta", tolerancia_valor_absoluta)
+        atribuir(self, "janela_data_dias", int(janela_data_dias))
+        atribuir(self, "score_minimo", score_minimo)
+        atribuir(self, "palavras_irrelevantes", frozenset(palavra.lower() for palavra in palavras_irrelevantes))
+        atribuir(self, "inverso_janela", 1.0 / int(janela_data_dias))
+        if extensoes.get("classificador_tipo") is not None:
+            # Tabela de regras (lista JSON) vira classificador compilado
+            extensoes["classificador_tipo"] = ClassificadorTipo.de_regras(extensoes["classificador_tipo"])
+        atribuir(self, "extensoes", MappingProxyType(dict(extensoes)))
+
+    @classmethod
+    def de(cls, config: Optional[Mapping[str, Any]]) -> "CriteriosConciliacao":
+        """Critérios a partir de um ``criterios_config`` (dicionário ou já compilado)."""
+        if isinstance(config, cls):
+            return config
+        if not config:
+            return CRITERIOS_PADRAO
+        return cls(**config)
+
+    def substituir(self, **alteracoes: Any) -> "CriteriosConciliacao":
+        """Cópia com os campos/extensões alterados (o original não muda)."""
+        if not alteracoes:
+            return self
+        return CriteriosConciliacao(**{**self, **alteracoes})
+
+    def __setattr__(self, nome: str, valor: Any) -> None:
+        raise AttributeError("CriteriosConciliacao é imutável; use substituir()")
+
+    def __delattr__(self, nome: str) -> None:
+        raise AttributeError("CriteriosConciliacao é imutável; use substituir()")
+
+    def __reduce__(self):
+        return (_restaurar, (dict(self),))
+
+    # Mapping: campos validados + extensões
+    def __getitem__(self, chave: str) -> Any:
+        if chave in _CAMPOS:
+            return getattr(self, chave)
+        return self.extensoes[chave]
+
+    def get(self, chave: str, padrao: Any = None) -> Any:
+        if chave in _CAMPOS:
+            return getattr(self, chave)
+        return self.extensoes.get(chave, padrao)
+
+    def __contains__(self, chave: object) -> bool:
+        return chave in _CAMPOS or chave in self.extensoes
+
+    def __iter__(self) -> Iterator[str]:
+        yield from _CAMPOS
+        yield from self.extensoes
+
+    def __len__(self) -> int:
+        return len(_CAMPOS) + len(self.extensoes)
+
+    def __repr__(self) -> str:
+        campos = ", ".join(f"{campo}={getattr(self, campo)!r}" for campo in _CAMPOS[:4])
+        extensoes = f", extensoes={sorted(self.extensoes)}" if self.extensoes else ""
+        return f"CriteriosConciliacao({campos}{extensoes})"
+
+
+def _restaurar(dados: Dict[str, Any]) -> CriteriosConciliacao:
+    return CriteriosConciliacao(**dados)
+
+
+CRITERIOS_PADRAO = CriteriosConciliacao()
+
+
+class InstantaneoCriterios:
+    """Critérios compilados de uma versão do registro (somente leitura)."""
+
+    __slots__ = ("versao", "padrao", "tenants", "contas")
+
+    def __init__(
+        self,
+        versao: int,
+        padrao: CriteriosConciliacao,
+        tenants: Mapping[str, CriteriosConciliacao],
+        contas: Mapping[str, CriteriosConciliacao]
+    ):
+        self.versao = versao
+        self.padrao = padrao
+        self.tenants = MappingProxyType(dict(tenants))
+        self.contas = MappingProxyType(dict(contas))
+
+    def obter(self, tenant: Optional[str] = None, conta: Optional[str] = None) -> CriteriosConciliacao:
+        """Critérios da conta, senão do tenant, senão o padrão."""
+        if conta is not None and conta in self.contas:
+            return self.contas[conta]
+        if tenant is not None and tenant in self.tenants:
+            return self.tenants[tenant]
+        return self.padrao
+
+
+class RegistroCriterios:
+    """
+    Registro de critérios por tenant/conta com recarga a quente.
+
+    Exemplo:
+        registro = RegistroCriterios("config/criterios.json")
+        agente = ConciliadorBancarioAgent(registro=registro)
+        ...
+        registro.recarregar_se_alterado()   # chamado pelo agente a cada lote
+    """
+
+    def __init__(
+        self,
+        caminho: Optional[str] = None,
+        base: CriteriosConciliacao = CRITERIOS_PADRAO,
+        dados: Optional[Mapping[str, Any]] = None
+    ):
+        """
+        Args:
+            caminho: Arquivo JSON com as sobrescritas (padrao/tenants/contas)
+            base: Critérios sobre os quais as sobrescritas são aplicadas
+            dados: Sobrescritas já carregadas (alternativa ao arquivo)
+        """
+        self.caminho = caminho
+        self._base = base
+        self._dados: Mapping[str, Any] = dados or {}
+        self._assinatura: Optional[tuple] = None
+        self._trava = threading.Lock()
+        self._instantaneo = self._compilar(self._dados, versao=0)
+        if caminho is not None:
+            self.recarregar()
+
+    @property
+    def versao(self) -> int:
+        return self._instantaneo.versao
+
+    def instantaneo(self) -> InstantaneoCriterios:
+        """Versão atual; use a mesma instância durante um lote inteiro."""
+        return self._instantaneo
+
+    def obter(self, tenant: Optional[str] = None, conta: Optional[str] = None) -> CriteriosConciliacao:
+        return self._instantaneo.obter(tenant, conta)
+
+    def definir_base(self, base: CriteriosConciliacao) -> None:
+        """Troca a base (ex.: novos índices de parceiros) e recompila as sobrescritas."""
+        with self._trava:
+            self._base = base
+            self._instantaneo = self._compilar(self._dados, self._instantaneo.versao + 1)
+
+    def recarregar(self) -> bool:
+        """
+        Relê o arquivo e publica uma nova versão.
+
+        A nova versão só é publicada se todo o arquivo compilar; com erro de
+        leitura ou validação a versão anterior continua valendo.
+
+        Raises:
+            ValueError: Se o arquivo contiver critérios inválidos
+        """
+        if self.caminho is None:
+            return False
+        with self._trava:
+            assinatura = self._assinatura_arquivo()
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+            instantaneo = self._compilar(dados, self._instantaneo.versao + 1)
+            self._dados, self._assinatura, self._instantaneo = dados, assinatura, instantaneo
+        return True
+
+    def recarregar_se_alterado(self) -> bool:
+        """
+        Recarrega apenas se o arquivo mudou (mtime/tamanho) desde a última leitura.
+
+        Uma versão inválida do arquivo levanta o erro uma única vez e não é
+        tentada de novo até o arquivo mudar outra vez.
+        """
+        if self.caminho is None:
+            return False
+        assinatura = self._assinatura_arquivo()
+        if assinatura == self._assinatura:
+            return False
+        try:
+            return self.recarregar()
+        except ValueError:
+            self._assinatura = assinatura
+            raise
+
+    def _assinatura_arquivo(self) -> tuple:
+        estado = os.stat(self.caminho)
+        return (estado.st_mtime_ns, estado.st_size)
+
+    def _compilar(self, dados: Mapping[str, Any], versao: int) -> InstantaneoCriterios:
+        """
+        Raises:
+            ValueError: Se a raiz ou alguma seção não for um objeto, se houver
+                chave desconhecida ou tenant inexistente, ou se algum critério
+                for inválido
+        """
+        if not isinstance(dados, Mapping):
+            raise ValueError("O arquivo de critérios deve conter um objeto JSON")
+        desconhecidas = sorted(str(chave) for chave in dados if chave not in _SECOES_ARQUIVO)
+        if desconhecidas:
+            raise ValueError(f"Seções desconhecidas no arquivo de critérios: {desconhecidas}")
+        padrao = self._base.substituir(**_sobrescritas('"padrao"', dados.get("padrao", {})))
+        tenants = {
+            tenant: padrao.substituir(**_sobrescritas(f"tenant {tenant!r}", valores))
+            for tenant, valores in _secao(dados, "tenants").items()
+        }
+        contas = {}
+        for conta, valores in _secao(dados, "contas").items():
+            valores = _sobrescritas(f"conta {conta!r}", valores, _CAMPOS_ARQUIVO + ("tenant",))
+            tenant = valores.pop("tenant", None)
+            if tenant is not None and tenant not in tenants:
+                raise ValueError(f"conta {conta!r}: tenant desconhecido {tenant!r}")
+            contas[conta] = tenants.get(tenant, padrao).substituir(**valores)
+        return InstantaneoCriterios(versao, padrao, tenants, contas)
+
+
+__all__ = [
+    "CRITERIOS_PADRAO",
+    "CriteriosConciliacao",
+    "InstantaneoCriterios",
+    "PALAVRAS_IRRELEVANTES_PADRAO",
+    "RegistroCriterios",
+]
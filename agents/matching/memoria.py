@@ -0,0 +1,236 @@
+# agents/matching/memoria.py
+"""
+Memória de conciliações confirmadas para descrições recorrentes.
+
+Aluguel, folha, assinaturas e fornecedores fixos se repetem todo mês com a
+mesma descrição a menos de datas e números. Cada conciliação confirmada grava
+assinatura da descrição → parceiro/contas; na próxima ocorrência a consulta
+é uma busca em dicionário (O(1)) feita antes do score completo, e o parceiro
+lembrado passa a compor o score de descrição (``parceiro_memoria``).
+
+A assinatura é a descrição normalizada sem tokens com dígitos (datas,
+competências, números de documento) e sem palavras irrelevantes, prefixada
+pela conta bancária.
+
+Entradas não confirmadas há mais de ``validade_dias`` expiram na consulta;
+acima de ``capacidade`` sai a usada há mais tempo (LRU).
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional
+
+from .criterios import PALAVRAS_IRRELEVANTES_PADRAO
+from .trigramas import normalizar_texto
+
+
+class EntradaMemoria:
+    """Mapeamento lembrado para uma assinatura de descrição."""
+
+    __slots__ = ("parceiro_nome", "parceiro_id", "cfop", "conta_debito", "conta_credito", "confirmacoes", "atualizado_em")
+
+    def __init__(
+        self,
+        parceiro_nome: Optional[str],
+        parceiro_id: Optional[str] = None,
+        cfop: Optional[str] = None,
+        conta_debito: Optional[str] = None,
+        conta_credito: Optional[str] = None,
+        confirmacoes: int = 1,
+        atualizado_em: float = 0.0
+    ):
+        self.parceiro_nome = parceiro_nome
+        self.parceiro_id = parceiro_id
+        self.cfop = cfop
+        self.conta_debito = conta_debito
+        self.conta_credito = conta_credito
+        self.confirmacoes = confirmacoes
+        self.atualizado_em = atualizado_em
+
+    def mesmo_mapeamento(self, outra: "EntradaMemoria") -> bool:
+        return (self.parceiro_nome, self.parceiro_id, self.conta_debito, self.conta_credito) == (
+            outra.parceiro_nome, outra.parceiro_id, outra.conta_debito, outra.conta_credito
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"EntradaMemoria(parceiro_nome={self.parceiro_nome!r}, confirmacoes={self.confirmacoes!r})"
+
+
+class MemoriaConciliacoes:
+    """
+    Memória LRU com validade de mapeamentos descrição → parceiro/contas.
+
+    Exemplo:
+        memoria = agente.registrar_memoria(MemoriaConciliacoes.carregar("dados/memoria.json"))
+        agente.conciliar_lote(estados)      # aprende com as conciliações automáticas
+        memoria.estatisticas()["taxa_acerto"]
+        memoria.salvar("dados/memoria.json")
+    """
+
+    def __init__(
+        self,
+        capacidade: int = 50_000,
+        validade_dias: float = 90,
+        palavras_irrelevantes: Iterable[str] = PALAVRAS_IRRELEVANTES_PADRAO,
+        relogio: Callable[[], float] = time.time
+    ):
+        """
+        Args:
+            capacidade: Máximo de assinaturas guardadas
+            validade_dias: Dias sem nova confirmação até a entrada expirar
+            palavras_irrelevantes: Termos removidos da assinatura (ex.: "pix", "ted")
+            relogio: Fonte do horário em segundos (substituível em simulações)
+        """
+        if capacidade < 1:
+            raise ValueError("capacidade deve ser positiva")
+        if validade_dias <= 0:
+            raise ValueError("validade_dias deve ser positivo")
+        self.capacidade = capacidade
+        self.validade_dias = validade_dias
+        self.palavras_irrelevantes = frozenset(palavra.upper() for palavra in palavras_irrelevantes)
+        self.relogio = relogio
+        self._entradas: "OrderedDict[str, EntradaMemoria]" = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.expiradas = 0
+        self.descartadas = 0
+
+    def assinatura(self, transacao: Mapping[str, Any]) -> Optional[str]:
+        """Chave da transação (conta + descrição sem números); None se a descrição não tem termos estáveis."""
+        termos = [
+            termo for termo in normalizar_texto(transacao.get("descricao_transacao") or "").split()
+            if len(termo) > 1 and termo not in self.palavras_irrelevantes
+            and not any(caractere.isdigit() for caractere in termo)
+        ]
+        if not termos:
+            return None
+        return f"{transacao.get('conta_bancaria') or ''}|{' '.join(termos)}"
+
+    def consultar(self, transacao: Mapping[str, Any]) -> Optional[EntradaMemoria]:
+        """Mapeamento lembrado para a transação (conta como acerto ou falha)."""
+        chave = self.assinatura(transacao)
+        with self._trava:
+            entrada = self._entradas.get(chave) if chave is not None else None
+            if entrada is not None and self._vencida(entrada):
+                del self._entradas[chave]
+                self.expiradas += 1
+                entrada = None
+            if entrada is None:
+                self.falhas += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada
+
+    def registrar(self, transacao: Mapping[str, Any], classificacao: Mapping[str, Any]) -> Optional[EntradaMemoria]:
+        """
+        Grava a conciliação confirmada de ``transacao`` com ``classificacao``.
+
+        Um mapeamento igual ao lembrado soma uma confirmação; um diferente o substitui.
+        """
+        chave = self.assinatura(transacao)
+        if chave is None or not classificacao.get("parceiro_nome"):
+            return None
+        nova = EntradaMemoria(
+            parceiro_nome=normalizar_texto(classificacao["parceiro_nome"]),
+            parceiro_id=classificacao.get("parceiro_id") or transacao.get("parceiro_id"),
+            cfop=classificacao.get("cfop"),
+            conta_debito=classificacao.get("conta_debito"),
+            conta_credito=classificacao.get("conta_credito"),
+            atualizado_em=self.relogio()
+        )
+        with self._trava:
+            atual = self._entradas.get(chave)
+            if atual is not None and atual.mesmo_mapeamento(nova):
+                nova.confirmacoes = atual.confirmacoes + 1
+            self._entradas[chave] = nova
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+                self.descartadas += 1
+        return nova
+
+    def _vencida(self, entrada: EntradaMemoria) -> bool:
+        return self.relogio() - entrada.atualizado_em > self.validade_dias * 86400
+
+    def remover_vencidas(self) -> int:
+        """Remove todas as entradas expiradas (a consulta já remove as que encontra)."""
+        with self._trava:
+            vencidas = [chave for chave, entrada in self._entradas.items() if self._vencida(entrada)]
+            for chave in vencidas:
+                del self._entradas[chave]
+            self.expiradas += len(vencidas)
+        return len(vencidas)
+
+    @property
+    def taxa_acerto(self) -> float:
+        consultas = self.acertos + self.falhas
+        return self.acertos / consultas if consultas else 0.0
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores lidos de uma vez (instantâneo consistente entre threads)."""
+        with self._trava:
+            return {
+                "entradas": len(self._entradas),
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": self.taxa_acerto,
+                "expiradas": self.expiradas,
+                "descartadas": self.descartadas,
+            }
+
+    def __len__(self) -> int:
+        with self._trava:
+            return len(self._entradas)
+
+    # A trava não é serializável (critérios são copiados para processos)
+    def __getstate__(self) -> Dict[str, Any]:
+        estado = self.__dict__.copy()
+        del estado["_trava"]
+        return estado
+
+    def __setstate__(self, estado: Dict[str, Any]) -> None:
+        self.__dict__.update(estado)
+        self._trava = threading.Lock()
+
+    # === PERSISTÊNCIA ===
+
+    def salvar(self, caminho: str) -> None:
+        """Grava as entradas em JSON (da menos para a mais recente), de forma atômica."""
+        with self._trava:
+            entradas = [[chave, entrada.to_dict()] for chave, entrada in self._entradas.items()]
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"validade_dias": self.validade_dias, "entradas": entradas}, f, ensure_ascii=False)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho: str, **opcoes: Any) -> "MemoriaConciliacoes":
+        """
+        Memória gravada por ``salvar``; arquivo inexistente resulta em memória vazia.
+
+        A ``validade_dias`` gravada vale, salvo se informada em ``opcoes``.
+        Entradas além da ``capacidade`` (as menos recentes) contam como descartadas.
+        """
+        if not os.path.exists(caminho):
+            return cls(**opcoes)
+        with open(caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        if "validade_dias" in dados:
+            opcoes.setdefault("validade_dias", dados["validade_dias"])
+        memoria = cls(**opcoes)
+        for chave, entrada in dados.get("entradas", []):
+            memoria._entradas[chave] = EntradaMemoria(**entrada)
+        while len(memoria._entradas) > memoria.capacidade:
+            memoria._entradas.popitem(last=False)
+            memoria.descartadas += 1
+        return memoria
+
+
+__all__ = ["EntradaMemoria", "MemoriaConciliacoes"]
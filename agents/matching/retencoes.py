@@ -0,0 +1,214 @@
+# agents/matching/retencoes.py
+"""
+Inferência de retenções tributárias a partir do valor bruto e do valor pago.
+
+Quando o documento não informa ``impostos_retidos``, a diferença entre o
+valor bruto da NF e o pagamento líquido ("LIQ") é explicada pela combinação
+de retenções usuais (IRRF, PIS, COFINS, CSLL, ISS, INSS) que a reproduz ao
+centavo. A tabela de combinações é pré-computada e avaliada como produto
+matricial para muitas transações de uma vez.
+
+Combinações diferentes podem somar o mesmo total (ex.: IRRF 1,5% + PCC +
+ISS 3,5% e IRRF 1% + ISS 5% + COFINS + PIS retêm 9,65%). No empate de
+resíduo vence a combinação usual: PIS/COFINS/CSLL retidos juntos (PCC) e
+IRRF a 1,5%. Se ainda houver mais de uma candidata, a inferência é marcada
+como ambígua: o total retido é confiável, a divisão por imposto não.
+"""
+from itertools import product
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Alíquotas usuais por imposto (inclui o conjunto do gerador de dados de teste)
+ALIQUOTAS_RETENCAO_PADRAO: Dict[str, Tuple[float, ...]] = {
+    "irrf": (0.015, 0.01),
+    "pis": (0.0065,),
+    "cofins": (0.03,),
+    "csll": (0.01,),
+    "iss": (0.02, 0.03, 0.035, 0.05),
+    "inss": (0.11,),
+}
+
+# Impostos retidos sempre em conjunto (PCC, Lei 10.833/2003, art. 30)
+GRUPOS_RETENCAO_CONJUNTA: Tuple[Tuple[str, ...], ...] = (("pis", "cofins", "csll"),)
+
+# Alíquota usual de cada imposto com mais de uma opção (IRRF sobre serviços)
+ALIQUOTAS_PREFERIDAS: Dict[str, float] = {"irrf": 0.015}
+
+
+class MotorRetencoes:
+    """
+    Tabela pré-computada de combinações de retenções.
+
+    Cada combinação escolhe, para cada imposto, "não retido" ou uma de suas
+    alíquotas. Os impostos são arredondados ao centavo individualmente, como
+    nas guias, antes de somar.
+    """
+
+    def __init__(
+        self,
+        aliquotas: Optional[Mapping[str, Sequence[float]]] = None,
+        tolerancia: float = 0.05,
+        tamanho_bloco: int = 8192,
+        grupos_conjuntos: Sequence[Sequence[str]] = GRUPOS_RETENCAO_CONJUNTA,
+        aliquotas_preferidas: Optional[Mapping[str, float]] = None
+    ):
+        """
+        Args:
+            aliquotas: Imposto → alíquotas possíveis (padrão: ALIQUOTAS_RETENCAO_PADRAO)
+            tolerancia: Resíduo máximo aceito em R$ (arredondamentos)
+            tamanho_bloco: Linhas avaliadas por bloco (limita a memória da matriz)
+            grupos_conjuntos: Impostos retidos juntos; combinações com parte de
+                um grupo perdem os empates
+            aliquotas_preferidas: Imposto → alíquota usual (padrão:
+                ALIQUOTAS_PREFERIDAS); outra alíquota do imposto perde os empates
+        """
+        aliquotas = aliquotas or ALIQUOTAS_RETENCAO_PADRAO
+        preferidas = ALIQUOTAS_PREFERIDAS if aliquotas_preferidas is None else aliquotas_preferidas
+        self.tolerancia = tolerancia
+        self.tamanho_bloco = tamanho_bloco
+
+        # Uma coluna por par (imposto, alíquota)
+        self.colunas: List[Tuple[str, float]] = [
+            (imposto, aliquota) for imposto, opcoes in aliquotas.items() for aliquota in opcoes
+        ]
+        self._aliquotas = np.array([aliquota for _, aliquota in self.colunas])
+
+        # Combinações: None (não retido) ou índice da coluna escolhida, por imposto
+        opcoes_por_imposto = []
+        for imposto in aliquotas:
+            indices = [i for i, (nome, _) in enumerate(self.colunas) if nome == imposto]
+            opcoes_por_imposto.append([None] + indices)
+
+        escolhas = [
+            tuple(indice for indice in escolha if indice is not None)
+            for escolha in product(*opcoes_por_imposto)
+        ]
+        # Penalidade de uma combinação: grupos retidos só em parte + impostos
+        # fora da alíquota usual
+        grupos = [set(grupo) & set(aliquotas) for grupo in grupos_conjuntos]
+
+        def penalidade(escolha: Tuple[int, ...]) -> int:
+            usados = {self.colunas[indice][0]: self.colunas[indice][1] for indice in escolha}
+            parciais = sum(1 for grupo in grupos if 0 < len(grupo & set(usados)) < len(grupo))
+            return parciais + sum(
+                1 for imposto, aliquota in usados.items()
+                if imposto in preferidas and aliquota != preferidas[imposto]
+            )
+
+        # Ordem de desempate entre combinações com o MESMO resíduo: menor
+        # penalidade, depois menos impostos e, entre eles, os impostos/alíquotas
+        # listados antes (argmin fica com a primeira)
+        escolhas = sorted(
+            (escolha for escolha in escolhas if escolha),
+            key=lambda escolha: (penalidade(escolha), len(escolha), escolha)
+        )
+        self._penalidades = np.array([penalidade(escolha) for escolha in escolhas])
+        self._combinacoes = np.zeros((len(escolhas), len(self.colunas)))
+        for linha, escolha in enumerate(escolhas):
+            self._combinacoes[linha, list(escolha)] = 1
+
+    def __len__(self) -> int:
+        return len(self._combinacoes)
+
+    def inferir_lote(self, valores_brutos: Sequence[float], valores_liquidos: Sequence[float]) -> Dict[str, np.ndarray]:
+        """
+        Melhor combinação para cada par (bruto, líquido).
+
+        A melhor combinação é a de menor resíduo: uma que reproduz a diferença
+        ao centavo sempre vence outra que só a aproxima. Resíduos iguais são
+        desempatados pela combinação usual (PCC completo, IRRF a 1,5%) e,
+        depois, por menos impostos.
+
+        Returns:
+            Dicionário de arrays alinhados à entrada:
+                - indice_combinacao: índice da combinação (-1 se nenhuma explica a
+                  diferença ou se não há diferença além da tolerância)
+                - residuo: |bruto - retenções - líquido| em R$ da melhor combinação
+                - total_retencoes: soma das retenções da melhor combinação em R$
+                - ambiguo: True se outra combinação, igualmente usual, tem o
+                  mesmo resíduo (a divisão por imposto não é determinável)
+        """
+        brutos = np.round(np.abs(np.asarray(valores_brutos, dtype=float)) * 100).astype(np.int64)
+        liquidos = np.round(np.abs(np.asarray(valores_liquidos, dtype=float)) * 100).astype(np.int64)
+        tolerancia = int(round(self.tolerancia * 100))
+
+        indices = np.full(len(brutos), -1, dtype=np.int64)
+        residuos = np.zeros(len(brutos), dtype=float)
+        totais = np.zeros(len(brutos), dtype=float)
+        ambiguos = np.zeros(len(brutos), dtype=bool)
+
+        for inicio in range(0, len(brutos), self.tamanho_bloco):
+            fim = inicio + self.tamanho_bloco
+            bruto = brutos[inicio:fim]
+            # (n, colunas): imposto arredondado ao centavo por coluna
+            impostos = np.round(bruto[:, None] * self._aliquotas[None, :])
+            # (n, combinações): total retido por combinação (inteiros exatos em float64)
+            retido = (impostos @ self._combinacoes.T).astype(np.int64)
+            residuo = np.abs(bruto[:, None] - retido - liquidos[inicio:fim, None])
+
+            melhor = np.argmin(residuo, axis=1)  # menor resíduo; empate: primeira (menos impostos)
+            linhas = np.arange(len(bruto))
+            residuo_melhor = residuo[linhas, melhor]
+            # Sem diferença a explicar (bruto ≈ líquido) não há retenção
+            sem_diferenca = np.abs(bruto - liquidos[inicio:fim]) <= tolerancia
+            aceito = (residuo_melhor <= tolerancia) & ~sem_diferenca
+
+            # Empate exato com outra combinação de mesma penalidade
+            empates = (
+                (residuo == residuo_melhor[:, None]) & (self._penalidades[None, :] == self._penalidades[melhor][:, None])
+            ).sum(axis=1)
+
+            indices[inicio:fim] = np.where(aceito, melhor, -1)
+            residuos[inicio:fim] = residuo_melhor / 100
+            totais[inicio:fim] = np.where(aceito, retido[linhas, melhor], 0) / 100
+            ambiguos[inicio:fim] = aceito & (empates > 1)
+
+        return {"indice_combinacao": indices, "residuo": residuos, "total_retencoes": totais, "ambiguo": ambiguos}
+
+    def inferir(self, valor_bruto: float, valor_liquido: float) -> Optional[Dict[str, float]]:
+        """
+        Impostos retidos (R$ por imposto) que explicam a diferença, ou None.
+
+        None também quando bruto e líquido diferem no máximo pela tolerância
+        ou quando a divisão por imposto é ambígua (ver ``inferir_lote``).
+        """
+        return self.impostos_lote([valor_bruto], [valor_liquido])[0]
+
+    def impostos_lote(
+        self, valores_brutos: Sequence[float], valores_liquidos: Sequence[float]
+    ) -> List[Optional[Dict[str, float]]]:
+        """Versão em lote de ``inferir``: um dicionário de impostos (ou None) por linha."""
+        inferencia = self.inferir_lote(valores_brutos, valores_liquidos)
+        resultados: List[Optional[Dict[str, float]]] = []
+        for bruto, indice, ambiguo in zip(valores_brutos, inferencia["indice_combinacao"], inferencia["ambiguo"]):
+            resultados.append(None if indice < 0 or ambiguo else self.impostos(bruto, indice))
+        return resultados
+
+    def impostos(self, valor_bruto: float, indice: int) -> Dict[str, float]:
+        """Impostos (R$ por imposto, arredondados ao centavo) da combinação de índice informado."""
+        bruto_centavos = round(abs(valor_bruto) * 100)
+        return {
+            imposto: round(bruto_centavos * aliquota) / 100
+            for imposto, aliquota in self.combinacao(indice).items()
+        }
+
+    def combinacao(self, indice: int) -> Dict[str, float]:
+        """Alíquotas (imposto → alíquota) da combinação de índice informado."""
+        return {
+            imposto: aliquota
+            for (imposto, aliquota), usado in zip(self.colunas, self._combinacoes[indice])
+            if usado
+        }
+
+
+MOTOR_RETENCOES_PADRAO = MotorRetencoes()
+
+
+__all__ = [
+    "ALIQUOTAS_PREFERIDAS",
+    "ALIQUOTAS_RETENCAO_PADRAO",
+    "GRUPOS_RETENCAO_CONJUNTA",
+    "MOTOR_RETENCOES_PADRAO",
+    "MotorRetencoes",
+]
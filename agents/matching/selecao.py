@@ -0,0 +1,325 @@
+# agents/matching/selecao.py
+"""
+Pontuação de pares transação × documento e seleção de candidatos.
+
+``pontuar`` é o cálculo de score usado por ``calcular_matching_node``; fica
+aqui para que os modos que avaliam muitos documentos por transação (execução
+particionada, top-k, atribuição) usem exatamente o mesmo critério sem passar
+pelo grafo a cada par.
+"""
+import heapq
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from .criterios import CriteriosConciliacao
+from .trigramas import normalizar_texto
+
+PESOS: Dict[str, float] = {"valor": 0.6, "data": 0.2, "descricao": 0.2}
+
+
+def extrair_palavras_chave(descricao: str, criterios_config: Mapping) -> List[str]:
+    """Extrai palavras-chave relevantes da descrição"""
+    descricao_clean = re.sub(r"[^\w\s]", " ", descricao.upper())
+    palavras = descricao_clean.split()
+
+    palavras_irrelevantes = CriteriosConciliacao.de(criterios_config).palavras_irrelevantes
+    palavras_filtradas = []
+
+    for palavra in palavras:
+        if len(palavra) > 2 and palavra.lower() not in palavras_irrelevantes:
+            palavras_filtradas.append(palavra)
+
+    numeros = re.findall(r"\d{3,}", descricao)
+    palavras_filtradas.extend(numeros)
+
+    return list(set(palavras_filtradas))
+
+
+def palavras_documento(classificacao: Mapping, criterios_config: Mapping) -> List[str]:
+    """Palavras-chave do documento (número e parceiro), pré-computáveis por documento."""
+    criterios_config = CriteriosConciliacao.de(criterios_config)
+    palavras_classificacao = []
+    if classificacao.get("numero_documento"):
+        palavras_classificacao.extend(extrair_palavras_chave(classificacao["numero_documento"], criterios_config))
+    if classificacao.get("parceiro_nome"):
+        palavras_classificacao.extend(extrair_palavras_chave(classificacao["parceiro_nome"], criterios_config))
+    return palavras_classificacao
+
+
+def _data(valor: Any) -> Optional[datetime]:
+    return _data_iso(valor) if isinstance(valor, str) else None
+
+
+@lru_cache(maxsize=65536)
+def _data_iso(valor: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _score_valor(valor_transacao: float, valor_classificacao: float, criterios: CriteriosConciliacao) -> float:
+    if valor_transacao == 0 and valor_classificacao == 0:
+        return 1.0
+    if valor_transacao == 0 or valor_classificacao == 0:
+        return 0.0
+
+    diferenca_abs = abs(valor_transacao - valor_classificacao)
+    diferenca_perc = diferenca_abs / max(valor_transacao, valor_classificacao)
+
+    if (diferenca_abs <= criterios.tolerancia_valor_absoluta and
+            diferenca_perc <= criterios.tolerancia_valor_percentual):
+        return 1.0 - diferenca_perc
+    return max(0.0, 1.0 - (diferenca_perc * 2))
+
+
+def _score_data(data_transacao: Any, data_classificacao: Any, criterios: CriteriosConciliacao) -> Tuple[float, int]:
+    """(score, diferença em dias); datas inválidas ou ausentes valem 0.5."""
+    inicio, fim = _data(data_transacao), _data(data_classificacao)
+    if inicio is None or fim is None:
+        return 0.5, 0
+
+    diferenca_dias = abs((inicio - fim).days)
+    if diferenca_dias <= criterios.janela_data_dias:
+        return max(0.0, 1.0 - diferenca_dias * criterios.inverso_janela), diferenca_dias
+    return 0.0, diferenca_dias
+
+
+def pontuar(
+    transacao: Mapping,
+    classificacao: Mapping,
+    criterios_config: Mapping,
+    palavras_transacao: Optional[Sequence[str]] = None,
+    palavras_classificacao: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    """
+    Score de matching entre uma transação e um documento (``matching_info``).
+
+    ``palavras_transacao``/``palavras_classificacao`` podem ser informadas já
+    extraídas quando a mesma transação ou documento é pontuado muitas vezes.
+    """
+    criterios_config = CriteriosConciliacao.de(criterios_config)
+    scores = {}
+
+    # Score por valor
+    valor_transacao = abs(transacao.get("valor_transacao", 0))
+    valor_classificacao = abs(classificacao.get("valor_total", 0))
+    scores["valor"] = _score_valor(valor_transacao, valor_classificacao, criterios_config)
+
+    # Score por data
+    scores["data"], diferenca_dias = _score_data(
+        transacao.get("data_transacao", ""), classificacao.get("data_documento", ""), criterios_config
+    )
+
+    # Score por descrição
+    if palavras_transacao is None:
+        palavras_transacao = extrair_palavras_chave(transacao.get("descricao_transacao", ""), criterios_config)
+    if palavras_classificacao is None:
+        palavras_classificacao = palavras_documento(classificacao, criterios_config)
+
+    if palavras_transacao and palavras_classificacao:
+        intersecao = set(palavras_transacao) & set(palavras_classificacao)
+        uniao = set(palavras_transacao) | set(palavras_classificacao)
+        scores["descricao"] = len(intersecao) / len(uniao) if uniao else 0.0
+        palavras_encontradas = list(intersecao)
+    else:
+        scores["descricao"] = 0.0
+        palavras_encontradas = []
+
+    # Componente opcional: similaridade por trigramas com o nome do parceiro
+    indice_parceiros = criterios_config.extensoes.get("indice_parceiros")
+    if indice_parceiros is not None and classificacao.get("parceiro_nome"):
+        similaridade = indice_parceiros.similaridade(
+            transacao.get("descricao_transacao", ""), classificacao["parceiro_nome"]
+        )
+        scores["parceiro_trigrama"] = similaridade
+        scores["descricao"] = max(scores["descricao"], similaridade)
+
+    # Componente opcional: parceiro lembrado de conciliações confirmadas (detectar_parceiro_node)
+    parceiro_memoria = transacao.get("parceiro_memoria")
+    if parceiro_memoria and classificacao.get("parceiro_nome"):
+        scores["parceiro_memoria"] = 1.0 if normalizar_texto(classificacao["parceiro_nome"]) == parceiro_memoria else 0.0
+        scores["descricao"] = max(scores["descricao"], scores["parceiro_memoria"])
+
+    # Componente opcional: parceiro resolvido pelo autômato (detectar_parceiro_node)
+    automato_parceiros = criterios_config.extensoes.get("automato_parceiros")
+    if automato_parceiros is not None and transacao.get("parceiro_id"):
+        parceiro_classificacao = classificacao.get("parceiro_id") or (
+            automato_parceiros.id_por_nome(classificacao["parceiro_nome"])
+            if classificacao.get("parceiro_nome") else None
+        )
+        if parceiro_classificacao:
+            scores["parceiro_detectado"] = 1.0 if parceiro_classificacao == transacao["parceiro_id"] else 0.0
+            scores["descricao"] = max(scores["descricao"], scores["parceiro_detectado"])
+
+    # Score total ponderado
+    score_total = sum(scores[key] * PESOS[key] for key in PESOS)
+
+    return {
+        "score_total": score_total,
+        "scores_detalhados": scores,
+        "diferenca_valor": abs(valor_transacao - valor_classificacao),
+        "diferenca_dias": diferenca_dias,
+        "palavras_encontradas": palavras_encontradas
+    }
+
+
+class ContadoresPoda:
+    """
+    Contadores de pares descartados por limite superior antes do score completo.
+
+    - avaliados: pares considerados
+    - podados_valor: descartados só pelo score de valor (sem datas nem descrição)
+    - podados_data: descartados após valor + data (sem tokenizar descrições)
+    - pontuados: pares que passaram pelo score completo
+    """
+
+    __slots__ = ("avaliados", "podados_valor", "podados_data", "pontuados")
+
+    def __init__(self) -> None:
+        self.avaliados = 0
+        self.podados_valor = 0
+        self.podados_data = 0
+        self.pontuados = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+
+def _ranquear(
+    transacao: Mapping,
+    documentos: Iterable[Mapping],
+    criterios_config: Mapping,
+    tamanho: int,
+    palavras_documentos: Optional[Sequence[Sequence[str]]],
+    limiar: Optional[float],
+    contadores: Optional[ContadoresPoda]
+) -> List[Tuple[float, int, Dict[str, Any]]]:
+    """
+    Heap mínimo limitado com os ``tamanho`` melhores pares, em ordem decrescente.
+
+    Antes do score completo cada par passa por dois limites superiores
+    (descrição vale no máximo 1; data também): só valor e, depois, valor +
+    data. O par é descartado se o limite não alcança o ``limiar`` nem entra
+    no heap já cheio. Os limites usam a mesma soma ponderada de ``pontuar``,
+    então o resultado é idêntico ao da avaliação exaustiva.
+    """
+    contadores = contadores or ContadoresPoda()
+    criterios_config = CriteriosConciliacao.de(criterios_config)
+    valor_transacao = abs(transacao.get("valor_transacao", 0))
+    data_transacao = transacao.get("data_transacao", "")
+    palavras_transacao: Optional[List[str]] = None
+    piso_limiar = float("-inf") if limiar is None else limiar
+
+    heap: List[Tuple[float, int, Dict[str, Any]]] = []
+    for indice, documento in enumerate(documentos):
+        contadores.avaliados += 1
+        # Com o heap cheio, o par precisa superar estritamente o pior item
+        # (empates perdem para o índice menor, já presente)
+        if len(heap) >= tamanho:
+            piso, estrito = max(piso_limiar, heap[0][0]), heap[0][0] >= piso_limiar
+        else:
+            piso, estrito = piso_limiar, False
+
+        score_valor = _score_valor(valor_transacao, abs(documento.get("valor_total", 0)), criterios_config)
+        limite = score_valor * PESOS["valor"] + 1.0 * PESOS["data"] + 1.0 * PESOS["descricao"]
+        if limite < piso or (estrito and limite == piso):
+            contadores.podados_valor += 1
+            continue
+
+        score_data, _ = _score_data(data_transacao, documento.get("data_documento", ""), criterios_config)
+        limite = score_valor * PESOS["valor"] + score_data * PESOS["data"] + 1.0 * PESOS["descricao"]
+        if limite < piso or (estrito and limite == piso):
+            contadores.podados_data += 1
+            continue
+
+        if palavras_transacao is None:
+            palavras_transacao = extrair_palavras_chave(transacao.get("descricao_transacao", ""), criterios_config)
+        contadores.pontuados += 1
+        matching_info = pontuar(
+            transacao, documento, criterios_config,
+            palavras_transacao=palavras_transacao,
+            palavras_classificacao=palavras_documentos[indice] if palavras_documentos is not None else None
+        )
+        if matching_info["score_total"] < piso_limiar:
+            continue
+        item = (matching_info["score_total"], -indice, matching_info)
+        if len(heap) < tamanho:
+            heapq.heappush(heap, item)
+        elif item[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, item)
+
+    return sorted(heap, key=lambda item: item[:2], reverse=True)
+
+
+def top_k_candidatos(
+    transacao: Mapping,
+    documentos: Iterable[Mapping],
+    criterios_config: Mapping,
+    k: int = 5,
+    palavras_documentos: Optional[Sequence[Sequence[str]]] = None,
+    limiar: Optional[float] = None,
+    contadores: Optional[ContadoresPoda] = None
+) -> List[Dict[str, Any]]:
+    """
+    Os ``k`` documentos de maior ``score_total`` para a transação.
+
+    Os documentos são percorridos uma única vez mantendo um heap mínimo de
+    tamanho k + 1 (o candidato extra só serve para calcular a margem do
+    k-ésimo), de modo que a memória é O(k) mesmo contra pools grandes.
+    Pares que não podem entrar no heap são podados por limite superior.
+
+    Args:
+        limiar: Se informado, descarta pares com score abaixo dele (ex.: score_minimo)
+        contadores: Acumula quantos pares foram podados em cada etapa
+
+    Returns:
+        Lista ordenada por score decrescente; cada item é o ``matching_info``
+        do par acrescido de ``indice`` (posição do documento) e ``margem``
+        (diferença de score para o candidato seguinte no ranking). Em empate
+        vence o documento de menor índice.
+    """
+    if k < 1:
+        raise ValueError("k deve ser positivo")
+
+    ranking = _ranquear(transacao, documentos, criterios_config, k + 1, palavras_documentos, limiar, contadores)
+    candidatos = []
+    for posicao, (score, indice_negativo, matching_info) in enumerate(ranking[:k]):
+        seguinte = ranking[posicao + 1][0] if posicao + 1 < len(ranking) else 0.0
+        candidatos.append({"indice": -indice_negativo, **matching_info, "margem": score - seguinte})
+    return candidatos
+
+
+def melhor_candidato(
+    transacao: Mapping,
+    documentos: Iterable[Mapping],
+    criterios_config: Mapping,
+    palavras_documentos: Optional[Sequence[Sequence[str]]] = None,
+    limiar: Optional[float] = None,
+    contadores: Optional[ContadoresPoda] = None
+) -> Optional[Tuple[int, Dict[str, Any]]]:
+    """
+    Documento de maior ``score_total`` para a transação.
+
+    Returns:
+        (índice do documento, matching_info) ou None se não há documentos
+        (ou nenhum alcança o ``limiar``). Em empate vence o primeiro documento.
+    """
+    ranking = _ranquear(transacao, documentos, criterios_config, 1, palavras_documentos, limiar, contadores)
+    if not ranking:
+        return None
+    _, indice_negativo, matching_info = ranking[0]
+    return -indice_negativo, matching_info
+
+
+__all__ = [
+    "ContadoresPoda",
+    "PESOS",
+    "extrair_palavras_chave",
+    "melhor_candidato",
+    "palavras_documento",
+    "pontuar",
+    "top_k_candidatos",
+]
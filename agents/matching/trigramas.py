@@ -0,0 +1,116 @@
+# agents/matching/trigramas.py
+"""
+Índice de trigramas de caracteres para matching aproximado de nomes de parceiros.
+
+Tolera abreviações e truncamentos comuns em extratos ("ABC COM LTDA" vs
+"ABC COMERCIO LTDA"). A busca percorre apenas as listas invertidas dos
+trigramas da consulta, sem varrer todos os parceiros cadastrados.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+def normalizar_texto(texto: str) -> str:
+    """Remove acentos e pontuação, converte para maiúsculas e colapsa espaços."""
+    sem_acentos = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^\w\s]", " ", sem_acentos.upper()).split())
+
+
+def trigramas(texto: str) -> FrozenSet[str]:
+    """Conjunto de trigramas de caracteres do texto normalizado (com bordas)."""
+    normalizado = f" {normalizar_texto(texto)} "
+    if len(normalizado) < 3:
+        return frozenset()
+    return frozenset(normalizado[i:i + 3] for i in range(len(normalizado) - 2))
+
+
+class IndiceTrigramas:
+    """
+    Índice invertido trigrama → parceiros.
+
+    A similaridade é a fração dos trigramas do nome do parceiro presentes no
+    texto consultado (contenção), adequada para descrições bancárias que
+    trazem o nome junto de outras palavras.
+    """
+
+    def __init__(self, nomes: Optional[Iterable[str]] = None, frequencia_maxima: float = 0.5):
+        """
+        Args:
+            nomes: Nomes de parceiros para indexar
+            frequencia_maxima: Trigramas presentes em mais que esta fração dos
+                parceiros são ignorados na geração de candidatos (ex.: "LTD")
+        """
+        self.frequencia_maxima = frequencia_maxima
+        self._nomes: List[str] = []
+        self._trigramas: List[FrozenSet[str]] = []
+        self._posicoes: Dict[str, int] = {}
+        self._invertido: Dict[str, List[int]] = defaultdict(list)
+        for nome in nomes or []:
+            self.adicionar(nome)
+
+    def __len__(self) -> int:
+        return len(self._nomes)
+
+    def adicionar(self, nome: str) -> None:
+        """Indexa um nome de parceiro (duplicatas normalizadas são ignoradas)."""
+        chave = normalizar_texto(nome)
+        if not chave or chave in self._posicoes:
+            return
+        posicao = len(self._nomes)
+        grams = trigramas(chave)
+        self._nomes.append(nome)
+        self._trigramas.append(grams)
+        self._posicoes[chave] = posicao
+        for gram in grams:
+            self._invertido[gram].append(posicao)
+
+    def buscar(
+        self, descricao: str, limite: int = 5, similaridade_minima: float = 0.3
+    ) -> List[Tuple[str, float]]:
+        """
+        Parceiros mais similares à descrição, em ordem decrescente de similaridade.
+
+        Args:
+            descricao: Texto da transação bancária
+            limite: Número máximo de parceiros retornados
+            similaridade_minima: Descarta parceiros abaixo deste valor
+        """
+        grams = trigramas(descricao)
+        if not grams or not self._nomes:
+            return []
+
+        corte = max(1, int(self.frequencia_maxima * len(self._nomes)))
+        contagem: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            lista = self._invertido.get(gram)
+            if lista and len(lista) <= corte:
+                for posicao in lista:
+                    contagem[posicao] += 1
+
+        # Recontagem exata apenas para os candidatos gerados
+        resultados = []
+        for posicao in contagem:
+            grams_nome = self._trigramas[posicao]
+            similaridade = len(grams_nome & grams) / len(grams_nome)
+            if similaridade >= similaridade_minima:
+                resultados.append((self._nomes[posicao], similaridade))
+
+        resultados.sort(key=lambda item: item[1], reverse=True)
+        return resultados[:limite]
+
+    def similaridade(self, descricao: str, nome: str) -> float:
+        """
+        Similaridade entre a descrição e um parceiro específico.
+
+        Usa o conjunto de trigramas em cache se o parceiro estiver indexado.
+        """
+        posicao = self._posicoes.get(normalizar_texto(nome))
+        grams_nome = self._trigramas[posicao] if posicao is not None else trigramas(nome)
+        if not grams_nome:
+            return 0.0
+        return len(grams_nome & trigramas(descricao)) / len(grams_nome)
+
+
+__all__ = ["IndiceTrigramas", "normalizar_texto", "trigramas"]
@@ -0,0 +1,377 @@
+# agents/rastreamento.py
+"""
+Rastreamento por transação com amostragem e exportação local de spans.
+
+Cada chamada de ``conciliar`` (e cada item de ``conciliar_lote``) abre um
+rastreio com um span raiz; cada nó do workflow vira um span filho com
+atributos do que decidiu (tipo da transação, parceiro, score, status). O
+rastreio viaja no estado do workflow (chave ``rastreio``), então itens de um
+mesmo lote e ramos paralelos não se misturam.
+
+Amostragem:
+- cabeça: ``taxa_amostragem`` dos rastreios é escolhida na abertura e sempre exportada
+- cauda: os demais são registrados e decididos no fim; ficam os lentos
+  (duração da raiz >= ``limite_lento_ms``) e os com erro
+
+Sem cauda (``limite_lento_ms=None`` e ``manter_erros=False``) os rastreios
+não amostrados na cabeça nem são registrados.
+
+Exportação: um span por linha no JSON v2 do Zipkin (``traceId``, ``id``,
+``parentId``, ``name``, ``timestamp``/``duration`` em microssegundos,
+``localEndpoint`` e ``tags`` como texto). ``jq -s . rastreios.jsonl`` gera o
+array aceito pelo upload do Zipkin e do Jaeger (formato Zipkin).
+
+Uso:
+    rastreador = agente.registrar_rastreador(Rastreador("rastreios.jsonl", taxa_amostragem=0.01))
+    agente.conciliar_lote(estados)
+    rastreador.estatisticas()          # iniciados, exportados por cabeça/lento/erro
+    rastreador.fechar()
+"""
+import functools
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, Union
+
+SERVICO_PADRAO = "conciliacao-bancaria"
+
+_STATUS_ERRO = "Erro_Processamento"
+
+
+class Span:
+    """Trecho cronometrado de um rastreio (tempos em segundos de ``perf_counter``)."""
+
+    __slots__ = ("nome", "id", "pai", "inicio", "fim", "atributos", "erro")
+
+    def __init__(self, nome: str, id: str, pai: Optional[str], inicio: float, atributos: Optional[Dict[str, Any]] = None):
+        self.nome = nome
+        self.id = id
+        self.pai = pai
+        self.inicio = inicio
+        self.fim: Optional[float] = None
+        self.atributos: Dict[str, Any] = atributos or {}
+        self.erro: Optional[str] = None
+
+    @property
+    def duracao_ms(self) -> float:
+        return ((self.fim if self.fim is not None else time.perf_counter()) - self.inicio) * 1000
+
+    def __repr__(self) -> str:
+        return f"Span(nome={self.nome!r}, duracao_ms={self.duracao_ms:.3f})"
+
+
+class Rastreio:
+    """
+    Spans de uma transação.
+
+    Spans registrados ficam sob o span aberto mais recente (``abrir``/``fechar``),
+    de modo que ``conciliar_top_k`` agrupa os nós sob o seu span "conciliar".
+    """
+
+    __slots__ = ("id", "raiz", "spans", "amostrado", "_abertos", "_epoca", "_aleatorio", "envelope")
+
+    def __init__(self, id: str, nome: str, atributos: Dict[str, Any], amostrado: bool, aleatorio: random.Random):
+        self.id = id
+        self._aleatorio = aleatorio
+        # Relógio de parede só na abertura; durações vêm de perf_counter
+        inicio = time.perf_counter()
+        self._epoca = time.time() - inicio
+        self.raiz = Span(nome, self._novo_id(), None, inicio, atributos)
+        self.spans: List[Span] = [self.raiz]
+        self._abertos: List[Span] = [self.raiz]
+        self.amostrado = amostrado
+        # Em lotes a raiz cobre só os spans do item, não a espera pelo lote
+        self.envelope = False
+
+    def _novo_id(self) -> str:
+        return f"{self._aleatorio.getrandbits(64):016x}"
+
+    def abrir(self, nome: str, atributos: Optional[Dict[str, Any]] = None) -> Span:
+        span = Span(nome, self._novo_id(), self._abertos[-1].id, time.perf_counter(), atributos)
+        self.spans.append(span)
+        self._abertos.append(span)
+        return span
+
+    def fechar(self, span: Span) -> None:
+        span.fim = time.perf_counter()
+        self._abertos.remove(span)
+
+    def registrar(
+        self, nome: str, inicio: float, fim: float, atributos: Dict[str, Any], erro: Optional[str] = None
+    ) -> Span:
+        """Acrescenta um span já cronometrado sob o span aberto atual."""
+        span = Span(nome, self._novo_id(), self._abertos[-1].id, inicio, atributos)
+        span.fim = fim
+        span.erro = erro
+        self.spans.append(span)
+        return span
+
+    def encerrar(self) -> None:
+        if self.envelope and len(self.spans) > 1:
+            filhos = self.spans[1:]
+            self.raiz.inicio = min(span.inicio for span in filhos)
+            self.raiz.fim = max(span.fim or span.inicio for span in filhos)
+        elif self.raiz.fim is None:
+            self.raiz.fim = time.perf_counter()
+
+    @property
+    def com_erro(self) -> bool:
+        return any(span.erro is not None for span in self.spans)
+
+    def zipkin(self, servico: str = SERVICO_PADRAO) -> List[Dict[str, Any]]:
+        """Spans no JSON v2 do Zipkin (tags convertidas para texto, erro na tag "error")."""
+        endpoint = {"serviceName": servico}
+        saida = []
+        for span in self.spans:
+            fim = span.fim if span.fim is not None else span.inicio
+            registro: Dict[str, Any] = {
+                "traceId": self.id,
+                "id": span.id,
+                "name": span.nome,
+                "timestamp": int((self._epoca + span.inicio) * 1_000_000),
+                "duration": max(1, int((fim - span.inicio) * 1_000_000)),
+                "localEndpoint": endpoint,
+                "tags": {chave: _texto(valor) for chave, valor in span.atributos.items() if valor is not None},
+            }
+            if span.pai is not None:
+                registro["parentId"] = span.pai
+            if span.erro is not None:
+                registro["tags"]["error"] = span.erro
+            saida.append(registro)
+        return saida
+
+
+def _texto(valor: Any) -> str:
+    valor = getattr(valor, "value", valor)
+    if isinstance(valor, bool):
+        return "true" if valor else "false"
+    if isinstance(valor, float):
+        return f"{valor:.6g}"
+    return str(valor)
+
+
+class ExportadorJSONL:
+    """Acrescenta spans a um arquivo JSON-lines (um span por linha)."""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._arquivo = open(caminho, "a", encoding="utf-8")
+        self._trava = threading.Lock()
+
+    def __call__(self, spans: List[Dict[str, Any]]) -> None:
+        linhas = "".join(json.dumps(span, ensure_ascii=False) + "\n" for span in spans)
+        with self._trava:
+            self._arquivo.write(linhas)
+            self._arquivo.flush()
+
+    def fechar(self) -> None:
+        with self._trava:
+            self._arquivo.close()
+
+
+class Rastreador:
+    """
+    Abre rastreios, aplica a amostragem de cabeça/cauda e exporta os mantidos.
+
+    Exemplo:
+        rastreador = Rastreador("rastreios.jsonl", taxa_amostragem=0.05, limite_lento_ms=50)
+        agente.registrar_rastreador(rastreador)
+    """
+
+    def __init__(
+        self,
+        exportador: Union[str, Callable[[List[Dict[str, Any]]], None]],
+        taxa_amostragem: float = 0.01,
+        limite_lento_ms: Optional[float] = 100.0,
+        manter_erros: bool = True,
+        servico: str = SERVICO_PADRAO,
+        semente: Optional[int] = None
+    ):
+        """
+        Args:
+            exportador: Caminho do arquivo JSON-lines ou função que recebe os
+                spans (formato Zipkin v2) de cada rastreio mantido
+            taxa_amostragem: Fração dos rastreios mantida na abertura, em [0, 1]
+            limite_lento_ms: Duração a partir da qual o rastreio é sempre mantido
+                (None desliga a cauda por latência)
+            manter_erros: Mantém sempre rastreios com erro ou Erro_Processamento
+            servico: ``localEndpoint.serviceName`` dos spans
+            semente: Semente dos ids e do sorteio (reprodutível em testes)
+        """
+        if not 0 <= taxa_amostragem <= 1:
+            raise ValueError("taxa_amostragem deve estar em [0, 1]")
+        if limite_lento_ms is not None and limite_lento_ms < 0:
+            raise ValueError("limite_lento_ms não pode ser negativo")
+        self.exportador = ExportadorJSONL(exportador) if isinstance(exportador, str) else exportador
+        self.taxa_amostragem = taxa_amostragem
+        self.limite_lento_ms = limite_lento_ms
+        self.manter_erros = manter_erros
+        self.servico = servico
+        self._aleatorio = random.Random(semente)
+        self._trava = threading.Lock()
+        self.iniciados = 0
+        self.exportados = {"cabeca": 0, "lento": 0, "erro": 0}
+        self.descartados = 0
+
+    @property
+    def cauda(self) -> bool:
+        return self.limite_lento_ms is not None or self.manter_erros
+
+    def iniciar(self, nome: str, atributos: Optional[Dict[str, Any]] = None) -> Optional[Rastreio]:
+        """Abre um rastreio; None se ele não pode ser mantido (sem cabeça nem cauda)."""
+        with self._trava:
+            self.iniciados += 1
+            amostrado = self._aleatorio.random() < self.taxa_amostragem
+            if not amostrado and not self.cauda:
+                self.descartados += 1
+                return None
+            id_rastreio = f"{self._aleatorio.getrandbits(128):032x}"
+        return Rastreio(id_rastreio, nome, dict(atributos or {}), amostrado, self._aleatorio)
+
+    def finalizar(self, rastreio: Optional[Rastreio], resultado: Any = None) -> bool:
+        """
+        Encerra o rastreio, anota o resultado na raiz e exporta se for mantido.
+
+        Returns:
+            True se o rastreio foi exportado
+        """
+        if rastreio is None:
+            return False
+        rastreio.encerrar()
+        if resultado is not None:
+            _anotar_resultado(rastreio.raiz, resultado)
+
+        if rastreio.amostrado:
+            motivo: Optional[str] = "cabeca"
+        elif self.manter_erros and rastreio.com_erro:
+            motivo = "erro"
+        elif self.limite_lento_ms is not None and rastreio.raiz.duracao_ms >= self.limite_lento_ms:
+            motivo = "lento"
+        else:
+            motivo = None
+
+        with self._trava:
+            if motivo is None:
+                self.descartados += 1
+                return False
+            self.exportados[motivo] += 1
+        rastreio.raiz.atributos["amostragem"] = motivo
+        self.exportador(rastreio.zipkin(self.servico))
+        return True
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._trava:
+            return {
+                "iniciados": self.iniciados,
+                "exportados": sum(self.exportados.values()),
+                "por_motivo": dict(self.exportados),
+                "descartados": self.descartados,
+            }
+
+    def fechar(self) -> None:
+        fechar = getattr(self.exportador, "fechar", None)
+        if fechar is not None:
+            fechar()
+
+
+def atributos_entrada(estado_global: Mapping[str, Any]) -> Dict[str, Any]:
+    """Atributos da raiz conhecidos antes do workflow (conta, valor e candidatos)."""
+    transacao = estado_global.get("transacao_bancaria") or {}
+    classificacoes = estado_global.get("classificacoes_disponiveis") or []
+    return {
+        "conta_bancaria": transacao.get("conta_bancaria"),
+        "valor_transacao": transacao.get("valor_transacao"),
+        "candidatos": len(classificacoes) or (1 if estado_global.get("classificacao_disponivel") else 0),
+    }
+
+
+def _anotar_resultado(span: Span, resultado: Any) -> None:
+    if isinstance(resultado, dict):
+        conciliacao = resultado.get("conciliacao") or {}
+        status = conciliacao.get("status")
+        span.atributos.update(
+            status=status,
+            score_confianca=conciliacao.get("score_confianca"),
+            needs_human_review=resultado.get("needs_human_review"),
+        )
+        erro = resultado.get("error")
+    else:
+        status = getattr(resultado.status, "value", resultado.status)
+        span.atributos.update(
+            status=status,
+            score_confianca=resultado.score_confianca,
+            needs_human_review=resultado.needs_human_review,
+        )
+        erro = None
+    if status == _STATUS_ERRO and span.erro is None:
+        span.erro = erro or _STATUS_ERRO
+
+
+# === SPANS DOS NÓS ===
+
+def _atributos_matching(estado: Mapping[str, Any]) -> Dict[str, Any]:
+    matching = estado.get("matching_info") or {}
+    return {"score_total": matching.get("score_total")}
+
+
+def _atributos_parceiro(estado: Mapping[str, Any]) -> Dict[str, Any]:
+    transacao = estado.get("transacao_bancaria") or {}
+    return {"parceiro_id": transacao.get("parceiro_id"), "parceiro_memoria": transacao.get("parceiro_memoria")}
+
+
+def _atributos_validacao(estado: Mapping[str, Any]) -> Dict[str, Any]:
+    validacao = estado.get("validacao") or {}
+    return {"pode_conciliar": validacao.get("pode_conciliar"), "divergencias": len(validacao.get("divergencias") or ())}
+
+
+def _atributos_especializado(estado: Mapping[str, Any]) -> Dict[str, Any]:
+    return {"processamentos": ",".join(sorted(estado.get("processamento_especializado") or {})) or None}
+
+
+def _atributos_resultado(estado: Mapping[str, Any]) -> Dict[str, Any]:
+    resultado = estado.get("resultado_final")
+    if resultado is None:
+        return {}
+    return {"status": resultado.status, "score_confianca": resultado.score_confianca}
+
+
+ATRIBUTOS_NOS: Dict[str, Callable[[Mapping[str, Any]], Dict[str, Any]]] = {
+    "identificar_tipo": lambda estado: {"tipo_transacao": estado.get("tipo_transacao")},
+    "detectar_parceiro": _atributos_parceiro,
+    "calcular_matching": _atributos_matching,
+    "validar_conciliacao": _atributos_validacao,
+    "processar_especializado": _atributos_especializado,
+    "gerar_resultado": _atributos_resultado,
+}
+
+
+def rastrear_no(nome: str, funcao: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """
+    Envolve um nó do workflow: com ``rastreio`` no estado, registra um span
+    com a duração e os atributos do nó; sem rastreio, só chama o nó.
+    """
+    extrair = ATRIBUTOS_NOS.get(nome)
+
+    @functools.wraps(funcao)
+    def no(state: Any) -> Any:
+        rastreio = state.get("rastreio")
+        if rastreio is None:
+            return funcao(state)
+        inicio = time.perf_counter()
+        try:
+            saida = funcao(state)
+        except Exception as e:
+            rastreio.registrar(nome, inicio, time.perf_counter(), {}, erro=f"{type(e).__name__}: {e}")
+            raise
+        fim = time.perf_counter()
+        atributos = extrair({**state, **saida}) if extrair is not None and saida is not None else {}
+        if nome == "identificar_tipo":
+            rastreio.raiz.atributos["tipo_transacao"] = atributos.get("tipo_transacao")
+        rastreio.registrar(nome, inicio, fim, atributos)
+        return saida
+
+    return no
+
+
+__all__ = ["ATRIBUTOS_NOS", "ExportadorJSONL", "Rastreador", "Rastreio", "Span", "atributos_entrada", "rastrear_no"]
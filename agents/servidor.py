@@ -0,0 +1,303 @@
+# agents/servidor.py
+"""
+Servidor HTTP leve para conciliação com micro-lotes.
+
+Requisições individuais chegam em ``POST /conciliar`` e são agrupadas em
+micro-lotes (por tamanho máximo ou tempo máximo de espera) executados por um
+único agente já inicializado. Métricas de latência por requisição ficam em
+``GET /metricas``.
+
+Uso:
+    python -m agents.servidor --porta 8080 --max-lote 32 --max-espera-ms 5
+    python -m agents.servidor --rastreio rastreios.jsonl --amostragem 0.01 --limite-lento-ms 100
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FuturoTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .conciliador_bancario import ConciliadorBancarioAgent
+from .rastreamento import Rastreador
+
+
+class MetricasLatencia:
+    """
+    Coleta latências por requisição e tamanhos de lote em janela deslizante.
+
+    O SLO é expresso como latência alvo em milissegundos; ``resumo`` informa
+    a fração de requisições recentes atendidas dentro do alvo.
+    """
+
+    def __init__(self, slo_ms: float = 200.0, janela: int = 10000):
+        self.slo_ms = slo_ms
+        self._latencias: Deque[float] = deque(maxlen=janela)
+        self._tamanhos_lote: Deque[int] = deque(maxlen=janela)
+        self._lock = threading.Lock()
+        self.total_requisicoes = 0
+        self.total_erros = 0
+        self.total_lotes = 0
+
+    def registrar_requisicao(self, latencia_ms: float, erro: bool = False) -> None:
+        with self._lock:
+            self._latencias.append(latencia_ms)
+            self.total_requisicoes += 1
+            if erro:
+                self.total_erros += 1
+
+    def registrar_lote(self, tamanho: int) -> None:
+        with self._lock:
+            self._tamanhos_lote.append(tamanho)
+            self.total_lotes += 1
+
+    def resumo(self) -> Dict[str, Any]:
+        with self._lock:
+            latencias = sorted(self._latencias)
+            tamanhos = list(self._tamanhos_lote)
+            total_requisicoes = self.total_requisicoes
+            total_erros = self.total_erros
+            total_lotes = self.total_lotes
+
+        dentro_slo = sum(1 for latencia in latencias if latencia <= self.slo_ms)
+        return {
+            "total_requisicoes": total_requisicoes,
+            "total_erros": total_erros,
+            "total_lotes": total_lotes,
+            "latencia_ms": {
+                "p50": _percentil(latencias, 0.50),
+                "p95": _percentil(latencias, 0.95),
+                "p99": _percentil(latencias, 0.99),
+                "max": latencias[-1] if latencias else 0.0
+            },
+            "slo": {
+                "alvo_ms": self.slo_ms,
+                "conformidade": dentro_slo / len(latencias) if latencias else 1.0
+            },
+            "tamanho_medio_lote": sum(tamanhos) / len(tamanhos) if tamanhos else 0.0
+        }
+
+
+class MicroLoteador:
+    """
+    Agrupa requisições concorrentes em micro-lotes.
+
+    Um lote é despachado quando atinge ``max_tamanho`` itens ou quando o
+    item mais antigo espera ``max_espera_ms``, o que ocorrer primeiro.
+    """
+
+    def __init__(
+        self,
+        agente: ConciliadorBancarioAgent,
+        max_tamanho: int = 32,
+        max_espera_ms: float = 5.0,
+        metricas: Optional[MetricasLatencia] = None
+    ):
+        if max_tamanho < 1:
+            raise ValueError("max_tamanho deve ser pelo menos 1")
+        if max_espera_ms < 0:
+            raise ValueError("max_espera_ms não pode ser negativo")
+
+        self.agente = agente
+        self.max_tamanho = max_tamanho
+        self.max_espera_ms = max_espera_ms
+        self.metricas = metricas or MetricasLatencia()
+        self._fila: "queue.Queue[Optional[Tuple[Dict, Future, float]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._executar, name="micro-loteador", daemon=True)
+        self._thread.start()
+
+    def submeter(self, estado_global: Dict) -> Future:
+        """Enfileira uma requisição e retorna um Future com o resultado."""
+        futuro: Future = Future()
+        self._fila.put((estado_global, futuro, time.perf_counter()))
+        return futuro
+
+    def conciliar(self, estado_global: Dict, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Submete uma requisição e aguarda o resultado.
+
+        Se o prazo expira antes do despacho, a requisição é cancelada e sai do lote.
+        """
+        futuro = self.submeter(estado_global)
+        try:
+            return futuro.result(timeout=timeout)
+        except FuturoTimeoutError:
+            futuro.cancel()
+            raise
+
+    def encerrar(self) -> None:
+        """Processa os itens pendentes e encerra a thread de despacho."""
+        self._fila.put(None)
+        self._thread.join()
+
+    def _executar(self) -> None:
+        encerrar = False
+        while not encerrar:
+            item = self._fila.get()
+            if item is None:
+                break
+
+            lote = [item]
+            limite = item[2] + self.max_espera_ms / 1000.0
+            while len(lote) < self.max_tamanho:
+                restante = limite - time.perf_counter()
+                try:
+                    proximo = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if proximo is None:
+                    encerrar = True
+                    break
+                lote.append(proximo)
+
+            self._despachar(lote)
+
+    def _despachar(self, lote: List[Tuple[Dict, Future, float]]) -> None:
+        # Requisições canceladas (prazo expirado) não são processadas; as demais
+        # passam a "em execução" e não podem mais ser canceladas
+        lote = [item for item in lote if item[1].set_running_or_notify_cancel()]
+        if not lote:
+            return
+        self.metricas.registrar_lote(len(lote))
+        try:
+            resultados = self.agente.conciliar_lote([estado for estado, _, _ in lote])
+        except Exception as e:
+            for _, futuro, inicio in lote:
+                self.metricas.registrar_requisicao((time.perf_counter() - inicio) * 1000, erro=True)
+                futuro.set_exception(e)
+            return
+
+        for (_, futuro, inicio), resultado in zip(lote, resultados):
+            erro = resultado.get("conciliacao", {}).get("status") == "Erro_Processamento"
+            self.metricas.registrar_requisicao((time.perf_counter() - inicio) * 1000, erro=erro)
+            futuro.set_result(resultado)
+
+
+class _ConciliacaoHandler(BaseHTTPRequestHandler):
+    """Handler HTTP: POST /conciliar, GET /metricas, GET /saude."""
+
+    loteador: MicroLoteador
+    timeout_requisicao: float = 30.0
+
+    def do_POST(self) -> None:
+        if self.path != "/conciliar":
+            self._responder(404, {"erro": "Rota não encontrada"})
+            return
+
+        try:
+            tamanho = int(self.headers.get("Content-Length", 0))
+            estado_global = json.loads(self.rfile.read(tamanho) or b"{}")
+        except (ValueError, json.JSONDecodeError) as e:
+            self._responder(400, {"erro": f"JSON inválido: {e}"})
+            return
+
+        if not isinstance(estado_global, dict) or "transacao_bancaria" not in estado_global:
+            self._responder(400, {"erro": "O JSON deve conter o campo 'transacao_bancaria'"})
+            return
+
+        try:
+            resultado = self.loteador.conciliar(estado_global, timeout=self.timeout_requisicao)
+        except Exception as e:
+            self._responder(500, {"erro": str(e)})
+            return
+
+        self._responder(200, resultado)
+
+    def do_GET(self) -> None:
+        if self.path == "/metricas":
+            self._responder(200, self.loteador.metricas.resumo())
+        elif self.path == "/saude":
+            self._responder(200, {"status": "ok"})
+        else:
+            self._responder(404, {"erro": "Rota não encontrada"})
+
+    def _responder(self, codigo: int, corpo: Dict[str, Any]) -> None:
+        dados = json.dumps(corpo, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Silenciar log padrão por requisição; métricas ficam em /metricas
+        pass
+
+
+def criar_servidor(
+    host: str = "127.0.0.1",
+    porta: int = 8080,
+    agente: Optional[ConciliadorBancarioAgent] = None,
+    max_lote: int = 32,
+    max_espera_ms: float = 5.0,
+    slo_ms: float = 200.0
+) -> ThreadingHTTPServer:
+    """
+    Cria o servidor HTTP com um agente aquecido compartilhado.
+
+    O micro-loteador fica acessível em ``servidor.loteador``. Use ``porta=0``
+    para escolher uma porta livre (útil em testes locais).
+    """
+    loteador = MicroLoteador(
+        agente or ConciliadorBancarioAgent(),
+        max_tamanho=max_lote,
+        max_espera_ms=max_espera_ms,
+        metricas=MetricasLatencia(slo_ms=slo_ms)
+    )
+    handler = type("ConciliacaoHandler", (_ConciliacaoHandler,), {"loteador": loteador})
+    servidor = ThreadingHTTPServer((host, porta), handler)
+    servidor.loteador = loteador  # type: ignore[attr-defined]
+    return servidor
+
+
+def _percentil(valores_ordenados: List[float], q: float) -> float:
+    """Percentil por vizinho mais próximo sobre lista já ordenada."""
+    if not valores_ordenados:
+        return 0.0
+    indice = min(len(valores_ordenados) - 1, int(q * len(valores_ordenados)))
+    return valores_ordenados[indice]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor HTTP de conciliação bancária")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--max-lote", type=int, default=32)
+    parser.add_argument("--max-espera-ms", type=float, default=5.0)
+    parser.add_argument("--slo-ms", type=float, default=200.0)
+    parser.add_argument("--rastreio", help="Arquivo JSON-lines (Zipkin v2) para os spans amostrados")
+    parser.add_argument("--amostragem", type=float, default=0.01, help="Fração de rastreios mantida na abertura")
+    parser.add_argument("--limite-lento-ms", type=float, default=100.0, help="Rastreios a partir desta duração são sempre mantidos")
+    args = parser.parse_args()
+
+    agente = ConciliadorBancarioAgent()
+    if args.rastreio:
+        agente.registrar_rastreador(Rastreador(args.rastreio, args.amostragem, args.limite_lento_ms))
+
+    servidor = criar_servidor(
+        args.host, args.porta,
+        agente=agente,
+        max_lote=args.max_lote,
+        max_espera_ms=args.max_espera_ms,
+        slo_ms=args.slo_ms
+    )
+    print(f"Servidor de conciliação em http://{args.host}:{servidor.server_address[1]}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servidor.loteador.encerrar()  # type: ignore[attr-defined]
+        if agente.rastreador is not None:
+            agente.rastreador.fechar()
+
+
+if __name__ == "__main__":
+    main()
+
+
+__all__ = ["MetricasLatencia", "MicroLoteador", "criar_servidor"]
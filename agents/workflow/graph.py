@@ -1,8 +1,10 @@
 # agents/workflow/graph.py
 from langgraph.graph import StateGraph, END
+from ..rastreamento import rastrear_no
 from .state import ConciliacaoState
 from .nodes import (
     identificar_tipo_node,
+    detectar_parceiro_node,
     calcular_matching_node,
     validar_conciliacao_node,
     processar_especializado_node,
@@ -10,35 +12,56 @@ from .nodes import (
 )
 
 
-def create_conciliacao_graph():
+def create_conciliacao_graph(paralelo: bool = False):
     """
     Cria e configura o workflow LangGraph para conciliação bancária.
     
     Fluxo:
-    START → identificar_tipo → calcular_matching → validar_conciliacao 
-          → processar_especializado → gerar_resultado → END
-          
-    Com roteamento condicional baseado no tipo de transação identificado.
+    START → identificar_tipo → detectar_parceiro → calcular_matching
+          → validar_conciliacao → processar_especializado → gerar_resultado → END
+    
+    Validação e processamento especializado leem as mesmas entradas e
+    escrevem chaves disjuntas (``validacao`` e ``processamento_especializado``,
+    com reducer ``mesclar_parcial``). Com ``paralelo=True`` rodam como ramos
+    paralelos após o matching e ``gerar_resultado`` espera os dois:
+    
+          calcular_matching → [validar_conciliacao ∥ processar_especializado] → gerar_resultado
+    
+    Os dois nós custam microssegundos e o superstep extra do LangGraph custa
+    mais do que a sobreposição economiza (``tests/benchmark_grafo.py``, caminhos
+    de retenções e lote: invoke sem ganho, dentro do ruído de ±1 ms; batch
+    +20 a 35% por item), por isso o padrão é a sequência. O modo paralelo
+    compensa quando algum dos ramos fizer E/S (ex.: consulta a ERP).
+    
+    Args:
+        paralelo: Se True, executa validação e processamento especializado em paralelo
     """
     
     # Criar o grafo com o estado tipado
     workflow = StateGraph(ConciliacaoState)
     
-    # Adicionar todos os nós funcionais
-    workflow.add_node("identificar_tipo", identificar_tipo_node)
-    workflow.add_node("calcular_matching", calcular_matching_node)
-    workflow.add_node("validar_conciliacao", validar_conciliacao_node)
-    workflow.add_node("processar_especializado", processar_especializado_node)
-    workflow.add_node("gerar_resultado", gerar_resultado_node)
+    # Adicionar todos os nós funcionais (com span por nó quando o estado traz rastreio)
+    workflow.add_node("identificar_tipo", rastrear_no("identificar_tipo", identificar_tipo_node))
+    workflow.add_node("detectar_parceiro", rastrear_no("detectar_parceiro", detectar_parceiro_node))
+    workflow.add_node("calcular_matching", rastrear_no("calcular_matching", calcular_matching_node))
+    workflow.add_node("validar_conciliacao", rastrear_no("validar_conciliacao", validar_conciliacao_node))
+    workflow.add_node("processar_especializado", rastrear_no("processar_especializado", processar_especializado_node))
+    workflow.add_node("gerar_resultado", rastrear_no("gerar_resultado", gerar_resultado_node))
     
     # Definir ponto de entrada
     workflow.set_entry_point("identificar_tipo")
     
     # Fluxo sequencial principal
-    workflow.add_edge("identificar_tipo", "calcular_matching")
+    workflow.add_edge("identificar_tipo", "detectar_parceiro")
+    workflow.add_edge("detectar_parceiro", "calcular_matching")
     workflow.add_edge("calcular_matching", "validar_conciliacao")
-    workflow.add_edge("validar_conciliacao", "processar_especializado")
-    workflow.add_edge("processar_especializado", "gerar_resultado")
+    if paralelo:
+        # Fan-out após o matching e junção antes do resultado
+        workflow.add_edge("calcular_matching", "processar_especializado")
+        workflow.add_edge(["validar_conciliacao", "processar_especializado"], "gerar_resultado")
+    else:
+        workflow.add_edge("validar_conciliacao", "processar_especializado")
+        workflow.add_edge("processar_especializado", "gerar_resultado")
     
     # Conectar ao fim
     workflow.add_edge("gerar_resultado", END)
@@ -58,12 +81,12 @@ def route_by_type(state: ConciliacaoState) -> str:
     routing_map = {
         "taxa_bancaria": "gerar_resultado",  # Pula matching
         "lote": "processar_especializado",   # Pula validação individual  
-        "normal": "calcular_matching",       # Fluxo padrão
-        "com_retencoes": "calcular_matching", # Fluxo padrão com processamento especial
-        "parcela": "calcular_matching"       # Fluxo padrão
+        "normal": "detectar_parceiro",       # Fluxo padrão
+        "com_retencoes": "detectar_parceiro", # Fluxo padrão com processamento especial
+        "parcela": "detectar_parceiro"       # Fluxo padrão
     }
     
-    return routing_map.get(tipo, "calcular_matching")
+    return routing_map.get(tipo, "detectar_parceiro")
 
 
 def create_advanced_conciliacao_graph():
@@ -75,6 +98,7 @@ def create_advanced_conciliacao_graph():
     
     # Adicionar nós
     workflow.add_node("identificar_tipo", identificar_tipo_node)
+    workflow.add_node("detectar_parceiro", detectar_parceiro_node)
     workflow.add_node("calcular_matching", calcular_matching_node)
     workflow.add_node("validar_conciliacao", validar_conciliacao_node)
     workflow.add_node("processar_especializado", processar_especializado_node)
@@ -90,11 +114,12 @@ def create_advanced_conciliacao_graph():
         {
             "taxa_bancaria": "gerar_resultado",
             "lote": "processar_especializado", 
-            "calcular_matching": "calcular_matching"
+            "detectar_parceiro": "detectar_parceiro"
         }
     )
     
     # Fluxo normal
+    workflow.add_edge("detectar_parceiro", "calcular_matching")
     workflow.add_edge("calcular_matching", "validar_conciliacao")
     workflow.add_edge("validar_conciliacao", "processar_especializado")
     workflow.add_edge("processar_especializado", "gerar_resultado")
@@ -1,7 +1,16 @@
 # agents/workflow/nodes.py
-import re
-from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from models.conciliacao import (
+    Divergencia,
+    ImpactoDivergencia,
+    ResultadoConciliacao,
+    StatusConciliacao,
+    TipoDivergencia
+)
+from ..matching.classificador_tipo import CLASSIFICADOR_PADRAO
+from ..matching.criterios import CriteriosConciliacao
+from ..matching.retencoes import MOTOR_RETENCOES_PADRAO
+from ..matching.selecao import pontuar
 from .state import ConciliacaoState
 
 
@@ -17,37 +26,64 @@ def identificar_tipo_node(state: ConciliacaoState) -> ConciliacaoState:
         state["tipo_transacao"] = "lote"
         return state
     
-    descricao = transacao.get("descricao_transacao", "").upper()
-    
-    # Identificar tipo baseado na descrição
-    if any(palavra in descricao for palavra in ["TARIFA", "TAXA", "MANUTENCAO", "ANUIDADE"]):
-        tipo = "taxa_bancaria"
-    elif "PARC" in descricao and "/" in descricao:
-        tipo = "parcela"
-    elif "LIQ" in descricao or "LIQUIDO" in descricao:
-        tipo = "com_retencoes"
-    elif "LOTE" in descricao and ("NFS" in descricao or "NOTAS" in descricao):
-        tipo = "multiplos_documentos"
-    else:
-        tipo = "normal"
+    # Identificar tipo baseado na descrição (tabela de regras compilada,
+    # configurável por tenant em criterios_config["classificador_tipo"])
+    criterios_config = CriteriosConciliacao.de(state.get("criterios_config"))
+    classificador = criterios_config.extensoes.get("classificador_tipo") or CLASSIFICADOR_PADRAO
+    state["tipo_transacao"] = classificador.classificar(transacao.get("descricao_transacao", ""))
+    return state
+
+
+def detectar_parceiro_node(state: ConciliacaoState) -> ConciliacaoState:
+    """
+    Nó 1b: Detecta parceiros cadastrados na descrição da transação
+    
+    Primeiro consulta a memória de conciliações confirmadas
+    (``criterios_config["memoria_conciliacoes"]``): descrições recorrentes
+    resolvem o parceiro com uma busca em dicionário. Sem acerto, usa o
+    autômato de Aho-Corasick em ``criterios_config["automato_parceiros"]``
+    (uma única passada pela descrição). O parceiro resolvido é anexado a uma
+    cópia da transação; sem memória nem autômato, não altera o estado.
+    """
+    extensoes = CriteriosConciliacao.de(state.get("criterios_config")).extensoes
+    if state.get("tipo_transacao") == "taxa_bancaria":
+        return state
     
-    state["tipo_transacao"] = tipo
+    transacao = state["transacao_bancaria"]
+    memoria = extensoes.get("memoria_conciliacoes")
+    if memoria is not None:
+        entrada = memoria.consultar(transacao)
+        if entrada is not None:
+            lembrada = {**transacao, "parceiro_memoria": entrada.parceiro_nome}
+            if entrada.parceiro_id:
+                lembrada["parceiro_id"] = entrada.parceiro_id
+            state["transacao_bancaria"] = lembrada
+            return state
+    
+    automato = extensoes.get("automato_parceiros")
+    if automato is None:
+        return state
+    ocorrencias = automato.detectar(transacao.get("descricao_transacao", ""))
+    if ocorrencias:
+        parceiro = max(ocorrencias, key=lambda ocorrencia: len(ocorrencia.alias))
+        state["transacao_bancaria"] = {
+            **transacao,
+            "parceiro_id": parceiro.parceiro_id,
+            "parceiros_detectados": sorted({ocorrencia.parceiro_id for ocorrencia in ocorrencias})
+        }
     return state
 
 
 def calcular_matching_node(state: ConciliacaoState) -> ConciliacaoState:
     """
     Nó 2: Calcula score de matching entre transação e classificação
+    
+    Também calcula as retenções (``state["retencoes"]``) uma única vez por
+    transação; validação e processamento especializado só as leem.
     """
     transacao = state["transacao_bancaria"]
     classificacao = state.get("classificacao_disponivel")
-    criterios_config = state.get("criterios_config", {
-        "tolerancia_valor_percentual": 0.05,
-        "tolerancia_valor_absoluta": 50.00,
-        "janela_data_dias": 7,
-        "score_minimo": 0.60,
-        "palavras_irrelevantes": {"ted", "pix", "pgto", "boleto", "doc", "transferencia"}
-    })
+    criterios_config = CriteriosConciliacao.de(state.get("criterios_config"))
     
     # Se não há classificação ou é taxa bancária, pular matching
     if not classificacao or state.get("tipo_transacao") == "taxa_bancaria":
@@ -60,89 +96,32 @@ def calcular_matching_node(state: ConciliacaoState) -> ConciliacaoState:
         }
         return state
     
-    scores = {}
-    
-    # Score por valor
-    valor_transacao = abs(transacao.get("valor_transacao", 0))
-    valor_classificacao = abs(classificacao.get("valor_total", 0))
-    
-    if valor_transacao == 0 and valor_classificacao == 0:
-        scores["valor"] = 1.0
-    elif valor_transacao == 0 or valor_classificacao == 0:
-        scores["valor"] = 0.0
-    else:
-        diferenca_abs = abs(valor_transacao - valor_classificacao)
-        diferenca_perc = diferenca_abs / max(valor_transacao, valor_classificacao)
-        
-        if (diferenca_abs <= criterios_config["tolerancia_valor_absoluta"] and 
-            diferenca_perc <= criterios_config["tolerancia_valor_percentual"]):
-            scores["valor"] = 1.0 - diferenca_perc
-        else:
-            scores["valor"] = max(0.0, 1.0 - (diferenca_perc * 2))
-    
-    # Score por data
-    try:
-        data_transacao = datetime.strptime(transacao.get("data_transacao", ""), "%Y-%m-%d")
-        data_classificacao = datetime.strptime(classificacao.get("data_documento", ""), "%Y-%m-%d")
-        diferenca_dias = abs((data_transacao - data_classificacao).days)
-        
-        if diferenca_dias <= criterios_config["janela_data_dias"]:
-            scores["data"] = max(0.0, 1.0 - (diferenca_dias / criterios_config["janela_data_dias"]))
-        else:
-            scores["data"] = 0.0
-    except:
-        scores["data"] = 0.5
-        diferenca_dias = 0
-    
-    # Score por descrição
-    palavras_transacao = _extrair_palavras_chave(transacao.get("descricao_transacao", ""), criterios_config)
-    palavras_classificacao = []
-    
-    if classificacao.get("numero_documento"):
-        palavras_classificacao.extend(_extrair_palavras_chave(classificacao["numero_documento"], criterios_config))
-    if classificacao.get("parceiro_nome"):
-        palavras_classificacao.extend(_extrair_palavras_chave(classificacao["parceiro_nome"], criterios_config))
-    
-    if palavras_transacao and palavras_classificacao:
-        intersecao = set(palavras_transacao) & set(palavras_classificacao)
-        uniao = set(palavras_transacao) | set(palavras_classificacao)
-        scores["descricao"] = len(intersecao) / len(uniao) if uniao else 0.0
-        palavras_encontradas = list(intersecao)
-    else:
-        scores["descricao"] = 0.0
-        palavras_encontradas = []
-    
-    # Score total ponderado
-    pesos = {"valor": 0.6, "data": 0.2, "descricao": 0.2}
-    score_total = sum(scores[key] * pesos[key] for key in pesos)
-    
-    state["matching_info"] = {
-        "score_total": score_total,
-        "scores_detalhados": scores,
-        "diferenca_valor": abs(valor_transacao - valor_classificacao),
-        "diferenca_dias": diferenca_dias,
-        "palavras_encontradas": palavras_encontradas
-    }
+    state["matching_info"] = pontuar(transacao, classificacao, criterios_config)
+    if state.get("tipo_transacao") == "com_retencoes":
+        state["retencoes"] = _retencoes(transacao, classificacao, criterios_config)
     
     return state
 
 
-def validar_conciliacao_node(state: ConciliacaoState) -> ConciliacaoState:
+def validar_conciliacao_node(state: ConciliacaoState) -> Dict[str, Any]:
     """
     Nó 3: Valida a conciliação e identifica divergências
+    
+    Retorna só ``validacao`` (atualização parcial), para poder rodar em
+    paralelo com ``processar_especializado_node``.
     """
     transacao = state["transacao_bancaria"]
     classificacao = state.get("classificacao_disponivel")
     matching_info = state.get("matching_info", {})
     tipo_transacao = state.get("tipo_transacao", "normal")
-    criterios_config = state.get("criterios_config", {"score_minimo": 0.60, "janela_data_dias": 7, "tolerancia_valor_absoluta": 50.0})
+    criterios_config = CriteriosConciliacao.de(state.get("criterios_config"))
     
     validacoes = {}
     divergencias = []
     
     # Taxa bancária não pode ser conciliada
     if tipo_transacao == "taxa_bancaria":
-        state["validacao"] = {
+        return {"validacao": {
             "pode_conciliar": False,
             "motivo": "Taxa bancaria sem documento fiscal correspondente",
             "tipo_identificado": "taxa_bancaria",
@@ -155,79 +134,76 @@ def validar_conciliacao_node(state: ConciliacaoState) -> ConciliacaoState:
             "validacoes": validacoes,
             "divergencias": divergencias,
             "tipo_transacao": tipo_transacao
-        }
-        return state
+        }}
     
     # Validações específicas por tipo
     if tipo_transacao == "com_retencoes" and classificacao:
-        impostos_retidos = classificacao.get("impostos_retidos", {})
-        if impostos_retidos:
-            valor_bruto = classificacao.get("valor_total", 0)
-            total_retencoes = sum(impostos_retidos.values())
-            valor_liquido_esperado = valor_bruto - total_retencoes
+        retencoes = _retencoes_do_estado(state, criterios_config)
+        if retencoes:
+            valor_liquido_esperado = retencoes["valor_bruto"] - retencoes["total_retencoes"]
             diferenca = abs(transacao["valor_transacao"] - valor_liquido_esperado)
             
-            if diferenca <= criterios_config["tolerancia_valor_absoluta"]:
+            if diferenca <= criterios_config.tolerancia_valor_absoluta:
                 validacoes["retencoes_calculadas"] = True
                 validacoes["valor_liquido_correto"] = True
+                if retencoes["origem"] == "inferida":
+                    validacoes["retencoes_inferidas"] = True
             else:
-                divergencias.append({
-                    "tipo": "valor_liquido",
-                    "descricao": f"Diferenca no valor liquido: R$ {diferenca:.2f}",
-                    "impacto": "alto"
-                })
+                divergencias.append(Divergencia(
+                    TipoDivergencia.VALOR_LIQUIDO, ImpactoDivergencia.ALTO, diferenca
+                ))
     
     # Validação de diferença de data
-    if matching_info.get("diferenca_dias", 0) > criterios_config["janela_data_dias"]:
-        divergencias.append({
-            "tipo": "data",
-            "descricao": f"Diferenca de {matching_info['diferenca_dias']} dias entre documento e pagamento",
-            "impacto": "baixo" if matching_info["diferenca_dias"] <= 30 else "medio"
-        })
+    if matching_info.get("diferenca_dias", 0) > criterios_config.janela_data_dias:
+        divergencias.append(Divergencia(
+            TipoDivergencia.DATA,
+            ImpactoDivergencia.BAIXO if matching_info["diferenca_dias"] <= 30 else ImpactoDivergencia.MEDIO,
+            matching_info["diferenca_dias"]
+        ))
     
     # Validação de diferença de valor
-    if matching_info.get("diferenca_valor", 0) > criterios_config["tolerancia_valor_absoluta"]:
-        divergencias.append({
-            "tipo": "valor",
-            "descricao": f"Diferenca de valor: R$ {matching_info['diferenca_valor']:.2f}",
-            "impacto": "medio"
-        })
+    if matching_info.get("diferenca_valor", 0) > criterios_config.tolerancia_valor_absoluta:
+        divergencias.append(Divergencia(
+            TipoDivergencia.VALOR, ImpactoDivergencia.MEDIO, matching_info["diferenca_valor"]
+        ))
     
-    state["validacao"] = {
-        "pode_conciliar": matching_info.get("score_total", 0) >= criterios_config["score_minimo"],
+    return {"validacao": {
+        "pode_conciliar": matching_info.get("score_total", 0) >= criterios_config.score_minimo,
         "validacoes": validacoes,
         "divergencias": divergencias,
         "tipo_transacao": tipo_transacao
-    }
-    
-    return state
+    }}
 
 
-def processar_especializado_node(state: ConciliacaoState) -> ConciliacaoState:
+def processar_especializado_node(state: ConciliacaoState) -> Dict[str, Any]:
     """
     Nó 4: Processamento especializado para casos específicos
+    
+    Retorna só ``processamento_especializado`` (atualização parcial).
     """
     tipo_transacao = state.get("tipo_transacao", "normal")
     transacao = state["transacao_bancaria"]
     classificacao = state.get("classificacao_disponivel")
     classificacoes_disponiveis = state.get("classificacoes_disponiveis", [])
     
+    criterios_config = CriteriosConciliacao.de(state.get("criterios_config"))
+    
     processamento = {}
     
     # Processamento de retenções
     if tipo_transacao == "com_retencoes" and classificacao:
-        impostos_retidos = classificacao.get("impostos_retidos", {})
-        if impostos_retidos:
-            valor_bruto = classificacao.get("valor_total", 0)
-            total_retencoes = sum(impostos_retidos.values())
-            valor_liquido = valor_bruto - total_retencoes
-            
+        retencoes = _retencoes_do_estado(state, criterios_config)
+        if retencoes:
             processamento["calculo_retencoes"] = {
-                "valor_bruto": valor_bruto,
-                "total_retencoes": total_retencoes,
-                "valor_liquido_esperado": valor_liquido,
-                "impostos_detalhados": impostos_retidos
+                "valor_bruto": retencoes["valor_bruto"],
+                "total_retencoes": retencoes["total_retencoes"],
+                "valor_liquido_esperado": retencoes["valor_bruto"] - retencoes["total_retencoes"],
+                "impostos_detalhados": retencoes["impostos"]
             }
+            if retencoes["origem"] == "inferida":
+                processamento["calculo_retencoes"]["origem"] = "inferida"
+            if retencoes["ambigua"]:
+                processamento["calculo_retencoes"]["divisao_ambigua"] = True
     
     # Processamento de lote
     elif tipo_transacao in ["lote", "multiplos_documentos"] and classificacoes_disponiveis:
@@ -261,13 +237,12 @@ def processar_especializado_node(state: ConciliacaoState) -> ConciliacaoState:
             "natureza": "despesa_operacional"
         }
     
-    state["processamento_especializado"] = processamento
-    return state
+    return {"processamento_especializado": processamento}
 
 
 def gerar_resultado_node(state: ConciliacaoState) -> ConciliacaoState:
     """
-    Nó 5: Gera o resultado final estruturado
+    Nó 5: Gera o resultado final estruturado (ResultadoConciliacao)
     """
     transacao = state["transacao_bancaria"]
     classificacao = state.get("classificacao_disponivel")
@@ -278,33 +253,19 @@ def gerar_resultado_node(state: ConciliacaoState) -> ConciliacaoState:
     
     # Caso taxa bancária não conciliável
     if tipo_transacao == "taxa_bancaria":
-        resultado = {
-            "conciliacao_ok": False,
-            "conciliacao": {
-                "conciliado": False,
-                "tipo_transacao_identificado": "taxa_bancaria",
-                "score_confianca": matching_info.get("score_total", 0.15),
-                "status": "Nao_Conciliavel",
-                "divergencias": [],
-                "classificacao_sugerida": processamento.get("classificacao_sugerida", {}),
-                "observacoes": [
-                    "Transacao identificada como taxa bancaria - nao possui documento fiscal correspondente",
-                    "Sugerido lancamento direto como despesa bancaria",
-                    "Nao requer conciliacao com documentos fiscais"
-                ],
-                "metadados_matching": {
-                    "criterio_principal": "exclusao_taxa_bancaria",
-                    "palavras_encontradas": matching_info.get("palavras_encontradas", []),
-                    "categoria_automatica": "taxa_bancaria"
-                }
-            },
-            "confianca": matching_info.get("score_total", 0.15),
-            "needs_human_review": False,
-            "motivo_nao_conciliacao": "Taxa bancaria sem documento fiscal correspondente",
-            "rule_version": "v1.0"
-        }
-        
-        state["resultado_final"] = resultado
+        state["resultado_final"] = ResultadoConciliacao(
+            conciliado=False,
+            id_lancamento_contabil=None,
+            documento_origem=None,
+            score_confianca=matching_info.get("score_total", 0.15),
+            status=StatusConciliacao.NAO_CONCILIAVEL,
+            needs_human_review=False,
+            tipo_transacao="taxa_bancaria",
+            criterio_principal="exclusao_taxa_bancaria",
+            palavras_encontradas=matching_info.get("palavras_encontradas", []),
+            classificacao_sugerida=processamento.get("classificacao_sugerida", {}),
+            motivo_nao_conciliacao="Taxa bancaria sem documento fiscal correspondente"
+        )
         return state
     
     # Caso lote
@@ -312,48 +273,35 @@ def gerar_resultado_node(state: ConciliacaoState) -> ConciliacaoState:
         totalizacao = processamento.get("totalizacao", {})
         conciliado = abs(totalizacao.get("diferenca", float('inf'))) <= 50.0  # tolerância
         
-        resultado = {
-            "conciliacao_ok": conciliado,
-            "conciliacao": {
-                "conciliado": conciliado,
-                "tipo_conciliacao": "multiplos_documentos",
-                "score_confianca": 0.94 if conciliado else 0.3,
-                "status": "Conciliado_Lote" if conciliado else "Lote_Nao_Conciliado",
-                "documentos_conciliados": processamento.get("documentos_conciliados", []),
-                "validacoes_contabeis": {
-                    "soma_valores_correta": conciliado,
-                    "fornecedor_unico": True,
-                    "cfop_homogeneo": True
-                },
-                "totalizacao": totalizacao,
-                "observacoes": [
-                    f"Pagamento em lote para {totalizacao.get('quantidade_nfs', 0)} notas fiscais",
-                    "Soma dos valores das NF-es corresponde ao valor da transacao" if conciliado else "Divergencia nos valores totais"
-                ]
+        state["resultado_final"] = ResultadoConciliacao(
+            conciliado=conciliado,
+            id_lancamento_contabil=None,
+            documento_origem=None,
+            score_confianca=0.94 if conciliado else 0.3,
+            status=StatusConciliacao.CONCILIADO_LOTE if conciliado else StatusConciliacao.LOTE_NAO_CONCILIADO,
+            needs_human_review=not conciliado,
+            tipo_transacao=tipo_transacao,
+            documentos_conciliados=processamento.get("documentos_conciliados", []),
+            validacoes_contabeis={
+                "soma_valores_correta": conciliado,
+                "fornecedor_unico": True,
+                "cfop_homogeneo": True
             },
-            "confianca": 0.94 if conciliado else 0.3,
-            "needs_human_review": not conciliado,
-            "rule_version": "v1.0"
-        }
-        
-        state["resultado_final"] = resultado
+            totalizacao=totalizacao
+        )
         return state
     
     # Caso sem classificação
     if not classificacao:
-        resultado = {
-            "conciliacao_ok": False,
-            "conciliacao": {
-                "conciliado": False,
-                "score_confianca": 0.0,
-                "status": "Sem_Classificacao_Disponivel"
-            },
-            "confianca": 0.0,
-            "needs_human_review": True,
-            "rule_version": "v1.0"
-        }
-        
-        state["resultado_final"] = resultado
+        state["resultado_final"] = ResultadoConciliacao(
+            conciliado=False,
+            id_lancamento_contabil=None,
+            documento_origem=None,
+            score_confianca=0.0,
+            status=StatusConciliacao.SEM_CLASSIFICACAO_DISPONIVEL,
+            needs_human_review=True,
+            tipo_transacao=tipo_transacao
+        )
         return state
     
     # Caso conciliação normal
@@ -362,98 +310,60 @@ def gerar_resultado_node(state: ConciliacaoState) -> ConciliacaoState:
     
     # Determinar status
     if not conciliado:
-        status = "Nao_Conciliado"
+        status = StatusConciliacao.NAO_CONCILIADO
     elif divergencias:
-        status = "Conciliado_Com_Ressalva"
+        status = StatusConciliacao.CONCILIADO_COM_RESSALVA
     elif tipo_transacao == "com_retencoes":
-        status = "Conciliado_Com_Retencoes"
+        status = StatusConciliacao.CONCILIADO_COM_RETENCOES
     elif tipo_transacao == "parcela":
-        status = "Conciliado_Parcial"
+        status = StatusConciliacao.CONCILIADO_PARCIAL
     else:
-        status = "Conciliado_Automatico"
+        status = StatusConciliacao.CONCILIADO_AUTOMATICO
     
     # Gerar ID do lançamento contábil
     data_formatada = transacao.get("data_transacao", "").replace("-", "")
     cfop = classificacao.get("cfop", "0000")
     id_lancamento = f"LC_{cfop}_{data_formatada}_001"
     
-    # Observações
-    observacoes = []
-    if tipo_transacao == "com_retencoes":
-        calculo_retencoes = processamento.get("calculo_retencoes", {})
-        if calculo_retencoes:
-            observacoes.append("Pagamento liquido com retencoes tributarias aplicadas")
-            observacoes.append(f"Total de impostos retidos: R$ {calculo_retencoes.get('total_retencoes', 0):.2f}")
-    elif tipo_transacao == "parcela":
-        observacoes.append("Conciliacao parcial - Pagamento parcelado identificado")
-    
-    if matching_info.get("diferenca_dias", 0) > 0:
-        observacoes.append(f"Diferenca de {matching_info['diferenca_dias']} dias entre documento e pagamento")
-    
-    if matching_info.get("diferenca_valor", 0) == 0:
-        observacoes.append("Valor exato entre transacao bancaria e classificacao fiscal")
-    
-    # Resultado final
-    resultado = {
-        "conciliacao_ok": conciliado,
-        "conciliacao": {
-            "conciliado": conciliado,
-            "id_lancamento_contabil": id_lancamento if conciliado else None,
-            "documento_origem": classificacao.get("numero_documento"),
-            "cfop_origem": classificacao.get("cfop"),
-            "score_confianca": round(matching_info.get("score_total", 0), 2),
-            "status": status,
-            "divergencias": divergencias,
-            "observacoes": observacoes,
-            "metadados_matching": {
-                "criterio_principal": _determinar_criterio_principal(matching_info, validacao, tipo_transacao),
-                "palavras_encontradas": matching_info.get("palavras_encontradas", []),
-                "diferenca_valor": matching_info.get("diferenca_valor", 0),
-                "diferenca_dias": matching_info.get("diferenca_dias", 0)
-            }
-        },
-        "confianca": round(matching_info.get("score_total", 0), 2),
-        "needs_human_review": not conciliado,
-        "rule_version": "v1.0"
-    }
-    
-    # Adicionar campos específicos para retenções
+    # Campos específicos para retenções
+    calculo_retencoes = None
     if tipo_transacao == "com_retencoes":
-        calculo_retencoes = processamento.get("calculo_retencoes", {})
-        if calculo_retencoes:
-            resultado["conciliacao"]["tipo_conciliacao"] = "com_retencoes"
-            resultado["conciliacao"]["calculo_retencoes"] = {
-                "valor_bruto": calculo_retencoes["valor_bruto"],
-                "total_retencoes": calculo_retencoes["total_retencoes"],
-                "valor_liquido_esperado": calculo_retencoes["valor_liquido_esperado"],
+        calculo = processamento.get("calculo_retencoes", {})
+        if calculo:
+            calculo_retencoes = {
+                "valor_bruto": calculo["valor_bruto"],
+                "total_retencoes": calculo["total_retencoes"],
+                "valor_liquido_esperado": calculo["valor_liquido_esperado"],
                 "valor_pago": transacao["valor_transacao"],
-                "diferenca": abs(transacao["valor_transacao"] - calculo_retencoes["valor_liquido_esperado"])
+                "diferenca": abs(transacao["valor_transacao"] - calculo["valor_liquido_esperado"])
             }
-    
-    state["resultado_final"] = resultado
+            if calculo.get("divisao_ambigua"):
+                # Várias combinações de alíquotas dão o mesmo total: só o total é publicado
+                calculo_retencoes["divisao_ambigua"] = True
+            elif calculo.get("origem") == "inferida":
+                calculo_retencoes["impostos_inferidos"] = calculo["impostos_detalhados"]
+    
+    state["resultado_final"] = ResultadoConciliacao(
+        conciliado=conciliado,
+        id_lancamento_contabil=id_lancamento if conciliado else None,
+        documento_origem=classificacao.get("numero_documento"),
+        score_confianca=round(matching_info.get("score_total", 0), 2),
+        status=status,
+        divergencias=divergencias,
+        needs_human_review=not conciliado,
+        tipo_transacao=tipo_transacao,
+        cfop_origem=classificacao.get("cfop"),
+        criterio_principal=_determinar_criterio_principal(matching_info, validacao, tipo_transacao),
+        palavras_encontradas=matching_info.get("palavras_encontradas", []),
+        diferenca_valor=matching_info.get("diferenca_valor", 0),
+        diferenca_dias=matching_info.get("diferenca_dias", 0),
+        calculo_retencoes=calculo_retencoes
+    )
     return state
 
 
 # === FUNÇÕES AUXILIARES ===
 
-def _extrair_palavras_chave(descricao: str, criterios_config: Dict) -> List[str]:
-    """Extrai palavras-chave relevantes da descrição"""
-    descricao_clean = re.sub(r"[^\w\s]", " ", descricao.upper())
-    palavras = descricao_clean.split()
-    
-    palavras_irrelevantes = criterios_config.get("palavras_irrelevantes", set())
-    palavras_filtradas = []
-    
-    for palavra in palavras:
-        if len(palavra) > 2 and palavra.lower() not in palavras_irrelevantes:
-            palavras_filtradas.append(palavra)
-    
-    numeros = re.findall(r"\d{3,}", descricao)
-    palavras_filtradas.extend(numeros)
-    
-    return list(set(palavras_filtradas))
-
-
 def _determinar_criterio_principal(matching_info: Dict, validacao: Dict, tipo_transacao: str) -> str:
     """Determina o critério principal usado na conciliação"""
     if tipo_transacao == "taxa_bancaria":
@@ -469,4 +379,53 @@ def _determinar_criterio_principal(matching_info: Dict, validacao: Dict, tipo_tr
     elif matching_info.get("palavras_encontradas", []):
         return "numero_documento"
     else:
-        return "fuzzy_matching"
\ No newline at end of file
+        return "fuzzy_matching"
+
+def _retencoes_do_estado(state: ConciliacaoState, criterios_config: CriteriosConciliacao) -> Optional[Dict[str, Any]]:
+    """Retenções calculadas por ``calcular_matching_node`` (ou calculadas aqui, se o nó não rodou)."""
+    if "retencoes" in state:
+        return state["retencoes"]
+    return _retencoes(state["transacao_bancaria"], state.get("classificacao_disponivel") or {}, criterios_config)
+
+
+def _retencoes(
+    transacao: Dict, classificacao: Dict, criterios_config: CriteriosConciliacao
+) -> Optional[Dict[str, Any]]:
+    """
+    Retenções informadas no documento ou, na ausência delas, inferidas pela
+    combinação de alíquotas usuais que explica bruto - líquido.
+
+    Returns:
+        None se não há retenção; senão um dicionário com ``valor_bruto``,
+        ``total_retencoes``, ``impostos`` (R$ por imposto; None quando a
+        divisão inferida é ambígua), ``origem`` ("documento" ou "inferida") e
+        ``ambigua``
+    """
+    valor_bruto = classificacao.get("valor_total", 0)
+    impostos_retidos = classificacao.get("impostos_retidos", {})
+    if impostos_retidos:
+        return {
+            "valor_bruto": valor_bruto,
+            "total_retencoes": sum(impostos_retidos.values()),
+            "impostos": impostos_retidos,
+            "origem": "documento",
+            "ambigua": False
+        }
+
+    valor_pago = transacao.get("valor_transacao", 0)
+    if not valor_bruto or abs(valor_pago) >= abs(valor_bruto):
+        return None
+
+    motor = criterios_config.extensoes.get("motor_retencoes") or MOTOR_RETENCOES_PADRAO
+    inferencia = motor.inferir_lote([valor_bruto], [valor_pago])
+    indice = int(inferencia["indice_combinacao"][0])
+    if indice < 0:
+        return None
+    ambigua = bool(inferencia["ambiguo"][0])
+    return {
+        "valor_bruto": valor_bruto,
+        "total_retencoes": float(inferencia["total_retencoes"][0]),
+        "impostos": None if ambigua else motor.impostos(valor_bruto, indice),
+        "origem": "inferida",
+        "ambigua": ambigua
+    }
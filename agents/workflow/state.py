@@ -1,5 +1,17 @@
 # agents/workflow/state.py
-from typing import Dict, List, Optional, TypedDict, Any
+from typing import Annotated, Dict, List, Mapping, Optional, TypedDict, Any
+
+
+def mesclar_parcial(atual: Optional[Dict[str, Any]], novo: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Reducer de chaves escritas por ramos paralelos: combina os dicionários
+    (chaves do novo prevalecem); None não apaga o que já foi escrito.
+    """
+    if novo is None:
+        return atual
+    if atual is None:
+        return novo
+    return {**atual, **novo}
 
 
 class ConciliacaoState(TypedDict):
@@ -24,19 +36,25 @@ class ConciliacaoState(TypedDict):
     matching_info: Optional[Dict[str, Any]]
     """Informações de scoring e matching fuzzy"""
     
-    validacao: Optional[Dict[str, Any]]
+    retencoes: Optional[Dict[str, Any]]
+    """Retenções do documento ou inferidas (calculadas uma vez por transação)"""
+    
+    validacao: Annotated[Optional[Dict[str, Any]], mesclar_parcial]
     """Resultados da validação contábil e identificação de divergências"""
     
-    processamento_especializado: Optional[Dict[str, Any]]
+    processamento_especializado: Annotated[Optional[Dict[str, Any]], mesclar_parcial]
     """Dados específicos para casos especiais (retenções, lote, etc.)"""
     
     # === SAÍDA FINAL ===
-    resultado_final: Optional[Dict[str, Any]]
-    """Resultado estruturado da conciliação"""
+    resultado_final: Optional[Any]
+    """Resultado estruturado da conciliação (ResultadoConciliacao)"""
     
     # === METADADOS ===
-    criterios_config: Optional[Dict[str, Any]]
-    """Configurações de critérios para conciliação"""
+    criterios_config: Optional[Mapping[str, Any]]
+    """Critérios de conciliação (CriteriosConciliacao ou dicionário equivalente)"""
+    
+    rastreio: Optional[Any]
+    """Rastreio da transação (agents.rastreamento.Rastreio), se houver rastreador"""
 
 
 class MatchingInfo(TypedDict):
@@ -52,7 +70,8 @@ class ValidacaoInfo(TypedDict):
     """Estrutura para informações de validação"""
     pode_conciliar: bool
     validacoes: Dict[str, bool]
-    divergencias: List[Dict[str, Any]]
+    divergencias: List[Any]
+    """Lista de Divergencia (models.conciliacao)"""
     tipo_transacao: str
     motivo: Optional[str]
 
@@ -9,6 +9,7 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from agents.conciliador_bancario import ConciliadorBancarioAgent
+from agents.dados import RelatorioConciliacao, validar_lote
 
 def validar_json_transacao(data: Dict) -> tuple[bool, str]:
     """Valida se o JSON contém os campos obrigatórios de uma transação bancária."""
@@ -41,6 +42,50 @@ def processar_json(json_data: Dict) -> Dict[str, Any]:
     resultado = agente.conciliar(estado_global)
     return resultado
 
+def processar_lote_json(estados: list) -> list:
+    """Executa a conciliação de um lote de estados já validados."""
+    agente = ConciliadorBancarioAgent()
+    return agente.conciliar_lote(estados)
+
+def exibir_validacao_lote(validacao: Dict[str, Any]):
+    """Exibe o resumo e o relatório de erros da validação em lote."""
+    resumo = validacao["resumo"]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Registros", resumo["total"])
+    with col2:
+        st.metric("Válidos", resumo["validos"])
+    with col3:
+        st.metric("Rejeitados", resumo["rejeitados"])
+    
+    if resumo["rejeitados"]:
+        st.warning(f"⚠️ {resumo['rejeitados']} registro(s) rejeitado(s) na validação")
+        st.dataframe(validacao["erros"], use_container_width=True, hide_index=True)
+
+def exibir_relatorio(relatorio: RelatorioConciliacao):
+    """Painel do lote: totais, distribuição por status e quebras por parceiro, CFOP e divergência."""
+    resumo = relatorio.resumo()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Transações", resumo["quantidade"], f"{resumo['conciliados']} conciliadas")
+    with col2:
+        st.metric("Valor Conciliado", f"R$ {resumo['valor_conciliado']:,.2f}")
+    with col3:
+        st.metric("Valor Não Conciliado", f"R$ {resumo['valor_nao_conciliado']:,.2f}")
+    with col4:
+        st.metric("Fila de Revisão", resumo["fila_revisao"])
+    
+    st.subheader("📈 Por Status")
+    st.bar_chart(relatorio.quadro("status").set_index("status")["quantidade"])
+    
+    aba_parceiro, aba_cfop, aba_divergencia = st.tabs(["Parceiro", "CFOP", "Divergência"])
+    with aba_parceiro:
+        st.dataframe(relatorio.quadro("parceiro"), use_container_width=True, hide_index=True)
+    with aba_cfop:
+        st.dataframe(relatorio.quadro("cfop"), use_container_width=True, hide_index=True)
+    with aba_divergencia:
+        st.dataframe(relatorio.quadro("divergencia"), use_container_width=True, hide_index=True)
+
 def exibir_resultado(resultado: Dict[str, Any]):
     """Exibe o resultado da conciliação de forma organizada."""
     conciliacao = resultado.get("conciliacao", {})
@@ -216,8 +261,40 @@ def main():
     
     # Processamento
     if json_data is not None:
+        # Lote: lista de estados/transações ou {"transacoes": [...]}
+        registros = json_data.get("transacoes") if isinstance(json_data, dict) else json_data
+        if isinstance(registros, list):
+            validacao = validar_lote(registros)
+            exibir_validacao_lote(validacao)
+            
+            if validacao["validos"] and st.button("🚀 Processar Lote", type="primary"):
+                with st.spinner("Processando conciliação em lote..."):
+                    try:
+                        resultados = processar_lote_json(validacao["validos"])
+                        
+                        st.header("📊 Resultado da Conciliação em Lote")
+                        exibir_relatorio(RelatorioConciliacao().acumular(resultados))
+                        
+                        st.subheader("📋 Resultados por Linha")
+                        linhas = validacao["linhas_validas"]
+                        st.dataframe(
+                            [
+                                {
+                                    "linha": int(linha),
+                                    "status": resultado.get("conciliacao", {}).get("status"),
+                                    "conciliado": resultado.get("conciliacao", {}).get("conciliado")
+                                }
+                                for linha, resultado in zip(linhas, resultados)
+                            ],
+                            use_container_width=True,
+                            hide_index=True
+                        )
+                    except Exception as e:
+                        st.error(f"❌ Erro durante o processamento: {e}")
+                        st.exception(e)
+        
         # Validação dos dados
-        if "transacao_bancaria" in json_data:
+        elif "transacao_bancaria" in json_data:
             is_valid, message = validar_json_transacao(json_data["transacao_bancaria"])
             
             if is_valid:
@@ -259,6 +336,12 @@ def main():
         st.write("• descricao_transacao (texto)")
         st.write("• tipo_transacao (Débito/Crédito)")
         
+        st.subheader("📦 Lotes")
+        st.write("• Lista JSON de transações ou estados")
+        st.write("• Ou objeto com a chave 'transacoes'")
+        st.write("• Registros inválidos são listados e ignorados")
+        st.write("• Painel com totais por status, parceiro, CFOP e divergência")
+        
         st.subheader("🔧 Versão")
         st.write("Agente: v1.0")
         st.write("Interface: Streamlit")
@@ -1,9 +1,24 @@
 # models/conciliacao.py
 from dataclasses import dataclass
-from typing import List, Optional, Dict
+from enum import Enum
+from typing import Any, List, Optional, Dict, Sequence, Tuple
 from datetime import datetime
 
 
+class StatusConciliacao(str, Enum):
+    """Status possíveis de uma conciliação (valores iguais às strings legadas)."""
+    CONCILIADO_AUTOMATICO = "Conciliado_Automatico"
+    CONCILIADO_COM_RESSALVA = "Conciliado_Com_Ressalva"
+    CONCILIADO_COM_RETENCOES = "Conciliado_Com_Retencoes"
+    CONCILIADO_PARCIAL = "Conciliado_Parcial"
+    CONCILIADO_LOTE = "Conciliado_Lote"
+    LOTE_NAO_CONCILIADO = "Lote_Nao_Conciliado"
+    NAO_CONCILIADO = "Nao_Conciliado"
+    NAO_CONCILIAVEL = "Nao_Conciliavel"
+    SEM_CLASSIFICACAO_DISPONIVEL = "Sem_Classificacao_Disponivel"
+    ERRO_PROCESSAMENTO = "Erro_Processamento"
+
+
 @dataclass
 class TransacaoBancaria:
     data_transacao: str
@@ -14,15 +29,322 @@ class TransacaoBancaria:
     codigo_banco: str
 
 
-@dataclass
+class TipoDivergencia(str, Enum):
+    """Tipos de divergência identificados na validação."""
+    DATA = "data"
+    VALOR = "valor"
+    VALOR_LIQUIDO = "valor_liquido"
+
+
+class ImpactoDivergencia(str, Enum):
+    """Nível de impacto de uma divergência."""
+    BAIXO = "baixo"
+    MEDIO = "medio"
+    ALTO = "alto"
+
+
+class Divergencia:
+    """
+    Divergência entre transação e documento.
+
+    Guarda o valor numérico (dias ou R$) e formata a descrição sob demanda.
+    """
+    __slots__ = ("tipo", "impacto", "valor")
+
+    def __init__(self, tipo: TipoDivergencia, impacto: ImpactoDivergencia, valor: float):
+        self.tipo = tipo
+        self.impacto = impacto
+        self.valor = valor
+
+    @property
+    def descricao(self) -> str:
+        if self.tipo == TipoDivergencia.DATA:
+            return f"Diferenca de {self.valor} dias entre documento e pagamento"
+        if self.tipo == TipoDivergencia.VALOR_LIQUIDO:
+            return f"Diferenca no valor liquido: R$ {self.valor:.2f}"
+        return f"Diferenca de valor: R$ {self.valor:.2f}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"tipo": self.tipo.value, "descricao": self.descricao, "impacto": self.impacto.value}
+
+    def __repr__(self) -> str:
+        return f"Divergencia({self.tipo.value!r}, {self.impacto.value!r}, {self.valor!r})"
+
+
 class ResultadoConciliacao:
-    conciliado: bool
-    id_lancamento_contabil: Optional[str]
-    documento_origem: Optional[str]
-    score_confianca: float
-    status: str
-    divergencias: List[Dict]
-    observacoes: List[str]
-    metadados_matching: Dict
-    needs_human_review: bool
-    timestamp: datetime
+    """
+    Resultado de uma conciliação produzido diretamente pelo workflow.
+
+    Usa ``__slots__`` e enums para reduzir alocação por resultado em lote;
+    ``to_dict`` reproduz o formato de dicionário da interface original e
+    ``compacto`` projeta apenas os campos essenciais.
+    """
+    __slots__ = (
+        "conciliado", "id_lancamento_contabil", "documento_origem", "score_confianca",
+        "status", "divergencias", "needs_human_review", "timestamp", "tipo_transacao",
+        "cfop_origem", "criterio_principal", "palavras_encontradas", "diferenca_valor",
+        "diferenca_dias", "classificacao_sugerida", "documentos_conciliados",
+        "validacoes_contabeis", "totalizacao", "calculo_retencoes",
+        "motivo_nao_conciliacao", "rule_version", "_observacoes"
+    )
+
+    def __init__(
+        self,
+        conciliado: bool,
+        id_lancamento_contabil: Optional[str],
+        documento_origem: Optional[str],
+        score_confianca: float,
+        status: StatusConciliacao,
+        divergencias: Sequence[Divergencia] = (),
+        observacoes: Optional[List[str]] = None,
+        needs_human_review: bool = True,
+        timestamp: Optional[datetime] = None,
+        tipo_transacao: Optional[str] = None,
+        cfop_origem: Optional[str] = None,
+        criterio_principal: Optional[str] = None,
+        palavras_encontradas: Sequence[str] = (),
+        diferenca_valor: float = 0,
+        diferenca_dias: int = 0,
+        classificacao_sugerida: Optional[Dict[str, Any]] = None,
+        documentos_conciliados: Optional[List[Dict[str, Any]]] = None,
+        validacoes_contabeis: Optional[Dict[str, bool]] = None,
+        totalizacao: Optional[Dict[str, Any]] = None,
+        calculo_retencoes: Optional[Dict[str, Any]] = None,
+        motivo_nao_conciliacao: Optional[str] = None,
+        rule_version: str = "v1.0"
+    ):
+        self.conciliado = conciliado
+        self.id_lancamento_contabil = id_lancamento_contabil
+        self.documento_origem = documento_origem
+        self.score_confianca = score_confianca
+        self.status = status
+        self.divergencias = tuple(divergencias)
+        self.needs_human_review = needs_human_review
+        self.timestamp = timestamp
+        self.tipo_transacao = tipo_transacao
+        self.cfop_origem = cfop_origem
+        self.criterio_principal = criterio_principal
+        self.palavras_encontradas = palavras_encontradas
+        self.diferenca_valor = diferenca_valor
+        self.diferenca_dias = diferenca_dias
+        self.classificacao_sugerida = classificacao_sugerida
+        self.documentos_conciliados = documentos_conciliados
+        self.validacoes_contabeis = validacoes_contabeis
+        self.totalizacao = totalizacao
+        self.calculo_retencoes = calculo_retencoes
+        self.motivo_nao_conciliacao = motivo_nao_conciliacao
+        self.rule_version = rule_version
+        self._observacoes = observacoes
+
+    @property
+    def observacoes(self) -> List[str]:
+        """Observações legíveis, formatadas apenas no primeiro acesso."""
+        if self._observacoes is None:
+            self._observacoes = gerar_observacoes(self.status, self.conciliado, *self._contexto())
+        return self._observacoes
+
+    def _contexto(self) -> Tuple[Any, ...]:
+        total_retencoes = self.calculo_retencoes["total_retencoes"] if self.calculo_retencoes else None
+        quantidade_nfs = self.totalizacao.get("quantidade_nfs", 0) if self.totalizacao else 0
+        return (self.tipo_transacao, self.diferenca_dias, self.diferenca_valor, total_retencoes, quantidade_nfs)
+
+    def compacto(self) -> "ResultadoCompacto":
+        """Projeta o resultado nos campos essenciais de um ResultadoCompacto."""
+        return ResultadoCompacto(
+            status=self.status,
+            score_confianca=self.score_confianca,
+            conciliado=self.conciliado,
+            needs_human_review=self.needs_human_review,
+            id_lancamento_contabil=self.id_lancamento_contabil,
+            documento_origem=self.documento_origem,
+            divergencias=[divergencia.tipo for divergencia in self.divergencias],
+            contexto=self._contexto()
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializa no formato de dicionário da interface original."""
+        status = self.status
+        conciliacao: Dict[str, Any] = {"conciliado": self.conciliado}
+
+        if status == StatusConciliacao.NAO_CONCILIAVEL:
+            conciliacao.update({
+                "tipo_transacao_identificado": self.tipo_transacao,
+                "score_confianca": self.score_confianca,
+                "status": status.value,
+                "divergencias": [divergencia.to_dict() for divergencia in self.divergencias],
+                "classificacao_sugerida": self.classificacao_sugerida or {},
+                "observacoes": self.observacoes,
+                "metadados_matching": {
+                    "criterio_principal": self.criterio_principal,
+                    "palavras_encontradas": list(self.palavras_encontradas),
+                    "categoria_automatica": self.tipo_transacao
+                }
+            })
+        elif status in (StatusConciliacao.CONCILIADO_LOTE, StatusConciliacao.LOTE_NAO_CONCILIADO):
+            conciliacao.update({
+                "tipo_conciliacao": "multiplos_documentos",
+                "score_confianca": self.score_confianca,
+                "status": status.value,
+                "documentos_conciliados": self.documentos_conciliados or [],
+                "validacoes_contabeis": self.validacoes_contabeis or {},
+                "totalizacao": self.totalizacao or {},
+                "observacoes": self.observacoes
+            })
+        elif status in (StatusConciliacao.SEM_CLASSIFICACAO_DISPONIVEL, StatusConciliacao.ERRO_PROCESSAMENTO):
+            conciliacao.update({
+                "score_confianca": self.score_confianca,
+                "status": status.value
+            })
+            if status == StatusConciliacao.ERRO_PROCESSAMENTO:
+                conciliacao["observacoes"] = self.observacoes
+        else:
+            conciliacao.update({
+                "id_lancamento_contabil": self.id_lancamento_contabil,
+                "documento_origem": self.documento_origem,
+                "cfop_origem": self.cfop_origem,
+                "score_confianca": self.score_confianca,
+                "status": status.value,
+                "divergencias": [divergencia.to_dict() for divergencia in self.divergencias],
+                "observacoes": self.observacoes,
+                "metadados_matching": {
+                    "criterio_principal": self.criterio_principal,
+                    "palavras_encontradas": list(self.palavras_encontradas),
+                    "diferenca_valor": self.diferenca_valor,
+                    "diferenca_dias": self.diferenca_dias
+                }
+            })
+            if self.calculo_retencoes:
+                conciliacao["tipo_conciliacao"] = "com_retencoes"
+                conciliacao["calculo_retencoes"] = self.calculo_retencoes
+
+        resultado: Dict[str, Any] = {
+            "conciliacao_ok": self.conciliado,
+            "conciliacao": conciliacao,
+            "confianca": self.score_confianca,
+            "needs_human_review": self.needs_human_review
+        }
+        if self.motivo_nao_conciliacao:
+            resultado["motivo_nao_conciliacao"] = self.motivo_nao_conciliacao
+        resultado["rule_version"] = self.rule_version
+        if self.timestamp is not None:
+            resultado["timestamp"] = self.timestamp.isoformat()
+        return resultado
+
+    def __repr__(self) -> str:
+        return (
+            f"ResultadoConciliacao(status={self.status.value!r}, "
+            f"score_confianca={self.score_confianca!r}, "
+            f"id_lancamento_contabil={self.id_lancamento_contabil!r})"
+        )
+
+
+class ResultadoCompacto:
+    """
+    Resultado enxuto para processamento em lote.
+
+    Guarda apenas os campos essenciais e o contexto numérico mínimo para
+    montar ``observacoes`` sob demanda, sem ecoar as entradas.
+    """
+    __slots__ = (
+        "status", "score_confianca", "conciliado", "needs_human_review",
+        "id_lancamento_contabil", "documento_origem", "divergencias",
+        "_contexto", "_observacoes"
+    )
+
+    def __init__(
+        self,
+        status: StatusConciliacao,
+        score_confianca: float,
+        conciliado: bool,
+        needs_human_review: bool,
+        id_lancamento_contabil: Optional[str] = None,
+        documento_origem: Optional[str] = None,
+        divergencias: Sequence[TipoDivergencia] = (),
+        contexto: Tuple[Any, ...] = ()
+    ):
+        self.status = status
+        self.score_confianca = score_confianca
+        self.conciliado = conciliado
+        self.needs_human_review = needs_human_review
+        self.id_lancamento_contabil = id_lancamento_contabil
+        self.documento_origem = documento_origem
+        self.divergencias = tuple(divergencias)
+        # (tipo_transacao, diferenca_dias, diferenca_valor, total_retencoes, quantidade_nfs, erro)
+        self._contexto = contexto
+        self._observacoes: Optional[List[str]] = None
+
+    @property
+    def observacoes(self) -> List[str]:
+        """Observações legíveis, formatadas apenas no primeiro acesso."""
+        if self._observacoes is None:
+            self._observacoes = gerar_observacoes(self.status, self.conciliado, *self._contexto)
+        return self._observacoes
+
+    def to_dict(self, incluir_observacoes: bool = False) -> Dict[str, Any]:
+        """Serializa os campos essenciais (observações apenas se solicitadas)."""
+        dados = {
+            "status": self.status.value,
+            "score_confianca": self.score_confianca,
+            "conciliado": self.conciliado,
+            "needs_human_review": self.needs_human_review,
+            "id_lancamento_contabil": self.id_lancamento_contabil,
+            "documento_origem": self.documento_origem,
+            "divergencias": [tipo.value for tipo in self.divergencias]
+        }
+        if incluir_observacoes:
+            dados["observacoes"] = self.observacoes
+        return dados
+
+    def __repr__(self) -> str:
+        return (
+            f"ResultadoCompacto(status={self.status.value!r}, "
+            f"score_confianca={self.score_confianca!r}, "
+            f"id_lancamento_contabil={self.id_lancamento_contabil!r})"
+        )
+
+
+def gerar_observacoes(
+    status: StatusConciliacao,
+    conciliado: bool,
+    tipo_transacao: Optional[str] = None,
+    diferenca_dias: int = 0,
+    diferenca_valor: float = 0,
+    total_retencoes: Optional[float] = None,
+    quantidade_nfs: int = 0,
+    erro: Optional[str] = None
+) -> List[str]:
+    """Monta as observações legíveis de um resultado a partir do seu contexto."""
+    if status == StatusConciliacao.ERRO_PROCESSAMENTO:
+        return [f"Erro durante execução: {erro}" if erro else "Erro interno durante processamento"]
+
+    if status == StatusConciliacao.SEM_CLASSIFICACAO_DISPONIVEL:
+        return []
+
+    if status == StatusConciliacao.NAO_CONCILIAVEL:
+        return [
+            "Transacao identificada como taxa bancaria - nao possui documento fiscal correspondente",
+            "Sugerido lancamento direto como despesa bancaria",
+            "Nao requer conciliacao com documentos fiscais"
+        ]
+
+    if status in (StatusConciliacao.CONCILIADO_LOTE, StatusConciliacao.LOTE_NAO_CONCILIADO):
+        return [
+            f"Pagamento em lote para {quantidade_nfs} notas fiscais",
+            "Soma dos valores das NF-es corresponde ao valor da transacao" if conciliado else "Divergencia nos valores totais"
+        ]
+
+    observacoes = []
+    if tipo_transacao == "com_retencoes":
+        if total_retencoes is not None:
+            observacoes.append("Pagamento liquido com retencoes tributarias aplicadas")
+            observacoes.append(f"Total de impostos retidos: R$ {total_retencoes:.2f}")
+    elif tipo_transacao == "parcela":
+        observacoes.append("Conciliacao parcial - Pagamento parcelado identificado")
+
+    if diferenca_dias > 0:
+        observacoes.append(f"Diferenca de {diferenca_dias} dias entre documento e pagamento")
+
+    if diferenca_valor == 0:
+        observacoes.append("Valor exato entre transacao bancaria e classificacao fiscal")
+
+    return observacoes
@@ -0,0 +1,100 @@
+# tests/benchmark_grafo.py
+"""
+Latência do workflow com validação e processamento especializado em
+sequência x em ramos paralelos (``create_conciliacao_graph(paralelo=...)``).
+
+Mede, por caminho (retenções, lote, normal), a latência de ``invoke`` por
+transação (mediana e p95) e o tempo por item de ``batch``.
+
+Uso:
+    python tests/benchmark_grafo.py --repeticoes 300 --lote 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agents.conciliador_bancario import ConciliadorBancarioAgent  # noqa: E402
+from agents.workflow.graph import create_conciliacao_graph  # noqa: E402
+from test_data_generator import GeradorDadosConciliacao  # noqa: E402
+
+
+def estados_caminho(caminho: str, quantidade: int) -> List[Dict[str, Any]]:
+    """Estados de entrada que seguem o caminho pedido do workflow."""
+    gerador = GeradorDadosConciliacao()
+    estados = []
+    for _ in range(quantidade):
+        if caminho == "lote":
+            transacao = gerador.gerar_transacao_bancaria("lote")
+            classificacoes = [
+                {"cfop": "1102", "documento": f"NF-e {i}", "valor": transacao["valor_transacao"] / 3}
+                for i in range(3)
+            ]
+            estados.append({"transacao_bancaria": transacao, "classificacoes_disponiveis": classificacoes})
+        else:
+            tipo_caso = "retencao" if caminho == "retencoes" else "normal"
+            transacao = gerador.gerar_transacao_bancaria(tipo_caso)
+            estados.append({
+                "transacao_bancaria": transacao,
+                "classificacao_disponivel": gerador.gerar_classificacao_fiscal(transacao, True)
+            })
+    return estados
+
+
+def medir(agente: ConciliadorBancarioAgent, estados: List[Dict[str, Any]], tamanho_lote: int) -> Dict[str, float]:
+    iniciais = [agente._criar_estado_inicial(estado) for estado in estados]
+    for estado in iniciais[:20]:
+        agente.workflow.invoke(estado)
+
+    latencias = []
+    for estado in iniciais:
+        inicio = time.perf_counter()
+        agente.workflow.invoke(estado)
+        latencias.append(time.perf_counter() - inicio)
+
+    lote = (iniciais * (tamanho_lote // len(iniciais) + 1))[:tamanho_lote]
+    inicio = time.perf_counter()
+    agente.workflow.batch(lote)
+    por_item_lote = (time.perf_counter() - inicio) / len(lote)
+
+    latencias.sort()
+    return {
+        "mediana_ms": statistics.median(latencias) * 1000,
+        "p95_ms": latencias[int(len(latencias) * 0.95)] * 1000,
+        "lote_ms_item": por_item_lote * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latência do workflow: nós em sequência x ramos paralelos")
+    parser.add_argument("--repeticoes", type=int, default=300, help="Invocações medidas por caminho")
+    parser.add_argument("--lote", type=int, default=500, help="Itens no batch medido")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    agentes = {}
+    for nome, paralelo in (("sequencial", False), ("paralelo", True)):
+        agente = ConciliadorBancarioAgent()
+        agente.workflow = create_conciliacao_graph(paralelo=paralelo)
+        agentes[nome] = agente
+
+    print(f"{'caminho':<10} {'grafo':<11} {'mediana (ms)':>13} {'p95 (ms)':>9} {'batch (ms/item)':>16}")
+    for caminho in ("retencoes", "lote", "normal"):
+        random.seed(args.semente)
+        estados = estados_caminho(caminho, args.repeticoes)
+        for nome, agente in agentes.items():
+            medidas = medir(agente, estados, args.lote)
+            print(
+                f"{caminho:<10} {nome:<11} {medidas['mediana_ms']:>13.3f} "
+                f"{medidas['p95_ms']:>9.3f} {medidas['lote_ms_item']:>16.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# tests/benchmark_memoria_compartilhada.py
+"""
+Conciliação particionada em processos: transporte via pickle x memória compartilhada.
+
+As duas variantes fazem exatamente a mesma seleção de candidatos (partições
+por ``--chave``, ``escolher_documentos`` em cada partição) sobre os mesmos
+registros; muda só o transporte:
+
+- pickle: ``ConciliadorParticionado``; cada tarefa leva as transações e os
+  documentos da sua partição como dicionários e os resultados compactos
+  voltam pelo pickle
+- memória compartilhada: ``ConciliadorMemoriaCompartilhada``; os registros vão
+  uma vez para blocos compartilhados, cada tarefa leva só descritores e as
+  faixas das suas partições e grava os resultados na saída compartilhada
+
+Antes de informar os tempos o script confere que status, score, flags e
+documento escolhido são iguais nas duas variantes (senão aborta).
+
+Uso:
+    python tests/benchmark_memoria_compartilhada.py --casos 20000 --processos 4 --faixa 2000
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agents.execucao.memoria_compartilhada import ConciliadorMemoriaCompartilhada, registros  # noqa: E402
+from agents.execucao.particionamento import ConciliadorParticionado  # noqa: E402
+from gerador_dados_volume import GeradorVolumeConciliacao  # noqa: E402
+
+
+def medir_pickle(
+    transacoes: Sequence[Dict[str, Any]], documentos: Sequence[Dict[str, Any]], args: argparse.Namespace
+) -> Tuple[float, pd.DataFrame]:
+    inicio = time.perf_counter()
+    resultados = ConciliadorParticionado(
+        chave=args.chave, max_processos=args.processos, compacto=True, atribuicao_otima=args.atribuicao_otima
+    ).conciliar(transacoes, documentos)
+    decorrido = time.perf_counter() - inicio
+    return decorrido, pd.DataFrame({
+        "status": [resultado.status.value for resultado in resultados],
+        "score_confianca": [resultado.score_confianca for resultado in resultados],
+        "conciliado": [resultado.conciliado for resultado in resultados],
+        "needs_human_review": [resultado.needs_human_review for resultado in resultados],
+        "documento_origem": [resultado.documento_origem for resultado in resultados],
+    })
+
+
+def medir_compartilhado(
+    transacoes: Sequence[Dict[str, Any]], documentos: Sequence[Dict[str, Any]], args: argparse.Namespace
+) -> Tuple[float, pd.DataFrame]:
+    inicio = time.perf_counter()
+    quadro = ConciliadorMemoriaCompartilhada(
+        chave=args.chave, max_processos=args.processos, tamanho_faixa=args.faixa,
+        atribuicao_otima=args.atribuicao_otima
+    ).conciliar(transacoes, documentos)
+    decorrido = time.perf_counter() - inicio
+    quadro["documento_origem"] = [
+        documentos[indice].get("numero_documento") if indice >= 0 else None for indice in quadro["documento"]
+    ]
+    return decorrido, quadro
+
+
+def _divergencias(esperado: pd.DataFrame, obtido: pd.DataFrame) -> List[str]:
+    divergentes = []
+    for coluna in ("status", "conciliado", "needs_human_review", "documento_origem"):
+        if list(esperado[coluna]) != list(obtido[coluna]):
+            divergentes.append(coluna)
+    if not np.allclose(esperado["score_confianca"], obtido["score_confianca"], atol=1e-6):
+        divergentes.append("score_confianca")
+    return divergentes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Conciliação em processos: pickle x memória compartilhada")
+    parser.add_argument("--casos", type=int, default=5000, help="Casos gerados (transações ~ documentos)")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--faixa", type=int, default=1000, help="Transações por tarefa (memória compartilhada)")
+    parser.add_argument("--chave", default="conta_bancaria", help="Campo de partição")
+    parser.add_argument("--atribuicao-otima", action="store_true", help="Atribuição 1:1 em cada partição")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    bloco = GeradorVolumeConciliacao(semente=args.semente).gerar_bloco(args.casos)
+    transacoes, documentos = registros(bloco["transacoes"]), registros(bloco["documentos"])
+    print(f"transações: {len(transacoes)}  documentos: {len(documentos)}  processos: {args.processos}  "
+          f"faixa: {args.faixa}  partições: {bloco['transacoes'][args.chave].nunique()}")
+
+    tempo_pickle, quadro_pickle = medir_pickle(transacoes, documentos, args)
+    tempo_compartilhado, quadro_compartilhado = medir_compartilhado(transacoes, documentos, args)
+
+    divergentes = _divergencias(quadro_pickle, quadro_compartilhado)
+    if divergentes:
+        raise SystemExit(f"Resultados diferentes entre as variantes: {', '.join(divergentes)}")
+
+    print(f"{'variante':<22} {'tempo (s)':>10} {'µs/transação':>13}")
+    for nome, tempo in (("pickle", tempo_pickle), ("memória compartilhada", tempo_compartilhado)):
+        print(f"{nome:<22} {tempo:>10.3f} {tempo / len(transacoes) * 1e6:>13.1f}")
+    print("resultados iguais: sim")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+# tests/conftest.py
+import os
+import sys
+
+# Raiz do repositório e tests/ no path (como nos scripts de benchmark)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,411 @@
+# tests/gerador_dados_volume.py
+"""
+Gerador vetorizado (numpy) de dados sintéticos em grande volume.
+
+Complementa ``GeradorDadosConciliacao``: em vez de montar um registro por
+vez com ``random``/``Decimal``, cada bloco de casos é gerado com arrays
+numpy (valores em centavos inteiros) e gravado em streaming como NDJSON,
+CSV ou Parquet. Além das transações e do pool de documentos, grava o
+gabarito (pares transação → documento conhecidos) para medir acurácia.
+
+Casos gerados:
+    - normal: pagamento de uma NF (1:1)
+    - divergencia: recebimento com diferença de valor e data (1:1)
+    - retencao: pagamento líquido de NF de serviço com retenções (1:1)
+    - parcela: NF paga em parcelas mensais (N transações → 1 documento)
+    - lote: uma transação pagando 3 NFs (1 transação → 3 documentos)
+    - tarifa: tarifas bancárias recorrentes (sem documento)
+    - NFs em aberto: documentos sem pagamento (distratores do pool)
+
+Uso:
+    python tests/gerador_dados_volume.py --casos 2000000 --pasta dados_volume --formato ndjson
+"""
+import argparse
+import glob
+import os
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DISTRIBUICAO_PADRAO = {
+    "normal": 0.40,
+    "divergencia": 0.15,
+    "retencao": 0.15,
+    "parcela": 0.10,
+    "lote": 0.08,
+    "tarifa": 0.12,
+}
+
+FORNECEDORES = np.array([
+    "ABC COMERCIO LTDA",
+    "XYZ INDUSTRIA SA",
+    "DEF SERVICOS EIRELI",
+    "GHI TRANSPORTES LTDA",
+    "JKL DISTRIBUIDORA LTDA",
+    "MNO TECNOLOGIA SA",
+])
+CFOPS_COMPRA = np.array(["1102", "1202", "2102"])
+CFOPS_VENDA = np.array(["5102", "6102", "5933"])
+CODIGOS_BANCO = np.array(["341", "237", "001", "104", "033"])
+TARIFAS = np.array(["TARIFA PACOTE SERVICOS", "TAXA MANUTENCAO CONTA", "TARIFA TED", "ANUIDADE CARTAO"])
+ALIQUOTAS_ISS = np.array([0.02, 0.03, 0.035, 0.05])
+
+TOTAL_PARCELAS = 3
+DOCUMENTOS_POR_LOTE = 3
+
+# Colunas fixas de cada conjunto: todo bloco sai com as mesmas colunas, na
+# mesma ordem (parcelas só existem em parte das transações: Int64 anulável)
+COLUNAS = {
+    "transacoes": [
+        "id_transacao", "data_transacao", "valor_transacao", "descricao_transacao", "tipo_transacao",
+        "conta_bancaria", "codigo_banco", "numero_parcela", "total_parcelas",
+    ],
+    "documentos": [
+        "id_documento", "numero_documento", "cfop", "data_documento", "valor_total", "parceiro_nome",
+        "natureza_operacao", "conta_bancaria",
+    ],
+    "gabarito": ["id_transacao", "id_documento", "tipo_caso"],
+}
+COLUNAS_INTEIRAS_ANULAVEIS = ("numero_parcela", "total_parcelas")
+
+
+def _texto(*partes) -> np.ndarray:
+    """Concatena arrays/strings elemento a elemento."""
+    resultado = np.asarray(partes[0]).astype(str)
+    for parte in partes[1:]:
+        resultado = np.char.add(resultado, np.asarray(parte).astype(str))
+    return resultado
+
+
+def _ids(prefixo: str, inicio: int, quantidade: int) -> np.ndarray:
+    return _texto(prefixo, np.char.zfill(np.arange(inicio, inicio + quantidade).astype(str), 10))
+
+
+class GeradorVolumeConciliacao:
+    """
+    Gera transações, pool de documentos e gabarito em blocos vetorizados.
+
+    Exemplo:
+        gerador = GeradorVolumeConciliacao(semente=42, contas=200)
+        gerador.escrever("dados_volume", casos=2_000_000, formato="ndjson")
+    """
+
+    def __init__(
+        self,
+        semente: int = 42,
+        contas: int = 50,
+        data_inicial: str = "2025-01-01",
+        dias: int = 365,
+        distribuicao: Optional[Dict[str, float]] = None,
+        fracao_nfs_abertas: float = 0.2,
+    ):
+        self.rng = np.random.default_rng(semente)
+        self.distribuicao = distribuicao or DISTRIBUICAO_PADRAO
+        self.fracao_nfs_abertas = fracao_nfs_abertas
+        self.data_inicial = np.datetime64(data_inicial, "D")
+        self.dias = dias
+
+        codigos = self.rng.choice(CODIGOS_BANCO, contas)
+        numeros = self.rng.integers(10000, 99999, contas).astype(str)
+        digitos = self.rng.integers(0, 9, contas).astype(str)
+        self.codigos_banco = codigos
+        self.contas = _texto(codigos, "-", numeros, "-", digitos)
+        # Valor fixo de tarifa por conta (recorrente mês a mês)
+        self.tarifa_centavos = self.rng.integers(1990, 8990, contas)
+
+        self._proxima_transacao = 0
+        self._proximo_documento = 0
+
+    # === PRIMITIVAS ===
+
+    def _valores(self, n: int, minimo: int = 10000, maximo: int = 1000000) -> np.ndarray:
+        """Valores em centavos (log-uniforme: muitos pequenos, poucos grandes)."""
+        return np.exp(self.rng.uniform(np.log(minimo), np.log(maximo), n)).astype(np.int64)
+
+    def _datas(self, n: int) -> np.ndarray:
+        return self.data_inicial + self.rng.integers(0, self.dias, n).astype("timedelta64[D]")
+
+    def _novos_ids_transacao(self, n: int) -> np.ndarray:
+        ids = _ids("T", self._proxima_transacao, n)
+        self._proxima_transacao += n
+        return ids
+
+    def _novos_ids_documento(self, n: int) -> np.ndarray:
+        ids = _ids("D", self._proximo_documento, n)
+        self._proximo_documento += n
+        return ids
+
+    def _documentos(
+        self,
+        valores: np.ndarray,
+        datas: np.ndarray,
+        conta: np.ndarray,
+        fornecedor: np.ndarray,
+        numero_nf: np.ndarray,
+        venda: Optional[np.ndarray] = None,
+    ) -> Dict[str, np.ndarray]:
+        n = len(valores)
+        venda = np.zeros(n, dtype=bool) if venda is None else venda
+        cfop = np.where(venda, self.rng.choice(CFOPS_VENDA, n), self.rng.choice(CFOPS_COMPRA, n))
+        return {
+            "id_documento": self._novos_ids_documento(n),
+            "numero_documento": _texto("NF-e ", numero_nf),
+            "cfop": cfop,
+            "data_documento": datas.astype(str),
+            "valor_total": valores / 100,
+            "parceiro_nome": FORNECEDORES[fornecedor],
+            "natureza_operacao": np.where(venda, "venda", "compra"),
+            "conta_bancaria": self.contas[conta],
+        }
+
+    def _transacoes(
+        self,
+        valores: np.ndarray,
+        datas: np.ndarray,
+        conta: np.ndarray,
+        descricoes: np.ndarray,
+        credito: Optional[np.ndarray] = None,
+    ) -> Dict[str, np.ndarray]:
+        n = len(valores)
+        credito = np.zeros(n, dtype=bool) if credito is None else credito
+        return {
+            "id_transacao": self._novos_ids_transacao(n),
+            "data_transacao": datas.astype(str),
+            "valor_transacao": valores / 100,
+            "descricao_transacao": descricoes,
+            "tipo_transacao": np.where(credito, "Crédito", "Débito"),
+            "conta_bancaria": self.contas[conta],
+            "codigo_banco": self.codigos_banco[conta],
+        }
+
+    @staticmethod
+    def _gabarito(id_transacao: np.ndarray, id_documento: np.ndarray, tipo_caso: str) -> Dict[str, np.ndarray]:
+        return {
+            "id_transacao": id_transacao,
+            "id_documento": id_documento,
+            "tipo_caso": np.full(len(id_transacao), tipo_caso),
+        }
+
+    # === CASOS ===
+
+    def _caso_simples(self, n: int, tipo_caso: str) -> List[Dict[str, Dict[str, np.ndarray]]]:
+        """normal, divergencia e retencao: uma transação por documento."""
+        conta = self.rng.integers(0, len(self.contas), n)
+        fornecedor = self.rng.integers(0, len(FORNECEDORES), n)
+        numero_nf = self.rng.integers(100000, 999999, n)
+        bruto = self._valores(n)
+        data_documento = self._datas(n)
+        credito = np.zeros(n, dtype=bool)
+
+        if tipo_caso == "normal":
+            pago = bruto
+            data_pagamento = data_documento + self.rng.integers(0, 4, n).astype("timedelta64[D]")
+            descricoes = _texto("PGTO NF ", numero_nf, " ", FORNECEDORES[fornecedor])
+        elif tipo_caso == "divergencia":
+            pago = np.maximum(bruto + self.rng.integers(-5000, 5001, n), 1)
+            data_pagamento = data_documento + np.timedelta64(5, "D")
+            descricoes = _texto("PIX RECEBIDO ", FORNECEDORES[fornecedor], " REF VENDA")
+            credito = np.ones(n, dtype=bool)
+        else:
+            # Retenções arredondadas ao centavo por imposto (IRRF, PIS, COFINS, CSLL, ISS)
+            aliquotas = np.column_stack([
+                np.full(n, 0.015), np.full(n, 0.0065), np.full(n, 0.03), np.full(n, 0.01),
+                self.rng.choice(ALIQUOTAS_ISS, n),
+            ])
+            retencoes = np.round(bruto[:, None] * aliquotas).astype(np.int64).sum(axis=1)
+            pago = bruto - retencoes
+            data_pagamento = data_documento + self.rng.integers(0, 4, n).astype("timedelta64[D]")
+            descricoes = _texto("PGTO SERVICO ", FORNECEDORES[fornecedor], " LIQ NF ", numero_nf)
+
+        documentos = self._documentos(bruto, data_documento, conta, fornecedor, numero_nf, venda=credito)
+        transacoes = self._transacoes(pago, data_pagamento, conta, descricoes, credito)
+        return [{
+            "transacoes": transacoes,
+            "documentos": documentos,
+            "gabarito": self._gabarito(transacoes["id_transacao"], documentos["id_documento"], tipo_caso),
+        }]
+
+    def _caso_parcela(self, n: int) -> List[Dict[str, Dict[str, np.ndarray]]]:
+        """NF paga em TOTAL_PARCELAS boletos mensais; a última absorve o arredondamento."""
+        conta = self.rng.integers(0, len(self.contas), n)
+        fornecedor = self.rng.integers(0, len(FORNECEDORES), n)
+        numero_nf = self.rng.integers(1000, 9999, n)
+        total = self._valores(n, 30000)
+        data_documento = self._datas(n)
+        documentos = self._documentos(total, data_documento, conta, fornecedor, numero_nf)
+
+        parcela = total // TOTAL_PARCELAS
+        valores = np.repeat(parcela, TOTAL_PARCELAS).reshape(n, TOTAL_PARCELAS)
+        valores[:, -1] = total - parcela * (TOTAL_PARCELAS - 1)
+        numero = np.tile(np.arange(1, TOTAL_PARCELAS + 1), n)
+        datas = np.repeat(data_documento, TOTAL_PARCELAS) + (30 * (numero - 1)).astype("timedelta64[D]")
+        repetir = lambda array: np.repeat(array, TOTAL_PARCELAS)  # noqa: E731
+
+        descricoes = _texto(
+            "BOLETO ", FORNECEDORES[repetir(fornecedor)], " PARC ", numero, f"/{TOTAL_PARCELAS} NF ", repetir(numero_nf)
+        )
+        transacoes = self._transacoes(valores.ravel(), datas, repetir(conta), descricoes)
+        transacoes["numero_parcela"] = numero
+        transacoes["total_parcelas"] = np.full(len(numero), TOTAL_PARCELAS)
+        return [{
+            "transacoes": transacoes,
+            "documentos": documentos,
+            "gabarito": self._gabarito(transacoes["id_transacao"], repetir(documentos["id_documento"]), "parcela"),
+        }]
+
+    def _caso_lote(self, n: int) -> List[Dict[str, Dict[str, np.ndarray]]]:
+        """Uma TED pagando DOCUMENTOS_POR_LOTE NFs do mesmo fornecedor."""
+        conta = self.rng.integers(0, len(self.contas), n)
+        fornecedor = self.rng.integers(0, len(FORNECEDORES), n)
+        data_pagamento = self._datas(n)
+        m = n * DOCUMENTOS_POR_LOTE
+        numero_nf = self.rng.integers(1000, 9999, m).reshape(n, DOCUMENTOS_POR_LOTE)
+        valores = self._valores(m).reshape(n, DOCUMENTOS_POR_LOTE)
+        repetir = lambda array: np.repeat(array, DOCUMENTOS_POR_LOTE)  # noqa: E731
+
+        data_documento = repetir(data_pagamento) - self.rng.integers(0, 10, m).astype("timedelta64[D]")
+        documentos = self._documentos(
+            valores.ravel(), data_documento, repetir(conta), repetir(fornecedor), numero_nf.ravel()
+        )
+        referencias = _texto(*[
+            parte for coluna in range(DOCUMENTOS_POR_LOTE) for parte in (" ", numero_nf[:, coluna])
+        ])
+        descricoes = _texto("TED PGTO LOTE ", FORNECEDORES[fornecedor], referencias)
+        transacoes = self._transacoes(valores.sum(axis=1), data_pagamento, conta, descricoes)
+        return [{
+            "transacoes": transacoes,
+            "documentos": documentos,
+            "gabarito": self._gabarito(repetir(transacoes["id_transacao"]), documentos["id_documento"], "lote"),
+        }]
+
+    def _caso_tarifa(self, n: int) -> List[Dict[str, Dict[str, np.ndarray]]]:
+        """Tarifas mensais por conta: valor fixo da conta, sem documento fiscal."""
+        conta = self.rng.integers(0, len(self.contas), n)
+        mes = self.rng.integers(0, max(1, self.dias // 30), n)
+        datas = self.data_inicial + (mes * 30 + 5).astype("timedelta64[D]")
+        descricoes = self.rng.choice(TARIFAS, n)
+        transacoes = self._transacoes(self.tarifa_centavos[conta], datas, conta, descricoes)
+        return [{
+            "transacoes": transacoes,
+            "documentos": {},
+            "gabarito": self._gabarito(transacoes["id_transacao"], np.full(n, ""), "tarifa"),
+        }]
+
+    def _nfs_abertas(self, n: int) -> Dict[str, np.ndarray]:
+        conta = self.rng.integers(0, len(self.contas), n)
+        fornecedor = self.rng.integers(0, len(FORNECEDORES), n)
+        return self._documentos(
+            self._valores(n), self._datas(n), conta, fornecedor, self.rng.integers(100000, 999999, n)
+        )
+
+    # === BLOCOS E SAÍDA ===
+
+    def gerar_bloco(self, casos: int) -> Dict[str, pd.DataFrame]:
+        """Gera um bloco de ``casos`` casos: DataFrames de transações, documentos e gabarito."""
+        tipos = list(self.distribuicao)
+        probabilidades = np.array([self.distribuicao[tipo] for tipo in tipos], dtype=float)
+        quantidades = self.rng.multinomial(casos, probabilidades / probabilidades.sum())
+
+        partes: List[Dict[str, Dict[str, np.ndarray]]] = []
+        for tipo, quantidade in zip(tipos, quantidades):
+            if quantidade == 0:
+                continue
+            if tipo == "parcela":
+                partes += self._caso_parcela(quantidade)
+            elif tipo == "lote":
+                partes += self._caso_lote(quantidade)
+            elif tipo == "tarifa":
+                partes += self._caso_tarifa(quantidade)
+            else:
+                partes += self._caso_simples(quantidade, tipo)
+
+        abertas = int(round(casos * self.fracao_nfs_abertas))
+        if abertas:
+            partes.append({"transacoes": {}, "documentos": self._nfs_abertas(abertas), "gabarito": {}})
+
+        bloco = {}
+        for nome in ("transacoes", "documentos", "gabarito"):
+            quadros = [pd.DataFrame(parte[nome]) for parte in partes if parte[nome]]
+            quadro = pd.concat(quadros, ignore_index=True) if quadros else pd.DataFrame()
+            if nome != "gabarito" and len(quadro):
+                # Extrato e pool em ordem aleatória (o gabarito liga pelos ids)
+                quadro = quadro.iloc[self.rng.permutation(len(quadro))].reset_index(drop=True)
+            quadro = quadro.reindex(columns=COLUNAS[nome])
+            for coluna in COLUNAS_INTEIRAS_ANULAVEIS:
+                if coluna in quadro:
+                    quadro[coluna] = quadro[coluna].astype("Int64")
+            bloco[nome] = quadro
+        return bloco
+
+    def gerar(self, casos: int, tamanho_bloco: int = 100000) -> Iterator[Dict[str, pd.DataFrame]]:
+        """Gera ``casos`` casos em blocos (memória limitada ao tamanho do bloco)."""
+        restantes = casos
+        while restantes > 0:
+            quantidade = min(tamanho_bloco, restantes)
+            yield self.gerar_bloco(quantidade)
+            restantes -= quantidade
+
+    def escrever(
+        self, pasta: str, casos: int, formato: str = "ndjson", tamanho_bloco: int = 100000
+    ) -> Dict[str, str]:
+        """
+        Grava transações, documentos e gabarito em streaming.
+
+        Args:
+            formato: "ndjson", "csv" ou "parquet" (parquet requer pyarrow;
+                um arquivo por bloco em subpastas)
+
+        Returns:
+            Caminho gravado para cada conjunto
+        """
+        if formato not in ("ndjson", "csv", "parquet"):
+            raise ValueError(f"Formato não suportado: {formato}")
+        os.makedirs(pasta, exist_ok=True)
+        extensao = {"ndjson": "ndjson", "csv": "csv", "parquet": "parquet"}[formato]
+        caminhos = {nome: os.path.join(pasta, f"{nome}.{extensao}") for nome in ("transacoes", "documentos", "gabarito")}
+
+        if formato != "parquet":
+            for caminho in caminhos.values():
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+        else:
+            # Partes de uma geração anterior (com mais blocos) não podem sobrar
+            for caminho in caminhos.values():
+                os.makedirs(caminho, exist_ok=True)
+                for parte in glob.glob(os.path.join(caminho, "parte_*.parquet")):
+                    os.remove(parte)
+
+        for numero, bloco in enumerate(self.gerar(casos, tamanho_bloco)):
+            for nome, quadro in bloco.items():
+                if quadro.empty:
+                    continue
+                if formato == "ndjson":
+                    linhas = quadro.to_json(orient="records", lines=True, force_ascii=False)
+                    with open(caminhos[nome], "a", encoding="utf-8") as f:
+                        f.write(linhas if linhas.endswith("\n") else linhas + "\n")
+                elif formato == "csv":
+                    quadro.to_csv(caminhos[nome], mode="a", header=not os.path.exists(caminhos[nome]), index=False)
+                else:
+                    quadro.to_parquet(os.path.join(caminhos[nome], f"parte_{numero:05d}.parquet"), index=False)
+        return caminhos
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gerador vetorizado de dados de conciliação em volume")
+    parser.add_argument("--casos", type=int, default=100000, help="Quantidade de casos (transações-base)")
+    parser.add_argument("--pasta", default="dados_volume", help="Pasta de saída")
+    parser.add_argument("--formato", choices=["ndjson", "csv", "parquet"], default="ndjson")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--contas", type=int, default=50, help="Quantidade de contas bancárias")
+    parser.add_argument("--tamanho-bloco", type=int, default=100000)
+    args = parser.parse_args()
+
+    gerador = GeradorVolumeConciliacao(semente=args.semente, contas=args.contas)
+    caminhos = gerador.escrever(args.pasta, args.casos, args.formato, args.tamanho_bloco)
+    for nome, caminho in caminhos.items():
+        print(f"{nome}: {caminho}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# tests/test_aho_corasick.py
+"""Testes do autômato de Aho-Corasick e da detecção de parceiros no workflow."""
+import random
+
+import pytest
+
+from agents.matching.aho_corasick import AutomatoAhoCorasick, AutomatoParceiros
+from agents.matching.trigramas import normalizar_texto
+from agents.workflow.nodes import calcular_matching_node, detectar_parceiro_node
+
+CADASTRO = {
+    "F001": ["XYZ INDUSTRIA SA", "XYZ"],
+    "F002": ["INDUSTRIA SA"],
+    "F003": ["ABC", "Comércio Brasil"],
+}
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_igual_a_busca_ingenua(semente):
+    gerador = random.Random(semente)
+    padroes = {"".join(gerador.choices("ab", k=gerador.randint(1, 4))) for _ in range(8)}
+    automato = AutomatoAhoCorasick()
+    for padrao in padroes:
+        automato.adicionar(padrao, padrao)
+    texto = "".join(gerador.choices("abc", k=200))
+
+    esperado = sorted(
+        (inicio, inicio + len(padrao), padrao)
+        for padrao in padroes for inicio in range(len(texto)) if texto.startswith(padrao, inicio)
+    )
+    assert sorted(automato.buscar(texto)) == esperado
+
+
+def test_padrao_invalido_e_automato_construido():
+    automato = AutomatoAhoCorasick()
+    with pytest.raises(ValueError):
+        automato.adicionar("", 1)
+    automato.adicionar("he", 1)
+    automato.construir()
+    with pytest.raises(RuntimeError):
+        automato.adicionar("she", 2)
+
+
+def test_limite_de_palavra():
+    automato = AutomatoParceiros(CADASTRO)
+    for descricao in ("PIX ABCD LTDA", "PIX XABC", "TED XYZW", "PGTO 123ABC"):
+        assert automato.detectar(descricao) == [], descricao
+    assert automato.resolver("PIX ABC 1234") == "F003"
+    assert automato.resolver("PIX, ABC.") == "F003"
+
+
+def test_apelidos_sobrepostos():
+    automato = AutomatoParceiros(CADASTRO)
+    descricao = "PGTO NF 55 XYZ INDUSTRIA SA"
+    ocorrencias = automato.detectar(descricao)
+    assert {(ocorrencia.parceiro_id, ocorrencia.alias) for ocorrencia in ocorrencias} == {
+        ("F001", "XYZ"), ("F001", "XYZ INDUSTRIA SA"), ("F002", "INDUSTRIA SA")
+    }
+    texto = normalizar_texto(descricao)
+    assert all(texto[ocorrencia.inicio:ocorrencia.fim] == ocorrencia.alias for ocorrencia in ocorrencias)
+    # A ocorrência mais longa (mais específica) decide
+    assert automato.resolver(descricao) == "F001"
+
+
+def test_apelidos_adjacentes_compartilham_o_espaco():
+    automato = AutomatoParceiros({"A": ["ABC DEF"], "B": ["DEF GHI"]})
+    assert [ocorrencia.parceiro_id for ocorrencia in automato.detectar("ABC DEF GHI")] == ["A", "B"]
+
+
+def test_normalizacao_e_id_por_nome():
+    automato = AutomatoParceiros(CADASTRO)
+    assert automato.resolver("pix recebido comercio-brasil") == "F003"
+    assert automato.id_por_nome("Comércio Brasil") == "F003"
+    assert automato.id_por_nome("COMERCIO") is None
+    # Apelido repetido fica com o primeiro parceiro
+    assert len(AutomatoParceiros({"A": ["ABC"], "B": ["abc"]})) == 1
+
+
+def _estado(descricao, automato, tipo="normal"):
+    return {
+        "transacao_bancaria": {"valor_transacao": -1500.0, "data_transacao": "2025-03-10",
+                               "descricao_transacao": descricao},
+        "classificacao_disponivel": {"valor_total": 1500.0, "data_documento": "2025-03-10",
+                                     "parceiro_nome": "XYZ Indústria SA", "numero_documento": "NF-e 55"},
+        "tipo_transacao": tipo,
+        "criterios_config": {"automato_parceiros": automato},
+    }
+
+
+def test_detectar_parceiro_node():
+    automato = AutomatoParceiros(CADASTRO)
+    estado = detectar_parceiro_node(_estado("PGTO XYZ INDUSTRIA SA NF 55", automato))
+    assert estado["transacao_bancaria"]["parceiro_id"] == "F001"
+    assert estado["transacao_bancaria"]["parceiros_detectados"] == ["F001", "F002"]
+
+    # O parceiro detectado compõe o score de descrição
+    matching = calcular_matching_node(estado)["matching_info"]
+    assert matching["scores_detalhados"]["parceiro_detectado"] == 1.0
+    assert matching["scores_detalhados"]["descricao"] == 1.0
+
+    # Tarifa e descrição sem parceiro não alteram a transação
+    for estado_original in (_estado("TARIFA XYZ", automato, "taxa_bancaria"), _estado("PIX 123", automato)):
+        transacao = estado_original["transacao_bancaria"]
+        assert detectar_parceiro_node(estado_original)["transacao_bancaria"] is transacao
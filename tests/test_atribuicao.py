@@ -0,0 +1,67 @@
+# tests/test_atribuicao.py
+"""Testes da atribuição 1:1 (húngaro esparso) contra força bruta em grafos pequenos."""
+import random
+from typing import Dict, List
+
+import pytest
+
+from agents.matching.atribuicao import Aresta, atribuir, componentes_conexos
+
+
+def _forca_bruta(arestas: List[Aresta]) -> float:
+    """Maior soma de scores de um emparelhamento (enumeração exaustiva)."""
+    por_transacao: Dict[str, List[Aresta]] = {}
+    for aresta in arestas:
+        por_transacao.setdefault(aresta[0], []).append(aresta)
+    transacoes = list(por_transacao)
+
+    def melhor(posicao: int, usados: frozenset) -> float:
+        if posicao == len(transacoes):
+            return 0.0
+        resultado = melhor(posicao + 1, usados)  # transação sem documento
+        for _, documento, score in por_transacao[transacoes[posicao]]:
+            if documento not in usados:
+                resultado = max(resultado, score + melhor(posicao + 1, usados | {documento}))
+        return resultado
+
+    return melhor(0, frozenset())
+
+
+def _grafo(gerador: random.Random) -> List[Aresta]:
+    n_transacoes, n_documentos = gerador.randint(1, 6), gerador.randint(1, 6)
+    densidade = gerador.uniform(0.2, 1.0)
+    return [
+        (f"t{t}", f"d{d}", round(gerador.uniform(0.0, 1.0), 3))
+        for t in range(n_transacoes) for d in range(n_documentos)
+        if gerador.random() < densidade
+    ]
+
+
+@pytest.mark.parametrize("semente", range(300))
+def test_otimo_igual_forca_bruta(semente):
+    arestas = _grafo(random.Random(semente))
+    atribuicao = atribuir(arestas)
+
+    # Emparelhamento válido: arestas existentes e um documento por transação
+    scores = {(t, d): s for t, d, s in arestas}
+    documentos = [documento for documento, _ in atribuicao.values()]
+    assert len(documentos) == len(set(documentos))
+    for transacao, (documento, score) in atribuicao.items():
+        assert scores[(transacao, documento)] == score
+
+    total = sum(score for _, score in atribuicao.values())
+    assert total == pytest.approx(_forca_bruta(arestas))
+
+
+def test_score_minimo_descarta_arestas():
+    arestas = [("t1", "d1", 0.9), ("t1", "d2", 0.4), ("t2", "d1", 0.95), ("t2", "d2", 0.3)]
+    # Sem limite: 0,9 + 0,3 < 0,95 + 0,4
+    assert atribuir(arestas) == {"t1": ("d2", 0.4), "t2": ("d1", 0.95)}
+    # Com limite 0,5 só resta disputar d1
+    assert atribuir(arestas, score_minimo=0.5) == {"t2": ("d1", 0.95)}
+
+
+def test_componentes_conexos():
+    arestas = [("t1", "d1", 1.0), ("t2", "d1", 1.0), ("t3", "d3", 1.0)]
+    componentes = sorted(componentes_conexos(arestas), key=len)
+    assert [len(componente) for componente in componentes] == [1, 2]
@@ -0,0 +1,136 @@
+# tests/test_checkpoint.py
+"""Retomada da ExecucaoComCheckpoint: cada linha de entrada sai exatamente uma vez."""
+import json
+import multiprocessing
+import os
+import signal
+import time
+
+import pytest
+
+from agents.execucao import checkpoint as modulo_checkpoint
+from agents.execucao.checkpoint import ExecucaoComCheckpoint
+
+TOTAL = 53
+
+
+def _eco(estados):
+    return [{"valor": estado["transacao_bancaria"]["valor_transacao"]} for estado in estados]
+
+
+def _eco_lento(estados):
+    time.sleep(0.02)
+    return _eco(estados)
+
+
+@pytest.fixture
+def entrada(tmp_path):
+    caminho = tmp_path / "entrada.ndjson"
+    with open(caminho, "w", encoding="utf-8") as f:
+        for i in range(TOTAL):
+            f.write(json.dumps({"valor_transacao": i, "descricao_transacao": f"PIX {i}"}) + "\n")
+    return str(caminho)
+
+
+def _linhas_resultado(diretorio):
+    with open(os.path.join(diretorio, "resultados.ndjson"), "r", encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f]
+
+
+def _verificar_exatamente_uma_vez(diretorio):
+    resultados = _linhas_resultado(diretorio)
+    assert [resultado["linha"] for resultado in resultados] == list(range(TOTAL))
+    assert [resultado["resultado"]["valor"] for resultado in resultados] == list(range(TOTAL))
+
+
+def test_falha_entre_resultados_e_checkpoint_nao_duplica(tmp_path, entrada, monkeypatch):
+    diretorio = str(tmp_path / "job")
+    gravar = modulo_checkpoint._gravar_atomico
+    chamadas = {"n": 0}
+
+    def gravar_e_falhar(caminho, conteudo):
+        chamadas["n"] += 1
+        if chamadas["n"] == 3:
+            # Resultados do bloco já estão no disco; o checkpoint não
+            raise KeyboardInterrupt
+        gravar(caminho, conteudo)
+
+    monkeypatch.setattr(modulo_checkpoint, "_gravar_atomico", gravar_e_falhar)
+    with pytest.raises(KeyboardInterrupt):
+        ExecucaoComCheckpoint(diretorio, intervalo=10, processar_bloco=_eco).executar(entrada)
+    monkeypatch.setattr(modulo_checkpoint, "_gravar_atomico", gravar)
+
+    resumo = ExecucaoComCheckpoint(diretorio, intervalo=10, processar_bloco=_eco).executar(entrada)
+    assert resumo["retomado_de"] == 20
+    assert resumo["concluido"]
+    _verificar_exatamente_uma_vez(diretorio)
+
+
+def test_max_linhas_e_retomada_em_varias_chamadas(tmp_path, entrada):
+    diretorio = str(tmp_path / "job")
+    while not ExecucaoComCheckpoint(diretorio, intervalo=7, processar_bloco=_eco).executar(entrada, max_linhas=9)["concluido"]:
+        pass
+    _verificar_exatamente_uma_vez(diretorio)
+
+
+def _executar_job(diretorio, entrada):
+    ExecucaoComCheckpoint(diretorio, intervalo=5, processar_bloco=_eco_lento).executar(entrada)
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="requer SIGKILL")
+def test_processo_morto_no_meio_retoma_sem_perder_nem_duplicar(tmp_path, entrada):
+    diretorio = str(tmp_path / "job")
+    processo = multiprocessing.get_context("fork").Process(target=_executar_job, args=(diretorio, entrada))
+    processo.start()
+    caminho_checkpoint = os.path.join(diretorio, "checkpoint.json")
+    limite = time.monotonic() + 30
+    while not os.path.exists(caminho_checkpoint) and time.monotonic() < limite:
+        time.sleep(0.005)
+    time.sleep(0.03)
+    os.kill(processo.pid, signal.SIGKILL)
+    processo.join()
+
+    with open(caminho_checkpoint, "r", encoding="utf-8") as f:
+        assert not json.load(f)["concluido"]
+    ExecucaoComCheckpoint(diretorio, intervalo=5, processar_bloco=_eco).executar(entrada)
+    _verificar_exatamente_uma_vez(diretorio)
+
+
+def test_linha_malformada_gera_erro_e_o_job_avanca(tmp_path):
+    caminho = tmp_path / "entrada.ndjson"
+    caminho.write_text(
+        '{"valor_transacao": 1}\n{"valor_transacao": 2, "descr\n[1, 2]\n\n{"valor_transacao": 3}\n',
+        encoding="utf-8"
+    )
+    diretorio = str(tmp_path / "job")
+
+    resumo = ExecucaoComCheckpoint(diretorio, intervalo=2, processar_bloco=_eco).executar(str(caminho))
+    assert resumo["concluido"]
+    resultados = [linha["resultado"] for linha in _linhas_resultado(diretorio)]
+    assert resultados[0] == {"valor": 1}
+    assert resultados[1]["conciliacao"]["status"] == "Erro_Processamento"
+    assert resultados[2]["conciliacao"]["status"] == "Erro_Processamento"
+    assert resultados[3] is None
+    assert resultados[4] == {"valor": 3}
+
+    # Retomar depois de concluído não reprocessa a linha malformada
+    assert ExecucaoComCheckpoint(diretorio, processar_bloco=_eco).executar(str(caminho))["linhas_processadas"] == 0
+
+
+@pytest.mark.parametrize("perda", ["removido", "truncado"])
+def test_resultados_perdidos_nao_retomam(tmp_path, entrada, perda):
+    diretorio = str(tmp_path / "job")
+    ExecucaoComCheckpoint(diretorio, intervalo=10, processar_bloco=_eco).executar(entrada, max_linhas=20)
+    caminho = os.path.join(diretorio, "resultados.ndjson")
+    if perda == "removido":
+        os.remove(caminho)
+    else:
+        with open(caminho, "r+b") as f:
+            f.truncate(os.path.getsize(caminho) // 2)
+
+    with pytest.raises(ValueError, match="confirmados no checkpoint"):
+        ExecucaoComCheckpoint(diretorio, intervalo=10, processar_bloco=_eco).executar(entrada)
+    # Nada é preenchido com bytes nulos
+    if perda == "truncado":
+        with open(caminho, "rb") as f:
+            assert b"\x00" not in f.read()
@@ -0,0 +1,113 @@
+# tests/test_classificador_tipo.py
+"""Testes do classificador de tipo: escalar e lote iguais à cadeia if/elif original."""
+import json
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.conciliador_bancario import ConciliadorBancarioAgent
+from agents.matching.classificador_tipo import CLASSIFICADOR_PADRAO, REGRAS_TIPO_PADRAO, ClassificadorTipo
+from agents.matching.criterios import RegistroCriterios
+from agents.workflow.nodes import identificar_tipo_node
+
+
+def _tipo_original(descricao: str) -> str:
+    """Cadeia if/elif de identificar_tipo_node antes da tabela de regras."""
+    descricao = descricao.upper()
+    if any(palavra in descricao for palavra in ["TARIFA", "TAXA", "MANUTENCAO", "ANUIDADE"]):
+        return "taxa_bancaria"
+    elif "PARC" in descricao and "/" in descricao:
+        return "parcela"
+    elif "LIQ" in descricao or "LIQUIDO" in descricao:
+        return "com_retencoes"
+    elif "LOTE" in descricao and ("NFS" in descricao or "NOTAS" in descricao):
+        return "multiplos_documentos"
+    return "normal"
+
+
+_FRAGMENTOS = [
+    "TARIFA", "taxa", "MANUTENCAO", "anuidade", "PARC", "parcela", "/", "03/12", "LIQ", "liquido", "LOTE",
+    "nfs", "NOTAS", "PIX", "TED", "RECEBIMENTO", "PAGAMENTO", "NF", "12345", "FORNECEDOR", "LTDA", "-", "ção",
+    "TAXAS", "LIQUIDACAO", "\x00",
+]
+
+
+def _descricoes(semente: int, quantidade: int = 500):
+    gerador = random.Random(semente)
+    return [
+        gerador.choice(["", " "]).join(gerador.choices(_FRAGMENTOS, k=gerador.randint(0, 6)))
+        for _ in range(quantidade)
+    ]
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_escalar_igual_cadeia_original(semente):
+    for descricao in _descricoes(semente):
+        assert CLASSIFICADOR_PADRAO.classificar(descricao) == _tipo_original(descricao), descricao
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_lote_igual_cadeia_original(semente):
+    descricoes = _descricoes(semente)
+    esperado = [_tipo_original(descricao) for descricao in descricoes]
+    assert list(CLASSIFICADOR_PADRAO.classificar_lote(descricoes)) == esperado
+
+
+def test_lote_serie_com_ausentes():
+    serie = pd.Series(["TARIFA PACOTE", None, np.nan, "PIX PARC 2/3"], index=[10, 20, 30, 40])
+    resultado = CLASSIFICADOR_PADRAO.classificar_lote(serie)
+    assert list(resultado.index) == [10, 20, 30, 40]
+    assert list(resultado) == ["taxa_bancaria", "normal", "normal", "parcela"]
+
+
+def test_termos_sobrepostos_entre_grupos():
+    # "NOTA" está contido em "NOTAS": a alternância simples perderia ocorrências
+    classificador = ClassificadorTipo([
+        {"tipo": "lote_notas", "termos": [["NOTAS"], ["NOTA"]]},
+        {"tipo": "nota", "termos": [["NOTA"]]},
+    ])
+    descricoes = ["PGTO NOTAS", "PGTO NOTA 12", "PIX"]
+    esperado = ["lote_notas", "nota", "normal"]
+    assert [classificador.classificar(descricao) for descricao in descricoes] == esperado
+    assert list(classificador.classificar_lote(descricoes)) == esperado
+
+
+REGRAS_FOLHA = REGRAS_TIPO_PADRAO + [{"tipo": "folha", "termos": [["FOLHA", "SALARIO"]]}]
+
+
+def _tipo_no_workflow(criterios_config, descricao="PGTO FOLHA MARCO"):
+    estado = {"transacao_bancaria": {"descricao_transacao": descricao}, "criterios_config": criterios_config}
+    return identificar_tipo_node(estado)["tipo_transacao"]
+
+
+def test_lista_de_regras_via_update_config():
+    agente = ConciliadorBancarioAgent()
+    agente.update_config({"classificador_tipo": REGRAS_FOLHA})
+    assert isinstance(agente.criterios_config["classificador_tipo"], ClassificadorTipo)
+    assert _tipo_no_workflow(agente.criterios_config) == "folha"
+    assert _tipo_no_workflow({"classificador_tipo": REGRAS_FOLHA}) == "folha"
+    assert _tipo_no_workflow(agente.criterios_config, "TARIFA PACOTE") == "taxa_bancaria"
+
+
+def test_lista_de_regras_por_tenant_no_registro(tmp_path):
+    caminho = tmp_path / "criterios.json"
+    caminho.write_text(json.dumps({"tenants": {"empresa_a": {"classificador_tipo": REGRAS_FOLHA}}}), encoding="utf-8")
+    registro = RegistroCriterios(str(caminho))
+
+    assert _tipo_no_workflow(registro.obter(tenant="empresa_a")) == "folha"
+    assert _tipo_no_workflow(registro.obter(tenant="outro")) == "normal"
+
+    agente = ConciliadorBancarioAgent(registro=registro)
+    estado = {"tenant": "empresa_a", "transacao_bancaria": {
+        "valor_transacao": -100.0, "descricao_transacao": "PGTO FOLHA MARCO", "data_transacao": "2025-01-15"
+    }}
+    assert agente.conciliar(estado)["conciliacao"]["status"] != "Erro_Processamento"
+
+
+def test_regras_malformadas_rejeitadas():
+    with pytest.raises(ValueError):
+        ClassificadorTipo.de_regras([{"tipo": "folha", "termos": ["FOLHA"]}])
+    with pytest.raises(ValueError):
+        ConciliadorBancarioAgent().update_config({"classificador_tipo": "FOLHA"})
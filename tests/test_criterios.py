@@ -0,0 +1,134 @@
+# tests/test_criterios.py
+"""Recarga a quente do RegistroCriterios: arquivo inválido mantém a versão anterior."""
+import json
+import os
+import warnings
+
+import pytest
+
+from agents.conciliador_bancario import ConciliadorBancarioAgent
+from agents.matching.classificador_tipo import ClassificadorTipo
+from agents.matching.criterios import CriteriosConciliacao, RegistroCriterios
+
+ESTADO = {
+    "transacao_bancaria": {
+        "valor_transacao": 100.0,
+        "descricao_transacao": "PIX RECEBIDO ABC COMERCIO",
+        "data_transacao": "2025-01-15",
+        "conta_bancaria": "341-12345-6",
+    }
+}
+
+INVALIDOS = [
+    {"padrao": {"janela_data_dias": None}},
+    [],
+    {"padrao": "x"},
+    {"tenants": []},
+    {"contas": {"341-12345-6": 3}},
+    {"padrao": {"score_minimo": "0.7"}},
+    {"padrao": {"score_minimo": 1.5}},
+    {"padrao": {"palavras_irrelevantes": 5}},
+    # Chaves desconhecidas (nome digitado errado) e extensões malformadas
+    {"padrao": {"score_minim": 0.9}},
+    {"padrao": {"indice_parceiros": {}}},
+    {"tenant": {"empresa_a": {}}},
+    {"contas": {"341-12345-6": {"tenant": "inexistente"}}},
+    {"tenants": {"empresa_a": {"classificador_tipo": "TARIFA"}}},
+    {"tenants": {"empresa_a": {"classificador_tipo": [{"tipo": "folha", "termos": ["FOLHA"]}]}}},
+    {"padrao": {"classificador_tipo": []}},
+]
+
+
+def _gravar(caminho, dados, versao_arquivo):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f)
+    # mtime distinto a cada gravação, independente da resolução do sistema de arquivos
+    os.utime(caminho, ns=(versao_arquivo * 10**9, versao_arquivo * 10**9))
+
+
+@pytest.fixture
+def registro(tmp_path):
+    caminho = str(tmp_path / "criterios.json")
+    _gravar(caminho, {"padrao": {"score_minimo": 0.7}}, 1)
+    return RegistroCriterios(caminho)
+
+
+def test_arquivo_valido_publica_nova_versao(registro):
+    versao = registro.versao
+    _gravar(registro.caminho, {"padrao": {"score_minimo": 0.8}, "contas": {"1": {"janela_data_dias": 3}}}, 2)
+
+    assert registro.recarregar_se_alterado()
+    assert registro.versao == versao + 1
+    assert registro.obter().score_minimo == 0.8
+    assert registro.obter(conta="1").janela_data_dias == 3
+    assert not registro.recarregar_se_alterado()
+
+
+@pytest.mark.parametrize("dados", INVALIDOS)
+def test_arquivo_invalido_mantem_versao_anterior(registro, dados):
+    versao = registro.versao
+    _gravar(registro.caminho, dados, 2)
+
+    with pytest.raises(ValueError):
+        registro.recarregar_se_alterado()
+    # Mesmo arquivo: não tenta de novo
+    assert not registro.recarregar_se_alterado()
+    assert registro.versao == versao
+    assert registro.obter().score_minimo == 0.7
+
+
+@pytest.mark.parametrize("dados", INVALIDOS)
+def test_agente_avisa_uma_vez_e_continua_conciliando(registro, dados):
+    agente = ConciliadorBancarioAgent(registro=registro)
+    versao = registro.versao
+    _gravar(registro.caminho, dados, 2)
+
+    with warnings.catch_warnings(record=True) as avisos:
+        warnings.simplefilter("always")
+        resultados = [agente.conciliar(ESTADO) for _ in range(3)]
+
+    assert len([aviso for aviso in avisos if issubclass(aviso.category, RuntimeWarning)]) == 1
+    assert all(resultado["conciliacao"]["status"] != "Erro_Processamento" for resultado in resultados)
+    assert registro.versao == versao
+
+    _gravar(registro.caminho, {"padrao": {"score_minimo": 0.9}}, 3)
+    agente.conciliar(ESTADO)
+    assert registro.versao == versao + 1
+    assert registro.obter().score_minimo == 0.9
+
+
+@pytest.mark.parametrize("campo, valor", [
+    ("janela_data_dias", None),
+    ("janela_data_dias", 0),
+    ("janela_data_dias", 2.5),
+    ("tolerancia_valor_absoluta", float("inf")),
+    ("tolerancia_valor_percentual", True),
+])
+def test_criterios_rejeitam_tipos_invalidos_com_value_error(campo, valor):
+    with pytest.raises(ValueError):
+        CriteriosConciliacao(**{campo: valor})
+
+
+def test_chave_digitada_errada_nao_publica_versao(registro):
+    _gravar(registro.caminho, {"padrao": {"score_minim": 0.9}}, 2)
+    with pytest.raises(ValueError, match="score_minim"):
+        registro.recarregar_se_alterado()
+    assert registro.obter().score_minimo == 0.7
+
+
+def test_regras_de_tipo_do_arquivo_sao_compiladas(registro):
+    regras = [{"tipo": "folha", "termos": [["FOLHA", "SALARIO"]]}]
+    _gravar(registro.caminho, {
+        "tenants": {"empresa_a": {"classificador_tipo": regras}},
+        "contas": {"341-12345-6": {"tenant": "empresa_a"}},
+    }, 2)
+
+    assert registro.recarregar_se_alterado()
+    classificador = registro.obter(conta="341-12345-6")["classificador_tipo"]
+    assert isinstance(classificador, ClassificadorTipo)
+    assert classificador.classificar("PGTO FOLHA MARCO") == "folha"
+    assert "classificador_tipo" not in registro.obter()
+
+    agente = ConciliadorBancarioAgent(registro=registro)
+    resultado = agente.conciliar(ESTADO)
+    assert resultado["conciliacao"]["status"] != "Erro_Processamento"
@@ -0,0 +1,29 @@
+# tests/test_gerador_dados_volume.py
+"""Testes da gravação em streaming do gerador de volume (colunas fixas por bloco)."""
+import os
+
+import pandas as pd
+import pytest
+
+from gerador_dados_volume import COLUNAS, GeradorVolumeConciliacao
+
+
+def test_csv_em_blocos_legivel(tmp_path):
+    # Blocos pequenos: alguns têm parcelas, outros não
+    caminhos = GeradorVolumeConciliacao(semente=3).escrever(str(tmp_path), casos=50, formato="csv", tamanho_bloco=5)
+    transacoes = pd.read_csv(caminhos["transacoes"], dtype={"numero_parcela": "Int64", "total_parcelas": "Int64"})
+    assert list(transacoes.columns) == COLUNAS["transacoes"]
+    assert transacoes["id_transacao"].str.startswith("T").all()
+    parcelas = transacoes.dropna(subset=["numero_parcela"])
+    assert len(parcelas) and parcelas["descricao_transacao"].str.contains(" PARC ").all()
+    assert set(parcelas["total_parcelas"]) == {3}
+    assert list(pd.read_csv(caminhos["documentos"]).columns) == COLUNAS["documentos"]
+
+
+def test_parquet_regravado_sem_partes_antigas(tmp_path):
+    pytest.importorskip("pyarrow")
+    gerador = GeradorVolumeConciliacao(semente=3)
+    gerador.escrever(str(tmp_path), casos=30, formato="parquet", tamanho_bloco=10)
+    caminhos = gerador.escrever(str(tmp_path), casos=10, formato="parquet", tamanho_bloco=10)
+    assert sorted(os.listdir(caminhos["transacoes"])) == ["parte_00000.parquet"]
+    assert list(pd.read_parquet(caminhos["transacoes"]).columns) == COLUNAS["transacoes"]
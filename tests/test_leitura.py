@@ -0,0 +1,61 @@
+# tests/test_leitura.py
+"""Testes da carga do pool a partir do CSV do ERP (blocos e valores inválidos)."""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.dados.leitura import BlocoDocumentos, carregar_pool, ler_documentos
+from agents.dados.pool_documentos import PoolDocumentos
+
+
+def _csv_erp(caminho, quantidade=600, semente=3):
+    gerador = random.Random(semente)
+    linhas = []
+    for numero in range(quantidade):
+        valor = f"{gerador.uniform(-500, 90000):.2f}".replace(".", ",")
+        linhas.append({
+            "VL_TOTAL": gerador.choice([valor, valor, valor, "", "abc"]),
+            "data_documento": f"{gerador.randint(1, 28):02d}/0{gerador.randint(1, 9)}/2025",
+            "numero_documento": f"NF-e {numero}",
+            "parceiro_nome": gerador.choice(["ALFA LTDA", "AÇÃO SERVIÇOS", ""]),
+            "irrf": gerador.choice(["", "15,00"]),
+        })
+    pd.DataFrame(linhas).to_csv(caminho, sep=";", index=False)
+    return linhas
+
+
+def test_pool_em_blocos_igual_ao_concatenado(tmp_path):
+    caminho = str(tmp_path / "nfs.csv")
+    _csv_erp(caminho)
+    opcoes = {"renomear": {"VL_TOTAL": "valor_total"}, "tamanho_bloco": 70}
+
+    with pytest.warns(RuntimeWarning):
+        pool = carregar_pool(caminho, str(tmp_path / "pool"), **opcoes)
+    bloco = BlocoDocumentos.concatenar(list(ler_documentos(caminho, **opcoes)))
+    esperado = PoolDocumentos.escrever_colunas(
+        str(tmp_path / "referencia"), bloco.valor_centavos, bloco.data_dias, bloco.textos
+    )
+    colunas, colunas_esperadas = pool.colunas(), esperado.colunas()
+    assert colunas.keys() == colunas_esperadas.keys()
+    for nome in colunas_esperadas:
+        assert np.array_equal(colunas[nome], colunas_esperadas[nome]), nome
+    assert pool[0] == esperado[0]
+
+
+def test_valor_ilegivel_descartado_e_informado(tmp_path):
+    caminho = str(tmp_path / "nfs.csv")
+    linhas = _csv_erp(caminho)
+    invalidas = [posicao for posicao, linha in enumerate(linhas) if linha["VL_TOTAL"] in ("", "abc")]
+
+    with pytest.warns(RuntimeWarning, match=f"{len(invalidas)} documento"):
+        pool = carregar_pool(caminho, str(tmp_path / "pool"), renomear={"VL_TOTAL": "valor_total"}, tamanho_bloco=70)
+    assert len(pool) == len(linhas) - len(invalidas)
+    assert pool.meta["descartados"] == len(invalidas)
+    # Nenhum valor zero inventado para as linhas descartadas
+    numeros = {linha["numero_documento"] for posicao, linha in enumerate(linhas) if posicao not in invalidas}
+    assert {pool.texto("numero_documento", linha) for linha in range(len(pool))} == numeros
+
+    blocos = list(ler_documentos(caminho, renomear={"VL_TOTAL": "valor_total"}, tamanho_bloco=70))
+    assert BlocoDocumentos.concatenar(blocos).descartadas.tolist() == invalidas
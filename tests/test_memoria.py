@@ -0,0 +1,135 @@
+# tests/test_memoria.py
+"""Testes da MemoriaConciliacoes: consulta no workflow, validade, LRU, contadores e persistência."""
+from agents.matching.memoria import MemoriaConciliacoes
+from agents.workflow.nodes import detectar_parceiro_node
+
+DIA = 86400
+
+
+def _memoria(**opcoes):
+    relogio = {"agora": 0.0}
+    memoria = MemoriaConciliacoes(relogio=lambda: relogio["agora"], **opcoes)
+    return memoria, relogio
+
+
+def _registrar(memoria, quantidade):
+    for numero in range(quantidade):
+        memoria.registrar(
+            {"descricao_transacao": f"ALUGUEL SALA {chr(65 + numero)}X", "conta_bancaria": "001"},
+            {"parceiro_nome": f"Imobiliaria {numero}"}
+        )
+
+
+def test_carregar_usa_validade_gravada(tmp_path):
+    caminho = str(tmp_path / "memoria.json")
+    memoria, _ = _memoria(validade_dias=7)
+    _registrar(memoria, 1)
+    memoria.salvar(caminho)
+
+    assert MemoriaConciliacoes.carregar(caminho).validade_dias == 7
+    assert MemoriaConciliacoes.carregar(caminho, validade_dias=30).validade_dias == 30
+
+
+def test_carregar_conta_descartadas(tmp_path):
+    caminho = str(tmp_path / "memoria.json")
+    memoria, _ = _memoria()
+    _registrar(memoria, 5)
+    memoria.salvar(caminho)
+
+    carregada = MemoriaConciliacoes.carregar(caminho, capacidade=3, relogio=lambda: 0.0)
+    assert len(carregada) == 3
+    assert carregada.estatisticas()["descartadas"] == 2
+    # Ficam as mais recentes
+    assert carregada.consultar({"descricao_transacao": "ALUGUEL SALA EX", "conta_bancaria": "001"}) is not None
+    assert carregada.consultar({"descricao_transacao": "ALUGUEL SALA AX", "conta_bancaria": "001"}) is None
+
+
+def test_carregar_arquivo_inexistente(tmp_path):
+    memoria = MemoriaConciliacoes.carregar(str(tmp_path / "nao_existe.json"), validade_dias=10)
+    assert len(memoria) == 0
+    assert memoria.validade_dias == 10
+
+
+def _transacao(letra):
+    return {"descricao_transacao": f"ALUGUEL SALA {letra}X", "conta_bancaria": "001"}
+
+
+class _AutomatoContado:
+    """Autômato que só conta as chamadas (a memória deve resolver antes dele)."""
+
+    def __init__(self):
+        self.chamadas = 0
+
+    def detectar(self, descricao):
+        self.chamadas += 1
+        return []
+
+
+def test_acerto_no_workflow_dispensa_automato():
+    memoria, _ = _memoria()
+    memoria.registrar(
+        {"descricao_transacao": "PIX ALUGUEL SALA 03/2025", "conta_bancaria": "001"},
+        {"parceiro_nome": "Imobiliária Central", "parceiro_id": "P7"}
+    )
+    automato = _AutomatoContado()
+    estado = detectar_parceiro_node({
+        "transacao_bancaria": {"descricao_transacao": "PIX ALUGUEL SALA 04/2025", "conta_bancaria": "001"},
+        "criterios_config": {"memoria_conciliacoes": memoria, "automato_parceiros": automato},
+    })
+    assert estado["transacao_bancaria"]["parceiro_memoria"] == "IMOBILIARIA CENTRAL"
+    assert estado["transacao_bancaria"]["parceiro_id"] == "P7"
+    assert automato.chamadas == 0
+
+    # Sem acerto (outra conta), o autômato é consultado
+    estado = detectar_parceiro_node({
+        "transacao_bancaria": {"descricao_transacao": "PIX ALUGUEL SALA 04/2025", "conta_bancaria": "002"},
+        "criterios_config": {"memoria_conciliacoes": memoria, "automato_parceiros": automato},
+    })
+    assert "parceiro_memoria" not in estado["transacao_bancaria"]
+    assert automato.chamadas == 1
+
+
+def test_validade_expira_na_consulta_e_confirmacao_renova():
+    memoria, relogio = _memoria(validade_dias=30)
+    _registrar(memoria, 2)
+
+    relogio["agora"] = 20 * DIA
+    memoria.registrar(_transacao("B"), {"parceiro_nome": "Imobiliaria 1"})
+    assert memoria.registrar(_transacao("B"), {"parceiro_nome": "Imobiliaria 1"}).confirmacoes == 3
+
+    relogio["agora"] = 31 * DIA
+    assert memoria.consultar(_transacao("A")) is None
+    assert memoria.consultar(_transacao("B")).parceiro_nome == "IMOBILIARIA 1"
+    assert memoria.estatisticas()["expiradas"] == 1
+    assert len(memoria) == 1
+
+    relogio["agora"] = 51 * DIA
+    assert memoria.remover_vencidas() == 1
+    assert len(memoria) == 0
+
+
+def test_lru_descarta_a_usada_ha_mais_tempo():
+    memoria, _ = _memoria(capacidade=2)
+    _registrar(memoria, 2)
+    # Consultar "A" a torna a mais recente: o próximo registro descarta "B"
+    assert memoria.consultar(_transacao("A")) is not None
+    memoria.registrar(_transacao("C"), {"parceiro_nome": "Imobiliaria 2"})
+
+    assert memoria.estatisticas()["descartadas"] == 1
+    assert memoria.consultar(_transacao("B")) is None
+    assert memoria.consultar(_transacao("A")) is not None
+    assert memoria.consultar(_transacao("C")) is not None
+
+
+def test_taxa_acerto():
+    memoria, _ = _memoria()
+    assert memoria.taxa_acerto == 0.0
+    _registrar(memoria, 1)
+    for letra in ("A", "A", "A", "Z"):
+        memoria.consultar(_transacao(letra))
+    # Descrição sem termos estáveis também conta como falha
+    memoria.consultar({"descricao_transacao": "PIX 123", "conta_bancaria": "001"})
+
+    estatisticas = memoria.estatisticas()
+    assert (estatisticas["acertos"], estatisticas["falhas"]) == (3, 2)
+    assert estatisticas["taxa_acerto"] == memoria.taxa_acerto == 3 / 5
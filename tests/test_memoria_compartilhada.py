@@ -0,0 +1,43 @@
+# tests/test_memoria_compartilhada.py
+"""Testes do ConciliadorMemoriaCompartilhada: mesmos resultados de conciliar_particao."""
+import numpy as np
+import pytest
+
+from agents.execucao.memoria_compartilhada import ConciliadorMemoriaCompartilhada, registros
+from agents.execucao.particionamento import ConciliadorParticionado
+from gerador_dados_volume import GeradorVolumeConciliacao
+
+
+@pytest.fixture(scope="module")
+def dados():
+    bloco = GeradorVolumeConciliacao(semente=7).gerar_bloco(120)
+    return registros(bloco["transacoes"]), registros(bloco["documentos"])
+
+
+@pytest.mark.parametrize("atribuicao_otima", [False, True])
+@pytest.mark.parametrize("max_processos", [1, 2])
+def test_igual_conciliar_particao(dados, atribuicao_otima, max_processos):
+    transacoes, documentos = dados
+    esperados = ConciliadorParticionado(compacto=True, max_processos=1, atribuicao_otima=atribuicao_otima).conciliar(
+        transacoes, documentos
+    )
+    quadro = ConciliadorMemoriaCompartilhada(
+        max_processos=max_processos, tamanho_faixa=40, atribuicao_otima=atribuicao_otima
+    ).conciliar(transacoes, documentos)
+
+    assert list(quadro["status"]) == [esperado.status.value for esperado in esperados]
+    assert np.allclose(quadro["score_confianca"], [esperado.score_confianca for esperado in esperados], atol=1e-6)
+    assert list(quadro["conciliado"]) == [esperado.conciliado for esperado in esperados]
+    assert list(quadro["needs_human_review"]) == [esperado.needs_human_review for esperado in esperados]
+    escolhidos = [documentos[indice]["numero_documento"] if indice >= 0 else None for indice in quadro["documento"]]
+    assert escolhidos == [esperado.documento_origem for esperado in esperados]
+
+
+def test_documentos_da_mesma_conta_e_sem_repeticao(dados):
+    transacoes, documentos = dados
+    quadro = ConciliadorMemoriaCompartilhada(max_processos=1, atribuicao_otima=True).conciliar(transacoes, documentos)
+    escolhidos = quadro["documento"][quadro["documento"] >= 0]
+    assert len(escolhidos) == len(set(escolhidos))
+    for posicao, indice in quadro["documento"].items():
+        if indice >= 0:
+            assert documentos[indice]["conta_bancaria"] == transacoes[posicao]["conta_bancaria"]
@@ -0,0 +1,107 @@
+# tests/test_particionamento.py
+"""Testes do particionamento (chaves de documentos) e das travas do diretório compartilhado."""
+import json
+import multiprocessing
+import os
+import socket
+import time
+
+import pytest
+
+from agents.execucao.particionamento import ConciliadorParticionado, _reivindicar, particionar
+
+TRANSACOES = [
+    {"id_transacao": "T1", "data_transacao": "2025-03-10", "valor_transacao": -1500.0,
+     "descricao_transacao": "PIX ENVIADO ALFA LTDA", "conta_bancaria": "001"},
+    {"id_transacao": "T2", "data_transacao": "2025-03-11", "valor_transacao": -320.0,
+     "descricao_transacao": "TED BETA SERVICOS", "conta_bancaria": "002"},
+]
+DOCUMENTOS = [
+    {"id_documento": "D1", "data_documento": "2025-03-09", "valor_total": 1500.0,
+     "parceiro_nome": "ALFA LTDA", "conta_bancaria": "001"},
+    {"id_documento": "D2", "data_documento": "2025-03-11", "valor_total": 320.0,
+     "parceiro_nome": "BETA SERVICOS", "conta_bancaria": "002"},
+]
+
+
+def _pid_morto() -> int:
+    processo = multiprocessing.Process(target=int)
+    processo.start()
+    processo.join()
+    return processo.pid
+
+
+def _gravar_trava(caminho, pid, criada_em, host=None):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({"host": host or socket.gethostname(), "pid": pid, "criada_em": criada_em}, f)
+
+
+def test_trava_registra_dono(tmp_path):
+    caminho = str(tmp_path / ".trava")
+    assert _reivindicar(caminho, 60)
+    with open(caminho, encoding="utf-8") as f:
+        dono = json.load(f)
+    assert dono["pid"] == os.getpid() and dono["host"] == socket.gethostname()
+    assert abs(dono["criada_em"] - time.time()) < 60
+    # Trava viva (deste processo) não é assumida
+    assert not _reivindicar(caminho, 60)
+
+
+def test_assume_trava_de_processo_morto(tmp_path):
+    caminho = str(tmp_path / ".trava")
+    _gravar_trava(caminho, _pid_morto(), time.time())
+    assert _reivindicar(caminho, 3600)
+    with open(caminho, encoding="utf-8") as f:
+        assert json.load(f)["pid"] == os.getpid()
+    assert os.listdir(tmp_path) == [".trava"]
+
+
+def test_assume_trava_vencida_de_outro_host(tmp_path):
+    caminho = str(tmp_path / ".trava")
+    _gravar_trava(caminho, 1, time.time() - 7200, host="outro-host")
+    assert _reivindicar(caminho, 3600)
+
+    _gravar_trava(caminho, 1, time.time(), host="outro-host")
+    assert not _reivindicar(caminho, 3600)
+
+
+def test_processar_diretorio_retoma_particao_abandonada(tmp_path):
+    diretorio = str(tmp_path)
+    particionado = ConciliadorParticionado()
+    nomes = particionado.preparar_diretorio(diretorio, TRANSACOES, DOCUMENTOS)
+    _gravar_trava(os.path.join(diretorio, nomes[0], ".trava"), _pid_morto(), time.time())
+
+    assert particionado.processar_diretorio(diretorio) == len(nomes)
+    resultados = particionado.mesclar_diretorio(diretorio)
+    assert [resultado["transacao_bancaria"]["id_transacao"] for resultado in resultados] == ["T1", "T2"]
+
+
+# Documentos no formato de tests/test_data_generator.py e tests/exemplos: sem conta_bancaria
+DOCUMENTOS_SEM_CONTA = [
+    {campo: valor for campo, valor in documento.items() if campo != "conta_bancaria"} for documento in DOCUMENTOS
+]
+CONTA_POR_PARCEIRO = {"ALFA LTDA": "001", "BETA SERVICOS": "002"}
+
+
+def test_documentos_sem_chave_rejeitados():
+    with pytest.raises(ValueError, match="chave_documentos"):
+        particionar(TRANSACOES, DOCUMENTOS_SEM_CONTA)
+    with pytest.raises(ValueError, match="2 documento"):
+        ConciliadorParticionado(max_processos=1).conciliar(TRANSACOES, DOCUMENTOS_SEM_CONTA)
+
+
+def test_chave_propria_dos_documentos():
+    particoes = particionar(
+        TRANSACOES, DOCUMENTOS_SEM_CONTA,
+        chave_documentos=lambda documento: CONTA_POR_PARCEIRO.get(documento["parceiro_nome"])
+    )
+    assert {conta: [documento["id_documento"] for documento in docs] for conta, (_, docs) in particoes.items()} == {
+        "001": ["D1"], "002": ["D2"]
+    }
+
+    esperados = ConciliadorParticionado(max_processos=1, compacto=True).conciliar(TRANSACOES, DOCUMENTOS)
+    obtidos = ConciliadorParticionado(
+        max_processos=1, compacto=True,
+        chave_documentos=lambda documento: CONTA_POR_PARCEIRO[documento["parceiro_nome"]]
+    ).conciliar(TRANSACOES, DOCUMENTOS_SEM_CONTA)
+    assert [resultado.to_dict() for resultado in obtidos] == [resultado.to_dict() for resultado in esperados]
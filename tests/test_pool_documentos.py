@@ -0,0 +1,57 @@
+# tests/test_pool_documentos.py
+"""Testes da busca de candidatos do PoolDocumentos contra varredura completa."""
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from agents.dados.pool_documentos import PoolDocumentos
+
+
+def _documentos(gerador: random.Random, quantidade: int):
+    inicio = date(2025, 1, 1)
+    return [
+        {
+            "id_documento": f"D{numero}",
+            "valor_total": gerador.choice([-1, 1]) * gerador.choice(
+                [1500.0, 1480.0, 320.0, 0.0, round(gerador.uniform(0, 3000), 2)]
+            ),
+            "data_documento": (inicio + timedelta(days=gerador.randint(0, 60))).isoformat(),
+        }
+        for numero in range(quantidade)
+    ]
+
+
+def _esperado(pool, valor, data, janela, percentual=0.05, absoluta=50.0):
+    largura = min(absoluta, abs(valor) * percentual / (1 - percentual))
+    linhas = []
+    for linha in range(len(pool)):
+        centavos = abs(int(pool.valor_centavos[linha]))
+        if not round((abs(valor) - largura) * 100) <= centavos <= round((abs(valor) + largura) * 100):
+            continue
+        dias = (date.fromisoformat(data) - date(1970, 1, 1)).days if data is not None else None
+        if dias is not None and abs(int(pool.data_dias[linha]) - dias) > janela:
+            continue
+        linhas.append(linha)
+    return linhas
+
+
+@pytest.mark.parametrize("semente", range(20))
+def test_candidatos_incluem_valores_negativos(tmp_path, semente):
+    gerador = random.Random(semente)
+    pool = PoolDocumentos.escrever(str(tmp_path / "pool"), _documentos(gerador, 300))
+    for valor in (1500.0, -1500.0, 320.0, -1480.0, 0.0):
+        for data, janela in ((None, 7), ("2025-01-20", 7), ("2025-02-10", 1), ("2025-01-15", 60)):
+            linhas = pool.candidatos(valor, data, janela_dias=janela)
+            assert list(linhas) == _esperado(pool, valor, data, janela), (valor, data, janela)
+            assert linhas.dtype == np.int64
+
+
+def test_documento_negativo_encontrado(tmp_path):
+    pool = PoolDocumentos.escrever(str(tmp_path / "pool"), [
+        {"id_documento": "ESTORNO", "valor_total": -1500.0, "data_documento": "2025-01-10"},
+        {"id_documento": "OUTRO", "valor_total": 900.0, "data_documento": "2025-01-10"},
+    ])
+    assert [pool[linha]["id_documento"] for linha in pool.candidatos(1500.0, "2025-01-11")] == ["ESTORNO"]
+    assert [pool[linha]["id_documento"] for linha in pool.candidatos(-1500.0)] == ["ESTORNO"]
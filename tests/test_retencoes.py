@@ -0,0 +1,106 @@
+# tests/test_retencoes.py
+"""Testes da inferência de retenções (MotorRetencoes)."""
+import numpy as np
+
+from agents.conciliador_bancario import ConciliadorBancarioAgent
+from agents.matching.retencoes import MotorRetencoes
+
+
+def test_sem_diferenca_nao_infere_retencao():
+    motor = MotorRetencoes()
+    assert motor.inferir(0, 0) is None
+    assert motor.inferir(1000.0, 1000.0) is None
+    # Diferença dentro da tolerância é arredondamento, não retenção
+    assert motor.inferir(1000.0, 999.97) is None
+
+
+def test_combinacao_exata():
+    motor = MotorRetencoes()
+    # IRRF 1,5% + PIS + COFINS + CSLL sobre 10.000,00
+    impostos = motor.inferir(10000.0, 10000.0 - 150.0 - 65.0 - 300.0 - 100.0)
+    assert impostos == {"irrf": 150.0, "pis": 65.0, "cofins": 300.0, "csll": 100.0}
+
+
+def test_residuo_exato_vence_menos_impostos():
+    # "a" sozinho aproxima a diferença a 1 centavo; "b" + "c" a reproduz exatamente
+    motor = MotorRetencoes({"a": (0.0301,), "b": (0.02,), "c": (0.01,)})
+    inferencia = motor.inferir_lote([100.0], [97.0])
+    assert motor.combinacao(int(inferencia["indice_combinacao"][0])) == {"b": 0.02, "c": 0.01}
+    assert inferencia["residuo"][0] == 0
+
+
+def test_lote_igual_ao_escalar():
+    motor = MotorRetencoes()
+    brutos = [0.0, 1000.0, 10000.0, 2500.0]
+    liquidos = [0.0, 1000.0, 9385.0, 2499.0]
+    assert motor.impostos_lote(brutos, liquidos) == [motor.inferir(b, l) for b, l in zip(brutos, liquidos)]
+    assert np.array_equal(motor.inferir_lote(brutos, liquidos)["indice_combinacao"] >= 0, [False, False, True, False])
+
+
+def _liquido(bruto, aliquotas):
+    return round(bruto - sum(round(bruto * 100 * aliquota) / 100 for aliquota in aliquotas), 2)
+
+
+def test_empate_prefere_pcc_completo_e_irrf_usual():
+    # IRRF 1,5% + PCC + ISS 3% empata com IRRF 1% + PCC + ISS 3,5% (9,15%):
+    # a combinação com a alíquota usual de IRRF vence
+    motor = MotorRetencoes()
+    for bruto in (1234.56, 9545.58, 48210.07):
+        impostos = motor.inferir(bruto, _liquido(bruto, (0.015, 0.0065, 0.03, 0.01, 0.03)))
+        assert set(impostos) == {"irrf", "pis", "cofins", "csll", "iss"}
+        assert impostos["irrf"] == round(bruto * 1.5) / 100
+        assert impostos["iss"] == round(bruto * 3) / 100
+
+
+def test_empate_exato_ambiguo_informa_so_total():
+    # IRRF 1,5% + PCC + ISS 3,5% = PCC + ISS 5% = 10,65%: a divisão não é determinável
+    motor = MotorRetencoes()
+    bruto = 9545.58
+    liquido = _liquido(bruto, (0.015, 0.0065, 0.03, 0.01, 0.035))
+    inferencia = motor.inferir_lote([bruto], [liquido])
+    assert inferencia["ambiguo"][0]
+    assert inferencia["residuo"][0] == 0
+    assert round(inferencia["total_retencoes"][0], 2) == round(bruto - liquido, 2)
+    assert motor.inferir(bruto, liquido) is None
+
+
+class _MotorContado(MotorRetencoes):
+    chamadas = 0
+
+    def inferir_lote(self, valores_brutos, valores_liquidos):
+        _MotorContado.chamadas += 1
+        return super().inferir_lote(valores_brutos, valores_liquidos)
+
+
+def _conciliar_retencao(bruto, liquido):
+    agente = ConciliadorBancarioAgent()
+    agente.update_config({"motor_retencoes": _MotorContado()})
+    _MotorContado.chamadas = 0
+    return agente.conciliar({
+        "transacao_bancaria": {
+            "valor_transacao": liquido, "descricao_transacao": "PIX RECEBIDO LIQ NF 123",
+            "data_transacao": "2025-01-15"
+        },
+        "classificacao_disponivel": {
+            "valor_total": bruto, "numero_documento": "123", "data_emissao": "2025-01-15", "cfop": "5933"
+        }
+    })["conciliacao"]
+
+
+def test_workflow_infere_retencoes_uma_vez():
+    bruto = 10000.0
+    conciliacao = _conciliar_retencao(bruto, _liquido(bruto, (0.015, 0.0065, 0.03, 0.01)))
+    assert _MotorContado.chamadas == 1
+    assert conciliacao["calculo_retencoes"]["impostos_inferidos"] == {
+        "irrf": 150.0, "pis": 65.0, "cofins": 300.0, "csll": 100.0
+    }
+
+
+def test_workflow_divisao_ambigua_publica_so_total():
+    bruto = 9545.58
+    liquido = _liquido(bruto, (0.015, 0.0065, 0.03, 0.01, 0.035))
+    calculo = _conciliar_retencao(bruto, liquido)["calculo_retencoes"]
+    assert _MotorContado.chamadas == 1
+    assert calculo["divisao_ambigua"] is True
+    assert "impostos_inferidos" not in calculo
+    assert round(calculo["total_retencoes"], 2) == round(bruto - liquido, 2)
@@ -0,0 +1,159 @@
+# tests/test_selecao.py
+"""Testes da seleção de candidatos: top-k, conciliar_top_k e poda contra a pontuação exaustiva."""
+import random
+
+import pytest
+
+from agents.conciliador_bancario import ConciliadorBancarioAgent
+from agents.matching.criterios import CriteriosConciliacao
+from agents.matching.selecao import (
+    ContadoresPoda,
+    melhor_candidato,
+    palavras_documento,
+    pontuar,
+    top_k_candidatos,
+)
+
+CRITERIOS = CriteriosConciliacao()
+PARCEIROS = ["ALFA LTDA", "BETA SERVICOS", "GAMA COMERCIO"]
+
+
+def _pool(semente, quantidade=60):
+    """Poucos valores, datas e parceiros distintos: muitos scores empatados."""
+    gerador = random.Random(semente)
+    return [
+        {
+            "numero_documento": f"NF-e {gerador.choice([1001, 1002, 2002])}",
+            "valor_total": gerador.choice([1500.0, 1500.0, 1490.0, 980.0, 3000.0]),
+            "data_documento": f"2025-03-{gerador.choice([8, 10, 10, 14, 30]):02d}",
+            "parceiro_nome": gerador.choice(PARCEIROS),
+        }
+        for _ in range(quantidade)
+    ]
+
+
+TRANSACAO = {
+    "valor_transacao": -1500.0, "data_transacao": "2025-03-10",
+    "descricao_transacao": "PIX ENVIADO ALFA LTDA NF 1001",
+}
+
+
+def _exaustivo(transacao, documentos, k):
+    """Ranking de referência: pontuar em todos os pares, score decrescente e índice crescente."""
+    scores = [pontuar(transacao, documento, CRITERIOS)["score_total"] for documento in documentos]
+    ordem = sorted(range(len(documentos)), key=lambda indice: (-scores[indice], indice))
+    return [
+        (indice, scores[indice], scores[indice] - (scores[ordem[posicao + 1]] if posicao + 1 < len(ordem) else 0.0))
+        for posicao, indice in enumerate(ordem[:k])
+    ]
+
+
+@pytest.mark.parametrize("semente", range(5))
+@pytest.mark.parametrize("k", [1, 3, 10])
+def test_top_k_igual_ao_exaustivo(semente, k):
+    documentos = _pool(semente)
+    candidatos = top_k_candidatos(TRANSACAO, documentos, CRITERIOS, k)
+    assert [
+        (candidato["indice"], candidato["score_total"], candidato["margem"]) for candidato in candidatos
+    ] == _exaustivo(TRANSACAO, documentos, k)
+
+
+def test_empate_vence_menor_indice():
+    documento = {"numero_documento": "NF-e 1001", "valor_total": 1500.0, "data_documento": "2025-03-10",
+                 "parceiro_nome": "ALFA LTDA"}
+    documentos = [{**documento, "valor_total": 10.0}, dict(documento), dict(documento), dict(documento)]
+    candidatos = top_k_candidatos(TRANSACAO, documentos, CRITERIOS, k=2)
+    assert [candidato["indice"] for candidato in candidatos] == [1, 2]
+    # Margem do último candidato é para o seguinte fora do top-k (empatado: zero)
+    assert [candidato["margem"] for candidato in candidatos] == [0.0, 0.0]
+
+
+def test_margem_do_ultimo_sem_seguinte_e_o_proprio_score():
+    documentos = _pool(1, quantidade=3)
+    candidatos = top_k_candidatos(TRANSACAO, documentos, CRITERIOS, k=5)
+    assert len(candidatos) == 3
+    assert candidatos[-1]["margem"] == candidatos[-1]["score_total"]
+
+
+def test_limiar_descarta_abaixo():
+    documentos = _pool(2)
+    candidatos = top_k_candidatos(TRANSACAO, documentos, CRITERIOS, k=len(documentos), limiar=0.9)
+    esperados = [item for item in _exaustivo(TRANSACAO, documentos, len(documentos)) if item[1] >= 0.9]
+    assert [candidato["indice"] for candidato in candidatos] == [indice for indice, _, _ in esperados]
+
+
+def test_k_invalido():
+    with pytest.raises(ValueError):
+        top_k_candidatos(TRANSACAO, [], CRITERIOS, k=0)
+
+
+def test_conciliar_top_k_concilia_contra_o_melhor():
+    agente = ConciliadorBancarioAgent()
+    documentos = _pool(3)
+    saida = agente.conciliar_top_k(TRANSACAO, documentos, k=3)
+
+    esperados = _exaustivo(TRANSACAO, documentos, 3)
+    assert [candidato["indice"] for candidato in saida["candidatos"]] == [indice for indice, _, _ in esperados]
+    assert all(candidato["documento"] is documentos[candidato["indice"]] for candidato in saida["candidatos"])
+
+    direto = agente.conciliar({
+        "transacao_bancaria": TRANSACAO, "classificacao_disponivel": documentos[esperados[0][0]]
+    })
+    assert saida["resultado"]["conciliacao"] == direto["conciliacao"]
+    assert saida["resultado"]["conciliacao"]["score_confianca"] == round(esperados[0][1], 2)
+
+
+def test_conciliar_top_k_sem_documentos():
+    saida = ConciliadorBancarioAgent().conciliar_top_k(TRANSACAO, [], k=3)
+    assert saida["candidatos"] == []
+    assert saida["resultado"]["conciliacao"]["conciliado"] is False
+
+
+@pytest.mark.parametrize("semente", range(5))
+@pytest.mark.parametrize("limiar", [None, 0.6, 0.9])
+def test_poda_igual_ao_exaustivo(semente, limiar):
+    documentos = _pool(semente, quantidade=200)
+    palavras = [palavras_documento(documento, CRITERIOS) for documento in documentos]
+    contadores = ContadoresPoda()
+    melhor = melhor_candidato(TRANSACAO, documentos, CRITERIOS, palavras, limiar=limiar, contadores=contadores)
+
+    indice, score, _ = _exaustivo(TRANSACAO, documentos, 1)[0]
+    if limiar is not None and score < limiar:
+        assert melhor is None
+    else:
+        assert melhor[0] == indice
+        assert melhor[1] == pontuar(TRANSACAO, documentos[indice], CRITERIOS)
+
+    assert contadores.avaliados == len(documentos)
+    assert contadores.podados_valor + contadores.podados_data + contadores.pontuados == len(documentos)
+    assert contadores.podados_valor + contadores.podados_data > 0
+
+
+def test_contadores_por_etapa():
+    base = {"numero_documento": "NF-e 1001", "valor_total": 1500.0, "data_documento": "2025-03-10",
+            "parceiro_nome": "ALFA LTDA"}
+    documentos = [
+        base,                                          # melhor: entra no heap
+        {**base, "valor_total": 50.0},                 # valor 0: limite 0,4 → podado por valor
+        {**base, "data_documento": "2025-06-10"},      # data 0: limite 0,8 → podado por data
+        {**base, "parceiro_nome": "BETA SERVICOS"},    # limites alcançam o melhor: pontuado
+    ]
+    contadores = ContadoresPoda()
+    assert melhor_candidato(TRANSACAO, documentos, CRITERIOS, contadores=contadores)[0] == 0
+    assert contadores.to_dict() == {"avaliados": 4, "podados_valor": 1, "podados_data": 1, "pontuados": 2}
+
+    # Heap ainda não cheio: nada é podado sem limiar
+    contadores = ContadoresPoda()
+    top_k_candidatos(TRANSACAO, documentos, CRITERIOS, k=len(documentos), contadores=contadores)
+    assert contadores.to_dict() == {"avaliados": 4, "podados_valor": 0, "podados_data": 0, "pontuados": 4}
+
+    # Com limiar, o limite superior poda mesmo com o heap vazio; o pontuado
+    # abaixo do limiar fica fora do resultado
+    contadores = ContadoresPoda()
+    candidatos = top_k_candidatos(TRANSACAO, documentos, CRITERIOS, k=len(documentos), limiar=0.85,
+                                  contadores=contadores)
+    assert [candidato["indice"] for candidato in candidatos] == [
+        indice for indice in (0, 3) if pontuar(TRANSACAO, documentos[indice], CRITERIOS)["score_total"] >= 0.85
+    ]
+    assert contadores.to_dict() == {"avaliados": 4, "podados_valor": 1, "podados_data": 1, "pontuados": 2}
+
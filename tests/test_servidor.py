@@ -0,0 +1,40 @@
+# tests/test_servidor.py
+"""Testes do MicroLoteador: requisições com prazo expirado saem do lote."""
+import threading
+from concurrent.futures import TimeoutError as FuturoTimeoutError
+
+import pytest
+
+from agents.servidor import MicroLoteador
+
+
+class _AgenteLento:
+    """Agente que bloqueia o primeiro lote até ser liberado e registra os lotes recebidos."""
+
+    def __init__(self):
+        self.liberar = threading.Event()
+        self.lotes = []
+
+    def conciliar_lote(self, estados):
+        self.lotes.append([estado["id"] for estado in estados])
+        self.liberar.wait(5)
+        return [{"id": estado["id"], "conciliacao": {"status": "Conciliado"}} for estado in estados]
+
+
+def test_timeout_cancela_requisicao_pendente():
+    agente = _AgenteLento()
+    loteador = MicroLoteador(agente, max_tamanho=1, max_espera_ms=0)
+    try:
+        primeiro = loteador.submeter({"id": 1})  # ocupa a thread de despacho
+        with pytest.raises(FuturoTimeoutError):
+            loteador.conciliar({"id": 2}, timeout=0.05)
+        terceiro = loteador.submeter({"id": 3})
+        agente.liberar.set()
+        assert primeiro.result(timeout=5)["id"] == 1
+        assert terceiro.result(timeout=5)["id"] == 3
+    finally:
+        agente.liberar.set()
+        loteador.encerrar()
+
+    assert agente.lotes == [[1], [3]]
+    assert loteador.metricas.resumo()["total_lotes"] == 2
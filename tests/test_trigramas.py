@@ -0,0 +1,69 @@
+# tests/test_trigramas.py
+"""Testes do índice de trigramas de parceiros e do seu uso no score de descrição."""
+from agents.conciliador_bancario import ConciliadorBancarioAgent
+from agents.matching.selecao import pontuar
+from agents.matching.trigramas import IndiceTrigramas, normalizar_texto, trigramas
+
+PARCEIROS = [
+    "ABC COMERCIO LTDA",
+    "XYZ INDUSTRIA SA",
+    "DEF SERVICOS EIRELI",
+    "GHI TRANSPORTES LTDA",
+    "JKL DISTRIBUIDORA LTDA",
+]
+
+
+def test_normalizacao_e_trigramas_com_bordas():
+    assert normalizar_texto("  Açúcar & Cia.  Ltda ") == "ACUCAR CIA LTDA"
+    assert trigramas("ab") == frozenset({" AB", "AB "})
+    assert trigramas("") == frozenset()
+
+
+def test_nome_truncado_encontra_o_parceiro():
+    indice = IndiceTrigramas(PARCEIROS)
+    resultados = indice.buscar("PIX ENVIADO ABC COM LTDA")
+    assert resultados[0][0] == "ABC COMERCIO LTDA"
+    assert resultados[0][1] > 0.5
+    # A similaridade informada é a recontagem exata (igual à de similaridade())
+    assert resultados[0][1] == indice.similaridade("PIX ENVIADO ABC COM LTDA", "ABC COMERCIO LTDA")
+    assert all(similaridade < resultados[0][1] for _, similaridade in resultados[1:])
+
+
+def test_frequencia_maxima_ignora_trigramas_comuns():
+    # " LTDA " só tem trigramas presentes em 3 dos 5 parceiros (acima de 50%)
+    assert IndiceTrigramas(PARCEIROS).buscar("LTDA", similaridade_minima=0.0) == []
+    sem_corte = IndiceTrigramas(PARCEIROS, frequencia_maxima=1.0).buscar("LTDA", limite=10, similaridade_minima=0.0)
+    assert {nome for nome, _ in sem_corte} == {nome for nome in PARCEIROS if nome.endswith("LTDA")}
+    # O corte só afeta a geração de candidatos, não a similaridade
+    indice = IndiceTrigramas(PARCEIROS)
+    assert indice.similaridade("LTDA", "ABC COMERCIO LTDA") == dict(sem_corte)["ABC COMERCIO LTDA"]
+
+
+def test_limite_similaridade_minima_e_duplicatas():
+    indice = IndiceTrigramas(PARCEIROS + ["abc comércio ltda."])
+    assert len(indice) == len(PARCEIROS)
+    assert indice.buscar("PIX ABC COM LTDA", limite=1) == indice.buscar("PIX ABC COM LTDA")[:1]
+    assert indice.buscar("PIX ABC COM LTDA", similaridade_minima=0.99) == []
+    assert IndiceTrigramas().buscar("ABC") == []
+
+
+def test_indice_eleva_score_de_descricao():
+    transacao = {"valor_transacao": -1500.0, "data_transacao": "2025-03-10",
+                 "descricao_transacao": "PIX ENVIADO ABC COM LTDA"}
+    documento = {"valor_total": 1500.0, "data_documento": "2025-03-10", "parceiro_nome": "ABC COMERCIO LTDA",
+                 "numero_documento": "NF-e 7788"}
+    indice = IndiceTrigramas(PARCEIROS)
+
+    sem_indice = pontuar(transacao, documento, {})
+    com_indice = pontuar(transacao, documento, {"indice_parceiros": indice})
+    similaridade = indice.similaridade(transacao["descricao_transacao"], documento["parceiro_nome"])
+    assert com_indice["scores_detalhados"]["parceiro_trigrama"] == similaridade
+    assert com_indice["scores_detalhados"]["descricao"] == max(sem_indice["scores_detalhados"]["descricao"], similaridade)
+    assert com_indice["score_total"] > sem_indice["score_total"]
+
+    # No workflow, via criterios_config
+    agente = ConciliadorBancarioAgent()
+    estado = {"transacao_bancaria": transacao, "classificacao_disponivel": documento}
+    score_sem = agente.conciliar(estado)["conciliacao"]["score_confianca"]
+    agente.update_config({"indice_parceiros": indice})
+    assert agente.conciliar(estado)["conciliacao"]["score_confianca"] == round(com_indice["score_total"], 2) > score_sem